@@ -6,6 +6,7 @@ This module contains serializers for the catalog app models.
 from typing import Any, Dict, List
 from rest_framework import serializers
 from catalog.models import AITool
+from catalog.similarity import get_related_tools
 
 
 class AIToolSerializer(serializers.ModelSerializer):
@@ -16,9 +17,8 @@ class AIToolSerializer(serializers.ModelSerializer):
     class Meta:
         model = AITool
         fields = [
-            'id', 'name', 'description', 'provider', 'website', 
-            'category', 'popularity', 'logo_url', 'is_free', 
-            'has_api', 'pricing_model', 'pricing_url'
+            'id', 'name', 'description', 'provider', 'endpoint',
+            'category', 'popularity', 'image', 'api_type', 'is_featured'
         ]
         read_only_fields = ['id', 'popularity']
 
@@ -32,7 +32,8 @@ class AIToolDetailSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = AITool
-        fields = '__all__'
+        # Internal bookkeeping of catalog.similarity
+        exclude = ['related_stale']
         read_only_fields = ['id', 'popularity']
         
     def to_representation(self, instance: AITool) -> Dict[str, Any]:
@@ -47,10 +48,8 @@ class AIToolDetailSerializer(serializers.ModelSerializer):
         """
         representation = super().to_representation(instance)
         
-        # Add related tools in the same category
-        related_tools = AITool.objects.filter(
-            category=instance.category
-        ).exclude(id=instance.id)[:5]
+        # Add the most similar tools (see catalog.similarity)
+        related_tools = get_related_tools(instance, 5)
         
         representation['related_tools'] = [
             {
@@ -58,7 +57,7 @@ class AIToolDetailSerializer(serializers.ModelSerializer):
                 'name': tool.name,
                 'description': tool.description[:100] + '...' if len(tool.description) > 100 else tool.description,
                 'provider': tool.provider,
-                'logo_url': tool.logo_url if tool.logo_url else '',
+                'logo_url': tool.image.url if tool.image else '',
             }
             for tool in related_tools
         ]
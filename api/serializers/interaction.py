@@ -29,15 +29,18 @@ class ConversationSerializer(serializers.ModelSerializer):
     Serializer for the Conversation model.
     """
     ai_tool_name = serializers.SerializerMethodField()
-    message_count = serializers.SerializerMethodField()
     
     class Meta:
         model = Conversation
         fields = [
             'id', 'user', 'ai_tool', 'ai_tool_name', 'title', 
-            'created_at', 'updated_at', 'message_count'
+            'created_at', 'updated_at', 'message_count',
+            'last_message_at', 'last_message_preview'
+        ]
+        read_only_fields = [
+            'id', 'created_at', 'updated_at', 'message_count',
+            'last_message_at', 'last_message_preview'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
     
     def get_ai_tool_name(self, obj: Conversation) -> str:
         """
@@ -50,18 +53,6 @@ class ConversationSerializer(serializers.ModelSerializer):
             The name of the AI tool or 'Unknown'
         """
         return obj.ai_tool.name if obj.ai_tool else 'Unknown'
-    
-    def get_message_count(self, obj: Conversation) -> int:
-        """
-        Get the number of messages in the conversation.
-        
-        Args:
-            obj: The Conversation instance
-            
-        Returns:
-            The number of messages
-        """
-        return obj.message_set.count()
 
 
 class ConversationDetailSerializer(ConversationSerializer):
@@ -1,3 +1,123 @@
-from django.test import TestCase
+import base64
+import json
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, TestCase, override_settings
+
+from api.views.interaction import achat_message, adirect_chat_message, direct_chat_message
+from catalog.models import AITool
+from core.admission import chat_admission
+from interaction.models import Conversation
+
+
+@override_settings(AI_ADMISSION_ENABLED=False)
+class AsyncChatAuthenticationTests(TestCase):
+    """The async chat API views authenticate like their Django REST framework versions."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='alice', email='alice@example.com', password='secret')
+        self.tool = AITool.objects.create(
+            name='ChatGPT', provider='OpenAI', endpoint='https://api.openai.com',
+            category='Text', description='Chat assistant', api_type='openai',
+        )
+        self.conversation = Conversation.objects.create(user=self.user, ai_tool=self.tool)
+        self.factory = RequestFactory()
+        reply = mock.AsyncMock(return_value={'success': True, 'data': 'Hello!'})
+        patcher = mock.patch('catalog.utils.AIService.asend_to_ai_service', reply)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _post(self, view, path, password=None, **kwargs):
+        headers = {}
+        if password is not None:
+            token = base64.b64encode(f'alice@example.com:{password}'.encode()).decode()
+            headers['HTTP_AUTHORIZATION'] = f'Basic {token}'
+        request = self.factory.post(path, json.dumps({'message': 'Hi'}), content_type='application/json', **headers)
+        return async_to_sync(view)(request, **kwargs)
+
+    def test_basic_authentication_is_accepted(self):
+        response = self._post(achat_message, '/api/interaction/chat/', password='secret',
+                              conversation_id=self.conversation.id)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['message'], 'Hello!')
+
+    def test_direct_chat_accepts_basic_authentication(self):
+        response = self._post(adirect_chat_message, '/api/interaction/direct-chat/', password='secret')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['ai_tool_name'], 'ChatGPT')
+
+    def test_missing_credentials_get_the_rest_framework_error(self):
+        response = self._post(achat_message, '/api/interaction/chat/', conversation_id=self.conversation.id)
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(json.loads(response.content), {'detail': 'Authentication credentials were not provided.'})
+
+    def test_wrong_password_is_rejected(self):
+        response = self._post(achat_message, '/api/interaction/chat/', password='wrong',
+                              conversation_id=self.conversation.id)
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(json.loads(response.content), {'detail': 'Invalid username/password.'})
+
+    def test_other_methods_are_not_allowed(self):
+        token = base64.b64encode(b'alice@example.com:secret').decode()
+        request = self.factory.get('/api/interaction/direct-chat/', HTTP_AUTHORIZATION=f'Basic {token}')
+
+        response = async_to_sync(adirect_chat_message)(request)
+
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(json.loads(response.content), {'detail': 'Method "GET" not allowed.'})
+
+
+@override_settings(AI_ADMISSION_ENABLED=True, AI_ADMISSION_MAX_CONCURRENT=1, AI_ADMISSION_MAX_PER_USER=1,
+                   AI_ADMISSION_QUEUE_TIMEOUT=0)
+class ChatAdmissionTests(TestCase):
+    """The chat API views take an admission slot only after authentication, keyed on the user."""
+
+    def setUp(self):
+        self.alice = get_user_model().objects.create_user(username='alice', email='alice@example.com', password='secret')
+        self.bob = get_user_model().objects.create_user(username='bob', email='bob@example.com', password='secret')
+        AITool.objects.create(
+            name='ChatGPT', provider='OpenAI', endpoint='https://api.openai.com',
+            category='Text', description='Chat assistant', api_type='openai',
+        )
+        self.factory = RequestFactory()
+        reply = mock.AsyncMock(return_value={'success': True, 'data': 'Hello!'})
+        patcher = mock.patch('catalog.utils.AIService.asend_to_ai_service', reply)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _hold(self, user_key):
+        self.assertIsNone(chat_admission.acquire(user_key))
+        self.addCleanup(chat_admission.release, user_key)
+
+    def _request(self, email=None, password='secret'):
+        headers = {}
+        if email is not None:
+            token = base64.b64encode(f'{email}:{password}'.encode()).decode()
+            headers['HTTP_AUTHORIZATION'] = f'Basic {token}'
+        return self.factory.post('/api/interaction/direct-chat/', json.dumps({'message': 'Hi'}),
+                                 content_type='application/json', **headers)
+
+    def test_unauthenticated_requests_take_no_slot(self):
+        self._hold('user:someone-else')
+
+        for view in (direct_chat_message, lambda request: async_to_sync(adirect_chat_message)(request)):
+            self.assertEqual(view(self._request()).status_code, 403)
+            self.assertEqual(view(self._request('alice@example.com', 'wrong')).status_code, 403)
+
+    def test_slots_are_keyed_on_the_authenticated_user(self):
+        # Alice and Bob share an IP address; only Alice is at her limit
+        self._hold(f'user:{self.alice.pk}')
+
+        for view in (direct_chat_message, lambda request: async_to_sync(adirect_chat_message)(request)):
+            self.assertEqual(view(self._request('alice@example.com')).status_code, 429)
+
+        with self.settings(AI_ADMISSION_MAX_CONCURRENT=2):
+            response = async_to_sync(adirect_chat_message)(self._request('bob@example.com'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(chat_admission.get_stats()['active'], 1)
@@ -3,6 +3,7 @@ API URL Configuration.
 
 This module defines the URL patterns for the API endpoints.
 """
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from typing import List, Union, cast
@@ -17,6 +18,14 @@ router.register(r'conversations', interaction.ConversationViewSet, basename='con
 router.register(r'messages', interaction.MessageViewSet, basename='message')
 router.register(r'favorites', interaction.UserFavoriteViewSet, basename='favorite')
 
+# Under ASGI the chat endpoints can await the AI provider instead of blocking a worker
+if settings.ASYNC_CHAT_VIEWS:
+    chat_message_view = interaction.achat_message
+    direct_chat_message_view = interaction.adirect_chat_message
+else:
+    chat_message_view = interaction.chat_message
+    direct_chat_message_view = interaction.direct_chat_message
+
 # Type hint for URL patterns
 urlpatterns: List[Union[URLPattern, URLResolver]] = [
     # Include router URLs
@@ -27,13 +36,15 @@ urlpatterns: List[Union[URLPattern, URLResolver]] = [
     
     # Catalog endpoints
     path('catalog/search/', catalog.search_ai_tools, name='search-ai-tools'),
+    path('catalog/autocomplete/', catalog.autocomplete, name='catalog-autocomplete'),
     path('catalog/categories/', catalog.list_categories, name='list-categories'),
     
     # Interaction endpoints
-    path('interaction/chat/<uuid:conversation_id>/', interaction.chat_message, name='chat-message'),
-    path('interaction/direct-chat/', interaction.direct_chat_message, name='direct-chat-message'),
+    path('interaction/chat/<uuid:conversation_id>/', chat_message_view, name='chat-message'),
+    path('interaction/direct-chat/', direct_chat_message_view, name='direct-chat-message'),
     path('interaction/share/<uuid:conversation_id>/', interaction.share_conversation, name='share-conversation'),
     path('interaction/favorite-prompts/', interaction.favorite_prompts, name='favorite-prompts'),
+    path('interaction/route/batch/', interaction.route_messages_batch, name='route-messages-batch'),
     
     # User endpoints
     path('users/profile/', users.user_profile, name='user-profile'),
@@ -4,14 +4,18 @@ API views for the catalog app.
 This module contains API views for the catalog app, including viewsets and function-based views.
 """
 from typing import Any, Dict, List, Optional, Union, cast
-from django.db.models import Q
+from django.conf import settings
 from django.http import HttpRequest, JsonResponse
+from django.utils.cache import patch_cache_control
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.request import Request
 
+from catalog.autocomplete import suggest_tools
+from catalog.facets import apply_filters, get_facets, parse_filters
 from catalog.models import AITool
+from catalog.search import search_tools
 
 
 class AIToolViewSet(viewsets.ModelViewSet):
@@ -45,19 +49,13 @@ class AIToolViewSet(viewsets.ModelViewSet):
         """
         queryset = super().get_queryset()
         
-        # Apply search filter
+        # Apply search filter, ordered by relevance unless a sort is given
         search_query = self.request.query_params.get('q', None)
         if search_query:
-            queryset = queryset.filter(
-                Q(name__icontains=search_query) |
-                Q(description__icontains=search_query) |
-                Q(provider__icontains=search_query)
-            )
+            queryset = search_tools(queryset, search_query)
             
-        # Apply category filter
-        category = self.request.query_params.get('category', None)
-        if category:
-            queryset = queryset.filter(category=category)
+        # Apply category, provider, integration and featured filters
+        queryset = apply_filters(queryset, parse_filters(self.request.query_params))
             
         # Apply sorting
         sort_by = self.request.query_params.get('sort', None)
@@ -70,6 +68,24 @@ class AIToolViewSet(viewsets.ModelViewSet):
                 queryset = queryset.order_by('-created_at')
                 
         return queryset
+    
+    def list(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        """
+        List AI tools with the tool counts of every facet value.
+        
+        Args:
+            request: The request object with the search text and facet filters
+            
+        Returns:
+            Paginated response with an additional ``facets`` entry (see catalog.facets.compute_facets)
+        """
+        response = super().list(request, *args, **kwargs)
+        if isinstance(response.data, dict):
+            response.data['facets'] = get_facets(
+                parse_filters(request.query_params),
+                request.query_params.get('q', ''),
+            )
+        return response
 
 
 @api_view(['GET'])
@@ -89,13 +105,9 @@ def search_ai_tools(request: Request) -> Response:
     # Start with all AI tools
     queryset = AITool.objects.all()
     
-    # Apply search filter if query is provided
+    # Apply search filter if query is provided, best matches first
     if query:
-        queryset = queryset.filter(
-            Q(name__icontains=query) |
-            Q(description__icontains=query) |
-            Q(provider__icontains=query)
-        )
+        queryset = search_tools(queryset, query)
         
     # Apply category filter if category is provided
     if category:
@@ -113,12 +125,39 @@ def search_ai_tools(request: Request) -> Response:
             'description': tool.description,
             'provider': tool.provider,
             'category': tool.category,
-            'logo_url': tool.logo_url if tool.logo_url else '',
+            'logo_url': tool.image.url if tool.image else '',
         })
         
     return Response(results)
 
 
+@api_view(['GET'])
+def autocomplete(request: Request) -> Response:
+    """
+    Suggest AI tools while the user types, tolerating one typo.
+    
+    Served from a per-process index (see catalog.autocomplete), without any
+    database query, so it can be called on every keystroke.
+    
+    Args:
+        request: The request object with the typed text (q) and the most
+            suggestions wanted (limit, 10 by default)
+        
+    Returns:
+        Response with the suggestions, cacheable for CATALOG_AUTOCOMPLETE_MAX_AGE seconds
+    """
+    query = request.query_params.get('q', '')[:100]
+    try:
+        limit = int(request.query_params.get('limit', 10))
+    except ValueError:
+        return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    response = Response({'query': query, 'results': suggest_tools(query, limit)})
+    # Suggestions are the same for every user; a short max-age keeps renamed tools from lingering
+    patch_cache_control(response, public=True, max_age=int(getattr(settings, 'CATALOG_AUTOCOMPLETE_MAX_AGE', 60)))
+    return response
+
+
 @api_view(['GET'])
 def list_categories(request: Request) -> Response:
     """
@@ -3,21 +3,27 @@ API views for the interaction app.
 
 This module contains API views for the interaction app, including viewsets and function-based views.
 """
-from typing import Any, Dict, List, Optional, Union, cast
+from typing import Any, Dict, List, Optional, Tuple, Union, cast
 import json
 import uuid
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db.models import Q
-from django.http import HttpRequest, JsonResponse
+from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.request import Request
+from rest_framework.views import APIView
 
 from catalog.models import AITool
+from core.admission import admission_control
 from interaction.models import Conversation, Message, FavoritePrompt, SharedChat
-from interaction.utils import route_message_to_ai_tool
+from interaction.utils import route_message_to_ai_tool, route_messages_to_ai_tools
 from catalog.utils import AIService
 
 
@@ -50,7 +56,7 @@ class ConversationViewSet(viewsets.ModelViewSet):
             Queryset of user's conversations
         """
         user = self.request.user
-        return Conversation.objects.filter(user=user).order_by('-updated_at')
+        return Conversation.objects.filter(user=user).select_related('ai_tool').order_by('-updated_at')
 
 
 class MessageViewSet(viewsets.ModelViewSet):
@@ -105,6 +111,7 @@ class UserFavoriteViewSet(viewsets.ModelViewSet):
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
+@admission_control
 def chat_message(request: Request, conversation_id: uuid.UUID) -> Response:
     """
     Send a message in an existing conversation.
@@ -178,6 +185,7 @@ def chat_message(request: Request, conversation_id: uuid.UUID) -> Response:
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
+@admission_control
 def direct_chat_message(request: Request) -> Response:
     """
     Send a message in the direct chat with smart routing.
@@ -263,6 +271,216 @@ def direct_chat_message(request: Request) -> Response:
     })
 
 
+class _AsyncChatAPIView(APIView):
+    """
+    Request checks of the sync chat API views, for their async versions.
+    
+    Django REST framework views are sync only, so the async chat views are
+    plain Django views. They run the checks of this view on the request
+    instead: the configured authenticators (with the CSRF check of session
+    authentication), the IsAuthenticated permission, the throttles and the
+    allowed method, with the same error responses.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+
+def _api_checks(request: HttpRequest) -> Tuple[Any, Optional[HttpResponse]]:
+    """
+    Authenticate a request to an async chat view like the sync views do.
+    
+    Args:
+        request: The HTTP request object
+        
+    Returns:
+        Tuple of (authenticated user, error response). The error response is
+        None when the request passed every check.
+    """
+    view = _AsyncChatAPIView()
+    view.args, view.kwargs = (), {}
+    view.request = view.initialize_request(request)
+    view.headers = view.default_response_headers
+    try:
+        view.initial(view.request)
+        if view.request.method != 'POST':
+            view.http_method_not_allowed(view.request)
+    except Exception as exc:
+        response = view.finalize_response(view.request, view.handle_exception(exc))
+        return None, response.render()
+    return view.request.user, None
+
+
+async def _async_api_user(request: HttpRequest) -> Tuple[Any, Optional[HttpResponse]]:
+    """
+    Resolve the authenticated user for the async API views.
+    
+    The checks of the sync views (see _AsyncChatAPIView) read the session or
+    the user table, so they run in a thread.
+    
+    Args:
+        request: The HTTP request object
+        
+    Returns:
+        Tuple of (authenticated user, error response), as _api_checks()
+    """
+    return await sync_to_async(_api_checks)(request)
+
+
+def _async_api_message(request: HttpRequest) -> Tuple[Dict[str, Any], Optional[JsonResponse]]:
+    """
+    Parse the JSON body sent to the async chat API views.
+    
+    Args:
+        request: The HTTP request object
+        
+    Returns:
+        Tuple of (parsed data, error response). The error response is None
+        when the body contains a non-empty message.
+    """
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return {}, JsonResponse({"error": "Invalid JSON data"}, status=status.HTTP_400_BAD_REQUEST)
+    
+    data['message'] = data.get('message', '').strip()
+    if not data['message']:
+        return data, JsonResponse({"error": "Message cannot be empty"}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return data, None
+
+
+async def _async_api_reply(conversation: Conversation, user_message: str) -> Tuple[Message, AITool]:
+    """
+    Save the user's message, await the AI reply and save it.
+    
+    Args:
+        conversation: The conversation, with its AI tool loaded
+        user_message: The message content
+        
+    Returns:
+        Tuple of the saved AI message and the conversation's AI tool
+    """
+    await Message.objects.acreate(
+        conversation=conversation,
+        content=user_message,
+        is_user=True
+    )
+    
+    ai_tool = conversation.ai_tool
+    response = await AIService.asend_to_ai_service(user_message, ai_tool.get_service_config())
+    
+    if response.get('success', False):
+        ai_response = response.get('data', 'Sorry, I could not process your request.')
+    else:
+        ai_response = response.get('error', 'Sorry, an error occurred while processing your request.')
+    
+    ai_message = await Message.objects.acreate(
+        conversation=conversation,
+        content=ai_response,
+        is_user=False
+    )
+    
+    conversation.updated_at = timezone.now()
+    await conversation.asave(update_fields=['updated_at'])
+    
+    return ai_message, ai_tool
+
+
+@csrf_exempt
+async def achat_message(request: HttpRequest, conversation_id: uuid.UUID) -> HttpResponse:
+    """
+    Async version of chat_message for ASGI deployments.
+    
+    Args:
+        request: The request object containing the message data
+        conversation_id: UUID of the conversation
+        
+    Returns:
+        JSON response with the AI's reply
+    """
+    user, error_response = await _async_api_user(request)
+    if error_response is not None:
+        return error_response
+    # Admission is keyed on the authenticated user, so it is only requested now
+    request.user = user
+    return await _achat_message(request, conversation_id)
+
+
+@admission_control
+async def _achat_message(request: HttpRequest, conversation_id: uuid.UUID) -> HttpResponse:
+    """Answer an authenticated request to achat_message."""
+    user = request.user
+    
+    try:
+        conversation = await Conversation.objects.select_related('ai_tool').aget(id=conversation_id, user=user)
+    except Conversation.DoesNotExist:
+        return JsonResponse({"error": "Conversation not found"}, status=status.HTTP_404_NOT_FOUND)
+    
+    data, error_response = _async_api_message(request)
+    if error_response is not None:
+        return error_response
+    
+    ai_message, _ = await _async_api_reply(conversation, data['message'])
+    
+    return JsonResponse({
+        "message": ai_message.content,
+        "timestamp": ai_message.timestamp.isoformat()
+    })
+
+
+@csrf_exempt
+async def adirect_chat_message(request: HttpRequest) -> HttpResponse:
+    """
+    Async version of direct_chat_message for ASGI deployments.
+    
+    Args:
+        request: The request object containing the message data
+        
+    Returns:
+        JSON response with the AI's reply and conversation information
+    """
+    user, error_response = await _async_api_user(request)
+    if error_response is not None:
+        return error_response
+    request.user = user
+    return await _adirect_chat_message(request)
+
+
+@admission_control
+async def _adirect_chat_message(request: HttpRequest) -> HttpResponse:
+    """Answer an authenticated request to adirect_chat_message."""
+    user = request.user
+    
+    data, error_response = _async_api_message(request)
+    if error_response is not None:
+        return error_response
+    user_message = data['message']
+    
+    conversation = None
+    conversation_id = data.get('conversation_id')
+    if conversation_id:
+        try:
+            conversation = await Conversation.objects.select_related('ai_tool').aget(id=conversation_id, user=user)
+        except (Conversation.DoesNotExist, ValueError, ValidationError):
+            conversation = None
+    
+    if not conversation:
+        ai_tool, confidence = await sync_to_async(route_message_to_ai_tool)(user_message)
+        conversation = await Conversation.objects.acreate(
+            user=user,
+            ai_tool=ai_tool,
+            title=user_message[:50] + ('...' if len(user_message) > 50 else '')
+        )
+    
+    ai_message, ai_tool = await _async_api_reply(conversation, user_message)
+    
+    return JsonResponse({
+        "message": ai_message.content,
+        "conversation_id": str(conversation.id),
+        "ai_tool_name": ai_tool.name,
+        "timestamp": ai_message.timestamp.isoformat()
+    })
+
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def share_conversation(request: Request, conversation_id: uuid.UUID) -> Response:
@@ -432,3 +650,56 @@ def favorite_prompts(request: Request) -> Response:
             'ai_tools': ai_tools_data,
             'created_at': prompt.created_at.isoformat()
         }, status=status.HTTP_201_CREATED)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def route_messages_batch(request: Request) -> Response:
+    """
+    Route a batch of messages to AI tools without sending them.
+    
+    Lets integrations pre-route whole sets of prompts (e.g. an assignment)
+    in one request instead of one request per prompt.
+    
+    Args:
+        request: The request object with a JSON body {"messages": ["...", ...]}
+        
+    Returns:
+        Response with the chosen tool, category and confidence of each message, in order
+    """
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return Response(
+            {"error": "Invalid JSON data"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    messages = data.get('messages') if isinstance(data, dict) else None
+    if not messages or not isinstance(messages, list) or not all(isinstance(message, str) for message in messages):
+        return Response(
+            {"error": "messages must be a non-empty list of strings"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    max_messages = int(getattr(settings, 'AI_ROUTING_BATCH_MAX_MESSAGES', 1000))
+    if len(messages) > max_messages:
+        return Response(
+            {"error": f"A batch can contain at most {max_messages} messages"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    routed = route_messages_to_ai_tools(messages)
+    
+    return Response({
+        "count": len(routed),
+        "results": [
+            {
+                "tool_id": str(ai_tool.id) if ai_tool else None,
+                "tool_name": ai_tool.name if ai_tool else None,
+                "category": category,
+                "confidence": round(confidence, 4)
+            }
+            for ai_tool, category, confidence in routed
+        ]
+    })
@@ -36,7 +36,7 @@ def user_profile(request: Request) -> Response:
     favorite_ids = [str(fav.id) for fav in favorites]
     
     # Get user's recent conversations
-    recent_conversations = Conversation.objects.filter(user=user).order_by('-updated_at')[:5]
+    recent_conversations = Conversation.objects.filter(user=user).select_related('ai_tool').order_by('-updated_at')[:5]
     conversations = []
     
     for conv in recent_conversations:
@@ -45,7 +45,9 @@ def user_profile(request: Request) -> Response:
             'title': conv.title,
             'ai_tool_name': conv.ai_tool.name if conv.ai_tool else 'Unknown',
             'updated_at': conv.updated_at.isoformat(),
-            'message_count': conv.message_set.count()
+            'message_count': conv.message_count,
+            'last_message_at': conv.last_message_at.isoformat() if conv.last_message_at else None,
+            'last_message_preview': conv.last_message_preview
         })
     
     # Build the profile data
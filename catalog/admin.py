@@ -8,6 +8,9 @@ from django.http import HttpResponseRedirect, HttpRequest
 from django.core.management import call_command
 from typing import List, Dict, Any, Optional, Union, Tuple, Set, Callable, Type, cast
 from django.db.models.query import QuerySet
+from catalog.autocomplete import invalidate_autocomplete_index
+from catalog.facets import invalidate_facets
+from interaction.routing import invalidate_tool_table
 
 
 
@@ -23,7 +26,7 @@ class AIToolAdmin(admin.ModelAdmin):
             'fields': ('id', 'name', 'provider', 'category', 'description', 'popularity', 'image', 'endpoint')
         }),
         ('API Integration', {
-            'fields': ('api_type', 'api_model', 'api_endpoint', 'is_featured'),
+            'fields': ('api_type', 'api_model', 'api_endpoint', 'is_featured', 'cache_responses', 'failover_chain'),
             'classes': ('collapse',),
             'description': 'Configure external API integrations for this AI tool'
         }),
@@ -69,6 +72,8 @@ class AIToolAdmin(admin.ModelAdmin):
     def feature_tools(self, request, queryset):
         """Mark selected tools as featured"""
         updated = queryset.update(is_featured=True)
+        invalidate_tool_table()
+        invalidate_facets()
         self.message_user(
             request, 
             f"{updated} AI {'tool was' if updated == 1 else 'tools were'} marked as featured and will appear prominently in the catalog.", 
@@ -79,6 +84,8 @@ class AIToolAdmin(admin.ModelAdmin):
     def unfeature_tools(self, request, queryset):
         """Unmark selected tools as featured"""
         updated = queryset.update(is_featured=False)
+        invalidate_tool_table()
+        invalidate_facets()
         self.message_user(
             request, 
             f"{updated} AI {'tool was' if updated == 1 else 'tools were'} unmarked as featured and will no longer appear in featured sections.", 
@@ -101,6 +108,9 @@ class AIToolAdmin(admin.ModelAdmin):
     def reset_popularity(self, request, queryset):
         """Reset popularity of selected tools to 0"""
         updated = queryset.update(popularity=0)
+        # update() sends no signal: refresh the smart routing table and the suggestion order by hand
+        invalidate_tool_table()
+        invalidate_autocomplete_index()
         self.message_user(
             request, 
             f"Reset popularity for {updated} AI {'tool' if updated == 1 else 'tools'} to 0.", 
@@ -123,6 +133,8 @@ class AIToolAdmin(admin.ModelAdmin):
                 api_type=tool.api_type,
                 api_model=tool.api_model,
                 api_endpoint=tool.api_endpoint,
+                cache_responses=tool.cache_responses,
+                failover_chain=tool.failover_chain,
                 is_featured=False  # New copies are not featured by default
             )
             
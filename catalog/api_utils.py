@@ -4,12 +4,13 @@ import time
 import logging
 from typing import Dict, Any, Optional, Union
 
-import requests
 from dotenv import load_dotenv
 
 # Import secure API key management and logging utilities
 from core.security import get_api_key
 from core.logging_utils import log_api_request, log_exception
+from catalog.providers.transport import provider_url, transport
+from catalog.providers.retry import retry_policy
 
 # Get a logger for this module
 logger = logging.getLogger(__name__)
@@ -59,12 +60,13 @@ def call_openai_api(prompt: str, max_tokens: int = 100) -> Dict[str, Any]:
     error_message = None
     
     try:
-        response = requests.post(
-            'https://api.openai.com/v1/completions',
+        response = retry_policy.call('openai', lambda timeout: transport.post(
+            'openai',
+            provider_url('openai', '/v1/completions'),
             headers=headers,
             data=json.dumps(data),
-            timeout=10
-        )
+            timeout=timeout
+        ), timeout=10)
         
         status_code = response.status_code
         response_time = time.time() - start_time
@@ -164,12 +166,13 @@ def call_huggingface_api(prompt: str, model: str = "google/flan-t5-small") -> Di
     endpoint = f'/models/{model}'
     
     try:
-        response = requests.post(
-            f'https://api-inference.huggingface.co/models/{model}',
+        response = retry_policy.call('huggingface', lambda timeout: transport.post(
+            'huggingface',
+            provider_url('huggingface', endpoint),
             headers=headers,
             data=json.dumps(data),
-            timeout=10
-        )
+            timeout=timeout
+        ), timeout=10)
         
         status_code = response.status_code
         response_time = time.time() - start_time
@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class CatalogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'catalog'
\ No newline at end of file
+    name = 'catalog'
+
+    def ready(self) -> None:
+        """Connect the signal handlers."""
+        from catalog import signals
+
+        post_migrate.connect(signals.create_search_index, sender=self, dispatch_uid='catalog_create_search_index')
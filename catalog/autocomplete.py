@@ -0,0 +1,303 @@
+"""
+In-process autocomplete of AI tool names and providers.
+
+Every process keeps two structures over the words of the tool names and
+providers, built from a single query:
+
+- a prefix trie whose nodes hold the ids of the most popular tools below
+  them, so completing a prefix walks one node per character;
+- a deletion index mapping every indexed prefix, and each variant of it with
+  one character removed, to the prefixes it came from. Looking up the
+  variants of the typed text finds the prefixes within one edit of it
+  (substitution, insertion, deletion or swapped neighbours), so "chatgtp"
+  finds ChatGPT and "midjor" finds Midjourney without comparing the text
+  to every name.
+
+A BK-tree was not used: it only measures distances between whole words,
+while autocomplete compares the typed text to word prefixes.
+
+The index is rebuilt when its version, kept in the ``default`` cache, is
+bumped by the ``AITool`` signals (see catalog.signals), or when it is older
+than CATALOG_AUTOCOMPLETE_TTL. The version is read at most once per
+CATALOG_AUTOCOMPLETE_VERSION_CHECK_INTERVAL, so a lookup usually touches no
+cache, database or network at all.
+"""
+import logging
+import re
+import time
+import unicodedata
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from django.conf import settings
+
+from catalog.models import AITool
+from core import metrics
+from core.versioned_cache import VersionedCache
+
+logger = logging.getLogger(__name__)
+
+AUTOCOMPLETE_VERSION_KEY = 'catalog:autocomplete:version'
+
+# Typed text shorter than this is only completed, never corrected
+MIN_FUZZY_LENGTH = 3
+# Longer text is corrected on its first characters only, which keeps the index small
+MAX_FUZZY_LENGTH = 8
+# Most tools kept per trie node, and so most suggestions per lookup
+MAX_SUGGESTIONS = 20
+
+_WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def normalize(text: str) -> str:
+    """Lowercase text and strip its accents ("Dall·E" -> "dall e")."""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ' '.join(_WORD_PATTERN.findall(''.join(c for c in decomposed if not unicodedata.combining(c)).lower()))
+
+
+def index_keys(text: str) -> List[str]:
+    """
+    Get the keys a name or provider is found by.
+
+    Args:
+        text: A tool name or provider
+
+    Returns:
+        The whole text without spaces, then each of its words
+        ("Stable Diffusion" -> ["stablediffusion", "stable", "diffusion"])
+    """
+    words = normalize(text).split()
+    if not words:
+        return []
+    keys = [''.join(words)]
+    keys.extend(word for word in words if word != keys[0])
+    return keys
+
+
+def deletions(text: str) -> Set[str]:
+    """Get the variants of a text with one character removed."""
+    return {text[:index] + text[index + 1:] for index in range(len(text))}
+
+
+def edit_distance(first: str, second: str) -> int:
+    """
+    Levenshtein distance counting swapped neighbouring characters as one edit.
+
+    Args:
+        first: A text
+        second: Another text
+
+    Returns:
+        The fewest insertions, deletions, substitutions and swaps turning one text into the other
+    """
+    if first == second:
+        return 0
+    previous_row: List[int] = []
+    row = list(range(len(second) + 1))
+    for i, first_char in enumerate(first, 1):
+        before_previous_row, previous_row, row = previous_row, row, [i] + [0] * len(second)
+        for j, second_char in enumerate(second, 1):
+            cost = first_char != second_char
+            row[j] = min(previous_row[j] + 1, row[j - 1] + 1, previous_row[j - 1] + cost)
+            if i > 1 and j > 1 and first_char == second[j - 2] and first[i - 2] == second_char:
+                row[j] = min(row[j], before_previous_row[j - 2] + 1)
+    return row[-1]
+
+
+class _Node:
+    """Trie node: children by character and the best tools below it, best first."""
+
+    __slots__ = ('children', 'tools')
+
+    def __init__(self) -> None:
+        self.children: Dict[str, '_Node'] = {}
+        self.tools: List[int] = []
+
+
+class _Index:
+    """One build of the autocomplete structures."""
+
+    __slots__ = ('root', 'tools', 'variants')
+
+    def __init__(self, root: _Node, tools: List[Dict[str, str]], variants: Dict[str, Set[str]]) -> None:
+        self.root = root
+        # Tools by popularity; their positions are what the trie nodes hold
+        self.tools = tools
+        # Prefix, or prefix with one character removed -> prefixes
+        self.variants = variants
+
+    def find(self, prefix: str) -> Optional[_Node]:
+        """Get the trie node of a prefix, if any key starts with it."""
+        node: Optional[_Node] = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def corrections(self, text: str) -> List[str]:
+        """Get the indexed prefixes one edit away from the start of a text."""
+        text = text[:MAX_FUZZY_LENGTH]
+        candidates: Set[str] = set(self.variants.get(text, ()))
+        for variant in deletions(text):
+            candidates.update(self.variants.get(variant, ()))
+        # Sharing a variant can still mean two edits ("abxd", "abdy"); keep single edits only
+        return sorted(prefix for prefix in candidates if edit_distance(text, prefix) == 1)
+
+
+class AutocompleteIndex(VersionedCache):
+    """
+    Prefix and typo-tolerant suggestions of AI tools, cached per process.
+
+    Cache backend failures are logged. Without a readable version the current
+    index is kept until CATALOG_AUTOCOMPLETE_TTL expires, then rebuilt from
+    the database, so suggestions keep working without a rebuild per keystroke
+    (see core.versioned_cache).
+
+    Use the module-level ``autocomplete_index`` instance rather than creating new ones.
+    """
+
+    version_key = AUTOCOMPLETE_VERSION_KEY
+    name = 'autocomplete index'
+    ttl_setting = 'CATALOG_AUTOCOMPLETE_TTL'
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._checked_at = 0.0
+        # Replaced whole on rebuild, so a lookup never mixes two builds
+        self._index = _Index(_Node(), [], {})
+
+    def _load(self, version: Optional[int]) -> None:
+        """Build the trie and the deletion index from a single query."""
+        started = time.perf_counter()
+        tools: List[Dict[str, str]] = []
+        keyed: List[Tuple[int, List[str]]] = []
+        rows = AITool.objects.order_by('-popularity', 'name').values_list('id', 'name', 'provider', 'category')
+        for position, (pk, name, provider, category) in enumerate(rows):
+            tools.append({'id': str(pk), 'name': name, 'provider': provider, 'category': category})
+            keyed.append((position, index_keys(name)))
+        # Provider words come after every name, so a name match outranks a provider match
+        for position, tool in enumerate(tools):
+            keyed.append((position, index_keys(tool['provider'])))
+
+        root = _Node()
+        prefixes: Set[str] = set()
+        for position, keys in keyed:
+            for key in keys:
+                node = root
+                for char in key:
+                    child = node.children.get(char)
+                    if child is None:
+                        child = node.children[char] = _Node()
+                    node = child
+                    if len(node.tools) < MAX_SUGGESTIONS and position not in node.tools:
+                        node.tools.append(position)
+                # One character past the longest corrected text, so a missing character is corrected too
+                prefixes.update(key[:length] for length in range(MIN_FUZZY_LENGTH, min(len(key), MAX_FUZZY_LENGTH + 1) + 1))
+
+        variants: Dict[str, Set[str]] = {}
+        for prefix in prefixes:
+            variants.setdefault(prefix, set()).add(prefix)
+            for variant in deletions(prefix):
+                variants.setdefault(variant, set()).add(prefix)
+
+        self._index = _Index(root, tools, variants)
+        metrics.increment('autocomplete.index_builds')
+        logger.debug(
+            f"Autocomplete index built: {len(tools)} tools, {len(variants)} variants "
+            f"in {(time.perf_counter() - started) * 1000:.1f} ms, version {version}"
+        )
+
+    def _ensure_fresh(self) -> bool:
+        """Rebuild the index if its version changed or it is too old."""
+        interval = float(getattr(settings, 'CATALOG_AUTOCOMPLETE_VERSION_CHECK_INTERVAL', 1))
+        now = time.monotonic()
+        if self._loaded_at and now - self._checked_at < interval:
+            return True
+        fresh = super()._ensure_fresh()
+        self._checked_at = now
+        return fresh
+
+    def suggest(self, query: str, limit: int = 10) -> List[Dict[str, str]]:
+        """
+        Suggest AI tools for partially typed, possibly misspelled text.
+
+        Args:
+            query: The text typed so far
+            limit: Most suggestions returned (at most MAX_SUGGESTIONS)
+
+        Returns:
+            Tools whose name or provider starts with the text, most popular
+            first, followed by tools matching it up to one typo. Each is a
+            dictionary with the id, name, provider, category and
+            ``match`` ("prefix" or "fuzzy").
+        """
+        text = ''.join(normalize(query).split())
+        limit = max(min(limit, MAX_SUGGESTIONS), 1)
+        if not text:
+            return []
+        self._ensure_fresh()
+        index = self._index
+
+        seen: Dict[int, str] = {}
+        node = index.find(text)
+        if node is not None:
+            for position in node.tools[:limit]:
+                seen[position] = 'prefix'
+        if len(seen) < limit and len(text) >= MIN_FUZZY_LENGTH:
+            for prefix in index.corrections(text):
+                corrected = index.find(prefix)
+                for position in corrected.tools if corrected is not None else ():
+                    seen.setdefault(position, 'fuzzy')
+                if len(seen) >= limit:
+                    break
+
+        matches = sorted(seen.items(), key=lambda item: (item[1] != 'prefix', item[0]))[:limit]
+        metrics.increment('autocomplete.lookups')
+        if not matches:
+            metrics.increment('autocomplete.misses')
+        return [dict(index.tools[position], match=match) for position, match in matches]
+
+    def warm_up(self) -> None:
+        """Build the index now rather than on the first suggestion; failures are only logged."""
+        try:
+            self._ensure_fresh()
+        except Exception as e:
+            logger.warning(f"Autocomplete index not built at startup: {str(e)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Report the index state for this process.
+
+        Returns:
+            Dictionary with the built version, tool and variant counts, builds,
+            lookups and lookups without suggestions
+        """
+        return {
+            'version': self._version,
+            'tools': len(self._index.tools),
+            'variants': len(self._index.variants),
+            'builds': metrics.get_counter('autocomplete.index_builds'),
+            'lookups': metrics.get_counter('autocomplete.lookups'),
+            'misses': metrics.get_counter('autocomplete.misses'),
+        }
+
+
+autocomplete_index = AutocompleteIndex()
+
+
+def suggest_tools(query: str, limit: int = 10) -> List[Dict[str, str]]:
+    """Suggest AI tools for typed text with the process-wide index (see AutocompleteIndex.suggest)."""
+    return autocomplete_index.suggest(query, limit)
+
+
+def invalidate_autocomplete_index() -> None:
+    """
+    Rebuild the autocomplete index in every process.
+
+    Called by the AITool signals; call it after ``QuerySet.update()`` on AI
+    tools, which sends no signal.
+    """
+    autocomplete_index.invalidate()
+
+
+metrics.register_collector('catalog_autocomplete', autocomplete_index.get_stats)
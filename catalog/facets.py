@@ -0,0 +1,264 @@
+"""
+Faceted filtering of the AI tool catalog.
+
+The catalog can be narrowed by category, provider, integration (``api_type``),
+featured status and pricing. Next to each value of each facet the catalog shows how
+many tools would match if that value were chosen, keeping the other filters.
+
+All these counts come from one grouped query: the tools matching the search
+text are grouped by the five facet fields at once, and each group counts
+towards a facet when it matches the filters on the other facets. The result
+is cached per search text and filters, under a version kept in the
+``default`` cache and bumped by the ``AITool`` signals (see catalog.signals),
+so a change to the catalog is visible on the next page load.
+"""
+import hashlib
+import json
+import logging
+from collections import defaultdict
+from typing import Any, Dict, List, Mapping
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, QuerySet
+
+from catalog.models import AITool
+from catalog.search import search_tools
+from core import metrics
+from core.versioned_cache import bump_version, read_version
+
+logger = logging.getLogger(__name__)
+
+FACETS_VERSION_KEY = 'catalog:facets:version'
+
+# Query parameter -> AITool field, in display order
+FACET_FIELDS = {
+    'category': 'category',
+    'provider': 'provider',
+    'api_type': 'api_type',
+    'featured': 'is_featured',
+    'pricing': 'is_free',
+}
+
+# Facet headings of the catalog page
+FACET_TITLES = {
+    'category': 'Category',
+    'provider': 'Provider',
+    'api_type': 'Integration',
+    'featured': 'Featured',
+    'pricing': 'Pricing',
+}
+
+_API_TYPE_LABELS = dict(AITool._meta.get_field('api_type').choices)
+_FEATURED_LABELS = {True: 'Featured', False: 'Not featured'}
+# Parameter value -> is_free
+_PRICING_VALUES = {'free': True, 'paid': False}
+
+
+def parse_filters(params: Mapping[str, str]) -> Dict[str, Any]:
+    """
+    Read the facet filters of a request.
+
+    Args:
+        params: The request's query parameters
+
+    Returns:
+        Dictionary mapping the facet parameters given to their field value;
+        ``featured`` is a boolean ("true", "1", "yes" mean featured), and so
+        is ``pricing`` ("free" or "paid"; other values are ignored)
+    """
+    filters: Dict[str, Any] = {}
+    for param in FACET_FIELDS:
+        value = params.get(param)
+        if not value:
+            continue
+        if param == 'featured':
+            filters[param] = value.lower() in ('true', 't', 'yes', 'y', '1')
+        elif param == 'pricing':
+            if value.lower() in _PRICING_VALUES:
+                filters[param] = _PRICING_VALUES[value.lower()]
+        else:
+            filters[param] = value
+    return filters
+
+
+def apply_filters(queryset: QuerySet, filters: Mapping[str, Any]) -> QuerySet:
+    """
+    Narrow an AI tool queryset to the tools matching facet filters.
+
+    Args:
+        queryset: AI tools
+        filters: Facet filters, as returned by parse_filters()
+
+    Returns:
+        The filtered queryset
+    """
+    lookups = {FACET_FIELDS[param]: value for param, value in filters.items() if param in FACET_FIELDS}
+    return queryset.filter(**lookups) if lookups else queryset
+
+
+def _label(param: str, value: Any) -> str:
+    if param == 'api_type':
+        return _API_TYPE_LABELS.get(value, value)
+    if param == 'featured':
+        return _FEATURED_LABELS[bool(value)]
+    if param == 'pricing':
+        return 'Free' if value else 'Paid'
+    return value
+
+
+def _param_value(param: str, value: Any) -> Any:
+    """The query parameter value selecting a field value."""
+    if param == 'pricing':
+        return 'free' if value else 'paid'
+    return value
+
+
+def compute_facets(filters: Mapping[str, Any], query: str = '') -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Count the tools behind every facet value with a single grouped query.
+
+    Args:
+        filters: Facet filters, as returned by parse_filters()
+        query: Search text the tools must match, if any
+
+    Returns:
+        Dictionary mapping each facet parameter to its values, most tools
+        first. Each value is a dictionary with the ``value`` to pass as
+        parameter, its ``label``, the ``count`` of tools matching it and
+        the other filters, and whether it is ``selected``.
+    """
+    queryset = AITool.objects.all()
+    if query:
+        queryset = search_tools(queryset, query)
+    fields = list(FACET_FIELDS.values())
+    groups = queryset.order_by().values(*fields).annotate(tools=Count('pk'))
+
+    counts: Dict[str, Dict[Any, int]] = {param: defaultdict(int) for param in FACET_FIELDS}
+    for group in groups:
+        # Parameters whose filter this group fails; it only counts for a facet if no other filter fails
+        failed = [param for param, value in filters.items() if group[FACET_FIELDS[param]] != value]
+        if len(failed) > 1:
+            continue
+        for param, field in FACET_FIELDS.items():
+            if not failed or failed == [param]:
+                counts[param][group[field]] += group['tools']
+
+    facets: Dict[str, List[Dict[str, Any]]] = {}
+    for param, values in counts.items():
+        # Keep the selected value even when nothing matches it any more, so it can be unselected
+        if param in filters:
+            values.setdefault(filters[param], 0)
+        facets[param] = [
+            {
+                'value': _param_value(param, value),
+                'label': _label(param, value),
+                'count': count,
+                'selected': param in filters and filters[param] == value,
+            }
+            for value, count in sorted(values.items(), key=lambda item: (-item[1], str(item[0])))
+            if value not in (None, '')
+        ]
+    return facets
+
+
+class FacetCache:
+    """
+    Facet counts cached per search text and filters.
+
+    Cache backend failures are logged and treated as misses: the counts are
+    then computed from the database, so the catalog keeps working.
+
+    Use the module-level ``facet_cache`` instance rather than creating new ones.
+    """
+
+    @property
+    def cache(self) -> Any:
+        """The Django cache holding the counts and their version."""
+        return caches['default']
+
+    def make_key(self, version: int, filters: Mapping[str, Any], query: str) -> str:
+        """
+        Build the cache key of a filter set.
+
+        Args:
+            version: The current facets version
+            filters: Facet filters, as returned by parse_filters()
+            query: Search text
+
+        Returns:
+            Cache key
+        """
+        raw = json.dumps([query.strip().lower(), sorted(filters.items())])
+        digest = hashlib.sha256(raw.encode('utf-8')).hexdigest()
+        return f"catalog:facets:{version}:{digest}"
+
+    def get(self, filters: Mapping[str, Any], query: str = '') -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Get the facet counts of a filter set, computing them on a miss.
+
+        Args:
+            filters: Facet filters, as returned by parse_filters()
+            query: Search text the tools must match, if any
+
+        Returns:
+            The facets, as returned by compute_facets()
+        """
+        key = None
+        cached = None
+        version = read_version(self.cache, FACETS_VERSION_KEY, 'facet counts')
+        if version is not None:
+            key = self.make_key(version, filters, query)
+            try:
+                cached = self.cache.get(key)
+            except Exception as e:
+                logger.warning(f"Facet cache unavailable: {str(e)}")
+        if cached is not None:
+            metrics.increment('facets.hits')
+            return cached
+
+        metrics.increment('facets.misses')
+        facets = compute_facets(filters, query)
+        if key is not None:
+            try:
+                self.cache.set(key, facets, int(getattr(settings, 'CATALOG_FACETS_CACHE_TTL', 300)))
+            except Exception as e:
+                logger.warning(f"Could not cache facet counts: {str(e)}")
+        return facets
+
+    def invalidate(self) -> None:
+        """Make every process recompute the facet counts; old entries expire on their own."""
+        bump_version(self.cache, FACETS_VERSION_KEY, 'facet counts')
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Report facet cache hits and misses for this process.
+
+        Returns:
+            Dictionary with the hit and miss counts
+        """
+        return {
+            'hits': metrics.get_counter('facets.hits'),
+            'misses': metrics.get_counter('facets.misses'),
+        }
+
+
+facet_cache = FacetCache()
+
+
+def get_facets(filters: Mapping[str, Any], query: str = '') -> Dict[str, List[Dict[str, Any]]]:
+    """Get the facet counts of a filter set with the process-wide cache (see FacetCache.get)."""
+    return facet_cache.get(filters, query)
+
+
+def invalidate_facets() -> None:
+    """
+    Recompute the facet counts on the next page load.
+
+    Called by the AITool signals; call it after ``QuerySet.update()`` on AI
+    tools, which sends no signal.
+    """
+    facet_cache.invalidate()
+
+
+metrics.register_collector('catalog_facets', facet_cache.get_stats)
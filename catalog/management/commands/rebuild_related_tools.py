@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog import similarity
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the related tools of every AI tool from descriptions, favorites and conversations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per INSERT')
+        parser.add_argument('--stale', action='store_true',
+                            help='Only update the tools saved since their related tools were computed')
+        parser.add_argument('--limit', type=int, default=None, help='Most saved tools updated with --stale')
+
+    def handle(self, *args, **options):
+        if similarity.np is None:
+            raise CommandError('NumPy is required to compute related tools. Install it with: pip install numpy')
+
+        started = time.perf_counter()
+        batch_size = max(options['batch_size'], 1)
+        if options['stale']:
+            count = similarity.update_stale_related_tools(limit=options['limit'], batch_size=batch_size)
+            self.stdout.write(self.style.SUCCESS(
+                f'Updated the related tools of {count} saved tools in {time.perf_counter() - started:.1f} s'
+            ))
+            return
+
+        count = similarity.rebuild_related_tools(batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored {count} related tools in {time.perf_counter() - started:.1f} s'
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from catalog.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text search index of the AI tool catalog'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        if backend.name == 'basic':
+            self.stdout.write('The basic search backend has no index to rebuild')
+            return
+        with transaction.atomic():
+            count = backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} AI tools with the {backend.name} search backend'))
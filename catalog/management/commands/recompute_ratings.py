@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+
+from catalog.models import AITool
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the stored rating aggregates and popularity of AI tools from their ratings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Tools updated per transaction')
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report the tools whose stored count or sum is wrong',
+        )
+
+    def handle(self, *args, **options):
+        drifted = (
+            AITool.objects.annotate(
+                actual_count=Count('ratings'),
+                actual_sum=Coalesce(Sum('ratings__stars'), 0),
+            )
+            .filter(~Q(rating_count=F('actual_count')) | ~Q(rating_sum=F('actual_sum')))
+            .count()
+        )
+        self.stdout.write(f'{drifted} tools have wrong rating aggregates')
+        if options['check']:
+            return
+
+        batch_size = max(options['batch_size'], 1)
+        ids = list(AITool.objects.order_by('pk').values_list('pk', flat=True))
+        updated = 0
+        for start in range(0, len(ids), batch_size):
+            updated += AITool.refresh_rating_stats(AITool.objects.filter(pk__in=ids[start:start + batch_size]))
+
+        self.stdout.write(self.style.SUCCESS(f'Recomputed the ratings of {updated} tools'))
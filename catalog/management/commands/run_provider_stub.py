@@ -0,0 +1,85 @@
+from django.core.management.base import BaseCommand
+
+from catalog.providers.stub_server import StubConfig, StubServer
+
+
+class Command(BaseCommand):
+    help = 'Runs a local server mimicking the OpenAI and Hugging Face APIs for benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1', help='Interface to listen on')
+        parser.add_argument('--port', type=int, default=8765, help='Port to listen on')
+        parser.add_argument(
+            '--latency',
+            type=float,
+            default=0.5,
+            help='Mean delay before answering or before the first streamed token, in seconds',
+        )
+        parser.add_argument(
+            '--jitter',
+            type=float,
+            default=0.0,
+            help='Standard deviation of the delay, in seconds',
+        )
+        parser.add_argument(
+            '--token-delay',
+            type=float,
+            default=0.02,
+            help='Delay between streamed tokens, in seconds',
+        )
+        parser.add_argument(
+            '--max-concurrency',
+            type=int,
+            default=0,
+            help='Requests processed at once, others wait (0 = unlimited)',
+        )
+        parser.add_argument(
+            '--rate-limit',
+            type=float,
+            default=0.0,
+            help='Requests per second accepted before answering 429 (0 = unlimited)',
+        )
+        parser.add_argument(
+            '--error-rate-429',
+            type=float,
+            default=0.0,
+            help='Fraction of requests answered with 429',
+        )
+        parser.add_argument(
+            '--error-rate-503',
+            type=float,
+            default=0.0,
+            help='Fraction of requests answered with 503',
+        )
+        parser.add_argument(
+            '--retry-after',
+            type=float,
+            default=1.0,
+            help='Retry-After value sent with 429 and 503 responses, in seconds',
+        )
+
+    def handle(self, *args, **options):
+        config = StubConfig(
+            latency=options['latency'],
+            jitter=options['jitter'],
+            token_delay=options['token_delay'],
+            max_concurrency=options['max_concurrency'],
+            rate_limit=options['rate_limit'],
+            error_rate_429=options['error_rate_429'],
+            error_rate_503=options['error_rate_503'],
+            retry_after=options['retry_after'],
+        )
+        server = StubServer((options['host'], options['port']), config)
+
+        self.stdout.write(self.style.SUCCESS(f'Provider stub listening on {server.base_url}'))
+        self.stdout.write('Point the application at it with:')
+        self.stdout.write(f'  OPENAI_API_BASE_URL={server.base_url} OPENAI_API_KEY=stub')
+        self.stdout.write(f'  HUGGINGFACE_API_BASE_URL={server.base_url} HUGGINGFACE_API_KEY=stub')
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write('Provider stub stopped')
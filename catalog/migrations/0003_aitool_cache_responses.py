@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="aitool",
+            name="cache_responses",
+            field=models.BooleanField(
+                default=True,
+                help_text="Reuse provider responses for identical prompts. Disable for tools whose answers must always be fresh.",
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0003_aitool_cache_responses"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="aitool",
+            name="failover_chain",
+            field=models.CharField(
+                blank=True,
+                help_text="Comma-separated services to try when this tool's provider fails, e.g. 'huggingface,simulation'. Leave empty to use the AI_FAILOVER_CHAIN setting.",
+                max_length=100,
+            ),
+        ),
+    ]
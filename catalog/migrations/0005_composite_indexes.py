@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0004_aitool_failover_chain"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="aitool",
+            index=models.Index(
+                fields=["category", "-popularity"], name="catalog_tool_cat_pop_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:41
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def fill_rating_aggregates(apps, schema_editor):
+    AITool = apps.get_model("catalog", "AITool")
+    Rating = apps.get_model("catalog", "Rating")
+    stats = {
+        row["ai_tool"]: row
+        for row in Rating.objects.values("ai_tool")
+        .annotate(
+            total=Sum("stars"),
+            count=Count("pk"),
+            **{f"count_{stars}": Count("pk", filter=Q(stars=stars)) for stars in range(1, 6)},
+        )
+        .order_by()
+    }
+    tools = list(AITool.objects.filter(pk__in=stats).only("pk"))
+    for tool in tools:
+        row = stats[tool.pk]
+        tool.rating_sum = row["total"]
+        tool.rating_count = row["count"]
+        for stars in range(1, 6):
+            setattr(tool, f"ratings_{stars}", row[f"count_{stars}"])
+    AITool.objects.bulk_update(
+        tools,
+        ["rating_sum", "rating_count"] + [f"ratings_{stars}" for stars in range(1, 6)],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0005_composite_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="aitool",
+            name="rating_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="aitool",
+            name="rating_sum",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="aitool",
+            name="ratings_1",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="aitool",
+            name="ratings_2",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="aitool",
+            name="ratings_3",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="aitool",
+            name="ratings_4",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="aitool",
+            name="ratings_5",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_rating_aggregates, migrations.RunPython.noop),
+    ]
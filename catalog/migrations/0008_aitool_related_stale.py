@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0007_related_tools"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="aitool",
+            name="related_stale",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
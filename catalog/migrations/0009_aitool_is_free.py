@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0008_aitool_related_stale"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="aitool",
+            name="is_free",
+            field=models.BooleanField(
+                default=False,
+                help_text="Usable without a paid plan; filters the catalog's pricing facet.",
+            ),
+        ),
+    ]
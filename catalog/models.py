@@ -1,7 +1,11 @@
 import uuid
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
-from django.db.models import Avg
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast, Round
+
+# Possible star values of a rating
+STARS = range(1, 6)
 
 class AITool(models.Model):
     """Model representing an AI tool available in the catalog."""
@@ -28,10 +32,138 @@ class AITool(models.Model):
     api_model = models.CharField(max_length=100, blank=True, null=True)
     api_endpoint = models.CharField(max_length=255, blank=True, null=True)
     is_featured = models.BooleanField(default=False)
+    is_free = models.BooleanField(default=False, help_text="Usable without a paid plan; filters the catalog's pricing facet.")
+    cache_responses = models.BooleanField(
+        default=True,
+        help_text="Reuse provider responses for identical prompts. Disable for tools whose answers must always be fresh."
+    )
+    failover_chain = models.CharField(
+        max_length=100,
+        blank=True,
+        help_text="Comma-separated services to try when this tool's provider fails, e.g. 'huggingface,simulation'. "
+                  "Leave empty to use the AI_FAILOVER_CHAIN setting."
+    )
+
+    # Rating aggregates, kept up to date by Rating.save and the rating delete signal
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    ratings_1 = models.PositiveIntegerField(default=0, editable=False)
+    ratings_2 = models.PositiveIntegerField(default=0, editable=False)
+    ratings_3 = models.PositiveIntegerField(default=0, editable=False)
+    ratings_4 = models.PositiveIntegerField(default=0, editable=False)
+    ratings_5 = models.PositiveIntegerField(default=0, editable=False)
+    # Set when the tool is saved; `rebuild_related_tools --stale` recomputes its related tools and clears it
+    related_stale = models.BooleanField(default=False, editable=False)
+
+    class Meta:
+        indexes = [
+            # Smart routing and related tools pick the most popular tools of a category
+            models.Index(fields=['category', '-popularity'], name='catalog_tool_cat_pop_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    def get_service_config(self):
+        """Configuration passed to AIService when sending prompts to this tool."""
+        return {
+            'api_type': self.api_type,
+            'api_model': self.api_model,
+            'cache_responses': self.cache_responses,
+            'failover_chain': self.get_failover_chain(),
+        }
+
+    def get_failover_chain(self):
+        """Services to fail over to, or None to use the AI_FAILOVER_CHAIN setting."""
+        chain = [service.strip() for service in self.failover_chain.split(',') if service.strip()]
+        return chain or None
+
+    @property
+    def average_rating(self):
+        """Mean of the ratings, or None when the tool has none."""
+        return self.rating_sum / self.rating_count if self.rating_count else None
+
+    @property
+    def rating_histogram(self):
+        """Number of ratings per star value, from 5 stars down to 1."""
+        return [(stars, getattr(self, f'ratings_{stars}')) for stars in reversed(STARS)]
+
+    @classmethod
+    def apply_rating_change(cls, tool_id, added=None, removed=None):
+        """
+        Update a tool's rating aggregates for one rating added and/or removed.
+
+        A single UPDATE with F() expressions, so concurrent ratings never lose
+        a write. popularity is set to the new average rounded to 2 decimals,
+        as it always has been.
+
+        Args:
+            tool_id: The rated tool
+            added: Stars of the rating added, if any
+            removed: Stars of the rating removed, if any
+        """
+        count_delta = (added is not None) - (removed is not None)
+        sum_delta = (added or 0) - (removed or 0)
+        changes = {}
+        for stars, delta in ((added, 1), (removed, -1)):
+            if stars is not None:
+                field = f'ratings_{stars}'
+                changes[field] = changes.get(field, F(field)) + delta
+        if not count_delta and not changes:
+            return
+        new_sum = Cast(F('rating_sum') + sum_delta, FloatField())
+        new_count = F('rating_count') + count_delta
+        cls.objects.filter(pk=tool_id).update(
+            rating_sum=F('rating_sum') + sum_delta,
+            rating_count=new_count,
+            popularity=Round(Case(
+                When(rating_count__lte=-count_delta, then=Value(0.0)),
+                default=new_sum / new_count,
+                output_field=FloatField(),
+            ), 2),
+            **changes,
+        )
+
+    @classmethod
+    def refresh_rating_stats(cls, queryset=None):
+        """
+        Recompute the rating aggregates and popularity of tools from their ratings.
+
+        The tools are locked first, so ratings saved meanwhile are applied on
+        top of the recomputed values instead of being lost.
+
+        Args:
+            queryset: Tools to refresh, all of them when None
+
+        Returns:
+            Number of tools updated
+        """
+        if queryset is None:
+            queryset = cls.objects.all()
+        fields = ['rating_sum', 'rating_count', 'popularity'] + [f'ratings_{stars}' for stars in STARS]
+        with transaction.atomic():
+            tools = list(queryset.select_for_update().only('pk'))
+            stats = {
+                row['ai_tool']: row
+                for row in Rating.objects.filter(ai_tool__in=[tool.pk for tool in tools])
+                .values('ai_tool')
+                .annotate(
+                    total=Sum('stars'),
+                    count=Count('pk'),
+                    **{f'count_{stars}': Count('pk', filter=Q(stars=stars)) for stars in STARS},
+                )
+                .order_by()
+            }
+            for tool in tools:
+                row = stats.get(tool.pk, {})
+                tool.rating_sum = row.get('total') or 0
+                tool.rating_count = row.get('count', 0)
+                tool.popularity = round(tool.rating_sum / tool.rating_count, 2) if tool.rating_count else 0
+                for stars in STARS:
+                    setattr(tool, f'ratings_{stars}', row.get(f'count_{stars}', 0))
+            cls.objects.bulk_update(tools, fields, batch_size=500)
+        return len(tools)
+
 class Rating(models.Model):
     """Model for storing user ratings and reviews."""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -52,12 +184,19 @@ class Rating(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     def save(self, *args, **kwargs):
-        """Save rating and update AI tool popularity"""
-        super().save(*args, **kwargs)
-        # Update popularity directly
-        avg = self.ai_tool.ratings.aggregate(Avg('stars'))['stars__avg']
-        self.ai_tool.popularity = round(avg, 2) if avg else 0
-        self.ai_tool.save(update_fields=['popularity'])
+        """Save rating and update the AI tool's rating aggregates and popularity"""
+        with transaction.atomic():
+            previous = None
+            if not self._state.adding:
+                previous = Rating.objects.select_for_update().filter(pk=self.pk).values('ai_tool_id', 'stars').first()
+            super().save(*args, **kwargs)
+            if previous is None:
+                AITool.apply_rating_change(self.ai_tool_id, added=self.stars)
+            elif previous['ai_tool_id'] != self.ai_tool_id:
+                AITool.apply_rating_change(previous['ai_tool_id'], removed=previous['stars'])
+                AITool.apply_rating_change(self.ai_tool_id, added=self.stars)
+            elif previous['stars'] != self.stars:
+                AITool.apply_rating_change(self.ai_tool_id, added=self.stars, removed=previous['stars'])
 
     class Meta:
         unique_together = ('user', 'ai_tool')
@@ -69,4 +208,26 @@ class Rating(models.Model):
             f"Tool: {self.ai_tool.id} ({self.ai_tool.name}) - "
             f"{self.stars}⭐ - "
             f"Created: {self.created_at.strftime('%Y-%m-%d %H:%M')}"
-        )
\ No newline at end of file
+        )
+
+class RelatedTool(models.Model):
+    """
+    One of the most similar tools of an AI tool, precomputed by catalog.similarity.
+
+    Rebuilt by the rebuild_related_tools command; ``--stale`` only updates the tools saved since.
+    """
+    tool = models.ForeignKey(AITool, on_delete=models.CASCADE, related_name='related_entries')
+    related = models.ForeignKey(AITool, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['tool', 'related'], name='catalog_related_tool_unique'),
+        ]
+        indexes = [
+            # Detail pages read the best neighbors of a tool
+            models.Index(fields=['tool', '-score'], name='catalog_related_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.tool_id} -> {self.related_id} ({self.score:.3f})"
@@ -0,0 +1,10 @@
+"""
+AI provider integration package for the catalog app.
+
+This package contains the building blocks used by ``catalog.utils.AIService``
+to talk to external AI providers, organized into logical modules.
+"""
+from .exceptions import ProviderError, RateLimitExceeded
+from .transport import ProviderTransport, provider_url
+
+__all__ = ['ProviderError', 'RateLimitExceeded', 'ProviderTransport', 'provider_url']
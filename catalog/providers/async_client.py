@@ -0,0 +1,139 @@
+"""
+Non-blocking HTTP client for AI provider calls.
+
+This is the asyncio counterpart of ``catalog.providers.transport``. Each
+event loop gets one ``httpx.AsyncClient`` per provider with keep-alive
+connection pooling, so a single worker process can keep hundreds of
+provider calls in flight without dedicating a thread to each of them.
+
+httpx is an optional dependency: it is only needed when the async chat
+views are enabled (see ``ASYNC_CHAT_VIEWS``).
+"""
+import asyncio
+import logging
+import threading
+import weakref
+from typing import Any, Dict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from core import metrics
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - depends on the environment
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncProviderClient:
+    """
+    Registry of pooled ``httpx.AsyncClient`` instances.
+
+    httpx clients are bound to the event loop they were first used on, so
+    clients are kept per loop and per provider. Clients of loops that were
+    garbage collected disappear with them.
+
+    Use the module-level ``async_client`` instance rather than creating new ones.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._clients: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Any]]' = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _build_client(self, provider: str) -> Any:
+        """
+        Create an async client with pool limits taken from settings.
+
+        Args:
+            provider: The provider name
+
+        Returns:
+            A configured httpx.AsyncClient
+        """
+        if httpx is None:
+            raise ImproperlyConfigured(
+                "The httpx package is required for the async chat views. "
+                "Install it with: pip install httpx"
+            )
+
+        sizes = getattr(settings, 'AI_PROVIDER_POOL_SIZES', {})
+        keepalive = int(sizes.get(provider, getattr(settings, 'AI_PROVIDER_POOL_MAXSIZE', 10)))
+        max_connections = int(getattr(settings, 'AI_PROVIDER_ASYNC_MAX_CONNECTIONS', 200))
+
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=keepalive,
+        )
+        logger.info(
+            f"Created async client for {provider} "
+            f"(max_connections={max_connections}, keepalive={keepalive})"
+        )
+        return httpx.AsyncClient(limits=limits, headers={'Connection': 'keep-alive'})
+
+    def get_client(self, provider: str) -> Any:
+        """
+        Get the async client for a provider on the running event loop.
+
+        Args:
+            provider: The provider name (e.g. 'openai')
+
+        Returns:
+            The provider's httpx.AsyncClient
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._clients.setdefault(loop, {})
+            client = clients.get(provider)
+            if client is None or client.is_closed:
+                client = self._build_client(provider)
+                clients[provider] = client
+            return client
+
+    async def post(self, provider: str, url: str, **kwargs: Any) -> Any:
+        """
+        Send a POST request without blocking the event loop.
+
+        Args:
+            provider: The provider name
+            url: Absolute URL to call
+            **kwargs: Extra arguments passed to ``httpx.AsyncClient.post``
+
+        Returns:
+            The httpx response
+        """
+        client = self.get_client(provider)
+        metrics.increment(f'provider_transport.{provider}.async_requests')
+        return await client.post(url, **kwargs)
+
+    async def aclose(self) -> None:
+        """Close the clients that belong to the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._clients.pop(loop, {})
+        for client in clients.values():
+            await client.aclose()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Report how many async clients are open.
+
+        Returns:
+            Dictionary with the number of event loops and clients
+        """
+        with self._lock:
+            loops = list(self._clients.values())
+        return {
+            'event_loops': len(loops),
+            'clients': sum(len(clients) for clients in loops),
+        }
+
+
+# Process-wide async client registry
+async_client = AsyncProviderClient()
+
+metrics.register_collector('provider_async_client', async_client.get_stats)
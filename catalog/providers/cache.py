@@ -0,0 +1,227 @@
+"""
+Response cache for AI provider calls.
+
+Identical prompts sent to the same model (classroom exercises, reused
+favorite prompts, ...) are answered from a dedicated Django cache instead of
+triggering a new paid provider call.
+
+The cache lives in its own cache alias (``AI_RESPONSE_CACHE_ALIAS``) so its
+size and eviction policy can be tuned independently from the default cache:
+
+- Local memory backend: ``MAX_ENTRIES`` bounds the number of responses and
+  the least recently used entries are culled first.
+- Redis backend: entries expire after ``AI_RESPONSE_CACHE_TTL`` and the
+  server evicts least recently used keys when ``maxmemory-policy`` is
+  ``allkeys-lru``.
+
+Responses larger than ``AI_RESPONSE_CACHE_MAX_BYTES`` are never stored, so a
+few huge completions cannot push everything else out of the cache.
+"""
+import hashlib
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+# Bump when the format of cached entries changes
+KEY_VERSION = 1
+
+
+class ResponseCache:
+    """
+    Cache of successful provider responses keyed by provider, model and prompt.
+
+    Cache backend failures are logged and treated as misses: an unavailable
+    cache must never break a chat request.
+
+    Use the module-level ``response_cache`` instance rather than creating new ones.
+    """
+
+    @property
+    def cache(self) -> Any:
+        """The Django cache backing the response cache."""
+        return caches[getattr(settings, 'AI_RESPONSE_CACHE_ALIAS', 'default')]
+
+    def is_enabled(self, service_config: Dict[str, Any]) -> bool:
+        """
+        Check whether responses for a service configuration may be cached.
+
+        Args:
+            service_config: Configuration for the AI service
+
+        Returns:
+            True if caching is enabled globally and for the AI tool
+        """
+        return (
+            getattr(settings, 'AI_RESPONSE_CACHE_ENABLED', True)
+            and service_config.get('cache_responses', True)
+        )
+
+    def make_key(self, service_config: Dict[str, Any], prompt: str) -> str:
+        """
+        Build the cache key for a prompt sent to a provider model.
+
+        Args:
+            service_config: Configuration for the AI service
+            prompt: The user's message
+
+        Returns:
+            Cache key
+        """
+        raw = json.dumps([
+            service_config.get('api_type', 'none'),
+            service_config.get('api_model') or '',
+            prompt.strip(),
+        ])
+        digest = hashlib.sha256(raw.encode('utf-8')).hexdigest()
+        return f"ai_response:{KEY_VERSION}:{digest}"
+
+    def _cacheable(self, response: Dict[str, Any]) -> bool:
+        """
+        Check whether a provider response can be stored.
+
+        Args:
+            response: Response returned by the provider call
+
+        Returns:
+            True for successful responses of the requested service within the size limit
+        """
+        # Failover responses come from another service than the one in the key
+        if not response.get('success', False) or response.get('failover'):
+            return False
+
+        max_bytes = int(getattr(settings, 'AI_RESPONSE_CACHE_MAX_BYTES', 65536))
+        size = len(str(response.get('data', '')).encode('utf-8'))
+        if size > max_bytes:
+            metrics.increment('ai_cache.skipped_too_large')
+            return False
+        return True
+
+    def _record(self, cached: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Count a lookup as hit or miss.
+
+        Args:
+            cached: The cached response, or None
+
+        Returns:
+            The cached response marked as such, or None
+        """
+        if cached is None:
+            metrics.increment('ai_cache.misses')
+            return None
+        metrics.increment('ai_cache.hits')
+        return dict(cached, cached=True)
+
+    def get(self, service_config: Dict[str, Any], prompt: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response.
+
+        Args:
+            service_config: Configuration for the AI service
+            prompt: The user's message
+
+        Returns:
+            The cached response, or None on a miss
+        """
+        try:
+            cached = self.cache.get(self.make_key(service_config, prompt))
+        except Exception as e:
+            logger.warning(f"AI response cache lookup failed: {str(e)}")
+            metrics.increment('ai_cache.errors')
+            return None
+        return self._record(cached)
+
+    def set(self, service_config: Dict[str, Any], prompt: str, response: Dict[str, Any]) -> bool:
+        """
+        Store a provider response.
+
+        Args:
+            service_config: Configuration for the AI service
+            prompt: The user's message
+            response: Response returned by the provider call
+
+        Returns:
+            True if the response was stored
+        """
+        if not self._cacheable(response):
+            return False
+        try:
+            self.cache.set(self.make_key(service_config, prompt), response)
+        except Exception as e:
+            logger.warning(f"AI response cache store failed: {str(e)}")
+            metrics.increment('ai_cache.errors')
+            return False
+        metrics.increment('ai_cache.stores')
+        return True
+
+    async def aget(self, service_config: Dict[str, Any], prompt: str) -> Optional[Dict[str, Any]]:
+        """
+        Async version of get.
+
+        Args:
+            service_config: Configuration for the AI service
+            prompt: The user's message
+
+        Returns:
+            The cached response, or None on a miss
+        """
+        try:
+            cached = await self.cache.aget(self.make_key(service_config, prompt))
+        except Exception as e:
+            logger.warning(f"AI response cache lookup failed: {str(e)}")
+            metrics.increment('ai_cache.errors')
+            return None
+        return self._record(cached)
+
+    async def aset(self, service_config: Dict[str, Any], prompt: str, response: Dict[str, Any]) -> bool:
+        """
+        Async version of set.
+
+        Args:
+            service_config: Configuration for the AI service
+            prompt: The user's message
+            response: Response returned by the provider call
+
+        Returns:
+            True if the response was stored
+        """
+        if not self._cacheable(response):
+            return False
+        try:
+            await self.cache.aset(self.make_key(service_config, prompt), response)
+        except Exception as e:
+            logger.warning(f"AI response cache store failed: {str(e)}")
+            metrics.increment('ai_cache.errors')
+            return False
+        metrics.increment('ai_cache.stores')
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Report hit and miss counts for this process.
+
+        Returns:
+            Dictionary with hits, misses and the hit ratio
+        """
+        hits = metrics.get_counter('ai_cache.hits')
+        misses = metrics.get_counter('ai_cache.misses')
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'stores': metrics.get_counter('ai_cache.stores'),
+            'hit_ratio': round(hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+# Process-wide response cache
+response_cache = ResponseCache()
+
+metrics.register_collector('ai_response_cache', response_cache.get_stats)
@@ -0,0 +1,257 @@
+"""
+Circuit breaker for AI providers.
+
+When a provider keeps failing (timeouts, connection errors, 5xx or 429
+responses), its circuit opens and calls fail immediately instead of waiting
+out the full request timeout. After ``AI_CIRCUIT_RECOVERY_TIMEOUT`` seconds
+the circuit is half-open: a single probe request is let through, and its
+outcome closes the circuit again or re-opens it.
+
+The state lives in a shared cache (``AI_CIRCUIT_CACHE_ALIAS``) so all worker
+processes see the same circuit. The cache calls are cheap enough to be made
+from the async views as well.
+"""
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Known providers, reported by get_stats even before their first call
+PROVIDERS = ('openai', 'huggingface')
+
+
+def is_provider_failure(result: Dict[str, Any]) -> bool:
+    """
+    Check whether a provider result says something about the provider's health.
+
+    Client errors such as an invalid prompt are not counted, since they
+    would fail the same way on a healthy provider.
+
+    Args:
+        result: Result returned by a provider call
+
+    Returns:
+        True for exceptions, 5xx and 429 responses
+    """
+    if result.get('success', False):
+        return False
+    status_code: Optional[int] = result.get('status_code')
+    return status_code is None or status_code >= 500 or status_code == 429
+
+
+class CircuitBreaker:
+    """
+    Per-provider circuit breaker with state shared through the cache.
+
+    Use the module-level ``circuit_breaker`` instance rather than creating new ones.
+    """
+
+    @property
+    def cache(self) -> Any:
+        """The shared cache holding the circuit state."""
+        return caches[getattr(settings, 'AI_CIRCUIT_CACHE_ALIAS', 'default')]
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the circuit breaker is enabled."""
+        return getattr(settings, 'AI_CIRCUIT_ENABLED', True)
+
+    def _keys(self, provider: str) -> Dict[str, str]:
+        """
+        Get the cache keys holding a provider's state.
+
+        Args:
+            provider: The provider name
+
+        Returns:
+            Dictionary of cache keys
+        """
+        return {
+            'failures': f"ai_circuit:{provider}:failures",
+            'open_until': f"ai_circuit:{provider}:open_until",
+            'probe': f"ai_circuit:{provider}:probe",
+        }
+
+    def get_state(self, provider: str) -> str:
+        """
+        Get the current state of a provider's circuit.
+
+        Args:
+            provider: The provider name
+
+        Returns:
+            'closed', 'open' or 'half_open'
+        """
+        try:
+            open_until = self.cache.get(self._keys(provider)['open_until'])
+        except Exception as e:
+            logger.warning(f"Circuit breaker state lookup failed: {str(e)}")
+            return CLOSED
+        if open_until is None:
+            return CLOSED
+        return OPEN if time.time() < open_until else HALF_OPEN
+
+    def allow_request(self, provider: str) -> bool:
+        """
+        Check whether a call to the provider may be made.
+
+        While half-open, only one caller across all workers gets to probe.
+
+        Args:
+            provider: The provider name
+
+        Returns:
+            True if the call may go ahead
+        """
+        if not self.enabled:
+            return True
+
+        state = self.get_state(provider)
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN:
+            timeout = int(getattr(settings, 'AI_CIRCUIT_PROBE_TIMEOUT', 30))
+            try:
+                if self.cache.add(self._keys(provider)['probe'], 1, timeout=timeout):
+                    logger.info(f"Circuit for {provider} is half-open, probing")
+                    metrics.increment(f'ai_circuit.{provider}.probes')
+                    return True
+            except Exception as e:
+                logger.warning(f"Circuit breaker probe lock failed: {str(e)}")
+                return True
+
+        metrics.increment(f'ai_circuit.{provider}.rejected')
+        return False
+
+    def record(self, provider: str, result: Dict[str, Any]) -> None:
+        """
+        Record the outcome of a provider call.
+
+        Args:
+            provider: The provider name
+            result: Result returned by the provider call
+        """
+        if not self.enabled:
+            return
+        try:
+            if is_provider_failure(result):
+                self._record_failure(provider)
+            else:
+                self._record_success(provider)
+        except Exception as e:
+            logger.warning(f"Circuit breaker update failed: {str(e)}")
+
+    def _record_success(self, provider: str) -> None:
+        """
+        Close the circuit after a successful call.
+
+        Args:
+            provider: The provider name
+        """
+        keys = self._keys(provider)
+        state = self.cache.get_many([keys['failures'], keys['open_until']])
+        if state:
+            self.cache.delete_many(list(keys.values()))
+            if keys['open_until'] in state:
+                logger.info(f"Circuit for {provider} closed")
+                metrics.increment(f'ai_circuit.{provider}.closed')
+
+    def _record_failure(self, provider: str) -> None:
+        """
+        Count a failed call and open the circuit when the threshold is reached.
+
+        Args:
+            provider: The provider name
+        """
+        keys = self._keys(provider)
+        metrics.increment(f'ai_circuit.{provider}.failures')
+
+        if self.cache.get(keys['open_until']) is not None:
+            # A failed probe re-opens the circuit for another recovery period
+            self._open(provider)
+            return
+
+        window = int(getattr(settings, 'AI_CIRCUIT_FAILURE_WINDOW', 60))
+        self.cache.add(keys['failures'], 0, timeout=window)
+        try:
+            failures = self.cache.incr(keys['failures'])
+        except ValueError:
+            # The counter expired between add and incr
+            self.cache.set(keys['failures'], 1, timeout=window)
+            failures = 1
+
+        if failures >= int(getattr(settings, 'AI_CIRCUIT_FAILURE_THRESHOLD', 5)):
+            self._open(provider)
+
+    def _open(self, provider: str) -> None:
+        """
+        Open the circuit for one recovery period.
+
+        Args:
+            provider: The provider name
+        """
+        keys = self._keys(provider)
+        recovery = float(getattr(settings, 'AI_CIRCUIT_RECOVERY_TIMEOUT', 30))
+        self.cache.set(keys['open_until'], time.time() + recovery, timeout=None)
+        self.cache.delete_many([keys['failures'], keys['probe']])
+        logger.warning(f"Circuit for {provider} opened for {recovery:.0f}s")
+        metrics.increment(f'ai_circuit.{provider}.opened')
+
+    def open_response(self, provider: str) -> Dict[str, Any]:
+        """
+        Build the result returned when a call is rejected by an open circuit.
+
+        Args:
+            provider: The provider name
+
+        Returns:
+            Error response
+        """
+        return {
+            "success": False,
+            "error": f"The {provider} service is temporarily unavailable. Please try again shortly.",
+            "circuit_open": True
+        }
+
+    def reset(self, provider: Optional[str] = None) -> None:
+        """
+        Close circuits regardless of their state.
+
+        Args:
+            provider: Reset only this provider; all known providers if None
+        """
+        for name in [provider] if provider else PROVIDERS:
+            self.cache.delete_many(list(self._keys(name).values()))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Report the state of every provider's circuit.
+
+        Returns:
+            Dictionary mapping provider names to their circuit state
+        """
+        return {
+            provider: {
+                'state': self.get_state(provider),
+                'failures': metrics.get_counter(f'ai_circuit.{provider}.failures'),
+                'rejected': metrics.get_counter(f'ai_circuit.{provider}.rejected'),
+                'opened': metrics.get_counter(f'ai_circuit.{provider}.opened'),
+            }
+            for provider in PROVIDERS
+        }
+
+
+# Process-wide circuit breaker
+circuit_breaker = CircuitBreaker()
+
+metrics.register_collector('ai_circuit_breaker', circuit_breaker.get_stats)
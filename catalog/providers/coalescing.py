@@ -0,0 +1,366 @@
+"""
+Request coalescing ("single-flight") for identical AI provider calls.
+
+When many users send the same prompt to the same model at the same time,
+only the first request (the leader) calls the provider; the others
+(followers) wait for its result.
+
+Coalescing works on two levels:
+
+- Within a process, followers wait on the leader's in-memory flight.
+- Across worker processes, the leader holds a lock in a shared cache
+  (``AI_COALESCE_CACHE_ALIAS``) and publishes its result there for a few
+  seconds; followers in other processes poll for it.
+
+Followers wait as long as the leader may take: the retry deadline
+(``AI_RETRY_DEADLINE``) plus the rate limiter's queue wait for every
+provider the call may try, plus ``AI_COALESCE_GRACE`` seconds. The leader's
+cache lock lives as long, so it never expires while the leader still works;
+if the leader dies, the lock expires and one of the followers takes over.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    """An in-progress provider call shared by the threads of one process."""
+
+    __slots__ = ('event', 'result')
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+
+
+class SingleFlight:
+    """
+    Share one provider call between concurrent identical requests.
+
+    Use the module-level ``single_flight`` instance rather than creating new ones.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self._async_flights: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Future]]' = (
+            weakref.WeakKeyDictionary()
+        )
+
+    @property
+    def enabled(self) -> bool:
+        """Whether coalescing is enabled."""
+        return getattr(settings, 'AI_COALESCE_ENABLED', True)
+
+    def timeout(self, calls: int = 1) -> float:
+        """
+        Maximum time a follower waits for the leader, in seconds.
+
+        This is also the lifetime of the leader's cache lock.
+
+        Args:
+            calls: Number of provider calls the leader may make (the
+                provider itself and its failover chain)
+
+        Returns:
+            The longest time the leader may take, plus AI_COALESCE_GRACE
+        """
+        per_call = float(getattr(settings, 'AI_RETRY_DEADLINE', 45))
+        if (getattr(settings, 'AI_RATE_LIMIT_ENABLED', True)
+                and getattr(settings, 'AI_RATE_LIMIT_MODE', 'queue') == 'queue'):
+            per_call += float(getattr(settings, 'AI_RATE_LIMIT_QUEUE_TIMEOUT', 10))
+        return per_call * max(calls, 1) + float(getattr(settings, 'AI_COALESCE_GRACE', 5))
+
+    @property
+    def cache(self) -> Any:
+        """The shared cache used to coordinate worker processes."""
+        return caches[getattr(settings, 'AI_COALESCE_CACHE_ALIAS', 'default')]
+
+    def _timeout_response(self) -> Dict[str, Any]:
+        """
+        Build the response returned to followers that gave up waiting.
+
+        Returns:
+            Error response
+        """
+        metrics.increment('ai_coalesce.timeouts')
+        return {
+            "success": False,
+            "error": "Timed out waiting for the AI service. Please try again."
+        }
+
+    def _try_lock(self, key: str, timeout: float) -> bool:
+        """
+        Try to become the leader across worker processes.
+
+        Args:
+            key: The flight key
+            timeout: Lifetime of the lock, in seconds
+
+        Returns:
+            True if this process holds the lock (or the cache is unavailable)
+        """
+        try:
+            return self.cache.add(f"ai_coalesce:lock:{key}", os.getpid(), timeout=timeout)
+        except Exception as e:
+            # Without a working cache every process simply calls the provider itself
+            logger.warning(f"Coalescing lock failed: {str(e)}")
+            return True
+
+    def _publish(self, key: str, result: Dict[str, Any]) -> None:
+        """
+        Share the leader's result with other processes and release the lock.
+
+        Args:
+            key: The flight key
+            result: The provider response
+        """
+        try:
+            result_ttl = int(getattr(settings, 'AI_COALESCE_RESULT_TTL', 5))
+            self.cache.set(f"ai_coalesce:result:{key}", result, timeout=result_ttl)
+            self.cache.delete(f"ai_coalesce:lock:{key}")
+        except Exception as e:
+            logger.warning(f"Coalescing publish failed: {str(e)}")
+
+    def _release(self, key: str) -> None:
+        """
+        Release the lock of a leader that failed without a result.
+
+        Args:
+            key: The flight key
+        """
+        try:
+            self.cache.delete(f"ai_coalesce:lock:{key}")
+        except Exception as e:
+            logger.warning(f"Coalescing release failed: {str(e)}")
+
+    def _remote_result(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the result published by a leader in another process.
+
+        Args:
+            key: The flight key
+
+        Returns:
+            The published response, or None if it is not available yet
+        """
+        try:
+            return self.cache.get(f"ai_coalesce:result:{key}")
+        except Exception as e:
+            logger.warning(f"Coalescing lookup failed: {str(e)}")
+            return None
+
+    async def _aremote_result(self, key: str) -> Optional[Dict[str, Any]]:
+        """Async version of _remote_result."""
+        try:
+            return await self.cache.aget(f"ai_coalesce:result:{key}")
+        except Exception as e:
+            logger.warning(f"Coalescing lookup failed: {str(e)}")
+            return None
+
+    def _lead(self, key: str, fn: Callable[[], Dict[str, Any]], timeout: float) -> Dict[str, Any]:
+        """
+        Call the provider, unless another process already does.
+
+        Args:
+            key: The flight key
+            fn: Callable performing the provider call
+            timeout: Maximum time to wait for another process, in seconds
+
+        Returns:
+            The provider response
+        """
+        deadline = time.monotonic() + timeout
+        poll_interval = float(getattr(settings, 'AI_COALESCE_POLL_INTERVAL', 0.1))
+        waiting = False
+
+        while True:
+            # A published result is used before anyone may lock: the leader deletes its lock once it publishes
+            result = self._remote_result(key)
+            if result is not None:
+                return result
+
+            if self._try_lock(key, timeout):
+                # The previous leader may have published between the lookup and the lock
+                result = self._remote_result(key)
+                if result is not None:
+                    self._release(key)
+                    return result
+                metrics.increment('ai_coalesce.leaders')
+                try:
+                    result = fn()
+                except BaseException:
+                    self._release(key)
+                    raise
+                self._publish(key, result)
+                return result
+
+            if not waiting:
+                waiting = True
+                metrics.increment('ai_coalesce.remote_followers')
+            if time.monotonic() >= deadline:
+                return self._timeout_response()
+            time.sleep(poll_interval)
+
+    def do(self, key: str, fn: Callable[[], Dict[str, Any]], calls: int = 1) -> Dict[str, Any]:
+        """
+        Run fn once for all concurrent callers using the same key.
+
+        Args:
+            key: Identifies identical requests (provider, model and prompt)
+            fn: Callable performing the provider call
+            calls: Number of provider calls fn may make, failovers included
+
+        Returns:
+            The provider response
+        """
+        if not self.enabled:
+            return fn()
+
+        timeout = self.timeout(calls)
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+
+        if not leader:
+            metrics.increment('ai_coalesce.followers')
+            if not flight.event.wait(timeout):
+                return self._timeout_response()
+            return flight.result if flight.result is not None else self._timeout_response()
+
+        try:
+            flight.result = self._lead(key, fn, timeout)
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.event.set()
+        return flight.result
+
+    async def _alead(self, key: str, fn: Callable[[], Awaitable[Dict[str, Any]]],
+                     timeout: float) -> Dict[str, Any]:
+        """
+        Async version of _lead.
+
+        Args:
+            key: The flight key
+            fn: Coroutine function performing the provider call
+            timeout: Maximum time to wait for another process, in seconds
+
+        Returns:
+            The provider response
+        """
+        deadline = time.monotonic() + timeout
+        poll_interval = float(getattr(settings, 'AI_COALESCE_POLL_INTERVAL', 0.1))
+        waiting = False
+
+        while True:
+            result = await self._aremote_result(key)
+            if result is not None:
+                return result
+
+            try:
+                acquired = await self.cache.aadd(f"ai_coalesce:lock:{key}", os.getpid(), timeout=timeout)
+            except Exception as e:
+                logger.warning(f"Coalescing lock failed: {str(e)}")
+                acquired = True
+
+            if acquired:
+                result = await self._aremote_result(key)
+                if result is not None:
+                    self._release(key)
+                    return result
+                metrics.increment('ai_coalesce.leaders')
+                try:
+                    result = await fn()
+                except BaseException:
+                    self._release(key)
+                    raise
+                self._publish(key, result)
+                return result
+
+            if not waiting:
+                waiting = True
+                metrics.increment('ai_coalesce.remote_followers')
+            if time.monotonic() >= deadline:
+                return self._timeout_response()
+            await asyncio.sleep(poll_interval)
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Dict[str, Any]]], calls: int = 1) -> Dict[str, Any]:
+        """
+        Async version of do for the ASGI chat views.
+
+        Args:
+            key: Identifies identical requests (provider, model and prompt)
+            fn: Coroutine function performing the provider call
+            calls: Number of provider calls fn may make, failovers included
+
+        Returns:
+            The provider response
+        """
+        if not self.enabled:
+            return await fn()
+
+        timeout = self.timeout(calls)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            flights = self._async_flights.setdefault(loop, {})
+            future = flights.get(key)
+            leader = future is None
+            if leader:
+                future = loop.create_future()
+                flights[key] = future
+
+        if not leader:
+            metrics.increment('ai_coalesce.followers')
+            try:
+                result = await asyncio.wait_for(asyncio.shield(future), timeout)
+            except asyncio.TimeoutError:
+                return self._timeout_response()
+            return result if result is not None else self._timeout_response()
+
+        result = None
+        try:
+            result = await self._alead(key, fn, timeout)
+        finally:
+            with self._lock:
+                flights.pop(key, None)
+            if not future.done():
+                future.set_result(result)
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Report coalescing counts for this process.
+
+        Returns:
+            Dictionary with leader, follower and timeout counts
+        """
+        with self._lock:
+            in_flight = len(self._flights) + sum(len(f) for f in self._async_flights.values())
+        return {
+            'in_flight': in_flight,
+            'leaders': metrics.get_counter('ai_coalesce.leaders'),
+            'followers': metrics.get_counter('ai_coalesce.followers'),
+            'remote_followers': metrics.get_counter('ai_coalesce.remote_followers'),
+            'timeouts': metrics.get_counter('ai_coalesce.timeouts'),
+        }
+
+
+# Process-wide single-flight registry
+single_flight = SingleFlight()
+
+metrics.register_collector('ai_coalescing', single_flight.get_stats)
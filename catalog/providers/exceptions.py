@@ -0,0 +1,32 @@
+"""
+Exceptions raised by the AI provider helpers.
+"""
+from typing import Optional
+
+
+class ProviderError(Exception):
+    """
+    Raised when an AI provider call fails.
+
+    Attributes:
+        provider: The provider name (e.g. 'openai')
+        status_code: HTTP status code returned by the provider, if any
+    """
+
+    def __init__(self, message: str, provider: str = '', status_code: Optional[int] = None) -> None:
+        super().__init__(message)
+        self.provider = provider
+        self.status_code = status_code
+
+
+class RateLimitExceeded(ProviderError):
+    """
+    Raised when a call would exceed the provider's request or token budget.
+
+    Attributes:
+        retry_after: Seconds until the budget allows the call
+    """
+
+    def __init__(self, message: str, provider: str = '', retry_after: float = 0.0) -> None:
+        super().__init__(message, provider, 429)
+        self.retry_after = retry_after
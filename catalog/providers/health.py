@@ -0,0 +1,278 @@
+"""
+Live latency and error statistics of the AI backends.
+
+Every provider call made by ``AIService`` is recorded against its backend
+(api_type and model): how long it took and whether it failed in a way that
+says something about the provider (see ``is_provider_failure``). Smart
+routing uses the statistics to prefer the faster of several tools of a
+category.
+
+Latencies are counted in a fixed histogram per time slot, with one cache
+counter per bucket, so recording is a couple of atomic increments and the
+counters are shared by all workers when the ``AI_HEALTH_CACHE_ALIAS`` cache
+is Redis. Percentiles are interpolated within the buckets, which is precise
+enough to tell a 1-second backend from a 6-second one. Readers keep the
+computed statistics for ``AI_HEALTH_REFRESH_INTERVAL`` seconds.
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+from catalog.providers.circuit_breaker import is_provider_failure
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the latency buckets, in seconds; slower calls go to an overflow bucket
+BUCKETS: Tuple[float, ...] = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0)
+
+# Number of time slots the window is divided into; the oldest slot expires as a new one starts
+SLOTS = 6
+
+
+def backend_key(api_type: Optional[str], model: Optional[str]) -> str:
+    """
+    Name the backend a tool's calls go to.
+
+    Args:
+        api_type: The tool's api_type
+        model: The tool's api_model
+
+    Returns:
+        Backend name, e.g. 'openai:gpt-4'
+    """
+    return f"{api_type or 'none'}:{(model or '').replace(' ', '_')}"
+
+
+def _percentile(counts: List[int], total: int, quantile: float) -> float:
+    """
+    Estimate a latency percentile from bucket counts.
+
+    Args:
+        counts: Calls per bucket, overflow bucket last
+        total: Sum of the counts
+        quantile: The percentile, between 0 and 1
+
+    Returns:
+        The estimated latency, interpolated linearly within its bucket
+    """
+    rank = quantile * total
+    seen = 0
+    lower = 0.0
+    for index, count in enumerate(counts):
+        upper = BUCKETS[index] if index < len(BUCKETS) else BUCKETS[-1] * 2
+        if count and seen + count >= rank:
+            return lower + (upper - lower) * (rank - seen) / count
+        seen += count
+        lower = upper
+    return lower
+
+
+class BackendHealth:
+    """
+    Recent statistics of one backend.
+
+    Attributes:
+        calls: Calls recorded within the window
+        errors: Calls that failed
+        p50: Median latency in seconds
+        p95: 95th percentile latency in seconds
+    """
+
+    def __init__(self, calls: int = 0, errors: int = 0, p50: float = 0.0, p95: float = 0.0) -> None:
+        self.calls = calls
+        self.errors = errors
+        self.p50 = p50
+        self.p95 = p95
+
+    @property
+    def error_rate(self) -> float:
+        """Share of the calls that failed."""
+        return self.errors / self.calls if self.calls else 0.0
+
+    @property
+    def expected_latency(self) -> float:
+        """
+        Expected time to get an answer, in seconds.
+
+        The mean of a skewed latency distribution is approximated by the
+        average of p50 and p95, and divided by the success rate since a
+        failed call has to be made again (or failed over).
+        """
+        return (self.p50 + self.p95) / 2 / (1 - min(self.error_rate, 0.95))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'error_rate': round(self.error_rate, 3),
+            'p50': round(self.p50, 3),
+            'p95': round(self.p95, 3),
+        }
+
+
+class ProviderHealth:
+    """
+    Per-backend latency histograms and error counts shared through the cache.
+
+    Cache backend failures are logged and ignored: health tracking must never
+    break a chat request.
+
+    Use the module-level ``provider_health`` instance rather than creating new ones.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # backend -> (time read, statistics)
+        self._snapshots: Dict[str, Tuple[float, BackendHealth]] = {}
+
+    @property
+    def cache(self) -> Any:
+        """The shared cache holding the counters."""
+        return caches[getattr(settings, 'AI_HEALTH_CACHE_ALIAS', 'default')]
+
+    @property
+    def enabled(self) -> bool:
+        """Whether provider calls are tracked."""
+        return getattr(settings, 'AI_HEALTH_ENABLED', True)
+
+    def _slot_seconds(self) -> float:
+        return float(getattr(settings, 'AI_HEALTH_WINDOW', 300)) / SLOTS
+
+    def _keys(self, backend: str, slot: int) -> List[str]:
+        """
+        Get the cache keys of a backend's counters for one time slot.
+
+        Returns:
+            One key per latency bucket (overflow last), then the error counter
+        """
+        prefix = f"ai_health:{backend}:{slot}"
+        return [f"{prefix}:{index}" for index in range(len(BUCKETS) + 1)] + [f"{prefix}:errors"]
+
+    def _increment(self, key: str, timeout: int) -> None:
+        self.cache.add(key, 0, timeout=timeout)
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            # The counter expired between add and incr
+            self.cache.set(key, 1, timeout=timeout)
+
+    def record(self, backend: str, elapsed: float, failed: bool) -> None:
+        """
+        Record one call to a backend.
+
+        Args:
+            backend: The backend name (see backend_key)
+            elapsed: Duration of the call in seconds
+            failed: Whether the call failed because of the provider
+        """
+        if not self.enabled:
+            return
+        slot_seconds = self._slot_seconds()
+        slot = int(time.time() // slot_seconds)
+        keys = self._keys(backend, slot)
+        bucket = next((index for index, bound in enumerate(BUCKETS) if elapsed <= bound), len(BUCKETS))
+        # Counters outlive the window by one slot, so a full window is always readable
+        timeout = int(slot_seconds * (SLOTS + 1)) + 1
+        try:
+            self._increment(keys[bucket], timeout)
+            if failed:
+                self._increment(keys[-1], timeout)
+        except Exception as e:
+            logger.warning(f"Provider health update failed: {str(e)}")
+            return
+        metrics.increment('ai_health.recorded')
+
+    def record_response(self, api_type: str, model: Optional[str], started: float,
+                        response: Dict[str, Any]) -> None:
+        """
+        Record a finished provider call from its result.
+
+        Calls rejected locally, by an open circuit or by the rate limiter,
+        never reached the provider and are not recorded. The latency is the
+        transport time carried by the result (``latency``, without rate-limit
+        waits and retry backoff); results without it are timed from ``started``.
+
+        Args:
+            api_type: The api_type that was called
+            model: The model that was asked
+            started: ``time.monotonic()`` when the call started
+            response: Result of the call
+        """
+        if response.get('circuit_open') or response.get('rate_limited'):
+            return
+        elapsed = response.get('latency')
+        if elapsed is None:
+            elapsed = time.monotonic() - started
+        self.record(backend_key(api_type, model), elapsed, is_provider_failure(response))
+
+    def _read(self, backends: List[str]) -> Dict[str, BackendHealth]:
+        """Compute the statistics of backends from the counters of the whole window."""
+        slot_seconds = self._slot_seconds()
+        current = int(time.time() // slot_seconds)
+        slots = range(current - SLOTS + 1, current + 1)
+        keys = {backend: [self._keys(backend, slot) for slot in slots] for backend in backends}
+        values = self.cache.get_many([key for slot_keys in keys.values() for slot in slot_keys for key in slot])
+
+        result = {}
+        for backend, slot_keys in keys.items():
+            counts = [0] * (len(BUCKETS) + 1)
+            errors = 0
+            for slot in slot_keys:
+                for index, key in enumerate(slot[:-1]):
+                    counts[index] += int(values.get(key, 0))
+                errors += int(values.get(slot[-1], 0))
+            calls = sum(counts)
+            result[backend] = BackendHealth(
+                calls=calls,
+                errors=errors,
+                p50=_percentile(counts, calls, 0.5) if calls else 0.0,
+                p95=_percentile(counts, calls, 0.95) if calls else 0.0,
+            )
+        return result
+
+    def get(self, backends: Iterable[str]) -> Dict[str, BackendHealth]:
+        """
+        Get the recent statistics of backends.
+
+        Args:
+            backends: Backend names (see backend_key)
+
+        Returns:
+            Dictionary mapping each backend to its statistics; backends
+            without calls have zero calls
+        """
+        backends = list(dict.fromkeys(backends))
+        now = time.monotonic()
+        refresh = float(getattr(settings, 'AI_HEALTH_REFRESH_INTERVAL', 5))
+        snapshots = self._snapshots
+        stale = [backend for backend in backends
+                 if backend not in snapshots or now - snapshots[backend][0] >= refresh]
+        if stale:
+            try:
+                fresh = self._read(stale)
+            except Exception as e:
+                logger.warning(f"Provider health lookup failed: {str(e)}")
+                fresh = {backend: snapshots.get(backend, (now, BackendHealth()))[1] for backend in stale}
+            with self._lock:
+                for backend, health in fresh.items():
+                    self._snapshots[backend] = (now, health)
+        return {backend: self._snapshots[backend][1] for backend in backends}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Report the statistics last read by this process.
+
+        Returns:
+            Dictionary mapping backend names to their calls, error rate, p50 and p95
+        """
+        return {backend: health.to_dict() for backend, (_, health) in sorted(self._snapshots.items())}
+
+
+# Process-wide health tracker
+provider_health = ProviderHealth()
+
+metrics.register_collector('ai_provider_health', provider_health.get_stats)
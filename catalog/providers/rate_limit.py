@@ -0,0 +1,388 @@
+"""
+Token-bucket rate limiter for AI provider calls.
+
+Every provider/API key pair has two buckets: one for requests per minute
+and one for tokens per minute. A call takes one request and its estimated
+token count from the buckets before it is sent; when either bucket is short,
+the caller waits for the buckets to refill (up to
+``AI_RATE_LIMIT_QUEUE_TIMEOUT`` seconds) or is rejected immediately,
+depending on ``AI_RATE_LIMIT_MODE``.
+
+When the ``AI_RATE_LIMIT_CACHE_ALIAS`` cache is backed by Redis, the buckets
+live in Redis and are updated atomically by a Lua script, so all worker
+processes and hosts share one budget per API key. Otherwise each process
+keeps its own buckets in memory, which is enough for a single-node setup.
+"""
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from django.conf import settings
+
+from catalog.providers.exceptions import RateLimitExceeded
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+# KEYS: request bucket, token bucket
+# ARGV: requests per minute, tokens per minute, request cost, token cost
+# A limit of 0 disables the bucket. Returns {allowed, wait, request level, token level}.
+TOKEN_BUCKET_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local function refill(key, capacity, now)
+    if capacity <= 0 then
+        return -1
+    end
+    local state = redis.call('HMGET', key, 'level', 'ts')
+    local level = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    return math.min(capacity, level + math.max(now - ts, 0) * capacity / 60)
+end
+
+local rpm = tonumber(ARGV[1])
+local tpm = tonumber(ARGV[2])
+local request_cost = tonumber(ARGV[3])
+local token_cost = tonumber(ARGV[4])
+
+local requests = refill(KEYS[1], rpm, now)
+local tokens = refill(KEYS[2], tpm, now)
+
+local wait = 0
+if requests >= 0 and requests < request_cost then
+    wait = math.max(wait, (request_cost - requests) * 60 / rpm)
+end
+if tokens >= 0 and tokens < token_cost then
+    wait = math.max(wait, (token_cost - tokens) * 60 / tpm)
+end
+
+if wait == 0 then
+    if requests >= 0 then requests = requests - request_cost end
+    if tokens >= 0 then tokens = tokens - token_cost end
+end
+
+if requests >= 0 then
+    redis.call('HSET', KEYS[1], 'level', tostring(requests), 'ts', tostring(now))
+    redis.call('EXPIRE', KEYS[1], 120)
+end
+if tokens >= 0 then
+    redis.call('HSET', KEYS[2], 'level', tostring(tokens), 'ts', tostring(now))
+    redis.call('EXPIRE', KEYS[2], 120)
+end
+
+return {wait == 0 and 1 or 0, tostring(wait), tostring(requests), tostring(tokens)}
+"""
+
+
+def estimate_tokens(prompt: str) -> int:
+    """
+    Estimate the tokens a completion request counts against the provider's budget.
+
+    Providers count the prompt plus the completion; about four characters
+    make one token in English text.
+
+    Args:
+        prompt: The user's message
+
+    Returns:
+        Estimated token count
+    """
+    completion_tokens = int(getattr(settings, 'AI_RATE_LIMIT_COMPLETION_TOKENS', 256))
+    return len(prompt) // 4 + 1 + completion_tokens
+
+
+class _LocalBucket:
+    """In-memory token bucket, used when no Redis cache is configured."""
+
+    __slots__ = ('level', 'updated')
+
+    def __init__(self, capacity: float) -> None:
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, capacity: float) -> float:
+        now = time.monotonic()
+        self.level = min(capacity, self.level + (now - self.updated) * capacity / 60)
+        self.updated = now
+        return self.level
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limiter per provider and API key.
+
+    Use the module-level ``rate_limiter`` instance rather than creating new ones.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._local: Dict[str, _LocalBucket] = {}
+        self._script: Any = None
+        self._seen: Dict[str, Dict[str, Optional[float]]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        """Whether rate limiting is enabled."""
+        return getattr(settings, 'AI_RATE_LIMIT_ENABLED', True)
+
+    def _limits(self, provider: str) -> Tuple[int, int]:
+        """
+        Get the configured limits of a provider.
+
+        Args:
+            provider: The provider name
+
+        Returns:
+            Tuple of (requests per minute, tokens per minute); 0 means unlimited
+        """
+        limits = getattr(settings, 'AI_RATE_LIMITS', {}).get(provider, {})
+        return int(limits.get('rpm', 0)), int(limits.get('tpm', 0))
+
+    def _bucket_id(self, provider: str, api_key: str) -> str:
+        """
+        Build the bucket identifier of a provider/API key pair.
+
+        The API key is hashed so it never appears in cache keys or metrics.
+
+        Args:
+            provider: The provider name
+            api_key: The API key used for the call
+
+        Returns:
+            Bucket identifier
+        """
+        fingerprint = hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:12]
+        return f"{provider}:{fingerprint}"
+
+    def _redis(self) -> Any:
+        """
+        Get a Redis client for the rate limit cache, if it is Redis-backed.
+
+        Returns:
+            A redis client, or None to use in-memory buckets
+        """
+        alias = getattr(settings, 'AI_RATE_LIMIT_CACHE_ALIAS', 'default')
+        backend = settings.CACHES.get(alias, {}).get('BACKEND', '')
+        if backend.startswith('django_redis.'):
+            from django_redis import get_redis_connection
+            return get_redis_connection(alias)
+        if backend == 'django.core.cache.backends.redis.RedisCache':
+            from django.core.cache import caches
+            return caches[alias]._cache.get_client(write=True)
+        return None
+
+    def _take_redis(self, client: Any, bucket_id: str, rpm: int, tpm: int,
+                    tokens: int) -> Tuple[bool, float, float, float]:
+        """
+        Take from the shared buckets in Redis.
+
+        Args:
+            client: Redis client
+            bucket_id: Identifier of the provider/API key pair
+            rpm: Requests per minute, 0 for unlimited
+            tpm: Tokens per minute, 0 for unlimited
+            tokens: Estimated token count of the call
+
+        Returns:
+            Tuple of (allowed, wait seconds, request level, token level)
+        """
+        if self._script is None:
+            self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+        allowed, wait, requests_level, tokens_level = self._script(
+            keys=[f"ai_rate:{bucket_id}:requests", f"ai_rate:{bucket_id}:tokens"],
+            args=[rpm, tpm, 1, tokens],
+            client=client,
+        )
+        return bool(int(allowed)), float(wait), float(requests_level), float(tokens_level)
+
+    def _take_local(self, bucket_id: str, rpm: int, tpm: int,
+                    tokens: int) -> Tuple[bool, float, float, float]:
+        """
+        Take from the in-memory buckets of this process.
+
+        Args:
+            bucket_id: Identifier of the provider/API key pair
+            rpm: Requests per minute, 0 for unlimited
+            tpm: Tokens per minute, 0 for unlimited
+            tokens: Estimated token count of the call
+
+        Returns:
+            Tuple of (allowed, wait seconds, request level, token level)
+        """
+        with self._lock:
+            levels = []
+            wait = 0.0
+            for name, capacity, cost in (('requests', rpm, 1), ('tokens', tpm, tokens)):
+                if capacity <= 0:
+                    levels.append(None)
+                    continue
+                bucket = self._local.setdefault(f"{bucket_id}:{name}", _LocalBucket(capacity))
+                level = bucket.refill(capacity)
+                levels.append(bucket)
+                if level < cost:
+                    wait = max(wait, (cost - level) * 60 / capacity)
+
+            if wait == 0:
+                for bucket, cost in zip(levels, (1, tokens)):
+                    if bucket is not None:
+                        bucket.level -= cost
+
+            requests_level, tokens_level = (
+                bucket.level if bucket is not None else -1.0 for bucket in levels
+            )
+            return wait == 0, wait, requests_level, tokens_level
+
+    def _take(self, provider: str, api_key: str, tokens: int) -> Tuple[bool, float]:
+        """
+        Try to take one request and the given tokens from the buckets.
+
+        Args:
+            provider: The provider name
+            api_key: The API key used for the call
+            tokens: Estimated token count of the call
+
+        Returns:
+            Tuple of (allowed, seconds to wait before retrying)
+        """
+        rpm, tpm = self._limits(provider)
+        if rpm <= 0 and tpm <= 0:
+            return True, 0.0
+
+        # A call larger than the whole bucket could never go through
+        if tpm > 0:
+            tokens = min(tokens, tpm)
+        bucket_id = self._bucket_id(provider, api_key)
+
+        result = None
+        try:
+            client = self._redis()
+            if client is not None:
+                result = self._take_redis(client, bucket_id, rpm, tpm, tokens)
+        except Exception as e:
+            logger.warning(f"Shared rate limiter unavailable, using local buckets: {str(e)}")
+            metrics.increment('ai_rate_limit.redis_errors')
+        if result is None:
+            result = self._take_local(bucket_id, rpm, tpm, tokens)
+
+        allowed, wait, requests_level, tokens_level = result
+        with self._lock:
+            # A level of -1 stands for a disabled bucket
+            self._seen[bucket_id] = {
+                'requests': round(requests_level, 1) if requests_level >= 0 else None,
+                'tokens': round(tokens_level) if tokens_level >= 0 else None,
+            }
+        return allowed, wait
+
+    def _deadline(self, wait: Optional[bool]) -> float:
+        """
+        Get the time.monotonic() value after which a queued call gives up.
+
+        Args:
+            wait: Queue (True) or reject (False); None uses AI_RATE_LIMIT_MODE
+
+        Returns:
+            The deadline
+        """
+        if wait is None:
+            wait = getattr(settings, 'AI_RATE_LIMIT_MODE', 'queue') == 'queue'
+        timeout = float(getattr(settings, 'AI_RATE_LIMIT_QUEUE_TIMEOUT', 10)) if wait else 0.0
+        return time.monotonic() + timeout
+
+    def _reject(self, provider: str, retry_after: float) -> RateLimitExceeded:
+        """
+        Build the exception raised when a call does not get through.
+
+        Args:
+            provider: The provider name
+            retry_after: Seconds until the buckets allow the call
+
+        Returns:
+            The exception to raise
+        """
+        metrics.increment(f'ai_rate_limit.{provider}.rejected')
+        logger.warning(f"Rate limit reached for {provider}, retry in {retry_after:.1f}s")
+        return RateLimitExceeded(
+            f"Too many requests to {provider}. Please try again in {max(int(retry_after + 0.999), 1)} seconds.",
+            provider,
+            retry_after,
+        )
+
+    def acquire(self, provider: str, api_key: str, tokens: int, wait: Optional[bool] = None) -> None:
+        """
+        Take the budget of one call, waiting for it if needed.
+
+        Args:
+            provider: The provider name
+            api_key: The API key used for the call
+            tokens: Estimated token count of the call
+            wait: Queue (True) or reject (False); None uses AI_RATE_LIMIT_MODE
+
+        Raises:
+            RateLimitExceeded: If the budget is not available in time
+        """
+        if not self.enabled:
+            return
+        deadline = self._deadline(wait)
+        queued = False
+
+        while True:
+            allowed, retry_after = self._take(provider, api_key, tokens)
+            if allowed:
+                metrics.increment(f'ai_rate_limit.{provider}.allowed')
+                return
+            if time.monotonic() + retry_after > deadline:
+                raise self._reject(provider, retry_after)
+            if not queued:
+                queued = True
+                metrics.increment(f'ai_rate_limit.{provider}.queued')
+            time.sleep(retry_after)
+
+    async def aacquire(self, provider: str, api_key: str, tokens: int, wait: Optional[bool] = None) -> None:
+        """
+        Async version of acquire.
+
+        Args:
+            provider: The provider name
+            api_key: The API key used for the call
+            tokens: Estimated token count of the call
+            wait: Queue (True) or reject (False); None uses AI_RATE_LIMIT_MODE
+
+        Raises:
+            RateLimitExceeded: If the budget is not available in time
+        """
+        if not self.enabled:
+            return
+        deadline = self._deadline(wait)
+        queued = False
+
+        while True:
+            allowed, retry_after = self._take(provider, api_key, tokens)
+            if allowed:
+                metrics.increment(f'ai_rate_limit.{provider}.allowed')
+                return
+            if time.monotonic() + retry_after > deadline:
+                raise self._reject(provider, retry_after)
+            if not queued:
+                queued = True
+                metrics.increment(f'ai_rate_limit.{provider}.queued')
+            await asyncio.sleep(retry_after)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Report the bucket levels last seen by this process.
+
+        Returns:
+            Dictionary mapping bucket identifiers to their request and token levels
+        """
+        with self._lock:
+            return {bucket_id: dict(levels) for bucket_id, levels in self._seen.items()}
+
+
+# Process-wide rate limiter
+rate_limiter = RateLimiter()
+
+metrics.register_collector('ai_rate_limit', rate_limiter.get_stats)
@@ -0,0 +1,289 @@
+"""
+Retry policy for AI provider calls.
+
+Transient provider throttling (429) and unavailability (503) are retried
+with exponential backoff and full jitter, honoring the provider's
+``Retry-After`` header. Every logical call has a deadline budget
+(``AI_RETRY_DEADLINE``): no attempt or backoff is started that would end
+after it.
+
+Completion requests are not idempotent (a retried request may be billed
+twice), so only failures where the provider certainly did not process the
+request are retried: 429/503 responses and errors raised while connecting.
+Read timeouts and other 5xx responses are returned as they are.
+
+A process-wide retry budget caps retries at a fraction of the calls made
+(``AI_RETRY_BUDGET_RATIO``), so a provider outage does not turn into a
+retry storm that multiplies the load.
+"""
+import asyncio
+import email.utils
+import logging
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import requests
+from django.conf import settings
+
+from core import metrics
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - depends on the environment
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+# Status codes that mean the request was not processed and may be sent again
+RETRYABLE_STATUS_CODES = frozenset({429, 503})
+
+
+class RetryBudget:
+    """
+    Token bucket limiting retries to a fraction of the calls made.
+
+    Every call deposits ``ratio`` tokens and every retry withdraws one, so
+    in steady state at most ``ratio`` retries are made per call.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._tokens: Optional[float] = None
+
+    def _max_tokens(self) -> float:
+        return float(getattr(settings, 'AI_RETRY_BUDGET_MAX', 10))
+
+    def deposit(self) -> None:
+        """Add the share of a new call to the budget."""
+        ratio = float(getattr(settings, 'AI_RETRY_BUDGET_RATIO', 0.2))
+        with self._lock:
+            tokens = self._max_tokens() if self._tokens is None else self._tokens
+            self._tokens = min(self._max_tokens(), tokens + ratio)
+
+    def withdraw(self) -> bool:
+        """
+        Take one retry from the budget.
+
+        Returns:
+            True if a retry may be made
+        """
+        with self._lock:
+            tokens = self._max_tokens() if self._tokens is None else self._tokens
+            if tokens < 1:
+                return False
+            self._tokens = tokens - 1
+            return True
+
+    def level(self) -> float:
+        """Current number of retries available."""
+        with self._lock:
+            return round(self._max_tokens() if self._tokens is None else self._tokens, 2)
+
+
+def is_retryable_exception(exc: BaseException) -> bool:
+    """
+    Check whether an exception was raised before the request reached the provider.
+
+    Args:
+        exc: The exception raised by the HTTP client
+
+    Returns:
+        True for connection errors and connect timeouts
+    """
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(exc, requests.exceptions.ConnectionError) and not isinstance(exc, requests.exceptions.Timeout):
+        # requests wraps urllib3's MaxRetryError; only failures to connect are safe
+        reason = getattr(exc.args[0], 'reason', None) if exc.args else None
+        return type(reason).__name__ in ('NewConnectionError', 'ConnectTimeoutError', 'NameResolutionError')
+    if httpx is not None and isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout)):
+        return True
+    return False
+
+
+def parse_retry_after(response: Any) -> Optional[float]:
+    """
+    Read the delay requested by a provider's Retry-After header.
+
+    Args:
+        response: A requests or httpx response
+
+    Returns:
+        Delay in seconds, or None if the header is missing or invalid
+    """
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(retry_at.timestamp() - time.time(), 0.0)
+
+
+class RetryPolicy:
+    """
+    Send provider requests with bounded, jittered retries.
+
+    Use the module-level ``retry_policy`` instance rather than creating new ones.
+    """
+
+    def __init__(self) -> None:
+        self.budget = RetryBudget()
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Compute the delay before a retry using exponential backoff with full jitter.
+
+        Args:
+            attempt: Number of the attempt that just failed, starting at 0
+
+        Returns:
+            Delay in seconds
+        """
+        base = float(getattr(settings, 'AI_RETRY_BASE_DELAY', 0.5))
+        cap = float(getattr(settings, 'AI_RETRY_MAX_DELAY', 8))
+        return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+    def _next_delay(self, provider: str, attempt: int, deadline: float,
+                    response: Any = None) -> Optional[float]:
+        """
+        Decide whether a failed attempt is retried.
+
+        Args:
+            provider: The provider name
+            attempt: Number of the attempt that just failed, starting at 0
+            deadline: time.monotonic() value by which the call must be done
+            response: The retryable response, None for a connection error
+
+        Returns:
+            Delay before the next attempt, or None to give up
+        """
+        if attempt + 1 >= int(getattr(settings, 'AI_RETRY_MAX_ATTEMPTS', 3)):
+            return None
+
+        delay = parse_retry_after(response) if response is not None else None
+        if delay is None:
+            delay = self.backoff(attempt)
+
+        if time.monotonic() + delay >= deadline:
+            logger.info(f"Not retrying {provider}: a {delay:.1f}s wait exceeds the deadline")
+            metrics.increment(f'ai_retry.{provider}.deadline_exceeded')
+            return None
+        if not self.budget.withdraw():
+            logger.warning(f"Not retrying {provider}: retry budget exhausted")
+            metrics.increment(f'ai_retry.{provider}.budget_exhausted')
+            return None
+
+        metrics.increment(f'ai_retry.{provider}.retries')
+        return delay
+
+    def call(self, provider: str, send: Callable[[float], Any], timeout: float = 30) -> Any:
+        """
+        Send a request, retrying transient failures.
+
+        Args:
+            provider: The provider name
+            send: Callable sending the request with the given timeout
+            timeout: Maximum duration of a single attempt, in seconds
+
+        Returns:
+            The last response
+
+        Raises:
+            Exception: The last error raised by send, if no response was received
+        """
+        self.budget.deposit()
+        deadline = time.monotonic() + float(getattr(settings, 'AI_RETRY_DEADLINE', 45))
+        attempt = 0
+
+        while True:
+            attempt_timeout = max(min(timeout, deadline - time.monotonic()), 0.1)
+            try:
+                response = send(attempt_timeout)
+            except Exception as e:
+                if not is_retryable_exception(e):
+                    raise
+                delay = self._next_delay(provider, attempt, deadline)
+                if delay is None:
+                    raise
+                logger.info(f"{provider} connection failed ({str(e)}), retrying in {delay:.2f}s")
+            else:
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    return response
+                delay = self._next_delay(provider, attempt, deadline, response)
+                if delay is None:
+                    return response
+                logger.info(f"{provider} returned {response.status_code}, retrying in {delay:.2f}s")
+
+            time.sleep(delay)
+            attempt += 1
+
+    async def acall(self, provider: str, send: Callable[[float], Awaitable[Any]], timeout: float = 30) -> Any:
+        """
+        Async version of call.
+
+        Args:
+            provider: The provider name
+            send: Coroutine function sending the request with the given timeout
+            timeout: Maximum duration of a single attempt, in seconds
+
+        Returns:
+            The last response
+
+        Raises:
+            Exception: The last error raised by send, if no response was received
+        """
+        self.budget.deposit()
+        deadline = time.monotonic() + float(getattr(settings, 'AI_RETRY_DEADLINE', 45))
+        attempt = 0
+
+        while True:
+            attempt_timeout = max(min(timeout, deadline - time.monotonic()), 0.1)
+            try:
+                response = await send(attempt_timeout)
+            except Exception as e:
+                if not is_retryable_exception(e):
+                    raise
+                delay = self._next_delay(provider, attempt, deadline)
+                if delay is None:
+                    raise
+                logger.info(f"{provider} connection failed ({str(e)}), retrying in {delay:.2f}s")
+            else:
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    return response
+                delay = self._next_delay(provider, attempt, deadline, response)
+                if delay is None:
+                    return response
+                logger.info(f"{provider} returned {response.status_code}, retrying in {delay:.2f}s")
+
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Report retry counts and the remaining retry budget.
+
+        Returns:
+            Dictionary with the budget level and per-provider retry counts
+        """
+        stats: Dict[str, Any] = {'budget': self.budget.level()}
+        for provider in ('openai', 'huggingface'):
+            stats[provider] = {
+                'retries': metrics.get_counter(f'ai_retry.{provider}.retries'),
+                'deadline_exceeded': metrics.get_counter(f'ai_retry.{provider}.deadline_exceeded'),
+                'budget_exhausted': metrics.get_counter(f'ai_retry.{provider}.budget_exhausted'),
+            }
+        return stats
+
+
+# Process-wide retry policy
+retry_policy = RetryPolicy()
+
+metrics.register_collector('ai_retry', retry_policy.get_stats)
@@ -0,0 +1,279 @@
+"""
+Simulated AI provider.
+
+Tools without an API key, and staging load tests, are answered by this
+simulator instead of a real provider. To make load tests measure the
+application rather than the simulator, it provides:
+
+- a configurable latency distribution (``AI_SIMULATION_LATENCY``: ``fixed``,
+  ``normal`` or ``long_tail``), waited with ``asyncio.sleep`` in async code
+  so the event loop is never blocked,
+- error injection (``AI_SIMULATION_ERROR_RATE``) returning the same error
+  results as a failing provider, so retries, circuit breakers and failover
+  can be exercised,
+- token streaming with a configurable delay between tokens, and
+- keyword tables prepared once at import, so picking a canned answer is a
+  handful of substring tests rather than a CPU hotspot.
+"""
+import asyncio
+import logging
+import math
+import random
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+
+from catalog.providers.exceptions import ProviderError
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+# Canned answers, by decreasing priority: the first rule with a keyword
+# appearing anywhere in the lowercased prompt wins.
+RULES: List[Tuple[List[str], str]] = [
+    (['hello', 'hi', 'hey', 'greetings'],
+     "Hello! I'm a simulated AI assistant. How can I help you today? I can provide information on various topics, answer questions, or just chat with you."),
+    (['help'],
+     "I'd be happy to help! I can provide information on various topics, answer questions, or assist with tasks. What specifically do you need help with? (Note: I'm currently running in simulation mode without API access, but I'll do my best to assist you.)"),
+    (['weather', 'temperature', 'forecast'],
+     "I can't check the real-time weather as I'm running in simulation mode, but I can tell you that weather forecasting involves collecting data from satellites, weather stations, and other sources. This data is then analyzed using complex mathematical models to predict future weather conditions."),
+    (['code', 'programming', 'javascript', 'python', 'java', 'html', 'css'],
+     "Programming is a fascinating field! Here's a simulated response about coding:\n\nPython is known for its readability and simplicity, making it great for beginners. JavaScript is essential for web development. HTML and CSS are the building blocks of web pages. Java is widely used in enterprise applications.\n\nIf you have a specific programming question, feel free to ask, and I'll provide a simulated response based on common knowledge."),
+    (['ai', 'artificial intelligence', 'model', 'gpt', 'llm'],
+     "Artificial Intelligence (AI) refers to systems that can perform tasks that typically require human intelligence. Machine Learning is a subset of AI where systems learn from data. Large Language Models (LLMs) like GPT are trained on vast amounts of text data to generate human-like responses. These models have revolutionized natural language processing but also raise important ethical considerations around bias, privacy, and misinformation."),
+    (['data', 'information', 'tell me', 'explain'],
+     "I would normally provide detailed information on this topic based on my training data. Since I'm in simulation mode, I can offer a general response: Information and data are fundamental to understanding our world. Data becomes information when it's organized and presented in a meaningful context. Knowledge is derived from information when patterns and insights are extracted. If you have a specific topic you'd like explained, please let me know."),
+    (['thanks', 'thank you', 'appreciate'],
+     "You're welcome! I'm happy to help, even in simulation mode. If you have any other questions or need assistance with anything else, feel free to ask. I'm here to make your experience as helpful as possible."),
+    (['app', 'platform', 'website', 'tool', 'inspire'],
+     "This platform is designed to provide access to various AI tools and models. You can chat with different AI assistants, save your favorite prompts, and explore various capabilities. Currently, I'm running in simulation mode, but once API keys are configured, you'll be able to access more advanced AI features and capabilities."),
+    (['can you', 'are you able', 'capability', 'function'],
+     "In simulation mode, I can provide pre-defined responses to common questions. I can simulate conversations on various topics including technology, general knowledge, and casual chat. Once API keys are configured, I'll be able to generate more dynamic and personalized responses, process complex queries, and provide more accurate and up-to-date information."),
+    (['science', 'physics', 'chemistry', 'biology', 'astronomy'],
+     "Science is the systematic study of the structure and behavior of the physical and natural world through observation and experiment. Physics explores matter, energy, and their interactions. Chemistry studies substances, their properties, and reactions. Biology examines living organisms. Astronomy focuses on celestial objects and the universe. Each field has made remarkable contributions to our understanding of the world around us."),
+    (['history', 'war', 'ancient', 'civilization', 'century'],
+     "History provides us with valuable insights into past events, cultures, and civilizations. Through studying history, we can understand how societies have evolved, learn from past successes and failures, and gain perspective on current global issues. While I'm in simulation mode, I can provide general information about historical periods, significant events, and cultural developments."),
+    (['art', 'music', 'literature', 'movie', 'culture', 'book'],
+     "Art and culture are fundamental expressions of human creativity and experience. The arts encompass visual arts, music, literature, film, dance, and more. These creative forms allow us to explore emotions, share stories, and connect across different backgrounds and perspectives. Cultural traditions also shape our identities and communities. If you have a specific topic in arts or culture you'd like to discuss, feel free to ask."),
+    (['economy', 'business', 'market', 'finance', 'investment', 'money'],
+     "Economics and business are fascinating fields that study how societies allocate resources and how organizations operate. Economic principles help us understand markets, trade, and financial systems. Business concepts cover entrepreneurship, management, marketing, and organizational behavior. While I'm in simulation mode, I can discuss general concepts but cannot provide specific financial advice or real-time market data."),
+    (['?'],
+     "That's an interesting question! In a fully configured system, I would provide a detailed answer based on my training data and available information. For now, I'm operating in simulation mode with pre-defined responses. If you'd like to discuss a different topic, feel free to ask another question."),
+]
+
+# Answers used when no rule matches
+FALLBACK_RESPONSES: List[str] = [
+    "I'm a simulated AI response since no API key was provided. Your question seems interesting!",
+    "This is a placeholder response. To get real AI responses, please configure the API keys.",
+    "I'm a demo response. In production, this would connect to the actual AI service.",
+    "Thanks for your prompt! This is a simulated response for testing purposes.",
+    "I understand you're asking about something, but I'm just a simulated response."
+]
+
+LONG_PROMPT_NOTE = "\n\nI notice you've shared quite a detailed message. In a fully configured system, I would analyze the specifics of your input and provide a tailored response. Feel free to continue our conversation or try a different topic."
+SHORT_PROMPT_NOTE = "\n\nYour message was quite brief. Feel free to provide more details if you'd like a more specific response."
+
+
+def compile_rules(rules: List[Tuple[List[str], str]]) -> Tuple[Tuple[str, int], ...]:
+    """
+    Flatten the rules into one table of keywords for matching.
+
+    Plain substring tests run in C and, for these short keywords, beat a
+    regular expression alternation (which would also find the leftmost
+    keyword rather than the highest-priority one). A flat table of
+    (keyword, rule) pairs in priority order is one loop per prompt, without
+    the per-rule iterators of the nested tables.
+
+    Args:
+        rules: (keywords, answer) pairs by decreasing priority
+
+    Returns:
+        (lowercased keyword, index of its rule) pairs, by decreasing priority
+    """
+    return tuple(
+        (word.lower(), index)
+        for index, (words, _) in enumerate(rules)
+        for word in words
+    )
+
+
+_RULE_KEYWORDS = compile_rules(RULES)
+
+
+def match_rule(prompt: str) -> Optional[int]:
+    """
+    Find the highest-priority rule matching a prompt.
+
+    Args:
+        prompt: The user's prompt
+
+    Returns:
+        Index of the rule in RULES, or None if no rule matches
+    """
+    prompt_lower = prompt.lower()
+    for word, index in _RULE_KEYWORDS:
+        if word in prompt_lower:
+            return index
+    return None
+
+
+class SimulatedProvider:
+    """
+    Provider answering with canned responses after a simulated latency.
+
+    Use the module-level ``simulated_provider`` instance rather than creating new ones.
+    """
+
+    def __init__(self) -> None:
+        self._random = random.Random(getattr(settings, 'AI_SIMULATION_SEED', None))
+
+    def build_response(self, service_type: str, prompt: str) -> Dict[str, Any]:
+        """
+        Build the simulated response for a prompt, without any delay.
+
+        Args:
+            service_type: The type of AI service being simulated
+            prompt: The user's prompt
+
+        Returns:
+            Simulated response with success status and data
+        """
+        index = match_rule(prompt)
+        if index is not None:
+            response = RULES[index][1]
+        else:
+            response = self._random.choice(FALLBACK_RESPONSES)
+            if len(prompt) > 100:
+                response += LONG_PROMPT_NOTE
+            elif len(prompt) < 10:
+                response += SHORT_PROMPT_NOTE
+
+        # Only shorter responses get the note, to keep long ones readable
+        if len(response) < 500:
+            response += f"\n\n[Note: This is a simulated {service_type} response. Configure API keys for real AI responses.]"
+
+        return {
+            "success": True,
+            "data": response
+        }
+
+    def latency(self) -> float:
+        """
+        Draw the latency of a simulated call.
+
+        Returns:
+            Delay in seconds, between 0 and AI_SIMULATION_LATENCY_MAX
+        """
+        distribution = getattr(settings, 'AI_SIMULATION_LATENCY', 'fixed')
+        mean = float(getattr(settings, 'AI_SIMULATION_LATENCY_MEAN', 1.0))
+        spread = float(getattr(settings, 'AI_SIMULATION_LATENCY_SPREAD', 0.25))
+
+        if distribution == 'normal':
+            # spread is the standard deviation, in seconds
+            delay = self._random.gauss(mean, spread)
+        elif distribution == 'long_tail':
+            # Log-normal with the configured mean; spread is the shape (sigma)
+            delay = self._random.lognormvariate(math.log(mean) - spread ** 2 / 2, spread) if mean > 0 else 0.0
+        else:
+            delay = mean
+        return min(max(delay, 0.0), float(getattr(settings, 'AI_SIMULATION_LATENCY_MAX', 30)))
+
+    def injected_error(self, service_type: str) -> Optional[Dict[str, Any]]:
+        """
+        Decide whether a simulated call fails.
+
+        Args:
+            service_type: The type of AI service being simulated
+
+        Returns:
+            Error result like the ones of a failing provider, or None
+        """
+        rate = float(getattr(settings, 'AI_SIMULATION_ERROR_RATE', 0.0))
+        if rate <= 0 or self._random.random() >= rate:
+            return None
+        status_code = self._random.choice(getattr(settings, 'AI_SIMULATION_ERROR_STATUS_CODES', [503]))
+        metrics.increment('ai_simulation.errors_injected')
+        return {
+            "success": False,
+            "error": f"API Error: simulated {service_type} failure",
+            "status_code": status_code
+        }
+
+    def respond(self, service_type: str, prompt: str) -> Dict[str, Any]:
+        """
+        Answer a prompt after the simulated latency.
+
+        Args:
+            service_type: The type of AI service being simulated
+            prompt: The user's prompt
+
+        Returns:
+            Simulated response, or an injected error
+        """
+        metrics.increment('ai_simulation.responses')
+        time.sleep(self.latency())
+        return self.injected_error(service_type) or self.build_response(service_type, prompt)
+
+    async def arespond(self, service_type: str, prompt: str) -> Dict[str, Any]:
+        """
+        Async version of respond; waits without blocking the event loop.
+
+        Args:
+            service_type: The type of AI service being simulated
+            prompt: The user's prompt
+
+        Returns:
+            Simulated response, or an injected error
+        """
+        metrics.increment('ai_simulation.responses')
+        await asyncio.sleep(self.latency())
+        return self.injected_error(service_type) or self.build_response(service_type, prompt)
+
+    def stream(self, service_type: str, prompt: str) -> Iterator[str]:
+        """
+        Stream the answer to a prompt token by token.
+
+        The simulated latency is spent before the first token, like a
+        provider's time to first token; tokens then follow every
+        AI_SIMULATION_TOKEN_DELAY seconds.
+
+        Args:
+            service_type: The type of AI service being simulated
+            prompt: The user's prompt
+
+        Yields:
+            Words of the simulated response
+
+        Raises:
+            ProviderError: When an error is injected
+        """
+        # Imported here to avoid a circular import with the streaming module
+        from catalog.providers.streaming import stream_text
+
+        metrics.increment('ai_simulation.responses')
+        time.sleep(self.latency())
+        error = self.injected_error(service_type)
+        if error:
+            raise ProviderError(error["error"], service_type, error["status_code"])
+        response = self.build_response(service_type, prompt)
+        yield from stream_text(response["data"], float(getattr(settings, 'AI_SIMULATION_TOKEN_DELAY', 0.03)))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Report simulated call counts for this process.
+
+        Returns:
+            Dictionary with the number of simulated responses and injected errors
+        """
+        return {
+            'latency': getattr(settings, 'AI_SIMULATION_LATENCY', 'fixed'),
+            'responses': metrics.get_counter('ai_simulation.responses'),
+            'errors_injected': metrics.get_counter('ai_simulation.errors_injected'),
+        }
+
+
+# Process-wide simulated provider
+simulated_provider = SimulatedProvider()
+
+metrics.register_collector('ai_simulation', simulated_provider.get_stats)
@@ -0,0 +1,178 @@
+"""
+Token streaming for AI provider calls.
+
+Each function in this module is a generator that yields pieces of the
+completion text as soon as the provider produces them, so views can relay
+them to the browser instead of waiting for the whole completion.
+"""
+import json
+import logging
+import re
+import time
+from typing import Any, Iterator
+
+from catalog.providers.exceptions import ProviderError
+from catalog.providers.transport import provider_url, transport
+
+logger = logging.getLogger(__name__)
+
+# Connect timeout and maximum wait between two streamed chunks, in seconds
+STREAM_TIMEOUT = (5, 30)
+
+# A word together with the whitespace that follows it
+_TOKEN_RE = re.compile(r'\S+\s*|\s+')
+
+
+def _iter_sse_data(response: Any) -> Iterator[str]:
+    """
+    Iterate over the ``data:`` payloads of a Server-Sent Events response.
+
+    Args:
+        response: A streaming requests response
+
+    Yields:
+        The payload of each data line
+    """
+    for line in response.iter_lines(decode_unicode=True):
+        if not line or not line.startswith('data:'):
+            continue
+        yield line[len('data:'):].strip()
+
+
+def stream_openai(prompt: str, model: str, api_key: str) -> Iterator[str]:
+    """
+    Stream a chat completion from the OpenAI API.
+
+    Args:
+        prompt: The message to send to the API
+        model: The OpenAI model name to use
+        api_key: The OpenAI API key
+
+    Yields:
+        Pieces of the completion text
+    """
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {api_key}"
+    }
+    data = {
+        "model": model,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0.7,
+        "stream": True
+    }
+
+    response = transport.post(
+        'openai',
+        provider_url('openai', '/v1/chat/completions'),
+        headers=headers,
+        json=data,
+        timeout=STREAM_TIMEOUT,
+        stream=True
+    )
+
+    with response:
+        if response.status_code != 200:
+            try:
+                message = response.json().get('error', {}).get('message', 'Unknown error')
+            except ValueError:
+                message = response.text
+            raise ProviderError(f"API Error: {message}", 'openai', response.status_code)
+
+        for payload in _iter_sse_data(response):
+            if payload == '[DONE]':
+                break
+            try:
+                delta = json.loads(payload)["choices"][0].get("delta", {})
+            except (ValueError, KeyError, IndexError):
+                logger.warning(f"Skipping malformed OpenAI stream chunk: {payload[:100]}")
+                continue
+            content = delta.get("content")
+            if content:
+                yield content
+
+
+def stream_huggingface(prompt: str, model: str, api_key: str) -> Iterator[str]:
+    """
+    Stream generated text from the Hugging Face Inference API.
+
+    Models served by text-generation-inference stream tokens as Server-Sent
+    Events. Other models answer with a single JSON document, which is
+    yielded as one piece.
+
+    Args:
+        prompt: The message to send to the API
+        model: The Hugging Face model name to use
+        api_key: The Hugging Face API key
+
+    Yields:
+        Pieces of the generated text
+    """
+    headers = {
+        "Authorization": f"Bearer {api_key}"
+    }
+    payload = {
+        "inputs": prompt,
+        "stream": True,
+    }
+
+    response = transport.post(
+        'huggingface',
+        provider_url('huggingface', f'/models/{model}'),
+        headers=headers,
+        json=payload,
+        timeout=STREAM_TIMEOUT,
+        stream=True
+    )
+
+    with response:
+        if response.status_code != 200:
+            raise ProviderError(f"API Error: {response.text}", 'huggingface', response.status_code)
+
+        if 'text/event-stream' not in response.headers.get('Content-Type', ''):
+            # Model does not support streaming: relay the full answer at once
+            yield response.json()[0]["generated_text"]
+            return
+
+        for data in _iter_sse_data(response):
+            try:
+                token = json.loads(data).get("token", {})
+            except ValueError:
+                logger.warning(f"Skipping malformed Hugging Face stream chunk: {data[:100]}")
+                continue
+            if not token.get("special") and token.get("text"):
+                yield token["text"]
+
+
+def stream_text(text: str, delay: float = 0.0) -> Iterator[str]:
+    """
+    Split an already generated text into word tokens.
+
+    Args:
+        text: The full text
+        delay: Seconds to wait between tokens
+
+    Yields:
+        Words of the text, each followed by its trailing whitespace
+    """
+    for match in _TOKEN_RE.finditer(text):
+        if delay:
+            time.sleep(delay)
+        yield match.group(0)
+
+
+def stream_simulation(service_type: str, prompt: str) -> Iterator[str]:
+    """
+    Stream a simulated AI response word by word.
+
+    Args:
+        service_type: The type of AI service being simulated
+        prompt: The user's prompt
+
+    Yields:
+        Words of the simulated response
+    """
+    # Imported here to avoid a circular import with the simulation module
+    from catalog.providers.simulation import simulated_provider
+
+    yield from simulated_provider.stream(service_type, prompt)
@@ -0,0 +1,321 @@
+"""
+Local stand-in for the OpenAI and Hugging Face HTTP APIs.
+
+The server answers the requests sent by ``AIService.call_openai_api``,
+``AIService.call_huggingface_api``, ``catalog.api_utils`` and the streaming
+functions, so those code paths (pooled transport, retries, rate limiting,
+circuit breaker, streaming parsers) can be benchmarked without network
+access. Point ``OPENAI_API_BASE_URL`` and ``HUGGINGFACE_API_BASE_URL`` at it
+and set any non-empty API keys.
+
+Endpoints:
+
+- ``POST /v1/chat/completions``: OpenAI chat completion, streamed when the
+  body has ``"stream": true``
+- ``POST /v1/completions``: OpenAI legacy completion
+- ``POST /models/{model}``: Hugging Face inference, streamed as
+  text-generation-inference tokens when the body has ``"stream": true``
+- ``GET /stats``: request counts since the server started
+
+Answers come from the simulated provider's canned responses. Latency,
+throughput caps and injected 429/503 errors are set with
+:class:`StubConfig`.
+"""
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from catalog.providers.simulation import simulated_provider
+from catalog.providers.streaming import stream_text
+
+logger = logging.getLogger(__name__)
+
+
+class StubConfig:
+    """
+    Behaviour of the stand-in provider server.
+
+    Attributes:
+        latency: Mean delay before answering (or before the first streamed token), in seconds
+        jitter: Standard deviation of the delay, in seconds
+        token_delay: Delay between streamed tokens, in seconds
+        max_concurrency: Requests processed at once; others wait (0 = unlimited)
+        rate_limit: Requests accepted per second before answering 429 (0 = unlimited)
+        error_rate_429: Fraction of requests answered with 429
+        error_rate_503: Fraction of requests answered with 503
+        retry_after: Retry-After value sent with 429 and 503 responses, in seconds
+    """
+
+    def __init__(self, latency: float = 0.5, jitter: float = 0.0, token_delay: float = 0.02,
+                 max_concurrency: int = 0, rate_limit: float = 0.0, error_rate_429: float = 0.0,
+                 error_rate_503: float = 0.0, retry_after: float = 1.0) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.token_delay = token_delay
+        self.max_concurrency = max_concurrency
+        self.rate_limit = rate_limit
+        self.error_rate_429 = error_rate_429
+        self.error_rate_503 = error_rate_503
+        self.retry_after = retry_after
+
+
+class StubState:
+    """Shared state of the server: throughput limits and request counters."""
+
+    def __init__(self, config: StubConfig) -> None:
+        self.config = config
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(config.max_concurrency) if config.max_concurrency > 0 else None
+        self._tokens = float(config.rate_limit)
+        self._refilled_at = time.monotonic()
+        self.counters: Dict[str, int] = {}
+
+    def count(self, name: str) -> None:
+        """Increment a request counter."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+    def take_rate_token(self) -> bool:
+        """
+        Take one request from the per-second budget.
+
+        Returns:
+            True if the request is within the rate limit
+        """
+        rate = self.config.rate_limit
+        if rate <= 0:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(rate, self._tokens + (now - self._refilled_at) * rate)
+            self._refilled_at = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def acquire_slot(self) -> None:
+        """Wait for a processing slot."""
+        if self._slots is not None:
+            self._slots.acquire()
+
+    def release_slot(self) -> None:
+        """Free a processing slot."""
+        if self._slots is not None:
+            self._slots.release()
+
+    def delay(self) -> float:
+        """Draw the delay before answering."""
+        return max(random.gauss(self.config.latency, self.config.jitter) if self.config.jitter else self.config.latency, 0.0)
+
+    def injected_status(self) -> Optional[int]:
+        """
+        Decide whether a request fails.
+
+        Returns:
+            429 or 503 for an injected failure, None otherwise
+        """
+        draw = random.random()
+        if draw < self.config.error_rate_429:
+            return 429
+        if draw < self.config.error_rate_429 + self.config.error_rate_503:
+            return 503
+        return None
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    """Request handler mimicking the provider endpoints."""
+
+    server_version = 'InspireIAProviderStub/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    @property
+    def state(self) -> StubState:
+        return self.server.state  # type: ignore[attr-defined]
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(f"{self.address_string()} {format % args}")
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        try:
+            body = json.loads(self.rfile.read(length))
+        except ValueError:
+            return {}
+        return body if isinstance(body, dict) else {}
+
+    def _send_json(self, status: int, data: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_stream(self, events: Iterator[str]) -> None:
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        for data in events:
+            self.wfile.write(f"data: {data}\n\n".encode('utf-8'))
+            self.wfile.flush()
+
+    def _send_error(self, provider: str, status: int, message: str) -> None:
+        # Each provider has its own error body format
+        body: Any = {'error': {'message': message, 'type': 'stub_error'}} if provider == 'openai' else {'error': message}
+        self._send_json(status, body, {'Retry-After': f"{self.state.config.retry_after:g}"})
+
+    def _route(self) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Identify the endpoint of a POST request.
+
+        Returns:
+            Tuple of (provider, endpoint kind), or (None, None) for unknown paths
+        """
+        path = self.path.split('?', 1)[0]
+        if path == '/v1/chat/completions':
+            return 'openai', 'chat'
+        if path == '/v1/completions':
+            return 'openai', 'completion'
+        if path.startswith('/models/') and len(path) > len('/models/'):
+            return 'huggingface', 'inference'
+        return None, None
+
+    def do_GET(self) -> None:
+        if self.path.split('?', 1)[0] == '/stats':
+            with self.state._lock:
+                counters = dict(self.state.counters)
+            self._send_json(200, counters)
+        else:
+            self._send_json(404, {'error': 'Not found'})
+
+    def do_POST(self) -> None:
+        provider, kind = self._route()
+        body = self._read_json()
+        if provider is None:
+            self._send_json(404, {'error': 'Not found'})
+            return
+        self.state.count(f'{provider}.requests')
+
+        if not self.headers.get('Authorization', '').startswith('Bearer '):
+            self.state.count(f'{provider}.unauthorized')
+            self._send_error(provider, 401, 'Missing API key')
+            return
+        if not self.state.take_rate_token():
+            self.state.count(f'{provider}.rate_limited')
+            self._send_error(provider, 429, 'Rate limit reached')
+            return
+
+        self.state.acquire_slot()
+        try:
+            status = self.state.injected_status()
+            if status:
+                time.sleep(self.state.delay())
+                self.state.count(f'{provider}.injected_{status}')
+                self._send_error(provider, status, 'Injected failure')
+                return
+
+            prompt = self._prompt(kind, body)
+            text = simulated_provider.build_response(provider, prompt)['data']
+            time.sleep(self.state.delay())
+            if body.get('stream'):
+                self._send_stream(self._stream_events(kind, text, body))
+            else:
+                self._send_json(200, self._completion(kind, text, body))
+            self.state.count(f'{provider}.ok')
+        except (BrokenPipeError, ConnectionResetError):
+            self.state.count(f'{provider}.disconnected')
+        finally:
+            self.state.release_slot()
+
+    def _prompt(self, kind: Optional[str], body: Dict[str, Any]) -> str:
+        if kind == 'chat':
+            messages = body.get('messages') or [{}]
+            return str(messages[-1].get('content', ''))
+        if kind == 'completion':
+            return str(body.get('prompt', ''))
+        return str(body.get('inputs', ''))
+
+    def _completion(self, kind: Optional[str], text: str, body: Dict[str, Any]) -> Any:
+        usage = {'prompt_tokens': 0, 'completion_tokens': len(text.split()), 'total_tokens': len(text.split())}
+        if kind == 'chat':
+            return {
+                'id': f"chatcmpl-{uuid.uuid4().hex}",
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': body.get('model', 'stub'),
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': text}, 'finish_reason': 'stop'}],
+                'usage': usage,
+            }
+        if kind == 'completion':
+            return {
+                'id': f"cmpl-{uuid.uuid4().hex}",
+                'object': 'text_completion',
+                'created': int(time.time()),
+                'model': body.get('model', 'stub'),
+                'choices': [{'index': 0, 'text': text, 'finish_reason': 'stop'}],
+                'usage': usage,
+            }
+        return [{'generated_text': text}]
+
+    def _stream_events(self, kind: Optional[str], text: str, body: Dict[str, Any]) -> Iterator[str]:
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        for index, token in enumerate(stream_text(text, self.state.config.token_delay)):
+            if kind == 'inference':
+                yield json.dumps({'token': {'id': index, 'text': token, 'special': False}, 'generated_text': None})
+            elif kind == 'chat':
+                yield json.dumps({'id': completion_id, 'object': 'chat.completion.chunk',
+                                  'choices': [{'index': 0, 'delta': {'content': token}, 'finish_reason': None}]})
+            else:
+                yield json.dumps({'id': completion_id, 'object': 'text_completion',
+                                  'choices': [{'index': 0, 'text': token, 'finish_reason': None}]})
+        if kind == 'inference':
+            yield json.dumps({'token': {'id': -1, 'text': '', 'special': True}, 'generated_text': text})
+        else:
+            yield '[DONE]'
+
+
+class StubServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the stub state."""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], config: StubConfig) -> None:
+        super().__init__(address, StubRequestHandler)
+        self.state = StubState(config)
+
+    @property
+    def base_url(self) -> str:
+        """URL to use as OPENAI_API_BASE_URL / HUGGINGFACE_API_BASE_URL."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_stub_server(config: StubConfig, host: str = '127.0.0.1', port: int = 0) -> StubServer:
+    """
+    Start a stub server in a background thread.
+
+    Args:
+        config: Behaviour of the server
+        host: Interface to listen on
+        port: Port to listen on; 0 picks a free port
+
+    Returns:
+        The running server; call ``shutdown()`` to stop it
+    """
+    server = StubServer((host, port), config)
+    thread = threading.Thread(target=server.serve_forever, name='provider-stub', daemon=True)
+    thread.start()
+    return server
@@ -0,0 +1,254 @@
+"""
+Pooled HTTP transport for AI provider calls.
+
+Every provider (OpenAI, Hugging Face, ...) gets its own ``requests.Session``
+with a connection pool sized from settings, so consecutive chat messages
+reuse already-established TCP+TLS connections instead of paying a new
+handshake each time.
+
+Sessions are owned by the process that created them. After a fork (e.g.
+gunicorn pre-fork workers) the child process transparently builds new
+sessions, and all sessions are closed when the process exits.
+"""
+import atexit
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional, Set
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+# Default base URLs of the supported providers, overridden by settings.AI_PROVIDER_BASE_URLS
+PROVIDER_BASE_URLS: Dict[str, str] = {
+    'openai': 'https://api.openai.com',
+    'huggingface': 'https://api-inference.huggingface.co',
+}
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    HTTP adapter that remembers the urllib3 pools it hands out.
+
+    urllib3 counts the connections it opens and the requests it sends per
+    pool; keeping a reference to the pools lets the transport report how
+    often a connection was reused instead of re-established.
+    """
+
+    def __init__(self, pool_maxsize: int = 10, **kwargs: Any) -> None:
+        self.seen_pools: Set[Any] = set()
+        self.pool_maxsize = pool_maxsize
+        super().__init__(pool_maxsize=pool_maxsize, **kwargs)
+
+    def get_connection_with_tls_context(self, *args: Any, **kwargs: Any) -> Any:
+        pool = super().get_connection_with_tls_context(*args, **kwargs)
+        self.seen_pools.add(pool)
+        return pool
+
+    def get_connection(self, *args: Any, **kwargs: Any) -> Any:
+        # Used by requests versions older than 2.32.2
+        pool = super().get_connection(*args, **kwargs)
+        self.seen_pools.add(pool)
+        return pool
+
+    def pool_stats(self) -> Dict[str, int]:
+        """
+        Aggregate request and connection counts over all seen pools.
+
+        Returns:
+            Dictionary with request, connection and reuse counts
+        """
+        pools = list(self.seen_pools)
+        num_requests = sum(getattr(pool, 'num_requests', 0) for pool in pools)
+        num_connections = sum(getattr(pool, 'num_connections', 0) for pool in pools)
+        return {
+            'pools': len(pools),
+            'requests': num_requests,
+            'connections_opened': num_connections,
+            'connections_reused': max(num_requests - num_connections, 0),
+        }
+
+
+class ProviderTransport:
+    """
+    Per-process registry of pooled sessions, one per AI provider.
+
+    Use the module-level ``transport`` instance rather than creating new ones.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, requests.Session] = {}
+        self._adapters: Dict[str, PooledHTTPAdapter] = {}
+        self._pid = os.getpid()
+
+    def _pool_maxsize(self, provider: str) -> int:
+        """
+        Get the connection pool size configured for a provider.
+
+        Args:
+            provider: The provider name
+
+        Returns:
+            Maximum number of pooled connections per host
+        """
+        sizes = getattr(settings, 'AI_PROVIDER_POOL_SIZES', {})
+        default = getattr(settings, 'AI_PROVIDER_POOL_MAXSIZE', 10)
+        return int(sizes.get(provider, default))
+
+    def _build_session(self, provider: str) -> requests.Session:
+        """
+        Create a keep-alive session with a sized connection pool.
+
+        Args:
+            provider: The provider name
+
+        Returns:
+            A configured requests session
+        """
+        adapter = PooledHTTPAdapter(
+            pool_connections=getattr(settings, 'AI_PROVIDER_POOL_CONNECTIONS', 4),
+            pool_maxsize=self._pool_maxsize(provider),
+            pool_block=getattr(settings, 'AI_PROVIDER_POOL_BLOCK', False),
+            # Retries are decided by the caller, never silently by urllib3
+            max_retries=0,
+        )
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({'Connection': 'keep-alive'})
+
+        self._adapters[provider] = adapter
+        logger.info(
+            f"Created pooled session for {provider} "
+            f"(pool_maxsize={adapter.pool_maxsize}, pid={self._pid})"
+        )
+        return session
+
+    def _check_process(self) -> None:
+        """Drop sessions inherited from a parent process after a fork."""
+        if self._pid != os.getpid():
+            # Sockets inherited from the parent must not be shared, so
+            # forget them without closing (the parent still owns them)
+            self._sessions = {}
+            self._adapters = {}
+            self._pid = os.getpid()
+
+    def get_session(self, provider: str) -> requests.Session:
+        """
+        Get the pooled session for a provider, creating it if needed.
+
+        Args:
+            provider: The provider name (e.g. 'openai')
+
+        Returns:
+            The provider's requests session
+        """
+        with self._lock:
+            self._check_process()
+            session = self._sessions.get(provider)
+            if session is None:
+                session = self._build_session(provider)
+                self._sessions[provider] = session
+            return session
+
+    def request(self, provider: str, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """
+        Send a request through the provider's pooled session.
+
+        Args:
+            provider: The provider name
+            method: HTTP method
+            url: Absolute URL to call
+            **kwargs: Extra arguments passed to ``requests.Session.request``
+
+        Returns:
+            The HTTP response
+        """
+        session = self.get_session(provider)
+        metrics.increment(f'provider_transport.{provider}.requests')
+        return session.request(method, url, **kwargs)
+
+    def post(self, provider: str, url: str, **kwargs: Any) -> requests.Response:
+        """
+        Send a POST request through the provider's pooled session.
+
+        Args:
+            provider: The provider name
+            url: Absolute URL to call
+            **kwargs: Extra arguments passed to ``requests.Session.request``
+
+        Returns:
+            The HTTP response
+        """
+        return self.request(provider, 'POST', url, **kwargs)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Report connection reuse statistics per provider.
+
+        Returns:
+            Dictionary mapping provider names to pool statistics
+        """
+        with self._lock:
+            self._check_process()
+            adapters = dict(self._adapters)
+
+        stats: Dict[str, Any] = {}
+        for provider, adapter in adapters.items():
+            provider_stats = adapter.pool_stats()
+            total = provider_stats['requests']
+            provider_stats['reuse_ratio'] = (
+                round(provider_stats['connections_reused'] / total, 3) if total else 0.0
+            )
+            provider_stats['pool_maxsize'] = adapter.pool_maxsize
+            stats[provider] = provider_stats
+        return stats
+
+    def close(self, provider: Optional[str] = None) -> None:
+        """
+        Close pooled sessions owned by this process.
+
+        Args:
+            provider: Close only this provider's session; all sessions if None
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                return
+            providers = [provider] if provider else list(self._sessions)
+            for name in providers:
+                session = self._sessions.pop(name, None)
+                self._adapters.pop(name, None)
+                if session is not None:
+                    session.close()
+
+
+def provider_url(provider: str, path: str) -> str:
+    """
+    Build an absolute URL for a provider endpoint.
+
+    The base URL comes from ``settings.AI_PROVIDER_BASE_URLS`` when set, so
+    the provider calls can target a local stand-in server
+    (``manage.py run_provider_stub``).
+
+    Args:
+        provider: The provider name
+        path: Endpoint path starting with '/'
+
+    Returns:
+        The absolute URL
+    """
+    base_url = getattr(settings, 'AI_PROVIDER_BASE_URLS', {}).get(provider) or PROVIDER_BASE_URLS[provider]
+    return f"{base_url.rstrip('/')}{path}"
+
+
+# Process-wide transport instance
+transport = ProviderTransport()
+
+atexit.register(transport.close)
+metrics.register_collector('provider_transport', transport.get_stats)
@@ -0,0 +1,417 @@
+"""
+Full-text search of the AI tool catalog.
+
+Every catalog search goes through ``get_search_backend().search(queryset, query)``,
+which filters the queryset to the matching tools and orders them by relevance
+blended with popularity. The backend depends on the database:
+
+- PostgreSQL: a weighted ``tsvector`` per tool (name A, provider B,
+  description C) in ``catalog_aitool_search``, with a GIN index
+- SQLite: an FTS5 table, ``catalog_aitool_fts``, ranked with bm25 using the
+  same field weights
+- Anything else, or ``CATALOG_SEARCH_BACKEND = 'basic'``: ``icontains``
+  filters ranked by the field that matched
+
+The index tables live outside the models: ``ensure_search_index`` creates and
+fills them after every ``migrate`` (also when the test settings disable
+migrations), and catalog/signals.py updates them on every AITool save and
+delete. Bulk changes that bypass the signals (``bulk_create``,
+``queryset.update``) need ``python manage.py rebuild_search_index``.
+"""
+import logging
+import re
+import threading
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.db.models import Case, F, FloatField, Func, Q, QuerySet, Value, When
+from django.db.models.expressions import RawSQL
+
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+SQLITE_TABLE = 'catalog_aitool_fts'
+POSTGRES_TABLE = 'catalog_aitool_search'
+
+# Relative weights of a match in the name, provider and description
+FIELD_WEIGHTS = (10.0, 4.0, 1.0)
+
+# Words of a query used for searching; the rest are ignored
+MAX_TERMS = 16
+
+_TERM_RE = re.compile(r'\w+')
+
+
+def query_terms(query: str) -> List[str]:
+    """
+    Split a search query into the words searched for.
+
+    Punctuation and operators are dropped, so user input can never break the
+    full-text query syntax.
+
+    Args:
+        query: The query typed by the user
+
+    Returns:
+        Lowercased words, at most MAX_TERMS
+    """
+    return _TERM_RE.findall(query.lower())[:MAX_TERMS]
+
+
+def sqlite_rowid(tool_id: Any) -> int:
+    """
+    Map a tool's UUID to the rowid of its FTS5 row.
+
+    The 63 high bits of the UUID fit a SQLite integer, so a tool's row can be
+    replaced by rowid instead of scanning the table for its tool_id.
+    """
+    return tool_id.int >> 65
+
+
+class _RankSubquery(Func):
+    """
+    Correlated subquery computing the relevance of each tool.
+
+    The outer tool's primary key is compiled by Django, so the subquery stays
+    correct whatever alias the AITool table gets.
+    """
+    output_field = FloatField()
+
+    def __init__(self, sql: str, params: List[Any]) -> None:
+        super().__init__(F('pk'))
+        self.sql = sql
+        self.sql_params = params
+
+    def as_sql(self, compiler: Any, connection: Any, **extra_context: Any) -> Any:
+        pk_sql, pk_params = compiler.compile(self.source_expressions[0])
+        return self.sql.format(pk=pk_sql), [*self.sql_params, *pk_params]
+
+
+class _RankLookup(Func):
+    """
+    Relevance of each tool looked up in ranks computed beforehand.
+
+    Compiled straight to ``CASE pk WHEN ... END``: building a Case with a When
+    per tool costs more than running the query.
+    """
+    output_field = FloatField()
+
+    def __init__(self, ranks: Dict[str, float]) -> None:
+        super().__init__(F('pk'))
+        self.ranks = ranks
+
+    def as_sql(self, compiler: Any, connection: Any, **extra_context: Any) -> Any:
+        pk_sql, pk_params = compiler.compile(self.source_expressions[0])
+        params = list(pk_params)
+        for tool_id, rank in self.ranks.items():
+            params.extend((tool_id, rank))
+        return f"CASE {pk_sql} {'WHEN %s THEN %s ' * len(self.ranks)}ELSE 0.0 END", params
+
+
+class SearchBackend:
+    """
+    Searches the catalog with ``icontains`` filters.
+
+    Used when no full-text index is available. Tools are ranked by where the
+    query matched: name first, then provider, then description.
+    """
+    name = 'basic'
+
+    def _rank(self, query: str) -> Optional[Any]:
+        """
+        Build the filter and relevance of a query.
+
+        Returns:
+            Tuple (filter, relevance expression), or None when the query has no words
+        """
+        terms = query_terms(query)
+        if not terms:
+            return None
+        phrase = ' '.join(terms)
+        name_weight, provider_weight, description_weight = FIELD_WEIGHTS
+        condition = Q(name__icontains=phrase) | Q(provider__icontains=phrase) | Q(description__icontains=phrase)
+        relevance = Case(
+            When(name__icontains=phrase, then=Value(name_weight)),
+            When(provider__icontains=phrase, then=Value(provider_weight)),
+            default=Value(description_weight),
+            output_field=FloatField(),
+        )
+        return condition, relevance
+
+    def search(self, queryset: QuerySet, query: str) -> QuerySet:
+        """
+        Filter tools to those matching a query, best matches first.
+
+        Args:
+            queryset: The AI tools to search
+            query: The query typed by the user
+
+        Returns:
+            The matching tools, annotated with ``search_rank`` (relevance) and
+            ``search_score`` (relevance blended with popularity) and ordered by
+            ``search_score``; no tools when the query has no words
+        """
+        ranked = self._rank(query)
+        metrics.increment(f'catalog_search.{self.name}')
+        if ranked is None:
+            return queryset.none()
+        condition, relevance = ranked
+        weight = float(getattr(settings, 'CATALOG_SEARCH_POPULARITY_WEIGHT', 0.1))
+        return (
+            queryset.filter(condition)
+            .annotate(search_rank=relevance)
+            .annotate(search_score=F('search_rank') * (1 + weight * F('popularity')))
+            .order_by('-search_score', '-popularity', 'name')
+        )
+
+    def index_tool(self, tool: Any) -> None:
+        """
+        Add or refresh a tool in the search index.
+
+        Args:
+            tool: The saved AITool
+        """
+
+    def remove_tool(self, tool_id: Any) -> None:
+        """
+        Remove a deleted tool from the search index.
+
+        Args:
+            tool_id: Primary key of the deleted AITool
+        """
+
+    def rebuild(self) -> int:
+        """
+        Rebuild the search index from the AI tools table.
+
+        Returns:
+            Number of tools indexed
+        """
+        return 0
+
+
+class SqliteSearchBackend(SearchBackend):
+    """
+    Searches the catalog with an FTS5 table, for development and tests.
+
+    Each word of the query matches as a prefix, after Porter stemming. bm25
+    can only be computed in the query running the MATCH, and re-running it
+    for each matching tool is quadratic, so the best
+    ``CATALOG_SEARCH_MAX_RESULTS`` matches are ranked by one FTS5 query and
+    their ranks passed to the tools query.
+    """
+    name = 'sqlite'
+
+    def _rank(self, query: str) -> Optional[Any]:
+        terms = query_terms(query)
+        if not terms:
+            return None
+        match = ' '.join(f'"{term}"*' for term in terms)
+        # The first weight is tool_id's, which is not indexed; bm25 is negative, lower is better
+        bm25 = f"bm25({SQLITE_TABLE}, 0.0, {', '.join(str(weight) for weight in FIELD_WEIGHTS)})"
+        limit = int(getattr(settings, 'CATALOG_SEARCH_MAX_RESULTS', 1000))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT tool_id, -{bm25} FROM {SQLITE_TABLE} WHERE {SQLITE_TABLE} MATCH %s ORDER BY {bm25} LIMIT %s',
+                [match, limit],
+            )
+            ranks = dict(cursor.fetchall())
+        if not ranks:
+            return Q(pk__in=[]), Value(0.0, output_field=FloatField())
+        return Q(pk__in=list(ranks)), _RankLookup(ranks)
+
+    def index_tool(self, tool: Any) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SQLITE_TABLE} WHERE rowid = %s', [sqlite_rowid(tool.pk)])
+            cursor.execute(
+                f'INSERT INTO {SQLITE_TABLE} (rowid, tool_id, name, provider, description) VALUES (%s, %s, %s, %s, %s)',
+                [sqlite_rowid(tool.pk), tool.pk.hex, tool.name or '', tool.provider or '', tool.description or ''],
+            )
+
+    def remove_tool(self, tool_id: Any) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SQLITE_TABLE} WHERE rowid = %s', [sqlite_rowid(tool_id)])
+
+    def rebuild(self) -> int:
+        from catalog.models import AITool
+
+        rows = [
+            (sqlite_rowid(pk), pk.hex, name or '', provider or '', description or '')
+            for pk, name, provider, description in AITool.objects.values_list('pk', 'name', 'provider', 'description')
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SQLITE_TABLE}')
+            cursor.executemany(
+                f'INSERT INTO {SQLITE_TABLE} (rowid, tool_id, name, provider, description) VALUES (%s, %s, %s, %s, %s)',
+                rows,
+            )
+        return len(rows)
+
+
+class PostgresSearchBackend(SearchBackend):
+    """
+    Searches the catalog with a weighted tsvector per tool and a GIN index.
+
+    Each word of the query matches as a prefix, after stemming with the
+    ``CATALOG_SEARCH_CONFIG`` text search configuration. Documents are built
+    by the database from the tool's row, so the index always matches what was
+    saved. The GIN index finds the matches; each one is then ranked from its
+    stored vector, found by primary key.
+    """
+    name = 'postgresql'
+
+    @property
+    def config(self) -> str:
+        """The text search configuration (stemming language)."""
+        return getattr(settings, 'CATALOG_SEARCH_CONFIG', 'english')
+
+    def _document_sql(self) -> str:
+        return (
+            "setweight(to_tsvector(%s::regconfig, coalesce(name, '')), 'A') || "
+            "setweight(to_tsvector(%s::regconfig, coalesce(provider, '')), 'B') || "
+            "setweight(to_tsvector(%s::regconfig, coalesce(description, '')), 'C')"
+        )
+
+    def _rank(self, query: str) -> Optional[Any]:
+        terms = query_terms(query)
+        if not terms:
+            return None
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        condition = Q(pk__in=RawSQL(
+            f'SELECT tool_id FROM {POSTGRES_TABLE} WHERE document @@ to_tsquery(%s::regconfig, %s)',
+            [self.config, tsquery],
+        ))
+        # ts_rank's default weights (D, C, B, A) = (0.1, 0.2, 0.4, 1.0) follow FIELD_WEIGHTS closely enough
+        relevance = _RankSubquery(
+            f'(SELECT ts_rank(document, to_tsquery(%s::regconfig, %s)) FROM {POSTGRES_TABLE} '
+            f'WHERE tool_id = {{pk}})',
+            [self.config, tsquery],
+        )
+        return condition, relevance
+
+    def index_tool(self, tool: Any) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {POSTGRES_TABLE} (tool_id, document) '
+                f'SELECT id, {self._document_sql()} FROM catalog_aitool WHERE id = %s '
+                f'ON CONFLICT (tool_id) DO UPDATE SET document = EXCLUDED.document',
+                [self.config, self.config, self.config, tool.pk],
+            )
+
+    def remove_tool(self, tool_id: Any) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {POSTGRES_TABLE} WHERE tool_id = %s', [tool_id])
+
+    def rebuild(self) -> int:
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {POSTGRES_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {POSTGRES_TABLE} (tool_id, document) '
+                f'SELECT id, {self._document_sql()} FROM catalog_aitool',
+                [self.config, self.config, self.config],
+            )
+            return cursor.rowcount
+
+
+_lock = threading.Lock()
+_backend: Optional[SearchBackend] = None
+
+
+def _table_exists(table: str) -> bool:
+    with connection.cursor() as cursor:
+        return table in connection.introspection.table_names(cursor)
+
+
+def get_search_backend() -> SearchBackend:
+    """
+    Get the search backend of the default database.
+
+    ``CATALOG_SEARCH_BACKEND = 'auto'`` picks the full-text backend of the
+    database when its index table exists (it is missing if, e.g., SQLite was
+    built without FTS5), and the basic backend otherwise.
+
+    Returns:
+        The process-wide search backend
+    """
+    global _backend
+    if _backend is None:
+        with _lock:
+            if _backend is None:
+                choice = getattr(settings, 'CATALOG_SEARCH_BACKEND', 'auto')
+                backend: SearchBackend = SearchBackend()
+                if choice == 'auto':
+                    if connection.vendor == 'postgresql' and _table_exists(POSTGRES_TABLE):
+                        backend = PostgresSearchBackend()
+                    elif connection.vendor == 'sqlite' and _table_exists(SQLITE_TABLE):
+                        backend = SqliteSearchBackend()
+                elif choice != 'basic':
+                    logger.warning(f"Unknown CATALOG_SEARCH_BACKEND {choice!r}, using basic search")
+                logger.info(f"Catalog search backend: {backend.name}")
+                _backend = backend
+    return _backend
+
+
+def reset_search_backend() -> None:
+    """Forget the chosen backend, e.g. after the settings or database changed."""
+    global _backend
+    with _lock:
+        _backend = None
+
+
+def ensure_search_index(using: str = DEFAULT_DB_ALIAS) -> bool:
+    """
+    Create and fill the full-text index table of the database if it is missing.
+
+    Args:
+        using: Database alias; only the default database is indexed
+
+    Returns:
+        True if the table was created
+    """
+    if using != DEFAULT_DB_ALIAS or connection.vendor not in ('postgresql', 'sqlite'):
+        return False
+    if not _table_exists('catalog_aitool'):
+        # Catalog migrated back to zero
+        return False
+    if _table_exists(POSTGRES_TABLE if connection.vendor == 'postgresql' else SQLITE_TABLE):
+        return False
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                f'CREATE TABLE {POSTGRES_TABLE} ('
+                'tool_id uuid PRIMARY KEY REFERENCES catalog_aitool (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, '
+                'document tsvector NOT NULL)'
+            )
+            cursor.execute(f'CREATE INDEX {POSTGRES_TABLE}_document_idx ON {POSTGRES_TABLE} USING gin (document)')
+            backend: SearchBackend = PostgresSearchBackend()
+        else:
+            try:
+                cursor.execute(
+                    f'CREATE VIRTUAL TABLE {SQLITE_TABLE} USING fts5('
+                    "tool_id UNINDEXED, name, provider, description, tokenize = 'porter unicode61 remove_diacritics 2')"
+                )
+            except Exception as e:
+                logger.warning(f"Full-text search index not created, catalog search uses icontains: {str(e)}")
+                return False
+            backend = SqliteSearchBackend()
+    count = backend.rebuild()
+    logger.info(f"Created the {backend.name} search index with {count} AI tools")
+    reset_search_backend()
+    return True
+
+
+def search_tools(queryset: QuerySet, query: str) -> QuerySet:
+    """
+    Search AI tools with the configured backend.
+
+    Args:
+        queryset: The AI tools to search
+        query: The query typed by the user
+
+    Returns:
+        The matching tools, best first (see SearchBackend.search)
+    """
+    return get_search_backend().search(queryset, query)
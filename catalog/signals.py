@@ -0,0 +1,78 @@
+"""
+Signal handlers for the catalog app.
+"""
+import logging
+from typing import Any
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from catalog.autocomplete import invalidate_autocomplete_index
+from catalog.facets import invalidate_facets
+from catalog.models import AITool, Rating
+from catalog.search import ensure_search_index, get_search_backend
+from catalog.snapshot import invalidate_catalog_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_delete, sender=Rating, dispatch_uid='catalog_rating_deleted')
+def remove_rating_from_aggregates(sender: Any, instance: Rating, **kwargs: Any) -> None:
+    """
+    Take a deleted rating out of its tool's aggregates.
+
+    A signal rather than Rating.delete so queryset deletes and cascades (a
+    user account being deleted) are counted too. It runs inside the delete's
+    transaction.
+    """
+    AITool.apply_rating_change(instance.ai_tool_id, removed=instance.stars)
+
+
+@receiver(post_save, sender=AITool, dispatch_uid='catalog_search_tool_saved')
+def index_tool_for_search(sender: Any, instance: AITool, **kwargs: Any) -> None:
+    """Refresh a saved tool in the full-text search index."""
+    try:
+        get_search_backend().index_tool(instance)
+    except Exception as e:
+        # A stale search entry is fixed by rebuild_search_index; failing the save is worse
+        logger.warning(f"Search index update failed for AI tool {instance.pk}: {str(e)}")
+
+
+@receiver(post_delete, sender=AITool, dispatch_uid='catalog_search_tool_deleted')
+def remove_tool_from_search(sender: Any, instance: AITool, **kwargs: Any) -> None:
+    """Remove a deleted tool from the full-text search index."""
+    try:
+        get_search_backend().remove_tool(instance.pk)
+    except Exception as e:
+        logger.warning(f"Search index removal failed for AI tool {instance.pk}: {str(e)}")
+
+
+@receiver(post_save, sender=AITool, dispatch_uid='catalog_caches_tool_saved')
+@receiver(post_delete, sender=AITool, dispatch_uid='catalog_caches_tool_deleted')
+def refresh_catalog_caches(sender: Any, **kwargs: Any) -> None:
+    """Reload the catalog snapshot, autocomplete index and facet counts when an AI tool changes."""
+    invalidate_catalog_snapshot()
+    invalidate_autocomplete_index()
+    invalidate_facets()
+
+
+@receiver(post_save, sender=AITool, dispatch_uid='catalog_related_tool_saved')
+def mark_related_tools_stale(sender: Any, instance: AITool, update_fields: Any = None, **kwargs: Any) -> None:
+    """
+    Flag a saved tool for `rebuild_related_tools --stale`.
+
+    Computing similarities reads the whole catalog, so it is never done while
+    saving: imports and admin saves only pay for this UPDATE.
+    """
+    if not getattr(settings, 'CATALOG_RELATED_UPDATE_ON_SAVE', True):
+        return
+    if update_fields is not None and not {'name', 'category', 'description'} & set(update_fields):
+        return
+    AITool.objects.filter(pk=instance.pk).update(related_stale=True)
+    instance.related_stale = True
+
+
+def create_search_index(sender: Any, using: str, **kwargs: Any) -> None:
+    """Create the full-text search index after migrate; connected to post_migrate in CatalogConfig.ready."""
+    ensure_search_index(using)
@@ -0,0 +1,403 @@
+"""
+Related AI tools, precomputed from descriptions and user behaviour.
+
+The similarity of two tools blends three cosine similarities:
+
+- text: TF-IDF vectors of the tool name, category and description;
+- favorites: users who favorite one tool also favorite the other;
+- usage: users who chat with one tool also chat with the other.
+
+The co-favorite and co-usage similarities are the number of users sharing
+both tools divided by the geometric mean of their user counts. The best
+CATALOG_RELATED_TOOLS_COUNT neighbors of each tool are stored in the
+``RelatedTool`` table, so a detail page reads them with one indexed query.
+
+The ``rebuild_related_tools`` command recomputes the whole table. Saving a
+tool only flags it (``AITool.related_stale``): reading the catalog for its
+similarities is too slow for a request or a bulk import. ``rebuild_related_tools
+--stale``, run every few minutes, then recomputes the neighbors of the flagged
+tools from a single read of the catalog, and adds each to, or re-scores it
+in, the lists of the tools it is now close to. A deleted tool disappears from
+every list with its rows. Drift between rebuilds is fixed by the next one.
+
+NumPy is an optional dependency: without it the table is left as it is, and
+tools without stored neighbors show other tools of their category.
+"""
+import logging
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count
+
+from catalog.models import AITool, RelatedTool
+from interaction.models import Conversation
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Users with more tools than this only count for their first ones, so pair counting stays linear
+MAX_TOOLS_PER_USER = 200
+# Tool rows scored per matrix product during a rebuild
+BLOCK_SIZE = 256
+
+
+def tokenize(text: str) -> List[str]:
+    """Split a text into lowercase words of two characters or more."""
+    return [token for token in _TOKEN_RE.findall(text.lower()) if len(token) > 1]
+
+
+def tfidf_matrix(documents: Sequence[List[str]], max_features: int) -> Any:
+    """
+    Build the TF-IDF vectors of tokenized documents.
+
+    Only words found in at least two documents, and in at most 80% of them,
+    are kept (a word of a single document makes nothing similar), the most
+    widespread first up to ``max_features``. Term frequencies are
+    logarithmic and every row is L2-normalised, so dot products are cosines.
+
+    Args:
+        documents: The words of each document
+        max_features: Most words kept
+
+    Returns:
+        Float32 matrix of shape (len(documents), number of words kept)
+    """
+    counts = [Counter(words) for words in documents]
+    document_frequency: Counter = Counter()
+    for words in counts:
+        document_frequency.update(words.keys())
+    max_df = max(2, int(len(documents) * 0.8))
+    kept = sorted(
+        (word for word, df in document_frequency.items() if 2 <= df <= max_df),
+        key=lambda word: (-document_frequency[word], word),
+    )[:max_features]
+    vocabulary = {word: index for index, word in enumerate(kept)}
+
+    matrix = np.zeros((len(documents), len(vocabulary)), dtype=np.float32)
+    for row, words in enumerate(counts):
+        for word, count in words.items():
+            column = vocabulary.get(word)
+            if column is not None:
+                idf = math.log((1 + len(documents)) / (1 + document_frequency[word])) + 1
+                matrix[row, column] = (1 + math.log(count)) * idf
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+def co_occurrence(pairs: Iterable[Tuple[Any, Any]], index: Dict[Any, int],
+                  users_per_tool: Optional[Dict[Any, int]] = None) -> List[Dict[int, float]]:
+    """
+    Compute the cosine similarity of tools from the users they share.
+
+    Args:
+        pairs: (user id, tool id) pairs; duplicates are ignored
+        index: Row of each tool id
+        users_per_tool: Number of users of each tool id, when ``pairs``
+            only holds some users; counted from ``pairs`` otherwise
+
+    Returns:
+        For each row, the rows of the tools sharing users with it and their similarity
+    """
+    tools_by_user: Dict[Any, List[int]] = defaultdict(list)
+    seen = set()
+    for user_id, tool_id in pairs:
+        row = index.get(tool_id)
+        if row is None or (user_id, row) in seen:
+            continue
+        seen.add((user_id, row))
+        if len(tools_by_user[user_id]) < MAX_TOOLS_PER_USER:
+            tools_by_user[user_id].append(row)
+
+    users: Counter = Counter()
+    shared: Dict[Tuple[int, int], int] = Counter()
+    for rows in tools_by_user.values():
+        users.update(rows)
+        for position, first in enumerate(rows):
+            for second in rows[position + 1:]:
+                shared[(first, second) if first < second else (second, first)] += 1
+
+    if users_per_tool is not None:
+        users = Counter({index[tool_id]: count for tool_id, count in users_per_tool.items() if tool_id in index})
+
+    similarities: List[Dict[int, float]] = [{} for _ in index]
+    for (first, second), count in shared.items():
+        similarity = count / math.sqrt(max(users[first], count) * max(users[second], count))
+        similarities[first][second] = similarity
+        similarities[second][first] = similarity
+    return similarities
+
+
+class SimilarityModel:
+    """
+    Similarities between all AI tools, computed from one read of the catalog.
+
+    Attributes:
+        tool_ids: Tool ids, in row order
+        index: Row of each tool id
+    """
+
+    def __init__(self, tool_ids: Sequence[Any], text: Any,
+                 favorites: List[Dict[int, float]], usage: List[Dict[int, float]]) -> None:
+        self.tool_ids = list(tool_ids)
+        self.index = {tool_id: row for row, tool_id in enumerate(self.tool_ids)}
+        self.text = text
+        self.favorites = favorites
+        self.usage = usage
+        self.text_weight = float(getattr(settings, 'CATALOG_RELATED_TEXT_WEIGHT', 0.6))
+        self.favorite_weight = float(getattr(settings, 'CATALOG_RELATED_FAVORITE_WEIGHT', 0.25))
+        self.usage_weight = float(getattr(settings, 'CATALOG_RELATED_USAGE_WEIGHT', 0.15))
+
+    @classmethod
+    def load(cls, for_tools: Optional[Iterable[Any]] = None) -> 'SimilarityModel':
+        """
+        Read the tools, favorites and conversations needed for the similarities.
+
+        Args:
+            for_tools: Only the rows of these tool ids will be scored, so
+                only the users of these tools are read; None for all tools
+
+        Returns:
+            The model
+        """
+        rows = list(AITool.objects.order_by('pk').values_list('pk', 'name', 'category', 'description'))
+        tool_ids = [pk for pk, _, _, _ in rows]
+        index = {tool_id: row for row, tool_id in enumerate(tool_ids)}
+        text = tfidf_matrix(
+            [tokenize(f'{name} {category} {description}') for _, name, category, description in rows],
+            int(getattr(settings, 'CATALOG_RELATED_MAX_FEATURES', 5000)),
+        )
+
+        field = get_user_model()._meta.get_field('favorites')
+        Favorite = field.remote_field.through
+        user_column, tool_column = field.m2m_column_name(), field.m2m_reverse_name()
+        favorites = Favorite.objects.all()
+        usage = Conversation.objects.filter(ai_tool__isnull=False)
+        favorite_totals = usage_totals = None
+        if for_tools is not None:
+            # Only the users of these tools matter, but similarities divide by every user of a tool
+            for_tools = list(for_tools)
+            favorites = favorites.filter(**{
+                f'{user_column}__in': Favorite.objects.filter(**{f'{tool_column}__in': for_tools}).values(user_column)
+            })
+            usage = usage.filter(user_id__in=usage.filter(ai_tool_id__in=for_tools).values('user_id'))
+            favorite_totals = dict(
+                Favorite.objects.values_list(tool_column).annotate(users=Count(user_column)).order_by()
+            )
+            usage_totals = dict(
+                Conversation.objects.filter(ai_tool__isnull=False).values_list('ai_tool_id')
+                .annotate(users=Count('user_id', distinct=True)).order_by()
+            )
+        favorite_pairs = favorites.values_list(user_column, tool_column).iterator(chunk_size=10000)
+        usage_pairs = usage.values_list('user_id', 'ai_tool_id').distinct().iterator(chunk_size=10000)
+        return cls(
+            tool_ids,
+            text,
+            co_occurrence(favorite_pairs, index, favorite_totals),
+            co_occurrence(usage_pairs, index, usage_totals),
+        )
+
+    def scores(self, rows: Sequence[int]) -> Any:
+        """
+        Score some tools against every tool.
+
+        Args:
+            rows: Rows of the tools to score
+
+        Returns:
+            Matrix of shape (len(rows), number of tools); a tool's score against itself is -inf
+        """
+        scores = self.text[list(rows)] @ self.text.T * self.text_weight
+        for position, row in enumerate(rows):
+            for other, similarity in self.favorites[row].items():
+                scores[position, other] += self.favorite_weight * similarity
+            for other, similarity in self.usage[row].items():
+                scores[position, other] += self.usage_weight * similarity
+            scores[position, row] = -np.inf
+        return scores
+
+    def neighbors(self, rows: Sequence[int], count: int) -> Dict[Any, List[Tuple[Any, float]]]:
+        """
+        Find the most similar tools of some tools.
+
+        Args:
+            rows: Rows of the tools
+            count: Most neighbors per tool
+
+        Returns:
+            Dictionary mapping each tool id to its (tool id, score) neighbors, best first;
+            tools with nothing in common (score 0) are left out
+        """
+        found: Dict[Any, List[Tuple[Any, float]]] = {}
+        for start in range(0, len(rows), BLOCK_SIZE):
+            block = rows[start:start + BLOCK_SIZE]
+            scores = self.scores(block)
+            keep = min(count, scores.shape[1] - 1)
+            for position, row in enumerate(block):
+                if keep <= 0:
+                    found[self.tool_ids[row]] = []
+                    continue
+                best = np.argpartition(-scores[position], keep - 1)[:keep]
+                best = best[np.argsort(-scores[position, best])]
+                found[self.tool_ids[row]] = [
+                    (self.tool_ids[other], float(scores[position, other]))
+                    for other in best.tolist()
+                    if scores[position, other] > 0
+                ]
+        return found
+
+
+def _related_count() -> int:
+    return max(int(getattr(settings, 'CATALOG_RELATED_TOOLS_COUNT', 10)), 1)
+
+
+def rebuild_related_tools(batch_size: int = 5000) -> int:
+    """
+    Recompute the neighbors of every AI tool and replace the RelatedTool table.
+
+    Args:
+        batch_size: Rows per INSERT
+
+    Returns:
+        Number of neighbors stored
+
+    Raises:
+        RuntimeError: If NumPy is not installed
+    """
+    if np is None:
+        raise RuntimeError('NumPy is required to compute related tools')
+    # Cleared first: a tool saved while the catalog is read is flagged again
+    AITool.objects.filter(related_stale=True).update(related_stale=False)
+    model = SimilarityModel.load()
+    neighbors = model.neighbors(range(len(model.tool_ids)), _related_count())
+    entries = [
+        RelatedTool(tool_id=tool_id, related_id=related_id, score=score)
+        for tool_id, related in neighbors.items()
+        for related_id, score in related
+    ]
+    with transaction.atomic():
+        RelatedTool.objects.all().delete()
+        RelatedTool.objects.bulk_create(entries, batch_size=batch_size)
+    logger.info(f"Related tools rebuilt: {len(entries)} neighbors of {len(neighbors)} tools")
+    return len(entries)
+
+
+def update_stale_related_tools(limit: Optional[int] = None, batch_size: int = 5000) -> int:
+    """
+    Recompute the related tools of the AI tools flagged when they were saved.
+
+    The catalog is read once for all of them. When a quarter of the catalog
+    or more is flagged, the whole table is rebuilt instead, which is cheaper
+    than merging that many tools one by one.
+
+    Args:
+        limit: Most flagged tools handled; the others stay flagged. None for all of them
+        batch_size: Rows per INSERT of a full rebuild
+
+    Returns:
+        Number of tools whose related tools were recomputed
+
+    Raises:
+        RuntimeError: If NumPy is not installed
+    """
+    if np is None:
+        raise RuntimeError('NumPy is required to compute related tools')
+    stale = AITool.objects.filter(related_stale=True).order_by('pk').values_list('pk', flat=True)
+    tool_ids = list(stale[:limit] if limit else stale)
+    if not tool_ids:
+        return 0
+    if len(tool_ids) * 4 >= AITool.objects.count():
+        rebuild_related_tools(batch_size=batch_size)
+        return len(tool_ids)
+
+    # Cleared first: a tool saved while the catalog is read is flagged again
+    AITool.objects.filter(pk__in=tool_ids).update(related_stale=False)
+    try:
+        model = SimilarityModel.load(for_tools=tool_ids)
+        for tool_id in tool_ids:
+            _merge_neighbors(model, tool_id)
+    except Exception:
+        AITool.objects.filter(pk__in=tool_ids).update(related_stale=True)
+        raise
+    logger.info(f"Related tools updated for {len(tool_ids)} saved tools")
+    return len(tool_ids)
+
+
+def _merge_neighbors(model: SimilarityModel, tool_id: Any) -> None:
+    """
+    Store the neighbors of one tool and its place in the other tools' lists.
+
+    Similarities are symmetric, so the tool's scores against every other tool
+    also say whether it now belongs among their neighbors.
+
+    Args:
+        model: Similarities loaded for this tool, among others
+        tool_id: The tool that was created or changed
+    """
+    row = model.index.get(tool_id)
+    if row is None:
+        return
+    count = _related_count()
+    scores = model.scores([row])[0]
+    own = model.neighbors([row], count)[tool_id]
+
+    # Tools whose list may gain, re-score or lose this tool
+    candidates = {model.tool_ids[other]: float(scores[other]) for other in np.flatnonzero(scores > 0).tolist()}
+    listing = set(RelatedTool.objects.filter(related_id=tool_id).values_list('tool_id', flat=True))
+    current: Dict[Any, List[Tuple[Any, float]]] = defaultdict(list)
+    for other_id, related_id, score in RelatedTool.objects.filter(
+        tool_id__in=set(candidates) | listing
+    ).exclude(related_id=tool_id).values_list('tool_id', 'related_id', 'score'):
+        current[other_id].append((related_id, score))
+
+    entries = [RelatedTool(tool_id=tool_id, related_id=related_id, score=score) for related_id, score in own]
+    changed = set()
+    for other_id in set(candidates) | listing:
+        related = current[other_id]
+        if other_id in candidates:
+            related = sorted(related + [(tool_id, candidates[other_id])], key=lambda item: -item[1])[:count]
+        if other_id in listing or any(related_id == tool_id for related_id, _ in related):
+            changed.add(other_id)
+            entries.extend(
+                RelatedTool(tool_id=other_id, related_id=related_id, score=score) for related_id, score in related
+            )
+
+    with transaction.atomic():
+        RelatedTool.objects.filter(tool_id__in=changed | {tool_id}).delete()
+        RelatedTool.objects.bulk_create(entries, batch_size=1000)
+
+
+def get_related_tools(tool: AITool, limit: int = 4) -> List[AITool]:
+    """
+    Get the tools most similar to an AI tool.
+
+    Args:
+        tool: The AI tool
+        limit: Most tools returned
+
+    Returns:
+        The stored neighbors, best first (one query); if there are fewer
+        than ``limit``, completed with the most popular tools of the category
+    """
+    related = [
+        entry.related
+        for entry in RelatedTool.objects.filter(tool=tool).select_related('related').order_by('-score')[:limit]
+    ]
+    if len(related) < limit:
+        related.extend(
+            AITool.objects.filter(category=tool.category)
+            .exclude(pk__in=[tool.pk] + [other.pk for other in related])
+            .order_by('-popularity')[:limit - len(related)]
+        )
+    return related
@@ -0,0 +1,148 @@
+"""
+Per-process snapshot of the AI tool catalog for tool selectors.
+
+Chat, history, favorite prompt and comparison pages list every AI tool in a
+dropdown. Rather than reading the whole table on each page view, every
+process keeps an immutable snapshot of the catalog: a tuple of compact
+records, ordered by name, with only the fields the selectors show.
+
+The snapshot is reloaded when its version, kept in the ``default`` cache, is
+bumped by the ``AITool`` signals (see catalog.signals), or when it is older
+than CATALOG_SNAPSHOT_TTL. With a shared cache such as Redis, all workers
+reload after a change; in between, rendering a selector runs no query.
+"""
+import logging
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+from catalog.models import AITool
+from core import metrics
+from core.versioned_cache import VersionedCache
+
+logger = logging.getLogger(__name__)
+
+CATALOG_SNAPSHOT_VERSION_KEY = 'catalog:snapshot:version'
+
+_API_TYPE_LABELS = dict(AITool._meta.get_field('api_type').choices)
+
+
+class ToolRecord:
+    """Read-only summary of an AI tool, as shown in tool selectors."""
+
+    __slots__ = ('id', 'name', 'provider', 'category', 'description', 'api_type', 'image_url')
+
+    def __init__(self, id: uuid.UUID, name: str, provider: str, category: str,
+                 description: str, api_type: str, image_url: str) -> None:
+        self.id = id
+        self.name = name
+        self.provider = provider
+        self.category = category
+        self.description = description
+        self.api_type = api_type
+        self.image_url = image_url
+
+    def get_api_type_display(self) -> str:
+        """Human-readable integration name, like AITool.get_api_type_display()."""
+        return _API_TYPE_LABELS.get(self.api_type, self.api_type)
+
+    def __str__(self) -> str:
+        return self.name
+
+    def __repr__(self) -> str:
+        return f"<ToolRecord {self.name}>"
+
+
+class CatalogSnapshot:
+    """An immutable view of the catalog at one version."""
+
+    __slots__ = ('version', 'tools')
+
+    def __init__(self, version: Optional[int], tools: Tuple[ToolRecord, ...]) -> None:
+        self.version = version
+        # Ordered by name
+        self.tools = tools
+
+
+class CatalogSnapshotCache(VersionedCache):
+    """
+    The catalog snapshot of this process, reloaded when the catalog changes.
+
+    Cache backend failures are logged; the snapshot is then kept until
+    CATALOG_SNAPSHOT_TTL expires (see core.versioned_cache).
+
+    Use the module-level ``catalog_snapshot`` instance rather than creating new ones.
+    """
+
+    version_key = CATALOG_SNAPSHOT_VERSION_KEY
+    name = 'catalog snapshot'
+    ttl_setting = 'CATALOG_SNAPSHOT_TTL'
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._snapshot = CatalogSnapshot(None, ())
+
+    def _load(self, version: Optional[int]) -> None:
+        """Load the catalog with a single query."""
+        storage = AITool._meta.get_field('image').storage
+        rows = AITool.objects.order_by('name').values_list(
+            'id', 'name', 'provider', 'category', 'description', 'api_type', 'image',
+        )
+        tools = tuple(
+            ToolRecord(pk, name, provider, category, description, api_type, storage.url(image) if image else '')
+            for pk, name, provider, category, description, api_type, image in rows
+        )
+        self._snapshot = CatalogSnapshot(version, tools)
+        metrics.increment('catalog_snapshot.loads')
+        logger.debug(f"Catalog snapshot loaded: {len(tools)} tools, version {version}")
+
+    def get(self) -> CatalogSnapshot:
+        """
+        Get the current catalog snapshot, reloading it if the catalog changed.
+
+        Returns:
+            The snapshot; it is never modified, so it can be kept and shared
+        """
+        if self._ensure_fresh():
+            metrics.increment('catalog_snapshot.hits')
+        return self._snapshot
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Report the snapshot state for this process.
+
+        Returns:
+            Dictionary with the loaded version, tool count, loads and hits
+        """
+        return {
+            'version': self._snapshot.version,
+            'tools': len(self._snapshot.tools),
+            'loads': metrics.get_counter('catalog_snapshot.loads'),
+            'hits': metrics.get_counter('catalog_snapshot.hits'),
+        }
+
+
+catalog_snapshot = CatalogSnapshotCache()
+
+
+def get_catalog_tools() -> Tuple[ToolRecord, ...]:
+    """
+    Get every AI tool, ordered by name, from the process-wide snapshot.
+
+    Returns:
+        Read-only tool records (id, name, provider, category, description,
+        api_type and image_url); use AITool for anything else
+    """
+    return catalog_snapshot.get().tools
+
+
+def invalidate_catalog_snapshot() -> None:
+    """
+    Reload the catalog snapshot in every process.
+
+    Called by the AITool signals; call it after ``QuerySet.update()`` on AI
+    tools, which sends no signal.
+    """
+    catalog_snapshot.invalidate()
+
+
+metrics.register_collector('catalog_snapshot', catalog_snapshot.get_stats)
@@ -1,3 +1,648 @@
-from django.test import TestCase
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import requests
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from catalog import similarity
+from catalog.autocomplete import AutocompleteIndex
+from catalog.facets import apply_filters, compute_facets, facet_cache, parse_filters
+from catalog.models import AITool, Rating, RelatedTool
+from catalog.utils import AIService
+from catalog.providers.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, circuit_breaker
+from catalog.providers.coalescing import SingleFlight
+from catalog.providers.exceptions import RateLimitExceeded
+from catalog.providers.health import ProviderHealth, backend_key
+from catalog.providers.rate_limit import RateLimiter
+from catalog.providers.retry import RetryPolicy
+from catalog.providers.simulation import RULES, match_rule
+from core import metrics
+
+
+class RelatedToolsTests(TestCase):
+    """Saving a tool flags it; its related tools are computed off-request."""
+
+    DESCRIPTIONS = [
+        ('Painter', 'Image Generator', 'generate images pictures art from text prompts'),
+        ('Sketcher', 'Image Generator', 'generate images pictures drawings from prompts'),
+        ('Coder', 'Code Generator', 'write python code functions and programs'),
+        ('Pair', 'Code Generator', 'write code programs and fix python bugs'),
+        ('Writer', 'Text Generator', 'write essays articles and text'),
+        ('Scribe', 'Text Generator', 'write articles text and summaries'),
+        ('Composer', 'Audio', 'compose music songs audio'),
+        ('Singer', 'Audio', 'music songs audio voices'),
+    ]
+
+    def setUp(self):
+        self.tools = {
+            name: AITool.objects.create(
+                name=name, provider='Provider', endpoint='https://example.com',
+                category=category, description=description,
+            )
+            for name, category, description in self.DESCRIPTIONS
+        }
+
+    def test_saving_flags_the_tool_without_computing(self):
+        similarity.rebuild_related_tools()
+        tool = self.tools['Painter']
+
+        with mock.patch.object(similarity.SimilarityModel, 'load') as load:
+            tool.description = 'generate images and photos'
+            tool.save()
+
+        load.assert_not_called()
+        self.assertTrue(AITool.objects.get(pk=tool.pk).related_stale)
+
+    def test_saves_that_do_not_change_the_text_are_not_flagged(self):
+        similarity.rebuild_related_tools()
+        tool = self.tools['Painter']
+
+        tool.popularity = 5
+        tool.save(update_fields=['popularity'])
+
+        self.assertFalse(AITool.objects.get(pk=tool.pk).related_stale)
+
+    def test_rebuild_clears_every_flag(self):
+        similarity.rebuild_related_tools()
+
+        self.assertFalse(AITool.objects.filter(related_stale=True).exists())
+        painter = self.tools['Painter']
+        self.assertEqual(similarity.get_related_tools(painter, limit=1), [self.tools['Sketcher']])
+
+    def test_stale_tools_are_merged_into_the_table(self):
+        similarity.rebuild_related_tools()
+        tool = AITool.objects.create(
+            name='Illustrator', provider='Provider', endpoint='https://example.com',
+            category='Image Generator', description='generate images pictures art drawings',
+        )
+
+        self.assertEqual(similarity.update_stale_related_tools(), 1)
+
+        self.assertFalse(AITool.objects.get(pk=tool.pk).related_stale)
+        related = set(RelatedTool.objects.filter(tool=tool).values_list('related__name', flat=True))
+        self.assertTrue({'Painter', 'Sketcher'} <= related)
+        # The new tool also joins the lists of the tools it is close to
+        self.assertTrue(RelatedTool.objects.filter(tool=self.tools['Painter'], related=tool).exists())
+        self.assertEqual(similarity.update_stale_related_tools(), 0)
+
+    def test_failed_update_keeps_the_flags(self):
+        similarity.rebuild_related_tools()
+        tool = self.tools['Coder']
+        tool.save()
+
+        with mock.patch.object(similarity.SimilarityModel, 'load', side_effect=RuntimeError('boom')):
+            with self.assertRaises(RuntimeError):
+                similarity.update_stale_related_tools()
+
+        self.assertTrue(AITool.objects.get(pk=tool.pk).related_stale)
+
+
+class RatingStatsTests(TestCase):
+    """Ratings keep the tool's aggregates and its popularity, the average rounded to 2 decimals."""
+
+    def setUp(self):
+        self.tool = AITool.objects.create(name='Painter', provider='Provider', endpoint='https://example.com',
+                                          category='Image Generator', description='Painter')
+        User = get_user_model()
+        for index, stars in enumerate((4, 4, 3)):
+            user = User.objects.create_user(username=f'user{index}', email=f'user{index}@example.com', password='secret')
+            Rating.objects.create(user=user, ai_tool=self.tool, stars=stars)
+
+    def test_popularity_is_the_rounded_average(self):
+        self.tool.refresh_from_db()
+
+        self.assertEqual((self.tool.rating_sum, self.tool.rating_count), (11, 3))
+        self.assertEqual(self.tool.popularity, 3.67)
+
+    def test_recompute_matches_the_incremental_updates(self):
+        AITool.objects.filter(pk=self.tool.pk).update(popularity=0, rating_sum=0, rating_count=0)
+
+        AITool.refresh_rating_stats()
+
+        self.tool.refresh_from_db()
+        self.assertEqual((self.tool.rating_sum, self.tool.rating_count, self.tool.popularity), (11, 3, 3.67))
+
+
+class FacetTests(TestCase):
+    """Facet counts agree with the tools listed for the same filters."""
+
+    def setUp(self):
+        for name, category, is_free, is_featured in (
+            ('Painter', 'Image Generator', True, True),
+            ('Sketcher', 'Image Generator', False, False),
+            ('Coder', 'Code Generator', True, False),
+            ('Writer', 'Text Generator', False, True),
+            ('Scribe', 'Text Generator', True, False),
+        ):
+            AITool.objects.create(
+                name=name, provider='Provider', endpoint='https://example.com', category=category,
+                description=name, is_free=is_free, is_featured=is_featured,
+            )
+
+    def _counts(self, facets, param):
+        return {value['value']: value['count'] for value in facets[param]}
+
+    def test_counts_match_the_filtered_list(self):
+        filters = parse_filters({'pricing': 'free'})
+        facets = compute_facets(filters)
+
+        listed = apply_filters(AITool.objects.all(), filters)
+        self.assertEqual(sum(self._counts(facets, 'category').values()), listed.count())
+        self.assertEqual(self._counts(facets, 'category'), {'Image Generator': 1, 'Code Generator': 1, 'Text Generator': 1})
+        # A facet's own filter is left out of its counts
+        self.assertEqual(self._counts(facets, 'pricing'), {'free': 3, 'paid': 2})
+
+    def test_filters_on_other_facets_narrow_the_counts(self):
+        facets = compute_facets(parse_filters({'category': 'Image Generator', 'featured': 'true'}))
+
+        self.assertEqual(self._counts(facets, 'pricing'), {'free': 1})
+        self.assertEqual(self._counts(facets, 'featured'), {True: 1, False: 1})
+
+    def test_unknown_pricing_is_ignored(self):
+        self.assertEqual(parse_filters({'pricing': 'cheap'}), {})
+
+    def test_cache_keys_depend_on_every_filter(self):
+        free = facet_cache.make_key(1, parse_filters({'pricing': 'free'}), '')
+        paid = facet_cache.make_key(1, parse_filters({'pricing': 'paid'}), '')
+
+        self.assertNotEqual(free, paid)
+        self.assertNotEqual(free, facet_cache.make_key(1, {}, ''))
+
+
+@override_settings(AI_COALESCE_ENABLED=True, AI_RETRY_DEADLINE=45, AI_RATE_LIMIT_ENABLED=True,
+                   AI_RATE_LIMIT_MODE='queue', AI_RATE_LIMIT_QUEUE_TIMEOUT=10, AI_COALESCE_GRACE=5)
+class SingleFlightTests(TestCase):
+    """Concurrent identical calls share one provider call, and followers wait as long as it may take."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_timeout_covers_the_retry_deadline_and_rate_limit_wait(self):
+        flight = SingleFlight()
+
+        self.assertEqual(flight.timeout(), 60)
+        # Each failover may take as long as the first call
+        self.assertEqual(flight.timeout(3), 170)
+        with self.settings(AI_RATE_LIMIT_MODE='reject'):
+            self.assertEqual(flight.timeout(), 50)
+
+    def test_the_lock_lives_as_long_as_the_leader_may_take(self):
+        flight = SingleFlight()
+        cache = mock.Mock(add=mock.Mock(return_value=True), get=mock.Mock(return_value=None))
+
+        with mock.patch.object(SingleFlight, 'cache', new_callable=mock.PropertyMock, return_value=cache):
+            flight.do('key', lambda: {'success': True}, calls=2)
+
+        self.assertEqual(cache.add.call_args.kwargs['timeout'], flight.timeout(2))
+
+    def test_concurrent_identical_calls_share_one_provider_call(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        finish = threading.Event()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            started.set()
+            finish.wait(5)
+            return {'success': True, 'data': 'Hello!'}
+
+        results = []
+        waiting = metrics.get_counter('ai_coalesce.followers')
+        leader = threading.Thread(target=lambda: results.append(flight.do('key', fetch)))
+        leader.start()
+        started.wait(5)
+        followers = [threading.Thread(target=lambda: results.append(flight.do('key', fetch))) for _ in range(3)]
+        for thread in followers:
+            thread.start()
+        deadline = time.monotonic() + 5
+        while metrics.get_counter('ai_coalesce.followers') < waiting + 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        finish.set()
+        for thread in [leader] + followers:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'success': True, 'data': 'Hello!'}] * 4)
+        self.assertEqual(flight.get_stats()['in_flight'], 0)
+
+    @override_settings(AI_RETRY_DEADLINE=0.2, AI_RATE_LIMIT_QUEUE_TIMEOUT=0, AI_COALESCE_GRACE=0)
+    def test_followers_give_up_on_a_stuck_leader(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        finish = threading.Event()
+
+        def fetch():
+            started.set()
+            finish.wait(5)
+            return {'success': True}
+
+        leader = threading.Thread(target=flight.do, args=('key', fetch))
+        leader.start()
+        started.wait(5)
+        try:
+            result = flight.do('key', fetch)
+        finally:
+            finish.set()
+            leader.join(5)
+
+        self.assertFalse(result['success'])
+        self.assertIn('Timed out', result['error'])
+
+
+    def _wait_for_remote_follower(self, followers):
+        deadline = time.monotonic() + 5
+        while metrics.get_counter('ai_coalesce.remote_followers') <= followers and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    @override_settings(AI_COALESCE_POLL_INTERVAL=0.01)
+    def test_one_upstream_call_across_processes(self):
+        # Each SingleFlight stands for the registry of one worker process; they only share the cache
+        leader_process, follower_process = SingleFlight(), SingleFlight()
+        followers = metrics.get_counter('ai_coalesce.remote_followers')
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            # Publish only once the other process is polling for the result
+            self._wait_for_remote_follower(followers)
+            return {'success': True, 'data': 'Hello!'}
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(leader_process.do('key', fetch)))
+        leader.start()
+        while not calls:
+            time.sleep(0.01)
+        results.append(follower_process.do('key', fetch))
+        leader.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'success': True, 'data': 'Hello!'}] * 2)
+
+    @override_settings(AI_COALESCE_POLL_INTERVAL=0.01)
+    def test_one_upstream_call_across_processes_async(self):
+        leader_process, follower_process = SingleFlight(), SingleFlight()
+        followers = metrics.get_counter('ai_coalesce.remote_followers')
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            while metrics.get_counter('ai_coalesce.remote_followers') <= followers:
+                await asyncio.sleep(0.01)
+            return {'success': True, 'data': 'Hello!'}
+
+        async def run():
+            leader = asyncio.ensure_future(leader_process.ado('key', fetch))
+            while not calls:
+                await asyncio.sleep(0.01)
+            return [await asyncio.wait_for(follower_process.ado('key', fetch), 5), await leader]
+
+        results = async_to_sync(run)()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'success': True, 'data': 'Hello!'}] * 2)
+
+
+@override_settings(AI_HEALTH_ENABLED=True, AI_FAILOVER_CHAIN=[])
+class ProviderHealthTests(TestCase):
+    """Only calls that reached the provider count towards its health."""
+
+    def setUp(self):
+        cache.clear()
+        self.health = ProviderHealth()
+        self.backend = backend_key('openai', 'gpt-4')
+
+    def _record(self, response):
+        self.health.record_response('openai', 'gpt-4', time.monotonic(), response)
+        return self.health.get([self.backend])[self.backend]
+
+    def test_provider_errors_are_counted(self):
+        health = self._record({'success': False, 'status_code': 503})
+
+        self.assertEqual((health.calls, health.errors), (1, 1))
+
+    def test_local_fast_fails_are_not_counted(self):
+        self._record(circuit_breaker.open_response('openai'))
+        health = self._record({'success': False, 'error': 'Rate limit reached', 'rate_limited': True, 'retry_after': 2})
+
+        self.assertEqual(health.calls, 0)
+
+    def test_dispatch_skips_an_open_circuit(self):
+        with mock.patch.object(AIService, '_call_service', return_value=circuit_breaker.open_response('openai')), \
+                mock.patch('catalog.utils.provider_health', self.health):
+            response = AIService._dispatch('Hi', {'api_type': 'openai', 'api_model': 'gpt-4'})
+
+        self.assertTrue(response['circuit_open'])
+        self.assertEqual(self.health.get([self.backend])[self.backend].calls, 0)
+
+    def test_latency_is_the_transport_time(self):
+        clock = FakeClock()
+        reply = mock.Mock(status_code=200, json=mock.Mock(return_value={'choices': [{'message': {'content': 'Hi'}}]}))
+
+        def post(*args, **kwargs):
+            clock.sleep(0.3)
+            return reply
+
+        def call(provider, send):
+            # Backoff before the attempt that succeeds
+            clock.sleep(10)
+            return send(30)
+
+        with mock.patch('catalog.utils.time', clock), \
+                mock.patch('catalog.utils.get_api_key', return_value='key'), \
+                mock.patch('catalog.utils.rate_limiter', mock.Mock(acquire=lambda *args: clock.sleep(5))), \
+                mock.patch('catalog.utils.retry_policy', mock.Mock(call=call)), \
+                mock.patch('catalog.utils.transport', mock.Mock(post=post)), \
+                mock.patch('catalog.utils.provider_health', self.health), \
+                mock.patch.object(self.health, 'record') as record:
+            response = AIService._dispatch('Hi', {'api_type': 'openai', 'api_model': 'gpt-4'})
+
+        self.assertTrue(response['success'])
+        backend, elapsed, failed = record.call_args.args
+        self.assertEqual((backend, failed), (self.backend, False))
+        self.assertAlmostEqual(elapsed, 0.3)
+
+    def test_failovers_are_recorded_under_the_backend_they_reach(self):
+        responses = [{'success': False, 'status_code': 503}, {'success': False, 'status_code': 503},
+                     {'success': True, 'data': 'Hi'}]
+        config = {'api_type': 'openai', 'api_model': 'gpt-4', 'failover_chain': ['huggingface', 'simulation']}
+        with mock.patch.object(AIService, '_call_service', side_effect=responses), \
+                mock.patch('catalog.utils.provider_health', self.health), \
+                mock.patch.object(self.health, 'record') as record:
+            response = AIService._dispatch('Hi', config)
+
+        self.assertEqual(response['failover'], 'simulation')
+        self.assertEqual([call.args[0] for call in record.call_args_list],
+                         [self.backend, backend_key('huggingface', 'google/flan-t5-base')])
+
+
+class AutocompleteTests(TestCase):
+    """Suggestions keep working, without a rebuild per keystroke, while the cache is down."""
+
+    def setUp(self):
+        cache.clear()
+        for name, popularity in (('ChatGPT', 10), ('Midjourney', 8)):
+            AITool.objects.create(
+                name=name, provider='Provider', endpoint='https://example.com',
+                category='Text', description=name, popularity=popularity,
+            )
+        self.index = AutocompleteIndex()
+
+    def _builds(self):
+        return metrics.get_counter('autocomplete.index_builds')
+
+    @override_settings(CATALOG_AUTOCOMPLETE_VERSION_CHECK_INTERVAL=0)
+    def test_unreadable_version_keeps_the_current_build(self):
+        self.assertEqual(self.index.suggest('chatgtp')[0]['name'], 'ChatGPT')
+        builds = self._builds()
+
+        with mock.patch.object(AutocompleteIndex, 'cache', new_callable=mock.PropertyMock,
+                               return_value=mock.Mock(get=mock.Mock(side_effect=ConnectionError('down')))):
+            for query in ('m', 'mi', 'mid', 'midj'):
+                self.assertEqual(self.index.suggest(query)[0]['name'], 'Midjourney')
+
+        self.assertEqual(self._builds(), builds)
+
+    @override_settings(CATALOG_AUTOCOMPLETE_VERSION_CHECK_INTERVAL=0, CATALOG_AUTOCOMPLETE_TTL=0)
+    def test_expired_build_is_rebuilt_while_the_cache_is_down(self):
+        self.index.suggest('chat')
+        builds = self._builds()
+
+        with mock.patch.object(AutocompleteIndex, 'cache', new_callable=mock.PropertyMock,
+                               return_value=mock.Mock(get=mock.Mock(side_effect=ConnectionError('down')))):
+            self.index.suggest('mid')
+
+        self.assertEqual(self._builds(), builds + 1)
+
+
+class SimulationRuleTests(TestCase):
+    """The simulator answers with the highest-priority rule whose keyword appears in the prompt."""
+
+    def test_matches_the_first_rule_with_a_keyword(self):
+        prompts = ['Tell me about Python code', 'HELLO there', 'What about the stock market?', 'zzz', '']
+
+        for prompt in prompts:
+            expected = next((index for index, (words, _) in enumerate(RULES)
+                             if any(word in prompt.lower() for word in words)), None)
+            self.assertEqual(match_rule(prompt), expected, prompt)
+        self.assertEqual(RULES[match_rule('Tell me about Python code')][0][0], 'code')
+
+
+class FakeClock:
+    """Stands in for the time module, so waits take no real time."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@override_settings(AI_CIRCUIT_ENABLED=True, AI_CIRCUIT_FAILURE_THRESHOLD=3,
+                   AI_CIRCUIT_FAILURE_WINDOW=60, AI_CIRCUIT_RECOVERY_TIMEOUT=30)
+class CircuitBreakerTests(TestCase):
+    """A provider's circuit opens after repeated failures and one probe decides when it closes."""
+
+    FAILURE = {'success': False, 'status_code': 503}
+
+    def setUp(self):
+        cache.clear()
+        self.breaker = CircuitBreaker()
+        self.clock = FakeClock()
+        patcher = mock.patch('catalog.providers.circuit_breaker.time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _fail(self, times):
+        for _ in range(times):
+            self.breaker.record('openai', self.FAILURE)
+
+    def test_opens_at_the_failure_threshold(self):
+        self._fail(2)
+        self.assertTrue(self.breaker.allow_request('openai'))
+
+        self._fail(1)
+
+        self.assertEqual(self.breaker.get_state('openai'), OPEN)
+        self.assertFalse(self.breaker.allow_request('openai'))
+        # Other providers are not affected
+        self.assertTrue(self.breaker.allow_request('huggingface'))
+
+    def test_client_errors_and_successes_do_not_open_it(self):
+        self._fail(2)
+        self.breaker.record('openai', {'success': True})
+        self._fail(2)
+        for _ in range(5):
+            self.breaker.record('openai', {'success': False, 'status_code': 400})
+
+        self.assertEqual(self.breaker.get_state('openai'), CLOSED)
+
+    def test_single_probe_closes_it_after_recovery(self):
+        self._fail(3)
+        self.clock.now += 31
+
+        self.assertEqual(self.breaker.get_state('openai'), HALF_OPEN)
+        self.assertTrue(self.breaker.allow_request('openai'))
+        self.assertFalse(self.breaker.allow_request('openai'))
+
+        self.breaker.record('openai', {'success': True})
+        self.assertEqual(self.breaker.get_state('openai'), CLOSED)
+        self.assertTrue(self.breaker.allow_request('openai'))
+
+    def test_failed_probe_reopens_it(self):
+        self._fail(3)
+        self.clock.now += 31
+        self.assertTrue(self.breaker.allow_request('openai'))
+
+        self._fail(1)
+
+        self.assertEqual(self.breaker.get_state('openai'), OPEN)
+        self.clock.now += 29
+        self.assertFalse(self.breaker.allow_request('openai'))
+
+
+def _response(status_code, retry_after=None):
+    return SimpleNamespace(status_code=status_code, headers={'Retry-After': retry_after} if retry_after else {})
+
+
+@override_settings(AI_RETRY_MAX_ATTEMPTS=3, AI_RETRY_BASE_DELAY=0.5, AI_RETRY_MAX_DELAY=8,
+                   AI_RETRY_DEADLINE=45, AI_RETRY_BUDGET_RATIO=0.2, AI_RETRY_BUDGET_MAX=10)
+class RetryPolicyTests(TestCase):
+    """Only failures the provider certainly did not process are retried, within the deadline and budget."""
+
+    def setUp(self):
+        self.policy = RetryPolicy()
+        self.clock = FakeClock()
+        patcher = mock.patch('catalog.providers.retry.time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _call(self, *outcomes):
+        sent = []
+
+        def send(timeout):
+            sent.append(timeout)
+            outcome = outcomes[len(sent) - 1]
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        return self.policy.call('openai', send), sent
+
+    def test_throttling_is_retried_after_retry_after(self):
+        response, sent = self._call(_response(429, '2'), _response(200))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(sent), 2)
+        self.assertEqual(self.clock.sleeps, [2.0])
+
+    def test_attempts_are_bounded(self):
+        response, sent = self._call(*[_response(503)] * 5)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(len(sent), 3)
+
+    def test_backoff_is_jittered_and_capped(self):
+        delays = [self.policy.backoff(attempt) for attempt in range(10) for _ in range(20)]
+
+        self.assertTrue(all(0 <= delay <= 8 for delay in delays))
+        self.assertGreater(len(set(delays)), 1)
+
+    def test_errors_the_provider_may_have_processed_are_not_retried(self):
+        response, sent = self._call(_response(500), _response(200))
+        self.assertEqual((response.status_code, len(sent)), (500, 1))
+
+        with self.assertRaises(requests.exceptions.ReadTimeout):
+            self._call(requests.exceptions.ReadTimeout('read timed out'), _response(200))
+
+    def test_connect_timeouts_are_retried(self):
+        response, sent = self._call(requests.exceptions.ConnectTimeout('connect timed out'), _response(200))
+
+        self.assertEqual((response.status_code, len(sent)), (200, 2))
+
+    def test_waits_past_the_deadline_are_not_made(self):
+        response, sent = self._call(_response(429, '60'), _response(200))
+
+        self.assertEqual((response.status_code, len(sent)), (429, 1))
+        self.assertEqual(self.clock.sleeps, [])
+
+    @override_settings(AI_RETRY_BUDGET_MAX=1, AI_RETRY_BUDGET_RATIO=0)
+    def test_retry_budget_stops_retry_storms(self):
+        first, _ = self._call(_response(503), _response(200))
+        second, sent = self._call(_response(503), _response(200))
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual((second.status_code, len(sent)), (503, 1))
+
+
+@override_settings(AI_RATE_LIMIT_ENABLED=True, AI_RATE_LIMITS={'openai': {'rpm': 2, 'tpm': 100}},
+                   AI_RATE_LIMIT_MODE='reject', AI_RATE_LIMIT_QUEUE_TIMEOUT=10)
+class RateLimiterTests(TestCase):
+    """Calls take from per-key request and token buckets, waiting for them or failing fast."""
+
+    def setUp(self):
+        self.limiter = RateLimiter()
+        self.clock = FakeClock()
+        patcher = mock.patch('catalog.providers.rate_limit.time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_requests_over_the_limit_are_rejected(self):
+        self.limiter.acquire('openai', 'key-1', 10)
+        self.limiter.acquire('openai', 'key-1', 10)
+
+        with self.assertRaises(RateLimitExceeded) as raised:
+            self.limiter.acquire('openai', 'key-1', 10)
+        # One request comes back every 30 seconds at 2 per minute
+        self.assertAlmostEqual(raised.exception.retry_after, 30)
+        # Each API key has its own buckets
+        self.limiter.acquire('openai', 'key-2', 10)
+
+    def test_tokens_over_the_limit_are_rejected(self):
+        self.limiter.acquire('openai', 'key-1', 80)
+
+        with self.assertRaises(RateLimitExceeded):
+            self.limiter.acquire('openai', 'key-1', 40)
+
+    def test_calls_larger_than_the_bucket_still_go_through(self):
+        self.limiter.acquire('openai', 'key-1', 1000)
+
+    def test_queued_calls_wait_for_the_bucket(self):
+        self.limiter.acquire('openai', 'key-1', 10)
+        self.limiter.acquire('openai', 'key-1', 10)
+
+        with self.settings(AI_RATE_LIMIT_QUEUE_TIMEOUT=60):
+            self.limiter.acquire('openai', 'key-1', 10, wait=True)
+
+        self.assertEqual(len(self.clock.sleeps), 1)
+        self.assertAlmostEqual(self.clock.sleeps[0], 30)
+
+    def test_queued_calls_give_up_when_the_wait_is_too_long(self):
+        self.limiter.acquire('openai', 'key-1', 10)
+        self.limiter.acquire('openai', 'key-1', 10)
+
+        with self.assertRaises(RateLimitExceeded):
+            self.limiter.acquire('openai', 'key-1', 10, wait=True)
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_buckets_refill_over_time(self):
+        self.limiter.acquire('openai', 'key-1', 10)
+        self.limiter.acquire('openai', 'key-1', 10)
+
+        self.clock.now += 30
+
+        self.limiter.acquire('openai', 'key-1', 10)
@@ -2,19 +2,68 @@
 Utility functions for the catalog app.
 """
 import json
-import requests
+import logging
 import os
 import time
 from django.http import HttpResponse
 from django.conf import settings
-import random
-from typing import Dict, Any, List, Optional, Union
+from typing import Dict, Any, Awaitable, Callable, Iterator, List, Optional, Tuple, Union
 # Import for type annotation
 from typing import TYPE_CHECKING
 
 # Import secure API key management
 from core.security import get_api_key
 
+# Pooled, keep-alive HTTP transport shared by all provider calls
+from catalog.providers.transport import provider_url, transport
+from catalog.providers import streaming
+from catalog.providers.async_client import async_client
+from catalog.providers.cache import response_cache
+from catalog.providers.coalescing import single_flight
+from catalog.providers.circuit_breaker import circuit_breaker
+from catalog.providers.exceptions import ProviderError, RateLimitExceeded
+from catalog.providers.health import provider_health
+from catalog.providers.rate_limit import estimate_tokens, rate_limiter
+from catalog.providers.retry import retry_policy
+from catalog.providers.simulation import simulated_provider
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+# Model asked when a tool, or a failover, does not name one
+DEFAULT_MODELS = {
+    'openai': "gpt-3.5-turbo",
+    'huggingface': "google/flan-t5-base",
+}
+
+
+def _timed(send: Callable[[float], Any], timing: Dict[str, float]) -> Callable[[float], Any]:
+    """
+    Wrap a transport call so ``timing['latency']`` holds the duration of its last attempt.
+    
+    Rate-limit waits and retry backoff happen outside the wrapped call, so
+    they are not part of the provider's latency.
+    """
+    def timed_send(timeout: float) -> Any:
+        started = time.monotonic()
+        try:
+            return send(timeout)
+        finally:
+            timing['latency'] = time.monotonic() - started
+    return timed_send
+
+
+def _atimed(send: Callable[[float], Awaitable[Any]], timing: Dict[str, float]) -> Callable[[float], Awaitable[Any]]:
+    """Async version of _timed."""
+    async def timed_send(timeout: float) -> Any:
+        started = time.monotonic()
+        try:
+            return await send(timeout)
+        finally:
+            timing['latency'] = time.monotonic() - started
+    return timed_send
+
+
 class AIService:
     """Service class for handling AI API interactions."""
     
@@ -37,43 +86,106 @@ class AIService:
         if not api_key:
             return AIService.simulate_ai_response("openai", prompt)
         
+        if not circuit_breaker.allow_request('openai'):
+            return circuit_breaker.open_response('openai')
+        
         try:
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {api_key}"
-            }
-            
-            data = {
-                "model": model,
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.7
-            }
+            rate_limiter.acquire('openai', api_key, estimate_tokens(prompt))
+        except RateLimitExceeded as e:
+            return AIService._rate_limited_response(e)
+        
+        timing: Dict[str, float] = {}
+        try:
+            headers, data = AIService._openai_request(prompt, model, api_key)
             
-            response = requests.post(
-                "https://api.openai.com/v1/chat/completions",
+            response = retry_policy.call('openai', _timed(lambda timeout: transport.post(
+                'openai',
+                provider_url('openai', '/v1/chat/completions'),
                 headers=headers,
                 json=data,
-                timeout=30
-            )
-            
-            response_data = response.json()
+                timeout=timeout
+            ), timing))
             
-            if response.status_code == 200:
-                return {
-                    "success": True,
-                    "data": response_data["choices"][0]["message"]["content"]
-                }
-            else:
-                return {
-                    "success": False,
-                    "error": f"API Error: {response_data.get('error', {}).get('message', 'Unknown error')}"
-                }
+            result = AIService._openai_result(response)
                 
         except Exception as e:
-            return {
+            result = {
                 "success": False,
                 "error": f"Exception: {str(e)}"
             }
+        
+        if 'latency' in timing:
+            result['latency'] = timing['latency']
+        circuit_breaker.record('openai', result)
+        return result
+    
+    @staticmethod
+    def _rate_limited_response(error: RateLimitExceeded) -> Dict[str, Any]:
+        """
+        Convert a rate limiter rejection into the service result format.
+        
+        Args:
+            error: The rate limiter exception
+            
+        Returns:
+            dict: Error response with the time to wait before retrying
+        """
+        return {
+            "success": False,
+            "error": str(error),
+            "rate_limited": True,
+            "retry_after": round(error.retry_after, 1)
+        }
+    
+    @staticmethod
+    def _openai_request(prompt: str, model: str, api_key: str) -> Tuple[Dict[str, str], Dict[str, Any]]:
+        """
+        Build the headers and body of an OpenAI chat completion request.
+        
+        Args:
+            prompt (str): The message to send to the API
+            model (str): The OpenAI model name to use
+            api_key (str): The OpenAI API key
+            
+        Returns:
+            tuple: Request headers and JSON body
+        """
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {api_key}"
+        }
+        
+        data = {
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": 0.7
+        }
+        return headers, data
+    
+    @staticmethod
+    def _openai_result(response: Any) -> Dict[str, Any]:
+        """
+        Convert an OpenAI HTTP response into the service result format.
+        
+        Args:
+            response: A requests or httpx response
+            
+        Returns:
+            dict: Response with success status and data/error
+        """
+        response_data = response.json()
+        
+        if response.status_code == 200:
+            return {
+                "success": True,
+                "data": response_data["choices"][0]["message"]["content"]
+            }
+        else:
+            return {
+                "success": False,
+                "error": f"API Error: {response_data.get('error', {}).get('message', 'Unknown error')}",
+                "status_code": response.status_code
+            }
     
     @staticmethod
     def call_huggingface_api(prompt: str, model: str = "google/flan-t5-base") -> Dict[str, Any]:
@@ -94,45 +206,91 @@ class AIService:
         if not api_key:
             return AIService.simulate_ai_response("huggingface", prompt)
         
+        if not circuit_breaker.allow_request('huggingface'):
+            return circuit_breaker.open_response('huggingface')
+        
         try:
-            API_URL = f"https://api-inference.huggingface.co/models/{model}"
-            headers = {
-                "Authorization": f"Bearer {api_key}"
-            }
-            
-            payload = {
-                "inputs": prompt,
-            }
+            rate_limiter.acquire('huggingface', api_key, estimate_tokens(prompt))
+        except RateLimitExceeded as e:
+            return AIService._rate_limited_response(e)
+        
+        timing: Dict[str, float] = {}
+        try:
+            headers, payload = AIService._huggingface_request(prompt, api_key)
             
-            response = requests.post(
-                API_URL,
+            response = retry_policy.call('huggingface', _timed(lambda timeout: transport.post(
+                'huggingface',
+                provider_url('huggingface', f'/models/{model}'),
                 headers=headers,
                 json=payload,
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                return {
-                    "success": True,
-                    "data": response.json()[0]["generated_text"]
-                }
-            else:
-                return {
-                    "success": False,
-                    "error": f"API Error: {response.text}"
-                }
+                timeout=timeout
+            ), timing))
+            
+            result = AIService._huggingface_result(response)
                 
         except Exception as e:
-            return {
+            result = {
                 "success": False,
                 "error": f"Exception: {str(e)}"
             }
+        
+        if 'latency' in timing:
+            result['latency'] = timing['latency']
+        circuit_breaker.record('huggingface', result)
+        return result
+    
+    @staticmethod
+    def _huggingface_request(prompt: str, api_key: str) -> Tuple[Dict[str, str], Dict[str, Any]]:
+        """
+        Build the headers and body of a Hugging Face inference request.
+        
+        Args:
+            prompt (str): The message to send to the API
+            api_key (str): The Hugging Face API key
+            
+        Returns:
+            tuple: Request headers and JSON body
+        """
+        headers = {
+            "Authorization": f"Bearer {api_key}"
+        }
+        
+        payload = {
+            "inputs": prompt,
+        }
+        return headers, payload
+    
+    @staticmethod
+    def _huggingface_result(response: Any) -> Dict[str, Any]:
+        """
+        Convert a Hugging Face HTTP response into the service result format.
+        
+        Args:
+            response: A requests or httpx response
+            
+        Returns:
+            dict: Response with success status and data/error
+        """
+        if response.status_code == 200:
+            return {
+                "success": True,
+                "data": response.json()[0]["generated_text"]
+            }
+        else:
+            return {
+                "success": False,
+                "error": f"API Error: {response.text}",
+                "status_code": response.status_code
+            }
     
     @staticmethod
     def simulate_ai_response(service_type: str, prompt: str) -> Dict[str, Any]:
         """
         Simulate an AI response for demo purposes when API keys aren't available.
         
+        The latency and error rate of the simulation are configured by the
+        AI_SIMULATION_* settings (see catalog/providers/simulation.py).
+        
         Args:
             service_type (str): The type of AI service ('openai' or 'huggingface')
             prompt (str): The user's prompt
@@ -140,132 +298,97 @@ class AIService:
         Returns:
             dict: Simulated response with success status and data
         """
-        # Add a slight delay to simulate API call latency
-        # This makes the simulation more realistic by mimicking network delay
-        time.sleep(1)
-        
-        # Define a set of generic fallback responses
-        # These will be used if no specific pattern matches the user's prompt
-        responses = [
-            "I'm a simulated AI response since no API key was provided. Your question seems interesting!",
-            "This is a placeholder response. To get real AI responses, please configure the API keys.",
-            "I'm a demo response. In production, this would connect to the actual AI service.",
-            "Thanks for your prompt! This is a simulated response for testing purposes.",
-            "I understand you're asking about something, but I'm just a simulated response."
-        ]
-        
-        # Attempt to generate contextually relevant responses based on prompt content
-        # First, convert to lowercase for case-insensitive matching
-        prompt_lower = prompt.lower()
-        
-        # RESPONSE SELECTION LOGIC:
-        # The following conditional blocks analyze the prompt for specific patterns
-        # and select an appropriate response category
-        
-        # Pattern 1: Greeting detection
-        # Check if the prompt contains common greeting words
-        if any(word in prompt_lower for word in ["hello", "hi", "hey", "greetings"]):
-            response = "Hello! I'm a simulated AI assistant. How can I help you today? I can provide information on various topics, answer questions, or just chat with you."
-        
-        # Pattern 2: Help request detection
-        # Identify if the user is asking for assistance
-        elif "help" in prompt_lower:
-            response = "I'd be happy to help! I can provide information on various topics, answer questions, or assist with tasks. What specifically do you need help with? (Note: I'm currently running in simulation mode without API access, but I'll do my best to assist you.)"
-        
-        # Pattern 3: Weather-related query detection
-        # Check if the user is asking about weather information
-        elif any(word in prompt_lower for word in ["weather", "temperature", "forecast"]):
-            response = "I can't check the real-time weather as I'm running in simulation mode, but I can tell you that weather forecasting involves collecting data from satellites, weather stations, and other sources. This data is then analyzed using complex mathematical models to predict future weather conditions."
-        
-        # Pattern 4: Programming topic detection
-        # Identify if the query is related to programming languages or coding
-        elif any(word in prompt_lower for word in ["code", "programming", "javascript", "python", "java", "html", "css"]):
-            response = "Programming is a fascinating field! Here's a simulated response about coding:\n\nPython is known for its readability and simplicity, making it great for beginners. JavaScript is essential for web development. HTML and CSS are the building blocks of web pages. Java is widely used in enterprise applications.\n\nIf you have a specific programming question, feel free to ask, and I'll provide a simulated response based on common knowledge."
-        
-        # Pattern 5: AI/ML topic detection
-        # Check if the query is about AI, machine learning, or language models
-        elif any(word in prompt_lower for word in ["ai", "artificial intelligence", "model", "gpt", "llm"]):
-            response = "Artificial Intelligence (AI) refers to systems that can perform tasks that typically require human intelligence. Machine Learning is a subset of AI where systems learn from data. Large Language Models (LLMs) like GPT are trained on vast amounts of text data to generate human-like responses. These models have revolutionized natural language processing but also raise important ethical considerations around bias, privacy, and misinformation."
-        
-        # Pattern 6: General information request detection
-        # Identify if the user is asking for an explanation or information
-        elif any(word in prompt_lower for word in ["data", "information", "tell me", "explain"]):
-            response = "I would normally provide detailed information on this topic based on my training data. Since I'm in simulation mode, I can offer a general response: Information and data are fundamental to understanding our world. Data becomes information when it's organized and presented in a meaningful context. Knowledge is derived from information when patterns and insights are extracted. If you have a specific topic you'd like explained, please let me know."
-        
-        # Pattern 7: Gratitude expression detection
-        # Check if the user is expressing thanks
-        elif any(word in prompt_lower for word in ["thanks", "thank you", "appreciate"]):
-            response = "You're welcome! I'm happy to help, even in simulation mode. If you have any other questions or need assistance with anything else, feel free to ask. I'm here to make your experience as helpful as possible."
-        
-        # Pattern 8: Platform-specific query detection
-        # Identify if the user is asking about the application itself
-        elif any(word in prompt_lower for word in ["app", "platform", "website", "tool", "inspire"]):
-            response = "This platform is designed to provide access to various AI tools and models. You can chat with different AI assistants, save your favorite prompts, and explore various capabilities. Currently, I'm running in simulation mode, but once API keys are configured, you'll be able to access more advanced AI features and capabilities."
-        
-        # Pattern 9: Capability inquiry detection
-        # Check if the user is asking about what the AI can do
-        elif any(word in prompt_lower for word in ["can you", "are you able", "capability", "function"]):
-            response = "In simulation mode, I can provide pre-defined responses to common questions. I can simulate conversations on various topics including technology, general knowledge, and casual chat. Once API keys are configured, I'll be able to generate more dynamic and personalized responses, process complex queries, and provide more accurate and up-to-date information."
-        
-        # Pattern 10: Science topic detection
-        # Identify if the query is related to scientific disciplines
-        elif any(word in prompt_lower for word in ["science", "physics", "chemistry", "biology", "astronomy"]):
-            response = "Science is the systematic study of the structure and behavior of the physical and natural world through observation and experiment. Physics explores matter, energy, and their interactions. Chemistry studies substances, their properties, and reactions. Biology examines living organisms. Astronomy focuses on celestial objects and the universe. Each field has made remarkable contributions to our understanding of the world around us."
-        
-        # Pattern 11: History topic detection
-        # Check if the query is about historical events or periods
-        elif any(word in prompt_lower for word in ["history", "war", "ancient", "civilization", "century"]):
-            response = "History provides us with valuable insights into past events, cultures, and civilizations. Through studying history, we can understand how societies have evolved, learn from past successes and failures, and gain perspective on current global issues. While I'm in simulation mode, I can provide general information about historical periods, significant events, and cultural developments."
-        
-        # Pattern 12: Arts and culture topic detection
-        # Identify if the query is about artistic or cultural subjects
-        elif any(word in prompt_lower for word in ["art", "music", "literature", "movie", "culture", "book"]):
-            response = "Art and culture are fundamental expressions of human creativity and experience. The arts encompass visual arts, music, literature, film, dance, and more. These creative forms allow us to explore emotions, share stories, and connect across different backgrounds and perspectives. Cultural traditions also shape our identities and communities. If you have a specific topic in arts or culture you'd like to discuss, feel free to ask."
-        
-        # Pattern 13: Economics/business topic detection
-        # Check if the query is related to financial or business topics
-        elif any(word in prompt_lower for word in ["economy", "business", "market", "finance", "investment", "money"]):
-            response = "Economics and business are fascinating fields that study how societies allocate resources and how organizations operate. Economic principles help us understand markets, trade, and financial systems. Business concepts cover entrepreneurship, management, marketing, and organizational behavior. While I'm in simulation mode, I can discuss general concepts but cannot provide specific financial advice or real-time market data."
-        
-        # Pattern 14: Question mark detection
-        # Special handling for any question not caught by previous patterns
-        elif "?" in prompt:
-            response = "That's an interesting question! In a fully configured system, I would provide a detailed answer based on my training data and available information. For now, I'm operating in simulation mode with pre-defined responses. If you'd like to discuss a different topic, feel free to ask another question."
-        
-        # Fallback response logic
-        else:
-            # If no specific patterns match, select a random generic response
-            # This ensures the system always provides some response
-            response = random.choice(responses)
-            
-            # Enhance the generic response based on message length analysis
-            # This adds a more personalized touch even to generic responses
-            if len(prompt) > 100:
-                # For very long prompts, acknowledge the detail and explain limitations
-                response += "\n\nI notice you've shared quite a detailed message. In a fully configured system, I would analyze the specifics of your input and provide a tailored response. Feel free to continue our conversation or try a different topic."
-            elif len(prompt) < 10:
-                # For very short prompts, encourage more detail
-                response += "\n\nYour message was quite brief. Feel free to provide more details if you'd like a more specific response."
-        
-        # Add transparency note about simulation mode
-        # This informs the user that they're not interacting with a real AI service
-        note = f"\n\n[Note: This is a simulated {service_type} response. Configure API keys for real AI responses.]"
-        
-        # Only add the simulation note for shorter responses
-        # This prevents excessively long responses that might overwhelm the user
-        if len(response) < 500:
-            response += note
+        return simulated_provider.respond(service_type, prompt)
+    
+    @staticmethod
+    def _provider_for(service_config: Dict[str, Any]) -> Optional[str]:
+        """
+        Get the external provider a service configuration would call.
         
-        return {
-            "success": True,
-            "data": response
-        }
+        Args:
+            service_config (dict): Configuration for the AI service
+            
+        Returns:
+            str: 'openai' or 'huggingface', or None when the response is simulated
+        """
+        service_type = service_config.get('api_type', 'none')
+        if service_type == 'openai' and get_api_key('OPENAI_API_KEY'):
+            return 'openai'
+        if service_type == 'huggingface' and get_api_key('HUGGINGFACE_API_KEY'):
+            return 'huggingface'
+        return None
     
     @staticmethod
     def send_to_ai_service(prompt: str, service_config: Dict[str, Any]) -> Dict[str, Any]:
         """
         Route the prompt to the appropriate AI service based on configuration.
         
+        Successful provider responses are served from the response cache
+        when the same prompt was already sent to the same model, and
+        concurrent identical requests share a single provider call.
+        
+        Args:
+            prompt (str): The user's message
+            service_config (dict): Configuration for the AI service
+            
+        Returns:
+            dict: Response with success status and data/error
+        """
+        # Simulated responses are free (and partly random), so only real provider calls are cached
+        if AIService._provider_for(service_config) is None:
+            return AIService._dispatch(prompt, service_config)
+        
+        use_cache = response_cache.is_enabled(service_config)
+        if use_cache:
+            cached = response_cache.get(service_config, prompt)
+            if cached is not None:
+                return cached
+        
+        def fetch() -> Dict[str, Any]:
+            response = AIService._dispatch(prompt, service_config)
+            if use_cache:
+                response_cache.set(service_config, prompt, response)
+            return response
+        
+        calls = AIService.provider_calls(service_config)
+        return single_flight.do(response_cache.make_key(service_config, prompt), fetch, calls)
+    
+    @staticmethod
+    def provider_calls(service_config: Dict[str, Any]) -> int:
+        """
+        Count the provider calls one request may make: the provider itself and its failover chain.
+        
+        Args:
+            service_config (dict): Configuration for the AI service
+            
+        Returns:
+            int: Maximum number of provider calls
+        """
+        return 1 + len(AIService._failover_chain(service_config))
+    
+    @staticmethod
+    def _failover_chain(service_config: Dict[str, Any]) -> List[str]:
+        """
+        Get the services to try, in order, when the tool's own service fails.
+        
+        Args:
+            service_config (dict): Configuration for the AI service
+            
+        Returns:
+            list: api_type values, where 'simulation' stands for a simulated response
+        """
+        chain = service_config.get('failover_chain')
+        if chain is None:
+            chain = getattr(settings, 'AI_FAILOVER_CHAIN', [])
+        service_type = service_config.get('api_type', 'none')
+        return [fallback for fallback in chain if fallback != service_type]
+    
+    @staticmethod
+    def _dispatch(prompt: str, service_config: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Call the AI service selected by the configuration, failing over
+        along the tool's failover chain when it does not succeed.
+        
         Args:
             prompt (str): The user's message
             service_config (dict): Configuration for the AI service
@@ -275,7 +398,40 @@ class AIService:
         """
         service_type = service_config.get('api_type', 'none')
         model = service_config.get('api_model', '')
+        started = time.monotonic()
+        response = AIService._call_service(prompt, service_type, model)
+        provider_health.record_response(service_type, model, started, response)
+        if response.get('success', False):
+            return response
         
+        for fallback in AIService._failover_chain(service_config):
+            logger.warning(f"{service_type} request failed, failing over to {fallback}")
+            metrics.increment(f'ai_failover.{service_type}.{fallback}')
+            fallback_type = 'none' if fallback == 'simulation' else fallback
+            started = time.monotonic()
+            fallback_response = AIService._call_service(prompt, fallback_type, '')
+            if fallback_type in DEFAULT_MODELS:
+                # Failovers ask the provider's default model; simulated fallbacks are no backend
+                provider_health.record_response(fallback_type, DEFAULT_MODELS[fallback_type], started,
+                                                fallback_response)
+            if fallback_response.get('success', False):
+                return dict(fallback_response, failover=fallback)
+        
+        return response
+    
+    @staticmethod
+    def _call_service(prompt: str, service_type: str, model: str) -> Dict[str, Any]:
+        """
+        Call a single AI service.
+        
+        Args:
+            prompt (str): The user's message
+            service_type (str): The api_type of the service to call
+            model (str): The model name, or '' for the service's default
+            
+        Returns:
+            dict: Response with success status and data/error
+        """
         # Check if API keys are available
         has_openai_key = bool(get_api_key('OPENAI_API_KEY'))
         has_huggingface_key = bool(get_api_key('HUGGINGFACE_API_KEY'))
@@ -285,13 +441,13 @@ class AIService:
             if service_type == 'openai' and has_openai_key:
                 # Use default model if none specified
                 if not model:
-                    model = "gpt-3.5-turbo"
+                    model = DEFAULT_MODELS['openai']
                 return AIService.call_openai_api(prompt, model)
                 
             elif service_type == 'huggingface' and has_huggingface_key:
                 # Use default model if none specified
                 if not model:
-                    model = "google/flan-t5-base"
+                    model = DEFAULT_MODELS['huggingface']
                 return AIService.call_huggingface_api(prompt, model)
                 
             elif service_type == 'custom':
@@ -310,6 +466,310 @@ class AIService:
                 "error": f"Error processing request: {str(e)}"
             }
 
+    @staticmethod
+    def stream_ai_service(prompt: str, service_config: Dict[str, Any]) -> Iterator[str]:
+        """
+        Stream the AI response token by token.
+        
+        Routing follows the same rules as send_to_ai_service.
+        
+        Args:
+            prompt (str): The user's message
+            service_config (dict): Configuration for the AI service
+            
+        Yields:
+            str: Pieces of the response text as the provider produces them
+            
+        Raises:
+            ProviderError: If the provider rejects the request
+        """
+        service_type = service_config.get('api_type', 'none')
+        model = service_config.get('api_model', '')
+        
+        openai_key = get_api_key('OPENAI_API_KEY')
+        huggingface_key = get_api_key('HUGGINGFACE_API_KEY')
+        
+        if AIService._provider_for(service_config) is not None and response_cache.is_enabled(service_config):
+            cached = response_cache.get(service_config, prompt)
+            if cached is not None:
+                yield cached['data']
+                return
+            
+            chunks: List[str] = []
+            for chunk in AIService._stream_provider(prompt, service_type, model, openai_key, huggingface_key):
+                chunks.append(chunk)
+                yield chunk
+            # Only complete streams reach this point; interrupted ones are not cached
+            response_cache.set(service_config, prompt, {"success": True, "data": ''.join(chunks)})
+            return
+        
+        yield from AIService._stream_provider(prompt, service_type, model, openai_key, huggingface_key)
+    
+    @staticmethod
+    def _stream_provider(prompt: str, service_type: str, model: str,
+                         openai_key: Optional[str], huggingface_key: Optional[str]) -> Iterator[str]:
+        """
+        Stream the response of the AI service selected by the configuration.
+        
+        Args:
+            prompt (str): The user's message
+            service_type (str): The AI tool's api_type
+            model (str): The AI tool's api_model
+            openai_key (str): OpenAI API key, if configured
+            huggingface_key (str): Hugging Face API key, if configured
+            
+        Yields:
+            str: Pieces of the response text
+        """
+        started = time.monotonic()
+        if service_type == 'openai' and openai_key:
+            stream = streaming.stream_openai(prompt, model or DEFAULT_MODELS['openai'], openai_key)
+        elif service_type == 'huggingface' and huggingface_key:
+            stream = streaming.stream_huggingface(prompt, model or DEFAULT_MODELS['huggingface'], huggingface_key)
+        else:
+            # Custom integrations and tools without API keys use simulation
+            try:
+                yield from streaming.stream_simulation(service_type, prompt)
+            except ProviderError as e:
+                provider_health.record_response(service_type, model, started, {"success": False, "status_code": e.status_code})
+                raise
+            provider_health.record_response(service_type, model, started, {"success": True})
+            return
+        
+        if not circuit_breaker.allow_request(service_type):
+            raise ProviderError(circuit_breaker.open_response(service_type)['error'], service_type, 503)
+        rate_limiter.acquire(service_type, openai_key if service_type == 'openai' else huggingface_key,
+                             estimate_tokens(prompt))
+        
+        # The provider's latency starts once the rate limiter let the request through
+        started = time.monotonic()
+        try:
+            yield from stream
+        except ProviderError as e:
+            result = {"success": False, "status_code": e.status_code}
+            circuit_breaker.record(service_type, result)
+            provider_health.record_response(service_type, model, started, result)
+            raise
+        except Exception:
+            circuit_breaker.record(service_type, {"success": False})
+            provider_health.record_response(service_type, model, started, {"success": False})
+            raise
+        circuit_breaker.record(service_type, {"success": True})
+        # Like non-streamed calls, the latency is the time to the complete reply
+        provider_health.record_response(service_type, model, started, {"success": True})
+
+    @staticmethod
+    async def acall_openai_api(prompt: str, model: str = "gpt-3.5-turbo") -> Dict[str, Any]:
+        """
+        Call OpenAI API without blocking the event loop.
+        
+        Args:
+            prompt (str): The message to send to the API
+            model (str): The OpenAI model name to use
+            
+        Returns:
+            dict: Response with success status and data/error
+        """
+        api_key = get_api_key('OPENAI_API_KEY')
+        
+        # If no API key set, return a simulated response
+        if not api_key:
+            return await AIService.asimulate_ai_response("openai", prompt)
+        
+        if not circuit_breaker.allow_request('openai'):
+            return circuit_breaker.open_response('openai')
+        
+        try:
+            await rate_limiter.aacquire('openai', api_key, estimate_tokens(prompt))
+        except RateLimitExceeded as e:
+            return AIService._rate_limited_response(e)
+        
+        timing: Dict[str, float] = {}
+        try:
+            headers, data = AIService._openai_request(prompt, model, api_key)
+            
+            response = await retry_policy.acall('openai', _atimed(lambda timeout: async_client.post(
+                'openai',
+                provider_url('openai', '/v1/chat/completions'),
+                headers=headers,
+                json=data,
+                timeout=timeout
+            ), timing))
+            
+            result = AIService._openai_result(response)
+            
+        except Exception as e:
+            result = {
+                "success": False,
+                "error": f"Exception: {str(e)}"
+            }
+        
+        if 'latency' in timing:
+            result['latency'] = timing['latency']
+        circuit_breaker.record('openai', result)
+        return result
+    
+    @staticmethod
+    async def acall_huggingface_api(prompt: str, model: str = "google/flan-t5-base") -> Dict[str, Any]:
+        """
+        Call Hugging Face API without blocking the event loop.
+        
+        Args:
+            prompt (str): The message to send to the API
+            model (str): The Hugging Face model name to use
+            
+        Returns:
+            dict: Response with success status and data/error
+        """
+        api_key = get_api_key('HUGGINGFACE_API_KEY')
+        
+        # If no API key set, return a simulated response
+        if not api_key:
+            return await AIService.asimulate_ai_response("huggingface", prompt)
+        
+        if not circuit_breaker.allow_request('huggingface'):
+            return circuit_breaker.open_response('huggingface')
+        
+        try:
+            await rate_limiter.aacquire('huggingface', api_key, estimate_tokens(prompt))
+        except RateLimitExceeded as e:
+            return AIService._rate_limited_response(e)
+        
+        timing: Dict[str, float] = {}
+        try:
+            headers, payload = AIService._huggingface_request(prompt, api_key)
+            
+            response = await retry_policy.acall('huggingface', _atimed(lambda timeout: async_client.post(
+                'huggingface',
+                provider_url('huggingface', f'/models/{model}'),
+                headers=headers,
+                json=payload,
+                timeout=timeout
+            ), timing))
+            
+            result = AIService._huggingface_result(response)
+            
+        except Exception as e:
+            result = {
+                "success": False,
+                "error": f"Exception: {str(e)}"
+            }
+        
+        if 'latency' in timing:
+            result['latency'] = timing['latency']
+        circuit_breaker.record('huggingface', result)
+        return result
+    
+    @staticmethod
+    async def asimulate_ai_response(service_type: str, prompt: str) -> Dict[str, Any]:
+        """
+        Simulate an AI response without blocking the event loop.
+        
+        Args:
+            service_type (str): The type of AI service ('openai' or 'huggingface')
+            prompt (str): The user's prompt
+            
+        Returns:
+            dict: Simulated response with success status and data
+        """
+        return await simulated_provider.arespond(service_type, prompt)
+    
+    @staticmethod
+    async def asend_to_ai_service(prompt: str, service_config: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Async version of send_to_ai_service for the ASGI chat views.
+        
+        Args:
+            prompt (str): The user's message
+            service_config (dict): Configuration for the AI service
+            
+        Returns:
+            dict: Response with success status and data/error
+        """
+        if AIService._provider_for(service_config) is None:
+            return await AIService._adispatch(prompt, service_config)
+        
+        use_cache = response_cache.is_enabled(service_config)
+        if use_cache:
+            cached = await response_cache.aget(service_config, prompt)
+            if cached is not None:
+                return cached
+        
+        async def fetch() -> Dict[str, Any]:
+            response = await AIService._adispatch(prompt, service_config)
+            if use_cache:
+                await response_cache.aset(service_config, prompt, response)
+            return response
+        
+        calls = AIService.provider_calls(service_config)
+        return await single_flight.ado(response_cache.make_key(service_config, prompt), fetch, calls)
+    
+    @staticmethod
+    async def _adispatch(prompt: str, service_config: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Async version of _dispatch.
+        
+        Args:
+            prompt (str): The user's message
+            service_config (dict): Configuration for the AI service
+            
+        Returns:
+            dict: Response with success status and data/error
+        """
+        service_type = service_config.get('api_type', 'none')
+        model = service_config.get('api_model', '')
+        started = time.monotonic()
+        response = await AIService._acall_service(prompt, service_type, model)
+        provider_health.record_response(service_type, model, started, response)
+        if response.get('success', False):
+            return response
+        
+        for fallback in AIService._failover_chain(service_config):
+            logger.warning(f"{service_type} request failed, failing over to {fallback}")
+            metrics.increment(f'ai_failover.{service_type}.{fallback}')
+            fallback_type = 'none' if fallback == 'simulation' else fallback
+            started = time.monotonic()
+            fallback_response = await AIService._acall_service(prompt, fallback_type, '')
+            if fallback_type in DEFAULT_MODELS:
+                # Failovers ask the provider's default model; simulated fallbacks are no backend
+                provider_health.record_response(fallback_type, DEFAULT_MODELS[fallback_type], started,
+                                                fallback_response)
+            if fallback_response.get('success', False):
+                return dict(fallback_response, failover=fallback)
+        
+        return response
+    
+    @staticmethod
+    async def _acall_service(prompt: str, service_type: str, model: str) -> Dict[str, Any]:
+        """
+        Async version of _call_service.
+        
+        Args:
+            prompt (str): The user's message
+            service_type (str): The api_type of the service to call
+            model (str): The model name, or '' for the service's default
+            
+        Returns:
+            dict: Response with success status and data/error
+        """
+        has_openai_key = bool(get_api_key('OPENAI_API_KEY'))
+        has_huggingface_key = bool(get_api_key('HUGGINGFACE_API_KEY'))
+        
+        try:
+            if service_type == 'openai' and has_openai_key:
+                return await AIService.acall_openai_api(prompt, model or DEFAULT_MODELS['openai'])
+            elif service_type == 'huggingface' and has_huggingface_key:
+                return await AIService.acall_huggingface_api(prompt, model or DEFAULT_MODELS['huggingface'])
+            else:
+                # Custom integrations and tools without API keys use simulation
+                return await AIService.asimulate_ai_response(service_type, prompt)
+        except Exception as e:
+            logger.error(f"Error in asend_to_ai_service: {str(e)}")
+            return {
+                "success": False,
+                "error": f"Error processing request: {str(e)}"
+            }
+
 # Legacy function wrappers for backward compatibility
 def call_openai_api(prompt: str, model: str = "gpt-3.5-turbo") -> Dict[str, Any]:
     return AIService.call_openai_api(prompt, model)
@@ -11,6 +11,8 @@ from django.views.generic import DetailView
 
 from catalog.models import AITool,Rating
 from catalog.forms import RatingForm
+from catalog.similarity import get_related_tools
+from catalog.snapshot import get_catalog_tools
 from django.contrib import messages
 from django.urls import reverse
 
@@ -46,10 +48,8 @@ class AIToolDetailView(DetailView):
         else:
             context['is_favorite'] = False
         
-        # Get related AI tools in the same category
-        context['related_tools'] = AITool.objects.filter(
-            category=self.object.category
-        ).exclude(id=self.object.id)[:4]
+        # Get the most similar AI tools (see catalog.similarity)
+        context['related_tools'] = get_related_tools(self.object, 4)
         
         return context
 
@@ -58,14 +58,11 @@ class AIToolDetailView(DetailView):
 def presentationAI(request: HttpRequest, id: uuid.UUID) -> HttpResponse:
     """View for displaying a presentation-style page for an AI tool."""
     
-    # Get AI tool with prefetched ratings
-    ai_tool = get_object_or_404(
-        AITool.objects.prefetch_related('ratings'), 
-        id=id
-    )
+    # Rating summary comes from the stored aggregates; ratings are only loaded for the opinions list
+    ai_tool = get_object_or_404(AITool, id=id)
     
-    # Get related tools
-    related_tools = AITool.objects.filter(category=ai_tool.category).exclude(id=ai_tool.id)[:4]
+    # Get the most similar tools
+    related_tools = get_related_tools(ai_tool, 4)
     
     # Check if the user has it in favorites
     is_favorite = request.user.is_authenticated and request.user.favorites.filter(id=ai_tool.id).exists()
@@ -95,8 +92,10 @@ def presentationAI(request: HttpRequest, id: uuid.UUID) -> HttpResponse:
         'is_favorite': is_favorite,
         'related_tools': related_tools,
         'ratings': ai_tool.ratings.select_related('user'),
-        'average_rating': ai_tool.popularity,  # Using popularity field directly
-        'popularity': ai_tool.popularity,  # For consistency
+        'average_rating': ai_tool.average_rating,
+        'rating_count': ai_tool.rating_count,
+        'rating_histogram': ai_tool.rating_histogram,
+        'popularity': ai_tool.popularity,
         'form': form
     })
 
@@ -124,11 +123,11 @@ def compare_tools(request: HttpRequest) -> HttpResponse:
     if tool_ids:
         tools = AITool.objects.filter(id__in=tool_ids)
     
+    # All AI tools for the selectors, by category then name
+    all_tools = sorted(get_catalog_tools(), key=lambda tool: (tool.category, tool.name))
+    
     # If no tools are selected, show a selection page
     if not tools:
-        # Get all AI tools for selection
-        all_tools = AITool.objects.all().order_by('category', 'name')
-        
         return render(request, 'catalog/compare_select.html', {
             'all_tools': all_tools
         })
@@ -154,6 +153,7 @@ def compare_tools(request: HttpRequest) -> HttpResponse:
     
     return render(request, 'catalog/compare.html', {
         'tools': tools,
+        'all_tools': all_tools,
         'features': features,
         'comparison': comparison
     })
@@ -4,15 +4,58 @@ Catalog views for the catalog app.
 This module contains views related to browsing and filtering the catalog of AI tools.
 """
 from typing import Any, Dict, List, Optional
-from django.db.models import Q
 from django.http import HttpRequest, HttpResponse
 from django.shortcuts import render
 from django.views.generic import ListView
 
+from catalog.facets import FACET_TITLES, apply_filters, get_facets, parse_filters
 from catalog.models import AITool
+from catalog.search import search_tools
 from core.mixins import PaginationMixin, FilterMixin
 
 
+def _query_without(request: HttpRequest, *params: str) -> str:
+    """Encode the request's query string without some parameters (and the page)."""
+    query = request.GET.copy()
+    for param in ('page',) + params:
+        query.pop(param, None)
+    return query.urlencode()
+
+
+def _facet_context(request: HttpRequest) -> Dict[str, Any]:
+    """
+    Build the facet filters context of the catalog page.
+
+    Args:
+        request: The HTTP request object
+
+    Returns:
+        Dictionary with the facet sections (parameter, title, values with
+        their counts, selected value and the query string removing it),
+        the query string removing the search, and
+        the query string of all filters for the pagination links
+    """
+    filters = parse_filters(request.GET)
+    facets = get_facets(filters, request.GET.get('q', ''))
+    sections = []
+    for param, values in facets.items():
+        selected = next((value for value in values if value['selected']), None)
+        sections.append({
+            'param': param,
+            'title': FACET_TITLES[param],
+            'values': values,
+            'selected': selected,
+            'remove_query': _query_without(request, param),
+        })
+    return {
+        'facets': facets,
+        'facet_sections': sections,
+        'has_facet_filters': bool(filters),
+        'search_remove_query': _query_without(request, 'q'),
+        'filter_querystring': _query_without(request),
+    }
+
+
 class CatalogView(PaginationMixin, FilterMixin, ListView):
     """
     View for displaying the catalog of AI tools with filtering and pagination.
@@ -34,29 +77,16 @@ class CatalogView(PaginationMixin, FilterMixin, ListView):
         """
         queryset = super().get_queryset()
         
-        # Apply search filter
+        # Apply search filter, ordered by relevance
         search_query = self.request.GET.get('q', None)
         if search_query:
-            queryset = queryset.filter(
-                Q(name__icontains=search_query) |
-                Q(description__icontains=search_query) |
-                Q(provider__icontains=search_query)
-            )
+            queryset = search_tools(queryset, search_query)
             
-        # Apply category filter
-        category = self.request.GET.get('category', None)
-        if category:
-            queryset = queryset.filter(category=category)
+        # Apply category, provider, integration, featured and pricing filters
+        queryset = apply_filters(queryset, parse_filters(self.request.GET))
             
-        # Apply pricing filter
-        pricing = self.request.GET.get('pricing', None)
-        if pricing == 'free':
-            queryset = queryset.filter(is_free=True)
-        elif pricing == 'paid':
-            queryset = queryset.filter(is_free=False)
-            
-        # Apply sorting
-        sort_by = self.request.GET.get('sort', 'popularity')
+        # Apply sorting; searches keep their relevance order by default
+        sort_by = self.request.GET.get('sort') or ('relevance' if search_query else 'popularity')
         if sort_by == 'name':
             queryset = queryset.order_by('name')
         elif sort_by == 'popularity':
@@ -81,12 +111,10 @@ class CatalogView(PaginationMixin, FilterMixin, ListView):
         # Add filter parameters to context
         context['search_query'] = self.request.GET.get('q', '')
         context['selected_category'] = self.request.GET.get('category', '')
-        context['selected_pricing'] = self.request.GET.get('pricing', '')
-        context['sort_by'] = self.request.GET.get('sort', 'popularity')
+        context['sort_by'] = self.request.GET.get('sort') or ('relevance' if context['search_query'] else 'popularity')
         
-        # Add categories for filter dropdown
-        categories = AITool.objects.values_list('category', flat=True).distinct()
-        context['categories'] = [cat for cat in categories if cat]
+        # Add the facet filters with their tool counts
+        context.update(_facet_context(self.request))
         
         # Add pagination context
         context = self.get_pagination_context(context)
@@ -109,29 +137,17 @@ def catalog_view(request: HttpRequest) -> HttpResponse:
     # Get filter parameters from request
     search_query = request.GET.get('q', '')
     category = request.GET.get('category', '')
-    pricing = request.GET.get('pricing', '')
-    sort_by = request.GET.get('sort', 'popularity')
+    sort_by = request.GET.get('sort') or ('relevance' if search_query else 'popularity')
     
     # Start with all AI tools
     queryset = AITool.objects.all()
     
-    # Apply search filter
+    # Apply search filter, ordered by relevance
     if search_query:
-        queryset = queryset.filter(
-            Q(name__icontains=search_query) |
-            Q(description__icontains=search_query) |
-            Q(provider__icontains=search_query)
-        )
-        
-    # Apply category filter
-    if category:
-        queryset = queryset.filter(category=category)
+        queryset = search_tools(queryset, search_query)
         
-    # Apply pricing filter
-    if pricing == 'free':
-        queryset = queryset.filter(is_free=True)
-    elif pricing == 'paid':
-        queryset = queryset.filter(is_free=False)
+    # Apply category, provider, integration, featured and pricing filters
+    queryset = apply_filters(queryset, parse_filters(request.GET))
         
     # Apply sorting
     if sort_by == 'name':
@@ -141,17 +157,12 @@ def catalog_view(request: HttpRequest) -> HttpResponse:
     elif sort_by == 'newest':
         queryset = queryset.order_by('-created_at')
     
-    # Get categories for filter dropdown
-    categories = AITool.objects.values_list('category', flat=True).distinct()
-    categories = [cat for cat in categories if cat]
-    
     return render(request, 'catalog/catalog.html', {
         'ai_tools': queryset,
         'search_query': search_query,
         'selected_category': category,
-        'selected_pricing': pricing,
         'sort_by': sort_by,
-        'categories': categories
+        **_facet_context(request),
     })
 
 
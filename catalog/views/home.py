@@ -7,8 +7,9 @@ from typing import Any, Dict
 from django.http import HttpRequest, HttpResponse
 from django.shortcuts import render
 
-from django.db.models import Avg
-from catalog.models import AITool, Rating
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast, NullIf
+from catalog.models import AITool
 
 
 def home(request: HttpRequest) -> HttpResponse:
@@ -24,9 +25,10 @@ def home(request: HttpRequest) -> HttpResponse:
     Returns:
         Rendered home page with popular AI tools context
     """
+    # Averaged from the stored rating aggregates: no join over the ratings table
     popular_ais = AITool.objects.annotate(
-        average_rating=Avg('ratings__stars')
-    ).order_by('-average_rating')[:6]
+        stored_average=Cast('rating_sum', FloatField()) / NullIf('rating_count', 0)
+    ).order_by(F('stored_average').desc(nulls_last=True))[:6]
     
     context = {
         'popular_ais': popular_ais,
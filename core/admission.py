@@ -0,0 +1,370 @@
+"""
+Admission control for expensive endpoints.
+
+Chat requests hold a worker for as long as the AI provider takes to answer.
+Without a limit, a traffic spike queues requests behind slow provider calls
+until every worker is busy and the whole site stops responding.
+
+The admission controller bounds, per process:
+
+- the number of requests being served concurrently,
+- the number of requests a single user can have in flight, and
+- the number of requests waiting for a free slot, and for how long.
+
+Requests over a limit are answered right away: 429 when the user already
+has too many requests in flight, 503 when the process is saturated. Both
+responses carry a ``Retry-After`` header.
+
+Usage:
+    @login_required
+    @admission_control
+    def my_chat_view(request):
+        ...
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import defaultdict
+from functools import wraps
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, Optional
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.utils.functional import LazyObject
+
+from core import metrics
+from core.utils import get_client_ip
+
+logger = logging.getLogger(__name__)
+
+# Reasons a request is not admitted
+OVERLOADED = 'overloaded'
+USER_LIMIT = 'user_limit'
+
+
+class AdmissionController:
+    """
+    Per-process concurrency limiter with a bounded wait queue.
+
+    Use the module-level ``chat_admission`` instance for the chat endpoints.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._condition = threading.Condition()
+        self._active = 0
+        self._waiting = 0
+        self._per_user: Dict[str, int] = defaultdict(int)
+
+    def _setting(self, name: str, default: Any) -> Any:
+        """Read an AI_ADMISSION_* setting."""
+        return getattr(settings, f'AI_ADMISSION_{name}', default)
+
+    def _try_admit(self, user_key: str) -> Optional[str]:
+        """
+        Take a slot if one is free. Must be called with the condition held.
+
+        Args:
+            user_key: Identifies the user (or client IP) making the request
+
+        Returns:
+            None if admitted, USER_LIMIT or OVERLOADED otherwise
+        """
+        if self._per_user.get(user_key, 0) >= int(self._setting('MAX_PER_USER', 2)):
+            return USER_LIMIT
+        if self._active >= int(self._setting('MAX_CONCURRENT', 16)):
+            return OVERLOADED
+        self._active += 1
+        self._per_user[user_key] += 1
+        return None
+
+    def _enqueue(self) -> bool:
+        """
+        Join the wait queue if it has room. Must be called with the condition held.
+
+        Returns:
+            True if the request may wait for a slot
+        """
+        if self._waiting >= int(self._setting('QUEUE_SIZE', 32)):
+            return False
+        self._waiting += 1
+        metrics.increment(f'admission.{self.name}.queued')
+        return True
+
+    def _reject(self, reason: str) -> str:
+        """
+        Count a rejected request.
+
+        Args:
+            reason: USER_LIMIT or OVERLOADED
+
+        Returns:
+            The reason
+        """
+        metrics.increment(f'admission.{self.name}.rejected_{reason}')
+        return reason
+
+    def acquire(self, user_key: str) -> Optional[str]:
+        """
+        Wait for a slot, up to AI_ADMISSION_QUEUE_TIMEOUT seconds.
+
+        Args:
+            user_key: Identifies the user (or client IP) making the request
+
+        Returns:
+            None if admitted, USER_LIMIT or OVERLOADED otherwise
+        """
+        deadline = time.monotonic() + float(self._setting('QUEUE_TIMEOUT', 5))
+        with self._condition:
+            reason = self._try_admit(user_key)
+            # Users over their own limit are not queued: they are the cause of the load
+            if reason != OVERLOADED:
+                return self._reject(reason) if reason else self._admitted()
+            if not self._enqueue():
+                return self._reject(OVERLOADED)
+            try:
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._condition.wait(remaining):
+                        return self._reject(OVERLOADED)
+                    reason = self._try_admit(user_key)
+                    if reason is None:
+                        return self._admitted()
+                    if reason == USER_LIMIT:
+                        return self._reject(reason)
+            finally:
+                self._waiting -= 1
+
+    async def aacquire(self, user_key: str) -> Optional[str]:
+        """
+        Async version of acquire; waits without blocking the event loop.
+
+        Args:
+            user_key: Identifies the user (or client IP) making the request
+
+        Returns:
+            None if admitted, USER_LIMIT or OVERLOADED otherwise
+        """
+        deadline = time.monotonic() + float(self._setting('QUEUE_TIMEOUT', 5))
+        with self._condition:
+            reason = self._try_admit(user_key)
+            if reason != OVERLOADED:
+                return self._reject(reason) if reason else self._admitted()
+            if not self._enqueue():
+                return self._reject(OVERLOADED)
+        try:
+            while time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+                with self._condition:
+                    reason = self._try_admit(user_key)
+                if reason is None:
+                    return self._admitted()
+                if reason == USER_LIMIT:
+                    return self._reject(reason)
+            return self._reject(OVERLOADED)
+        finally:
+            with self._condition:
+                self._waiting -= 1
+
+    def _admitted(self) -> None:
+        """Count an admitted request."""
+        metrics.increment(f'admission.{self.name}.admitted')
+        return None
+
+    def release(self, user_key: str) -> None:
+        """
+        Free the slot taken by an admitted request.
+
+        Args:
+            user_key: The key passed to acquire
+        """
+        with self._condition:
+            self._active -= 1
+            self._per_user[user_key] -= 1
+            if self._per_user[user_key] <= 0:
+                del self._per_user[user_key]
+            self._condition.notify()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Report the current load and rejection counts.
+
+        Returns:
+            Dictionary with active and queued requests and rejection counts
+        """
+        with self._condition:
+            active, waiting, users = self._active, self._waiting, len(self._per_user)
+        return {
+            'active': active,
+            'queue_depth': waiting,
+            'active_users': users,
+            'max_concurrent': int(self._setting('MAX_CONCURRENT', 16)),
+            'admitted': metrics.get_counter(f'admission.{self.name}.admitted'),
+            'queued': metrics.get_counter(f'admission.{self.name}.queued'),
+            'rejected_overloaded': metrics.get_counter(f'admission.{self.name}.rejected_{OVERLOADED}'),
+            'rejected_user_limit': metrics.get_counter(f'admission.{self.name}.rejected_{USER_LIMIT}'),
+        }
+
+
+class _ReleasingIterator:
+    """
+    Wraps the content of a streaming response so its slot is released when
+    the response is closed, not when the view returns.
+    """
+
+    def __init__(self, content: Iterable[Any], release: Callable[[], None]) -> None:
+        self._content = content
+        self._release = release
+        self._released = False
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._content)
+
+    def close(self) -> None:
+        if hasattr(self._content, 'close'):
+            self._content.close()
+        if not self._released:
+            self._released = True
+            self._release()
+
+
+class _AsyncReleasingIterator(_ReleasingIterator):
+    """_ReleasingIterator for the async content of streaming responses served under ASGI."""
+
+    def __aiter__(self) -> AsyncIterator[Any]:
+        return self._content.__aiter__()  # type: ignore[attr-defined]
+
+
+def _user_key(user: Any, request: HttpRequest) -> str:
+    """
+    Identify the client for the per-user limit.
+
+    Args:
+        user: The request's user
+        request: The HTTP request object
+
+    Returns:
+        The user id, or the client IP for anonymous requests
+    """
+    if user is not None and user.is_authenticated:
+        return f"user:{user.pk}"
+    return f"ip:{get_client_ip(request)}"
+
+
+async def _arequest_user(request: HttpRequest) -> Any:
+    """
+    Get the user of a request in an async view.
+
+    The lazy user of AuthenticationMiddleware is resolved with ``auser()``
+    so the session is not read in the event loop; a user set by the view's
+    own authentication (see the async API views) is used as it is.
+
+    Args:
+        request: The HTTP request object
+
+    Returns:
+        The request's user, or None
+    """
+    user = getattr(request, 'user', None)
+    if isinstance(user, LazyObject) and hasattr(request, 'auser'):
+        return await request.auser()
+    return user
+
+
+def _rejection_response(reason: str) -> JsonResponse:
+    """
+    Build the response sent to requests that are not admitted.
+
+    Args:
+        reason: USER_LIMIT or OVERLOADED
+
+    Returns:
+        JSON response with status 429 or 503 and a Retry-After header
+    """
+    if reason == USER_LIMIT:
+        response = JsonResponse({
+            'error': 'You already have requests in progress. Please wait for them to finish.'
+        }, status=429)
+    else:
+        response = JsonResponse({
+            'error': 'The AI assistant is busy right now. Please try again in a few seconds.'
+        }, status=503)
+    response['Retry-After'] = str(int(getattr(settings, 'AI_ADMISSION_RETRY_AFTER', 5)))
+    return response
+
+
+def _finish(response: HttpResponse, release: Callable[[], None]) -> HttpResponse:
+    """
+    Release the slot once the response is complete.
+
+    Args:
+        response: The view's response
+        release: Callable freeing the slot
+
+    Returns:
+        The response
+    """
+    if response.streaming:
+        wrapper = _AsyncReleasingIterator if getattr(response, 'is_async', False) else _ReleasingIterator
+        response.streaming_content = wrapper(response.streaming_content, release)
+    else:
+        release()
+    return response
+
+
+def admission_control(view_func: Callable) -> Callable:
+    """
+    Decorator limiting how many requests a view serves concurrently.
+
+    Works with sync and async views. Apply it after authentication, below
+    ``login_required`` or inside ``api_view``, so requests are keyed by
+    their user and rejected requests never take a slot.
+
+    Args:
+        view_func: The view function to protect
+
+    Returns:
+        The wrapped view function
+    """
+    controller = chat_admission
+
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def _async_wrapped(request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+            if not getattr(settings, 'AI_ADMISSION_ENABLED', True):
+                return await view_func(request, *args, **kwargs)
+            user_key = _user_key(await _arequest_user(request), request)
+            reason = await controller.aacquire(user_key)
+            if reason:
+                return _rejection_response(reason)
+            try:
+                response = await view_func(request, *args, **kwargs)
+            except BaseException:
+                controller.release(user_key)
+                raise
+            return _finish(response, lambda: controller.release(user_key))
+        return _async_wrapped
+
+    @wraps(view_func)
+    def _wrapped(request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        if not getattr(settings, 'AI_ADMISSION_ENABLED', True):
+            return view_func(request, *args, **kwargs)
+        user_key = _user_key(getattr(request, 'user', None), request)
+        reason = controller.acquire(user_key)
+        if reason:
+            return _rejection_response(reason)
+        try:
+            response = view_func(request, *args, **kwargs)
+        except BaseException:
+            controller.release(user_key)
+            raise
+        return _finish(response, lambda: controller.release(user_key))
+    return _wrapped
+
+
+# Admission controller shared by the chat endpoints of this process
+chat_admission = AdmissionController('chat')
+
+metrics.register_collector('admission_chat', chat_admission.get_stats)
@@ -0,0 +1,97 @@
+"""
+Lightweight in-process metrics for the InspireIA application.
+
+This module provides thread-safe counters and a registry of collector
+callables so that subsystems (AI provider transport, caches, limiters, ...)
+can expose their internal statistics through a single snapshot.
+
+Metrics are per-process: every worker keeps its own counters, and the
+snapshot includes the process id so values from several workers can be
+told apart when they are scraped.
+"""
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_counters: Dict[str, int] = defaultdict(int)
+_collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+def increment(name: str, value: int = 1) -> None:
+    """
+    Increment a named counter.
+
+    Args:
+        name: Dotted counter name (e.g. 'ai_cache.hits')
+        value: Amount to add to the counter
+    """
+    with _lock:
+        _counters[name] += value
+
+
+def get_counter(name: str) -> int:
+    """
+    Get the current value of a counter.
+
+    Args:
+        name: The counter name
+
+    Returns:
+        The counter value, or 0 if it was never incremented
+    """
+    with _lock:
+        return _counters.get(name, 0)
+
+
+def register_collector(name: str, collector: Callable[[], Dict[str, Any]]) -> None:
+    """
+    Register a callable that reports statistics for a subsystem.
+
+    Registering the same name twice replaces the previous collector.
+
+    Args:
+        name: Name of the subsystem, used as the key in the snapshot
+        collector: Callable returning a JSON-serializable dictionary
+    """
+    with _lock:
+        _collectors[name] = collector
+
+
+def snapshot() -> Dict[str, Any]:
+    """
+    Collect all counters and collector statistics for this process.
+
+    Returns:
+        Dictionary with process information, counters and collector output
+    """
+    with _lock:
+        counters = dict(_counters)
+        collectors = dict(_collectors)
+
+    data: Dict[str, Any] = {
+        'pid': os.getpid(),
+        'timestamp': time.time(),
+        'counters': counters,
+    }
+
+    for name, collector in collectors.items():
+        try:
+            data[name] = collector()
+        except Exception as e:
+            # A broken collector must never break the metrics endpoint
+            logger.error(f"Metrics collector '{name}' failed: {str(e)}")
+            data[name] = {'error': str(e)}
+
+    return data
+
+
+def reset() -> None:
+    """Reset all counters. Collectors stay registered."""
+    with _lock:
+        _counters.clear()
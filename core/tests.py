@@ -1,3 +1,159 @@
-from django.test import TestCase
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from core.admission import OVERLOADED, USER_LIMIT, AdmissionController, admission_control, chat_admission
+from core.versioned_cache import VersionedCache
+
+
+class CountingCache(VersionedCache):
+    version_key = 'tests:counting:version'
+    name = 'counting cache'
+    ttl_setting = 'TEST_COUNTING_TTL'
+
+    def __init__(self):
+        super().__init__()
+        self.loads = []
+
+    def _load(self, version):
+        self.loads.append(version)
+
+
+@override_settings(TEST_COUNTING_TTL=300)
+class VersionedCacheTests(TestCase):
+    """Per-process data follows its shared version and survives a cache outage."""
+
+    def setUp(self):
+        cache.clear()
+
+    def _broken_cache(self):
+        broken = mock.Mock(get=mock.Mock(side_effect=ConnectionError('down')),
+                           incr=mock.Mock(side_effect=ConnectionError('down')))
+        return mock.patch.object(CountingCache, 'cache', new_callable=mock.PropertyMock, return_value=broken)
+
+    def test_loads_once_per_version(self):
+        data = CountingCache()
+
+        self.assertFalse(data._ensure_fresh())
+        self.assertTrue(data._ensure_fresh())
+        self.assertEqual(data.loads, [1])
+
+    def test_invalidation_reaches_other_processes(self):
+        data, other = CountingCache(), CountingCache()
+        data._ensure_fresh()
+        other._ensure_fresh()
+
+        data.invalidate()
+
+        self.assertFalse(other._ensure_fresh())
+        self.assertEqual(other.loads, [1, 2])
+
+    def test_evicted_version_still_changes(self):
+        data = CountingCache()
+        data._ensure_fresh()
+        cache.delete(CountingCache.version_key)
+
+        data.invalidate()
+
+        self.assertFalse(data._ensure_fresh())
+        self.assertNotEqual(data.loads[-1], 1)
+
+    def test_unreadable_version_keeps_the_data_until_it_expires(self):
+        data = CountingCache()
+        data._ensure_fresh()
+
+        with self._broken_cache():
+            self.assertTrue(data._ensure_fresh())
+            with self.settings(TEST_COUNTING_TTL=0):
+                self.assertFalse(data._ensure_fresh())
+
+        self.assertEqual(data.loads, [1, None])
+
+    def test_local_invalidation_reloads_without_the_cache(self):
+        data = CountingCache()
+        data._ensure_fresh()
+
+        with self._broken_cache():
+            data.invalidate()
+            self.assertFalse(data._ensure_fresh())
+
+        self.assertEqual(data.loads, [1, None])
+
+
+@override_settings(AI_ADMISSION_ENABLED=True, AI_ADMISSION_MAX_CONCURRENT=2, AI_ADMISSION_MAX_PER_USER=1,
+                   AI_ADMISSION_QUEUE_SIZE=4, AI_ADMISSION_QUEUE_TIMEOUT=0, AI_ADMISSION_RETRY_AFTER=5)
+class AdmissionControlTests(TestCase):
+    """Requests over the concurrency limits are queued briefly, then answered right away."""
+
+    def setUp(self):
+        self.controller = AdmissionController('test')
+
+    def test_users_over_their_limit_are_rejected(self):
+        self.assertIsNone(self.controller.acquire('user:1'))
+
+        self.assertEqual(self.controller.acquire('user:1'), USER_LIMIT)
+        self.assertIsNone(self.controller.acquire('user:2'))
+
+    def test_saturated_process_rejects_requests(self):
+        self.controller.acquire('user:1')
+        self.controller.acquire('user:2')
+
+        self.assertEqual(self.controller.acquire('user:3'), OVERLOADED)
+
+        self.controller.release('user:1')
+        self.assertIsNone(self.controller.acquire('user:3'))
+        self.assertEqual(self.controller.get_stats()['active'], 2)
+
+    @override_settings(AI_ADMISSION_QUEUE_TIMEOUT=5)
+    def test_queued_request_gets_the_next_free_slot(self):
+        self.controller.acquire('user:1')
+        self.controller.acquire('user:2')
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(self.controller.acquire('user:3')))
+        waiter.start()
+        while self.controller.get_stats()['queue_depth'] == 0:
+            waiter.join(0.01)
+
+        self.controller.release('user:1')
+        waiter.join(5)
+
+        self.assertEqual(results, [None])
+        self.assertEqual(self.controller.get_stats()['queue_depth'], 0)
+
+    @override_settings(AI_ADMISSION_QUEUE_TIMEOUT=5, AI_ADMISSION_QUEUE_SIZE=0)
+    def test_full_queue_rejects_without_waiting(self):
+        self.controller.acquire('user:1')
+        self.controller.acquire('user:2')
+
+        with mock.patch.object(self.controller._condition, 'wait') as wait:
+            self.assertEqual(self.controller.acquire('user:3'), OVERLOADED)
+        wait.assert_not_called()
+
+    @override_settings(AI_ADMISSION_MAX_CONCURRENT=1, AI_ADMISSION_MAX_PER_USER=2)
+    def test_streaming_response_holds_its_slot_until_closed(self):
+        @admission_control
+        def view(request):
+            if request.GET.get('stream'):
+                return StreamingHttpResponse(iter(['a', 'b']))
+            return HttpResponse('ok')
+
+        factory = RequestFactory()
+
+        def get(path):
+            request = factory.get(path)
+            request.user = AnonymousUser()
+            return view(request)
+
+        streamed = get('/?stream=1')
+        busy = get('/')
+        self.assertEqual(busy.status_code, 503)
+        self.assertEqual(busy['Retry-After'], '5')
+
+        self.assertEqual(b''.join(streamed.streaming_content), b'ab')
+        streamed.close()
+        self.assertEqual(get('/').status_code, 200)
+        self.assertEqual(chat_admission.get_stats()['active'], 0)
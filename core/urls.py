@@ -14,6 +14,7 @@ from core.views.api_logging_demo import (
     api_logging_demo,
     api_logging_demo_json,
 )
+from core.views.metrics import metrics_view
 
 app_name = "core"
 
@@ -29,4 +30,7 @@ urlpatterns = [
     # API logging demo views
     path("demo/logging/api/", api_logging_demo, name="api_logging_demo"),
     path("demo/logging/api/json/", api_logging_demo_json, name="api_logging_demo_json"),
+    
+    # Operational metrics (staff only)
+    path("metrics/", metrics_view, name="metrics"),
 ]
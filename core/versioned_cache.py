@@ -0,0 +1,127 @@
+"""
+Per-process data reloaded when a version shared through the cache changes.
+
+Some data is read on nearly every request but rarely changes: the catalog
+snapshot, the autocomplete index, the routing table, the facet counts.
+Each process keeps it in memory, or caches it under a version, and a version
+number kept in the ``default`` cache tells every process when to reload:
+
+- the first process to look starts the version at 1,
+- a change bumps it (``incr``; if the key was evicted, a millisecond
+  timestamp that differs from every version seen so far),
+- a process reloads when the version differs from the one it loaded, or
+  when its copy is older than a TTL.
+
+With a shared cache such as Redis, all workers follow a change. Cache
+backend failures are logged: without a readable version a process keeps
+its copy until the TTL expires, then reloads it from the database.
+"""
+import logging
+import threading
+import time
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+
+def read_version(cache: Any, key: str, name: str) -> Optional[int]:
+    """
+    Read a shared version, starting it if no process did yet.
+
+    Args:
+        cache: The Django cache holding the version
+        key: The version's cache key
+        name: What the version is for, used in log messages
+
+    Returns:
+        The version, or None if the cache cannot be read
+    """
+    try:
+        version = cache.get(key)
+        if version is None:
+            # First process to look: start the shared version
+            cache.add(key, 1, None)
+            version = cache.get(key)
+        return version
+    except Exception as e:
+        logger.warning(f"{name.capitalize()} version unavailable: {str(e)}")
+        return None
+
+
+def bump_version(cache: Any, key: str, name: str) -> None:
+    """
+    Change a shared version, so every process reloads.
+
+    Args:
+        cache: The Django cache holding the version
+        key: The version's cache key
+        name: What the version is for, used in log messages
+    """
+    try:
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Key missing or evicted: any new value differs from the versions seen so far
+            cache.set(key, int(time.time() * 1000), None)
+    except Exception as e:
+        logger.warning(f"Could not bump the {name} version: {str(e)}")
+
+
+class VersionedCache:
+    """
+    Base class for data kept per process and reloaded when its shared version changes.
+
+    Subclasses set ``version_key``, ``name`` and ``ttl_setting`` and implement
+    ``_load``; readers call ``_ensure_fresh`` before using the data.
+    """
+
+    version_key: str = ''
+    name: str = ''
+    # Setting holding the seconds after which the data is reloaded even if the version did not change
+    ttl_setting: str = ''
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._loaded_at = 0.0
+
+    @property
+    def cache(self) -> Any:
+        """The Django cache holding the version."""
+        return caches['default']
+
+    def _load(self, version: Optional[int]) -> None:
+        """Load the data from the database."""
+        raise NotImplementedError("Subclasses must implement _load()")
+
+    def _is_fresh(self, version: Optional[int]) -> bool:
+        ttl = float(getattr(settings, self.ttl_setting, 300))
+        if not self._loaded_at or time.monotonic() - self._loaded_at >= ttl:
+            return False
+        # An unreadable version keeps the current data until it expires
+        return version is None or version == self._version
+
+    def _ensure_fresh(self) -> bool:
+        """
+        Reload the data if its version changed or it is too old.
+
+        Returns:
+            True if the data was already fresh
+        """
+        version = read_version(self.cache, self.version_key, self.name)
+        if self._is_fresh(version):
+            return True
+        with self._lock:
+            if not self._is_fresh(version):
+                self._load(version)
+                self._version = version
+                self._loaded_at = time.monotonic()
+        return False
+
+    def invalidate(self) -> None:
+        """Make every process reload the data before its next use."""
+        self._loaded_at = 0.0
+        bump_version(self.cache, self.version_key, self.name)
@@ -4,5 +4,6 @@ Core views package.
 This package contains views for the core app.
 """
 from core.views.service_worker import service_worker
+from core.views.metrics import metrics_view
 
-__all__ = ['service_worker']
+__all__ = ['service_worker', 'metrics_view']
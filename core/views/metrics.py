@@ -0,0 +1,28 @@
+"""
+Metrics view module.
+
+This module contains a staff-only view that exposes the in-process metrics
+snapshot as JSON.
+"""
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpRequest, JsonResponse
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_GET
+
+from core import metrics
+
+
+@require_GET
+@never_cache
+@staff_member_required
+def metrics_view(request: HttpRequest) -> JsonResponse:
+    """
+    Return the metrics snapshot of the process serving the request.
+
+    Args:
+        request: The HTTP request object
+
+    Returns:
+        JSON response with counters and subsystem statistics
+    """
+    return JsonResponse(metrics.snapshot())
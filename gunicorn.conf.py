@@ -0,0 +1,11 @@
+"""
+Gunicorn settings, read from the working directory: ``gunicorn inspireIA.wsgi``.
+"""
+from typing import Any
+
+
+def post_worker_init(worker: Any) -> None:
+    # Runs in each worker once the application is loaded, so forked workers never share the warm-up's connection
+    from inspireIA.startup import warm_up
+
+    warm_up()
@@ -3,14 +3,39 @@ ASGI config for inspireIA project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Django does not handle the ASGI lifespan protocol, so ``application`` answers
+it: on startup each worker warms up its per-process caches (see
+inspireIA.startup) before serving requests. Every other connection goes to
+Django.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
 
 import os
+from typing import Any, Dict
 
+from asgiref.sync import sync_to_async
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'inspireIA.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from inspireIA.startup import warm_up  # noqa: E402
+
+
+async def application(scope: Dict[str, Any], receive: Any, send: Any) -> None:
+    """Serve a connection, answering the lifespan protocol Django does not handle."""
+    if scope['type'] != 'lifespan':
+        await django_application(scope, receive, send)
+        return
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            # warm_up never raises, so a failed warm-up does not stop the server
+            await sync_to_async(warm_up)()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
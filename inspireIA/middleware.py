@@ -2,6 +2,7 @@ import time
 import logging
 from typing import Any, Callable, Dict, Optional
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
 from django.http import HttpRequest, HttpResponse
 from django.utils import timezone
 
@@ -18,14 +19,25 @@ class RequestLogMiddleware:
     - User agent
     - Referrer
     - Query parameters (excluding sensitive data)
+    
+    The middleware supports both sync and async requests, so async views
+    served under ASGI are not switched back to a thread for every request.
     """
     
+    sync_capable = True
+    async_capable = True
+    
     def __init__(self, get_response: Callable) -> None:
         self.get_response = get_response
         # Get a logger instance
         self.logger = logging.getLogger('inspireIA.request')
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
         
     def __call__(self, request: HttpRequest) -> HttpResponse:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        
         # Record start time
         start_time = time.time()
         
@@ -46,6 +58,32 @@ class RequestLogMiddleware:
         
         return response
     
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        """
+        Async version of __call__ used when the middleware chain is async.
+        
+        Args:
+            request: The HTTP request object
+            
+        Returns:
+            The HTTP response
+        """
+        start_time = time.time()
+        
+        response = await self.get_response(request)
+        
+        duration = time.time() - start_time
+        
+        # Resolving request.user may hit the database, so it runs in a thread
+        log_data = await sync_to_async(self._prepare_log_data)(request, response, duration)
+        
+        self.logger.info(
+            f"{request.method} {request.path} - Status: {response.status_code}",
+            extra=log_data
+        )
+        
+        return response
+    
     def _prepare_log_data(self, request: HttpRequest, response: HttpResponse, duration: float) -> Dict[str, Any]:
         """
         Prepare structured log data from the request and response.
@@ -4,7 +4,7 @@ Contains settings common to all environments.
 """
 import os
 from pathlib import Path
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 # Note: BASE_DIR is also defined in __init__.py for dotenv loading
@@ -308,3 +308,207 @@ REST_FRAMEWORK = {
         'user': '1000/day'
     }
 }
+
+# Base URLs of the AI providers; point them at `manage.py run_provider_stub` to benchmark without network access
+AI_PROVIDER_BASE_URLS: Dict[str, str] = {
+    'openai': get_env_value('OPENAI_API_BASE_URL', 'https://api.openai.com'),
+    'huggingface': get_env_value('HUGGINGFACE_API_BASE_URL', 'https://api-inference.huggingface.co'),
+}
+
+# AI provider transport settings
+# Each provider gets its own pooled keep-alive session (see catalog/providers/transport.py)
+AI_PROVIDER_POOL_CONNECTIONS: int = int(get_env_value('AI_PROVIDER_POOL_CONNECTIONS', 4))
+AI_PROVIDER_POOL_MAXSIZE: int = int(get_env_value('AI_PROVIDER_POOL_MAXSIZE', 10))
+AI_PROVIDER_POOL_BLOCK: bool = get_env_value('AI_PROVIDER_POOL_BLOCK', 'False').lower() in ('true', 't', 'yes', 'y', '1')
+AI_PROVIDER_POOL_SIZES: Dict[str, int] = {
+    'openai': int(get_env_value('OPENAI_POOL_MAXSIZE', AI_PROVIDER_POOL_MAXSIZE)),
+    'huggingface': int(get_env_value('HUGGINGFACE_POOL_MAXSIZE', AI_PROVIDER_POOL_MAXSIZE)),
+}
+
+# AI provider response cache (see catalog/providers/cache.py)
+AI_RESPONSE_CACHE_ENABLED: bool = get_env_value('AI_RESPONSE_CACHE_ENABLED', 'True').lower() in ('true', 't', 'yes', 'y', '1')
+AI_RESPONSE_CACHE_ALIAS: str = 'ai_responses'
+AI_RESPONSE_CACHE_TTL: int = int(get_env_value('AI_RESPONSE_CACHE_TTL', 3600))
+AI_RESPONSE_CACHE_MAX_ENTRIES: int = int(get_env_value('AI_RESPONSE_CACHE_MAX_ENTRIES', 1000))
+AI_RESPONSE_CACHE_MAX_BYTES: int = int(get_env_value('AI_RESPONSE_CACHE_MAX_BYTES', 65536))
+
+# Local memory caches; production switches to Redis when REDIS_URL is set
+CACHES: Dict[str, Dict[str, Any]] = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    AI_RESPONSE_CACHE_ALIAS: {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'ai-responses',
+        'TIMEOUT': AI_RESPONSE_CACHE_TTL,
+        'OPTIONS': {
+            # Least recently used responses are culled first once the cache is full
+            'MAX_ENTRIES': AI_RESPONSE_CACHE_MAX_ENTRIES,
+            'CULL_FREQUENCY': 10,
+        },
+    },
+}
+
+# Coalescing of concurrent identical provider calls (see catalog/providers/coalescing.py)
+AI_COALESCE_ENABLED: bool = get_env_value('AI_COALESCE_ENABLED', 'True').lower() in ('true', 't', 'yes', 'y', '1')
+AI_COALESCE_CACHE_ALIAS: str = 'default'
+# Waiting requests allow the leader its retry deadline and rate-limit wait per provider, plus this grace
+AI_COALESCE_GRACE: float = float(get_env_value('AI_COALESCE_GRACE', 5))
+AI_COALESCE_RESULT_TTL: int = int(get_env_value('AI_COALESCE_RESULT_TTL', 5))
+AI_COALESCE_POLL_INTERVAL: float = float(get_env_value('AI_COALESCE_POLL_INTERVAL', 0.1))
+
+# Per-provider circuit breaker shared by all workers (see catalog/providers/circuit_breaker.py)
+AI_CIRCUIT_ENABLED: bool = get_env_value('AI_CIRCUIT_ENABLED', 'True').lower() in ('true', 't', 'yes', 'y', '1')
+AI_CIRCUIT_CACHE_ALIAS: str = 'default'
+AI_CIRCUIT_FAILURE_THRESHOLD: int = int(get_env_value('AI_CIRCUIT_FAILURE_THRESHOLD', 5))
+AI_CIRCUIT_FAILURE_WINDOW: int = int(get_env_value('AI_CIRCUIT_FAILURE_WINDOW', 60))
+AI_CIRCUIT_RECOVERY_TIMEOUT: float = float(get_env_value('AI_CIRCUIT_RECOVERY_TIMEOUT', 30))
+AI_CIRCUIT_PROBE_TIMEOUT: int = int(get_env_value('AI_CIRCUIT_PROBE_TIMEOUT', 30))
+
+# Retries of throttled or unavailable provider calls (see catalog/providers/retry.py)
+AI_RETRY_MAX_ATTEMPTS: int = int(get_env_value('AI_RETRY_MAX_ATTEMPTS', 3))
+AI_RETRY_BASE_DELAY: float = float(get_env_value('AI_RETRY_BASE_DELAY', 0.5))
+AI_RETRY_MAX_DELAY: float = float(get_env_value('AI_RETRY_MAX_DELAY', 8))
+AI_RETRY_DEADLINE: float = float(get_env_value('AI_RETRY_DEADLINE', 45))
+AI_RETRY_BUDGET_RATIO: float = float(get_env_value('AI_RETRY_BUDGET_RATIO', 0.2))
+AI_RETRY_BUDGET_MAX: float = float(get_env_value('AI_RETRY_BUDGET_MAX', 10))
+
+# Requests/tokens per minute allowed per provider API key (see catalog/providers/rate_limit.py).
+# Buckets are shared through Redis when the cache below is Redis-backed; 0 disables a limit.
+AI_RATE_LIMIT_ENABLED: bool = get_env_value('AI_RATE_LIMIT_ENABLED', 'True').lower() in ('true', 't', 'yes', 'y', '1')
+AI_RATE_LIMIT_CACHE_ALIAS: str = 'default'
+AI_RATE_LIMITS: Dict[str, Dict[str, int]] = {
+    'openai': {
+        'rpm': int(get_env_value('OPENAI_RATE_LIMIT_RPM', 500)),
+        'tpm': int(get_env_value('OPENAI_RATE_LIMIT_TPM', 200000)),
+    },
+    'huggingface': {
+        'rpm': int(get_env_value('HUGGINGFACE_RATE_LIMIT_RPM', 300)),
+        'tpm': int(get_env_value('HUGGINGFACE_RATE_LIMIT_TPM', 0)),
+    },
+}
+# 'queue' waits up to AI_RATE_LIMIT_QUEUE_TIMEOUT seconds for the budget, 'reject' fails immediately
+AI_RATE_LIMIT_MODE: str = get_env_value('AI_RATE_LIMIT_MODE', 'queue')
+AI_RATE_LIMIT_QUEUE_TIMEOUT: float = float(get_env_value('AI_RATE_LIMIT_QUEUE_TIMEOUT', 10))
+# Completion tokens assumed per call when estimating its token cost
+AI_RATE_LIMIT_COMPLETION_TOKENS: int = int(get_env_value('AI_RATE_LIMIT_COMPLETION_TOKENS', 256))
+
+# Services tried in order when a tool's provider fails and the tool has no failover chain of its own,
+# e.g. "huggingface,simulation"
+AI_FAILOVER_CHAIN: List[str] = [
+    service.strip() for service in get_env_value('AI_FAILOVER_CHAIN', '').split(',') if service.strip()
+]
+
+# Admission control for the chat endpoints, per process (see core/admission.py)
+AI_ADMISSION_ENABLED: bool = get_env_value('AI_ADMISSION_ENABLED', 'True').lower() in ('true', 't', 'yes', 'y', '1')
+AI_ADMISSION_MAX_CONCURRENT: int = int(get_env_value('AI_ADMISSION_MAX_CONCURRENT', 16))
+AI_ADMISSION_MAX_PER_USER: int = int(get_env_value('AI_ADMISSION_MAX_PER_USER', 2))
+AI_ADMISSION_QUEUE_SIZE: int = int(get_env_value('AI_ADMISSION_QUEUE_SIZE', 32))
+AI_ADMISSION_QUEUE_TIMEOUT: float = float(get_env_value('AI_ADMISSION_QUEUE_TIMEOUT', 5))
+AI_ADMISSION_RETRY_AFTER: int = int(get_env_value('AI_ADMISSION_RETRY_AFTER', 5))
+
+# Background completion jobs executed by `manage.py run_completion_workers` (see interaction/jobs.py)
+AI_COMPLETION_JOBS_ENABLED: bool = get_env_value('AI_COMPLETION_JOBS_ENABLED', 'False').lower() in ('true', 't', 'yes', 'y', '1')
+AI_JOB_WORKERS: int = int(get_env_value('AI_JOB_WORKERS', 2))
+AI_JOB_MAX_ATTEMPTS: int = int(get_env_value('AI_JOB_MAX_ATTEMPTS', 3))
+# Seconds before a job claimed by a worker that stopped responding can be claimed again
+AI_JOB_VISIBILITY_TIMEOUT: int = int(get_env_value('AI_JOB_VISIBILITY_TIMEOUT', 120))
+# Base delay before a failed job is retried, doubled on every attempt
+AI_JOB_RETRY_DELAY: float = float(get_env_value('AI_JOB_RETRY_DELAY', 5))
+AI_JOB_LONG_POLL_TIMEOUT: float = float(get_env_value('AI_JOB_LONG_POLL_TIMEOUT', 25))
+AI_JOB_POLL_INTERVAL: float = float(get_env_value('AI_JOB_POLL_INTERVAL', 0.5))
+AI_JOB_WORKER_IDLE_INTERVAL: float = float(get_env_value('AI_JOB_WORKER_IDLE_INTERVAL', 1))
+
+# Compare-chat mode: one prompt sent concurrently to several AI tools (see interaction/compare.py)
+AI_COMPARE_MAX_TOOLS: int = int(get_env_value('AI_COMPARE_MAX_TOOLS', 4))
+AI_COMPARE_TOOL_TIMEOUT: float = float(get_env_value('AI_COMPARE_TOOL_TIMEOUT', 30))
+# Threads shared by all compare requests of a process
+AI_COMPARE_MAX_WORKERS: int = int(get_env_value('AI_COMPARE_MAX_WORKERS', 32))
+
+# Smart routing: seconds a process keeps its category-to-tool table without a version change
+# (see interaction/routing.py); AI tool saves and deletes reload it immediately
+AI_ROUTING_TABLE_TTL: float = float(get_env_value('AI_ROUTING_TABLE_TTL', 300))
+# Trained routing model (see interaction/classifier.py and the train_routing_model command);
+# below the confidence threshold the regex rules decide
+AI_ROUTING_MODEL_ENABLED: bool = get_env_value('AI_ROUTING_MODEL_ENABLED', 'True').lower() in ('true', 't', 'yes', 'y', '1')
+AI_ROUTING_MODEL_PATH: Path = Path(get_env_value('AI_ROUTING_MODEL_PATH', str(BASE_DIR / 'routing_model')))
+AI_ROUTING_MODEL_THRESHOLD: float = float(get_env_value('AI_ROUTING_MODEL_THRESHOLD', 0.6))
+# Most messages accepted by the batch routing endpoint (/api/interaction/route/batch/)
+AI_ROUTING_BATCH_MAX_MESSAGES: int = int(get_env_value('AI_ROUTING_BATCH_MAX_MESSAGES', 1000))
+# Health-aware routing: choose among the most popular tools of a category the one expected
+# to answer first; tools within the tolerance of the fastest are ranked by popularity
+AI_ROUTING_HEALTH_ENABLED: bool = get_env_value('AI_ROUTING_HEALTH_ENABLED', 'True').lower() in ('true', 't', 'yes', 'y', '1')
+AI_ROUTING_CANDIDATES: int = int(get_env_value('AI_ROUTING_CANDIDATES', 3))
+AI_ROUTING_LATENCY_TOLERANCE: float = float(get_env_value('AI_ROUTING_LATENCY_TOLERANCE', 0.2))
+
+# Provider latency and error statistics (see catalog/providers/health.py), kept in a shared cache
+AI_HEALTH_ENABLED: bool = get_env_value('AI_HEALTH_ENABLED', 'True').lower() in ('true', 't', 'yes', 'y', '1')
+AI_HEALTH_CACHE_ALIAS: str = 'default'
+# Seconds of calls the statistics cover
+AI_HEALTH_WINDOW: int = int(get_env_value('AI_HEALTH_WINDOW', 300))
+# Seconds a process reuses the statistics it read
+AI_HEALTH_REFRESH_INTERVAL: float = float(get_env_value('AI_HEALTH_REFRESH_INTERVAL', 5))
+# Recent calls needed before a backend's statistics are trusted
+AI_HEALTH_MIN_SAMPLES: int = int(get_env_value('AI_HEALTH_MIN_SAMPLES', 5))
+
+# Upper bound of concurrent connections per provider for the async client (see catalog/providers/async_client.py)
+AI_PROVIDER_ASYNC_MAX_CONNECTIONS: int = int(get_env_value('AI_PROVIDER_ASYNC_MAX_CONNECTIONS', 200))
+
+# Serve the chat endpoints with async views; only useful when running under ASGI (uvicorn/daphne)
+ASYNC_CHAT_VIEWS: bool = get_env_value('ASYNC_CHAT_VIEWS', 'False').lower() in ('true', 't', 'yes', 'y', '1')
+
+# Delay between words when streaming simulated responses, in seconds
+AI_SIMULATION_TOKEN_DELAY: float = float(get_env_value('AI_SIMULATION_TOKEN_DELAY', 0.03))
+
+# Simulated provider used by tools without an API key (see catalog/providers/simulation.py)
+# Latency distribution: 'fixed', 'normal' or 'long_tail' (log-normal)
+AI_SIMULATION_LATENCY: str = get_env_value('AI_SIMULATION_LATENCY', 'fixed')
+AI_SIMULATION_LATENCY_MEAN: float = float(get_env_value('AI_SIMULATION_LATENCY_MEAN', 1.0))
+# Standard deviation in seconds for 'normal', shape (sigma) for 'long_tail'
+AI_SIMULATION_LATENCY_SPREAD: float = float(get_env_value('AI_SIMULATION_LATENCY_SPREAD', 0.25))
+AI_SIMULATION_LATENCY_MAX: float = float(get_env_value('AI_SIMULATION_LATENCY_MAX', 30))
+# Fraction of simulated calls failing with one of AI_SIMULATION_ERROR_STATUS_CODES
+AI_SIMULATION_ERROR_RATE: float = float(get_env_value('AI_SIMULATION_ERROR_RATE', 0.0))
+AI_SIMULATION_ERROR_STATUS_CODES: List[int] = [
+    int(code) for code in get_env_value('AI_SIMULATION_ERROR_STATUS_CODES', '503,429').split(',') if code.strip()
+]
+# Seed making the simulated latencies, errors and answers reproducible between runs
+AI_SIMULATION_SEED: Optional[int] = int(get_env_value('AI_SIMULATION_SEED')) if get_env_value('AI_SIMULATION_SEED') else None
+
+# Catalog search (see catalog/search.py)
+# 'auto' uses PostgreSQL full-text search or SQLite FTS5 depending on the database; 'basic' forces icontains filters
+CATALOG_SEARCH_BACKEND: str = get_env_value('CATALOG_SEARCH_BACKEND', 'auto')
+# PostgreSQL text search configuration (stemming language); run rebuild_search_index after changing it
+CATALOG_SEARCH_CONFIG: str = get_env_value('CATALOG_SEARCH_CONFIG', 'english')
+# How much popularity lifts relevance: score = relevance * (1 + weight * popularity)
+CATALOG_SEARCH_POPULARITY_WEIGHT: float = float(get_env_value('CATALOG_SEARCH_POPULARITY_WEIGHT', 0.1))
+# SQLite only: best full-text matches ranked per search; weaker ones are left out
+CATALOG_SEARCH_MAX_RESULTS: int = int(get_env_value('CATALOG_SEARCH_MAX_RESULTS', 1000))
+
+# Catalog autocomplete (see catalog/autocomplete.py), served by /api/catalog/autocomplete/
+# Seconds before a process rebuilds its index even if no AI tool changed
+CATALOG_AUTOCOMPLETE_TTL: float = float(get_env_value('CATALOG_AUTOCOMPLETE_TTL', 300))
+# Seconds between two reads of the shared index version, so most lookups skip the cache
+CATALOG_AUTOCOMPLETE_VERSION_CHECK_INTERVAL: float = float(get_env_value('CATALOG_AUTOCOMPLETE_VERSION_CHECK_INTERVAL', 1))
+# Seconds browsers and proxies may reuse an autocomplete response
+CATALOG_AUTOCOMPLETE_MAX_AGE: int = int(get_env_value('CATALOG_AUTOCOMPLETE_MAX_AGE', 60))
+
+# Seconds the catalog facet counts of a search and filter set are cached (see catalog/facets.py);
+# saving or deleting an AI tool makes them recomputed earlier
+CATALOG_FACETS_CACHE_TTL: int = int(get_env_value('CATALOG_FACETS_CACHE_TTL', 300))
+
+# Seconds before a process reloads its snapshot of the catalog tool selectors (see catalog/snapshot.py)
+# even if no AI tool changed
+CATALOG_SNAPSHOT_TTL: float = float(get_env_value('CATALOG_SNAPSHOT_TTL', 300))
+
+# Related tools of the detail pages (see catalog/similarity.py and the rebuild_related_tools command)
+# Neighbors stored per tool
+CATALOG_RELATED_TOOLS_COUNT: int = int(get_env_value('CATALOG_RELATED_TOOLS_COUNT', 10))
+# Weights of the description (TF-IDF), co-favorite and co-usage similarities
+CATALOG_RELATED_TEXT_WEIGHT: float = float(get_env_value('CATALOG_RELATED_TEXT_WEIGHT', 0.6))
+CATALOG_RELATED_FAVORITE_WEIGHT: float = float(get_env_value('CATALOG_RELATED_FAVORITE_WEIGHT', 0.25))
+CATALOG_RELATED_USAGE_WEIGHT: float = float(get_env_value('CATALOG_RELATED_USAGE_WEIGHT', 0.15))
+# Most description words in the TF-IDF vocabulary
+CATALOG_RELATED_MAX_FEATURES: int = int(get_env_value('CATALOG_RELATED_MAX_FEATURES', 5000))
+# Flag saved tools for `rebuild_related_tools --stale`; otherwise only full rebuilds see them
+CATALOG_RELATED_UPDATE_ON_SAVE: bool = get_env_value('CATALOG_RELATED_UPDATE_ON_SAVE', 'True').lower() in ('true', 't', 'yes', 'y', '1')
@@ -116,7 +116,21 @@ if REDIS_URL:
                     'SOCKET_CONNECT_TIMEOUT': int(get_env_value('REDIS_SOCKET_TIMEOUT', 5)),
                     'SOCKET_TIMEOUT': int(get_env_value('REDIS_SOCKET_TIMEOUT', 5)),
                 }
-            }
+            },
+            # Size-bound this cache on the Redis server with maxmemory and
+            # maxmemory-policy allkeys-lru
+            AI_RESPONSE_CACHE_ALIAS: {
+                'BACKEND': 'django_redis.cache.RedisCache',
+                'LOCATION': get_env_value('AI_RESPONSE_CACHE_REDIS_URL', REDIS_URL),
+                'TIMEOUT': AI_RESPONSE_CACHE_TTL,
+                'KEY_PREFIX': 'ai_responses',
+                'OPTIONS': {
+                    'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+                    'PARSER_CLASS': 'redis.connection.HiredisParser',
+                    'SOCKET_CONNECT_TIMEOUT': int(get_env_value('REDIS_SOCKET_TIMEOUT', 5)),
+                    'SOCKET_TIMEOUT': int(get_env_value('REDIS_SOCKET_TIMEOUT', 5)),
+                }
+            },
         }
         # Use Redis as session backend if configured
         if get_env_value('USE_REDIS_SESSIONS', 'False').lower() in ('true', 't', 'yes', 'y', '1'):
@@ -0,0 +1,32 @@
+"""
+Warm-up of the per-process caches before a worker serves its first request.
+
+Server hooks call :func:`warm_up` once the application is loaded in a worker:
+the ASGI lifespan startup (see inspireIA/asgi.py) and gunicorn's
+``post_worker_init`` (see gunicorn.conf.py). Importing the WSGI or ASGI
+module does not touch the database, so management commands, tests and
+servers without these hooks start as before; the caches are then built on
+first use.
+"""
+import logging
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up() -> None:
+    """
+    Build the catalog autocomplete index before the first keystroke rather than on it.
+
+    Failures are only logged: a worker without a warm cache still serves requests.
+    """
+    try:
+        from catalog.autocomplete import autocomplete_index
+
+        autocomplete_index.warm_up()
+    except Exception as e:
+        logger.warning(f"Startup warm-up failed: {str(e)}")
+    finally:
+        # The warm-up's connections belong to no request; requests open their own
+        connections.close_all()
@@ -3,6 +3,9 @@ WSGI config for inspireIA project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
 
+Per-process caches are warmed up by the server's worker hook (see
+gunicorn.conf.py and inspireIA.startup), not when this module is imported.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/wsgi/
 """
@@ -13,4 +16,4 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'inspireIA.settings')
 
-application = get_wsgi_application()
\ No newline at end of file
+application = get_wsgi_application()
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Conversation, Message, FavoritePrompt, SharedChat
+from .models import Conversation, Message, FavoritePrompt, SharedChat, CompletionJob
 from inspireIA.admin import admin_site
 from django.utils.html import format_html
 from django.urls import reverse
@@ -29,10 +29,10 @@ class MessageInline(admin.TabularInline):
 
 @admin.register(Conversation)
 class ConversationAdmin(admin.ModelAdmin):
-    list_display = ('title', 'user', 'ai_tool', 'message_count', 'created_at', 'updated_at')
+    list_display = ('title', 'user', 'ai_tool', 'message_count', 'last_message_at', 'created_at', 'updated_at')
     list_filter = ('ai_tool', 'created_at', 'updated_at')
     search_fields = ('title', 'user__username', 'user__email', 'ai_tool__name')
-    readonly_fields = ('created_at', 'updated_at', 'id')
+    readonly_fields = ('created_at', 'updated_at', 'id', 'message_count', 'last_message_at', 'last_message_preview')
     date_hierarchy = 'created_at'
     inlines = [MessageInline]
     raw_id_fields = ('user', 'ai_tool')
@@ -45,14 +45,9 @@ class ConversationAdmin(admin.ModelAdmin):
     ]
     
     def get_queryset(self, request: HttpRequest) -> QuerySet[Conversation]:
-        """Optimize query by prefetching related objects"""
-        return super().get_queryset(request).select_related('user', 'ai_tool').prefetch_related('message_set')
-    
-    def message_count(self, obj: Conversation) -> str:
-        """Display the number of messages in this conversation"""
-        count = obj.message_set.count()
-        return count
-    message_count.short_description = 'Messages'
+        """Optimize query by joining the user and AI tool"""
+        return super().get_queryset(request).select_related('user', 'ai_tool')
+
     
     def export_conversations_json(self, request, queryset):
         """Export selected conversations to JSON"""
@@ -129,7 +124,7 @@ class ConversationAdmin(admin.ModelAdmin):
         for conversation in queryset:
             if not conversation.title.startswith('[IMPORTANT]'):
                 conversation.title = f'[IMPORTANT] {conversation.title}'
-                conversation.save()
+                conversation.save(update_fields=['title', 'updated_at'])
                 count += 1
         
         self.message_user(
@@ -145,7 +140,7 @@ class ConversationAdmin(admin.ModelAdmin):
         for conversation in queryset:
             if not conversation.title.startswith('[ARCHIVED]'):
                 conversation.title = f'[ARCHIVED] {conversation.title}'
-                conversation.save()
+                conversation.save(update_fields=['title', 'updated_at'])
                 count += 1
         
         self.message_user(
@@ -242,8 +237,22 @@ class SharedChatAdmin(admin.ModelAdmin):
     recipient_display.short_description = 'Shared With'
     recipient_display.admin_order_field = 'recipient__username'
 
+@admin.register(CompletionJob)
+class CompletionJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'status', 'attempts', 'created_at', 'finished_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('id', 'user__username', 'prompt')
+    readonly_fields = ('id', 'created_at', 'finished_at', 'worker_id', 'locked_until', 'ai_message')
+    raw_id_fields = ('user', 'conversation')
+    date_hierarchy = 'created_at'
+    
+    def get_queryset(self, request: HttpRequest) -> QuerySet[CompletionJob]:
+        """Optimize query by selecting related objects"""
+        return super().get_queryset(request).select_related('user')
+
 # Register with our custom admin site
 admin_site.register(Conversation, ConversationAdmin)
 admin_site.register(Message, MessageAdmin)
 admin_site.register(FavoritePrompt, FavoritePromptAdmin)
 admin_site.register(SharedChat, SharedChatAdmin)
+admin_site.register(CompletionJob, CompletionJobAdmin)
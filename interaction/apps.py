@@ -5,3 +5,7 @@ class InteractionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'interaction'
     verbose_name = 'User Interactions'
+
+    def ready(self) -> None:
+        """Connect the signal handlers."""
+        from interaction import signals  # noqa: F401
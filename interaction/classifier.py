@@ -0,0 +1,411 @@
+"""
+Learned classifier for smart routing.
+
+Messages are turned into hashed bag-of-words features (word unigrams and
+bigrams, signed, L2-normalised) and scored by a linear softmax model over
+the AI tool categories. The model is trained offline by the
+``train_routing_model`` command from past conversations, and the chosen
+category still goes through the routing table (see interaction.routing) to
+pick the tool.
+
+A trained model is two files sharing a base path: ``<path>.npy`` holds the
+weight matrix and is memory-mapped, so worker processes share its pages and
+loading is instantaneous; ``<path>.json`` holds the categories, the bias and
+the softmax temperature fitted on held-out conversations so confidences
+match the observed accuracy.
+
+NumPy is an optional dependency: without it, or without a trained model,
+routing uses the regex rules only.
+"""
+import json
+import logging
+import math
+import os
+import re
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Bump when the feature extraction changes; older models are then ignored
+FEATURES_VERSION = 1
+
+DEFAULT_N_FEATURES = 2 ** 18
+
+_TOKEN_RE = re.compile(r"[a-z0-9+#]+")
+
+
+def extract_features(text: str, n_features: int) -> Tuple[Any, Any]:
+    """
+    Hash a message into a sparse feature vector.
+
+    Args:
+        text: The message
+        n_features: Size of the hashed feature space (a power of two)
+
+    Returns:
+        Tuple of (feature indices, values) as NumPy arrays; both are empty
+        when the message has no words
+    """
+    tokens = _TOKEN_RE.findall(text.lower())
+    grams = tokens + [f"{first} {second}" for first, second in zip(tokens, tokens[1:])]
+    mask = n_features - 1
+    counts: Dict[int, float] = {}
+    for gram in grams:
+        digest = zlib.crc32(gram.encode('utf-8'))
+        # The top bit gives the sign, so colliding features tend to cancel out
+        index = digest & mask
+        counts[index] = counts.get(index, 0.0) + (1.0 if digest & 0x80000000 else -1.0)
+
+    indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+    values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+    norm = float(np.sqrt(np.dot(values, values)))
+    if norm:
+        values /= norm
+    return indices, values
+
+
+def _softmax(logits: Any) -> Any:
+    shifted = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+class RoutingClassifier:
+    """
+    Linear softmax model over hashed message features.
+
+    Attributes:
+        categories: AI tool categories, in the order of the model's outputs
+        weights: Matrix of shape (n_features, len(categories)), possibly memory-mapped
+        bias: Vector of len(categories), the log class frequencies learned with the weights
+        temperature: Divides the evidence from the words; fitted on held-out conversations
+        n_features: Size of the hashed feature space
+    """
+
+    def __init__(self, categories: Sequence[str], weights: Any, bias: Any,
+                 temperature: float = 1.0) -> None:
+        self.categories = tuple(categories)
+        self.weights = weights
+        self.bias = np.asarray(bias, dtype=np.float32)
+        self.temperature = float(temperature)
+        self.n_features = int(weights.shape[0])
+
+    def logits(self, text: str) -> Any:
+        """
+        Compute the calibrated category scores of a message.
+
+        The temperature scales the evidence from the words only, so a message
+        made of unknown words gets the class frequencies as probabilities
+        instead of an over-confident guess.
+
+        Args:
+            text: The message
+
+        Returns:
+            Vector of len(categories) scores
+        """
+        indices, values = extract_features(text, self.n_features)
+        if not len(indices):
+            return self.bias.copy()
+        return (values @ self.weights.take(indices, axis=0)) / self.temperature + self.bias
+
+    def predict_proba(self, text: str) -> Any:
+        """
+        Compute the calibrated category probabilities of a message.
+
+        Args:
+            text: The message
+
+        Returns:
+            Vector of len(categories) probabilities
+        """
+        return _softmax(self.logits(text))
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """
+        Pick the most likely category of a message.
+
+        Args:
+            text: The message
+
+        Returns:
+            Tuple of (category, probability of that category)
+        """
+        # A handful of categories: plain floats are faster than NumPy here
+        logits = self.logits(text).tolist()
+        best = max(range(len(logits)), key=logits.__getitem__)
+        top = logits[best]
+        return self.categories[best], 1.0 / sum(math.exp(logit - top) for logit in logits)
+
+    def predict_many(self, texts: Sequence[str]) -> List[Tuple[str, float]]:
+        """
+        Pick the most likely category of several messages with one matrix product.
+
+        Args:
+            texts: The messages
+
+        Returns:
+            List of (category, probability of that category), in the order of ``texts``
+        """
+        if not texts:
+            return []
+        indices, values, offsets = _batch_features(texts, self.n_features)
+        probabilities = _softmax(_batch_scores(self.weights, indices, values, offsets) / self.temperature + self.bias)
+        best = probabilities.argmax(axis=1)
+        return [
+            (self.categories[index], float(probability))
+            for index, probability in zip(best.tolist(), probabilities[np.arange(len(texts)), best].tolist())
+        ]
+
+    def save(self, path: Path) -> None:
+        """
+        Write the model next to ``path`` (``.npy`` and ``.json``).
+
+        Each file is replaced atomically, so a process loading the model
+        meanwhile never reads a half-written file.
+
+        Args:
+            path: Base path of the model files
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        weights_path = path.with_suffix('.npy')
+        meta_path = path.with_suffix('.json')
+
+        tmp_weights = weights_path.with_name(f"{weights_path.name}.tmp")
+        with open(tmp_weights, 'wb') as f:
+            np.save(f, np.ascontiguousarray(self.weights, dtype=np.float32))
+        os.replace(tmp_weights, weights_path)
+
+        tmp_meta = meta_path.with_name(f"{meta_path.name}.tmp")
+        with open(tmp_meta, 'w', encoding='utf-8') as f:
+            json.dump({
+                'features_version': FEATURES_VERSION,
+                'n_features': self.n_features,
+                'categories': list(self.categories),
+                'bias': [float(value) for value in self.bias],
+                'temperature': self.temperature,
+            }, f, indent=2)
+        os.replace(tmp_meta, meta_path)
+
+    @classmethod
+    def load(cls, path: Path) -> 'RoutingClassifier':
+        """
+        Load a model written by :meth:`save`, memory-mapping its weights.
+
+        Args:
+            path: Base path of the model files
+
+        Returns:
+            The model
+
+        Raises:
+            ValueError: If the files do not describe a usable model
+        """
+        path = Path(path)
+        with open(path.with_suffix('.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('features_version') != FEATURES_VERSION:
+            raise ValueError(f"Model features version {meta.get('features_version')} is not {FEATURES_VERSION}")
+        # A plain ndarray view of the mapping indexes faster than np.memmap
+        weights = np.load(path.with_suffix('.npy'), mmap_mode='r').view(np.ndarray)
+        expected_shape = (meta['n_features'], len(meta['categories']))
+        if weights.shape != expected_shape:
+            raise ValueError(f"Model weights have shape {weights.shape}, expected {expected_shape}")
+        return cls(meta['categories'], weights, meta['bias'], meta.get('temperature', 1.0))
+
+
+def _batch_features(texts: Sequence[str], n_features: int) -> Tuple[Any, Any, Any]:
+    """
+    Hash several messages into a CSR-like layout.
+
+    Returns:
+        Tuple of (indices, values, row offsets) where the features of message
+        ``i`` are ``indices[offsets[i]:offsets[i + 1]]``
+    """
+    all_indices: List[Any] = []
+    all_values: List[Any] = []
+    offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+    for row, text in enumerate(texts):
+        indices, values = extract_features(text, n_features)
+        all_indices.append(indices)
+        all_values.append(values)
+        offsets[row + 1] = offsets[row] + len(indices)
+    return np.concatenate(all_indices), np.concatenate(all_values), offsets
+
+
+def _batch_scores(weights: Any, indices: Any, values: Any, offsets: Any) -> Any:
+    """Evidence from the words of each message: the logits without the bias."""
+    lengths = np.diff(offsets)
+    scores = np.zeros((len(lengths), weights.shape[1]), dtype=np.float32)
+    rows = lengths > 0
+    if rows.any():
+        contributions = values[:, None] * weights.take(indices, axis=0)
+        # Messages without words add no contribution, so the starts of the
+        # others delimit their features
+        scores[rows] = np.add.reduceat(contributions, offsets[:-1][rows], axis=0)
+    return scores
+
+
+def train(texts: Sequence[str], labels: Sequence[str], n_features: int = DEFAULT_N_FEATURES,
+          epochs: int = 8, learning_rate: float = 0.5, batch_size: int = 64,
+          validation_split: float = 0.1, seed: int = 0) -> Tuple[RoutingClassifier, Dict[str, Any]]:
+    """
+    Train a routing classifier with mini-batch gradient descent.
+
+    A share of the examples is held out to fit the softmax temperature and
+    to report the accuracy of the model.
+
+    Args:
+        texts: Example messages
+        labels: Category of each message
+        n_features: Size of the hashed feature space (a power of two)
+        epochs: Passes over the training examples
+        learning_rate: Initial step size, decreasing with each epoch
+        batch_size: Examples per gradient step
+        validation_split: Share of the examples held out
+        seed: Seed of the shuffling
+
+    Returns:
+        Tuple of (trained model, report with example counts, held-out accuracy,
+        mean confidence and temperature)
+
+    Raises:
+        ValueError: If there are fewer than two categories to learn
+    """
+    if n_features & (n_features - 1):
+        raise ValueError("n_features must be a power of two")
+    examples = [(text, label) for text, label in zip(texts, labels) if _TOKEN_RE.search(text.lower())]
+    categories = sorted({label for _, label in examples})
+    if len(categories) < 2:
+        raise ValueError("At least two categories with examples are needed to train a routing model")
+
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(examples))
+    n_validation = int(len(examples) * validation_split) if len(examples) >= 20 else 0
+    validation = [examples[i] for i in order[:n_validation]]
+    training = [examples[i] for i in order[n_validation:]]
+
+    category_index = {category: index for index, category in enumerate(categories)}
+    train_labels = np.array([category_index[label] for _, label in training], dtype=np.int64)
+    indices, values, offsets = _batch_features([text for text, _ in training], n_features)
+
+    weights = np.zeros((n_features, len(categories)), dtype=np.float32)
+    # Start from the class frequencies so rare categories need evidence to win
+    frequencies = np.bincount(train_labels, minlength=len(categories)) + 1.0
+    bias = np.log(frequencies / frequencies.sum()).astype(np.float32)
+    targets = np.eye(len(categories), dtype=np.float32)
+
+    for epoch in range(epochs):
+        step = learning_rate / (1 + epoch)
+        for start in rng.permutation(np.arange(0, len(training), batch_size)):
+            rows = slice(start, min(start + batch_size, len(training)))
+            row_offsets = offsets[rows.start:rows.stop + 1]
+            batch_indices = indices[row_offsets[0]:row_offsets[-1]]
+            batch_values = values[row_offsets[0]:row_offsets[-1]]
+            logits = _batch_scores(weights, batch_indices, batch_values, row_offsets - row_offsets[0]) + bias
+            # Gradient of the cross-entropy with respect to the logits
+            error = (_softmax(logits) - targets[train_labels[rows]]) / len(logits)
+            row_of_feature = np.repeat(np.arange(len(logits)), np.diff(row_offsets))
+            np.add.at(weights, batch_indices, -step * batch_values[:, None] * error[row_of_feature])
+            bias -= step * error.sum(axis=0)
+
+    classifier = RoutingClassifier(categories, weights, bias)
+    report: Dict[str, Any] = {
+        'examples': len(examples),
+        'training': len(training),
+        'validation': len(validation),
+        'categories': {category: int(count) for category, count in
+                       zip(categories, np.bincount(train_labels, minlength=len(categories)))},
+    }
+    if validation:
+        val_labels = np.array([category_index[label] for _, label in validation], dtype=np.int64)
+        val_indices, val_values, val_offsets = _batch_features([text for text, _ in validation], n_features)
+        val_scores = _batch_scores(weights, val_indices, val_values, val_offsets)
+        classifier.temperature = _fit_temperature(val_scores, bias, val_labels)
+        probabilities = _softmax(val_scores / classifier.temperature + bias)
+        report['accuracy'] = float((probabilities.argmax(axis=1) == val_labels).mean())
+        report['mean_confidence'] = float(probabilities.max(axis=1).mean())
+    report['temperature'] = classifier.temperature
+    return classifier, report
+
+
+def _fit_temperature(scores: Any, bias: Any, labels: Any) -> float:
+    """
+    Find the temperature minimising the held-out negative log-likelihood.
+
+    Args:
+        scores: Held-out evidence from the words, one row per message
+        bias: Bias of the model
+        labels: Category index of each message
+
+    Returns:
+        The best temperature of a logarithmic grid between 0.01 and 20
+    """
+    best_temperature, best_loss = 1.0, math.inf
+    for temperature in np.geomspace(0.01, 20, 80):
+        probabilities = _softmax(scores / temperature + bias)
+        loss = float(-np.log(probabilities[np.arange(len(labels)), labels] + 1e-12).mean())
+        if loss < best_loss:
+            best_temperature, best_loss = float(temperature), loss
+    return best_temperature
+
+
+_classifier: Optional[RoutingClassifier] = None
+_classifier_loaded = False
+_classifier_lock = threading.Lock()
+
+
+def get_classifier() -> Optional[RoutingClassifier]:
+    """
+    Get the routing model of this process, loading it on first use.
+
+    Returns:
+        The model, or None when it is disabled, NumPy is missing or no usable
+        model has been trained
+    """
+    global _classifier, _classifier_loaded
+    if _classifier_loaded:
+        return _classifier
+    with _classifier_lock:
+        if not _classifier_loaded:
+            _classifier = _load_configured_classifier()
+            _classifier_loaded = True
+    return _classifier
+
+
+def reset_classifier() -> None:
+    """Forget the loaded model so the next call to get_classifier() reads the files again."""
+    global _classifier, _classifier_loaded
+    with _classifier_lock:
+        _classifier = None
+        _classifier_loaded = False
+
+
+def _load_configured_classifier() -> Optional[RoutingClassifier]:
+    if not getattr(settings, 'AI_ROUTING_MODEL_ENABLED', True):
+        return None
+    if np is None:
+        logger.info("NumPy is not installed: smart routing uses the regex rules only")
+        return None
+    path = Path(getattr(settings, 'AI_ROUTING_MODEL_PATH', settings.BASE_DIR / 'routing_model'))
+    if not path.with_suffix('.json').exists():
+        logger.info(f"No routing model at {path}: smart routing uses the regex rules only")
+        return None
+    try:
+        classifier = RoutingClassifier.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Could not load the routing model at {path}: {str(e)}")
+        return None
+    logger.info(f"Routing model loaded from {path}: {len(classifier.categories)} categories")
+    return classifier
@@ -0,0 +1,136 @@
+"""
+Fan-out of one prompt to several AI tools for the compare-chat mode.
+
+The provider calls run concurrently on a shared thread pool, so the total
+latency is that of the slowest tool rather than the sum of all of them.
+Results are yielded in the order the tools answer. Tools that have not
+answered within ``AI_COMPARE_TOOL_TIMEOUT`` seconds are reported as timed
+out; the thread keeps waiting for the provider in the background, but its
+answer is discarded.
+
+The worker threads only call the providers: everything touching the
+database stays in the caller's thread.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+
+from catalog.models import AITool
+from catalog.utils import AIService
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """
+    Get the thread pool shared by all compare requests of this process.
+
+    Returns:
+        The thread pool, created on first use
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=int(getattr(settings, 'AI_COMPARE_MAX_WORKERS', 32)),
+                thread_name_prefix='ai-compare'
+            )
+        return _executor
+
+
+def _call_tool(prompt: str, service_config: Dict[str, Any]) -> Tuple[Dict[str, Any], float]:
+    """
+    Send the prompt to one tool and time the call.
+
+    Args:
+        prompt: The user's message
+        service_config: Configuration for the AI service
+
+    Returns:
+        Tuple of (provider response, elapsed seconds)
+    """
+    started = time.monotonic()
+    try:
+        response = AIService.send_to_ai_service(prompt, service_config)
+    except Exception as e:
+        logger.error(f"Compare call to {service_config.get('api_type')} raised: {str(e)}")
+        response = {"success": False, "error": f"Error processing request: {str(e)}"}
+    return response, time.monotonic() - started
+
+
+def fan_out(prompt: str, tools: List[AITool],
+            timeout: Optional[float] = None) -> Iterator[Tuple[AITool, Dict[str, Any], float]]:
+    """
+    Send a prompt to several AI tools concurrently.
+
+    Args:
+        prompt: The user's message
+        tools: The AI tools to ask
+        timeout: Seconds to wait for the tools; AI_COMPARE_TOOL_TIMEOUT if None
+
+    Yields:
+        Tuples of (tool, provider response, elapsed seconds) as the tools answer,
+        followed by the tools that timed out
+    """
+    if timeout is None:
+        timeout = float(getattr(settings, 'AI_COMPARE_TOOL_TIMEOUT', 30))
+
+    started = time.monotonic()
+    deadline = started + timeout
+    executor = _get_executor()
+    pending: Dict[Future, AITool] = {
+        executor.submit(_call_tool, prompt, tool.get_service_config()): tool
+        for tool in tools
+    }
+    metrics.increment('ai_compare.requests')
+    metrics.increment('ai_compare.tool_calls', len(tools))
+
+    try:
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                tool = pending.pop(future)
+                response, elapsed = future.result()
+                yield tool, response, elapsed
+    finally:
+        # Reached on timeout, or when the client goes away mid-stream
+        for future, tool in pending.items():
+            if future.cancel():
+                continue
+            logger.warning(f"Compare call to {tool.name} did not answer within {timeout:.0f}s")
+
+    for tool in pending.values():
+        metrics.increment('ai_compare.timeouts')
+        yield tool, {
+            "success": False,
+            "error": f"{tool.name} did not answer within {timeout:.0f} seconds.",
+            "timed_out": True
+        }, time.monotonic() - started
+
+
+def get_stats() -> Dict[str, Any]:
+    """
+    Report compare-chat counts for this process.
+
+    Returns:
+        Dictionary with the number of compare requests, tool calls and timeouts
+    """
+    return {
+        'requests': metrics.get_counter('ai_compare.requests'),
+        'tool_calls': metrics.get_counter('ai_compare.tool_calls'),
+        'timeouts': metrics.get_counter('ai_compare.timeouts'),
+    }
+
+
+metrics.register_collector('ai_compare', get_stats)
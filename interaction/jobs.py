@@ -0,0 +1,365 @@
+"""
+Background completion jobs for the interaction app.
+
+With ``AI_COMPLETION_JOBS_ENABLED``, the chat views no longer call the AI
+provider themselves: they save the user's message, enqueue a
+:class:`~interaction.models.CompletionJob` and answer right away with the
+job's id. Worker processes started with ``manage.py run_completion_workers``
+execute the jobs, and the browser polls (or long-polls) the job until the
+reply is ready. Web workers are therefore never pinned by a slow completion.
+
+Jobs live in the database, so no broker is needed:
+
+- A worker claims a job by moving it to ``running`` with a compare-and-swap
+  update, which is safe on every database. On PostgreSQL the candidate rows
+  are also locked with ``SKIP LOCKED`` so workers do not compete for the
+  same row.
+- A claim is valid until ``locked_until`` (``AI_JOB_VISIBILITY_TIMEOUT``).
+  Before calling the provider, the worker extends it to the longest the
+  call may take: the retry deadline and rate-limit wait of the provider and
+  of every failover, as for coalesced calls. If the worker dies, the job
+  becomes claimable again afterwards.
+- Provider failures are retried with exponential backoff until
+  ``max_attempts`` claims have been made.
+- Cancelling a job discards its result. A running provider call cannot be
+  interrupted, but its reply is not saved.
+"""
+import logging
+import time
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.urls import reverse
+from django.utils import timezone
+
+from catalog.providers.circuit_breaker import is_provider_failure
+from catalog.providers.coalescing import single_flight
+from catalog.utils import AIService
+from core import metrics
+from interaction.models import CompletionJob, Conversation, Message
+
+logger = logging.getLogger(__name__)
+
+# Claims lost to another worker before giving up until the next poll
+MAX_CLAIM_RACES = 10
+# Longest pause, in seconds, of a worker after repeated errors
+MAX_ERROR_BACKOFF = 30
+
+
+def jobs_enabled() -> bool:
+    """Whether the chat views enqueue completion jobs instead of calling the provider."""
+    return getattr(settings, 'AI_COMPLETION_JOBS_ENABLED', False)
+
+
+def enqueue_completion(user: Any, conversation: Conversation, prompt: str) -> CompletionJob:
+    """
+    Enqueue the AI reply to a message.
+
+    Args:
+        user: The user who sent the message
+        conversation: The conversation the reply belongs to
+        prompt: The user's message
+
+    Returns:
+        The new job
+    """
+    job = CompletionJob.objects.create(
+        user=user,
+        conversation=conversation,
+        prompt=prompt,
+        max_attempts=int(getattr(settings, 'AI_JOB_MAX_ATTEMPTS', 3)),
+    )
+    metrics.increment('ai_jobs.enqueued')
+    logger.info(f"Enqueued completion job {job.id} for conversation {conversation.id}")
+    return job
+
+
+def claim_job(worker_id: str) -> Optional[CompletionJob]:
+    """
+    Claim the oldest job ready to run.
+
+    Pending jobs are claimable once ``available_at`` has passed, running
+    jobs once their claim has expired.
+
+    Args:
+        worker_id: Identifier of the claiming worker
+
+    Returns:
+        The claimed job, or None if no job is ready
+    """
+    for _ in range(MAX_CLAIM_RACES):
+        now = timezone.now()
+        with transaction.atomic():
+            candidates = CompletionJob.objects.filter(
+                Q(status=CompletionJob.PENDING, available_at__lte=now)
+                | Q(status=CompletionJob.RUNNING, locked_until__lt=now)
+            ).order_by('available_at')
+            if connection.features.has_select_for_update_skip_locked:
+                candidates = candidates.select_for_update(skip_locked=True)
+            job = candidates.first()
+            if job is None:
+                return None
+
+            # Only the worker that still sees the job as it was read gets it
+            unchanged = CompletionJob.objects.filter(pk=job.pk, status=job.status, attempts=job.attempts)
+
+            if job.attempts >= job.max_attempts:
+                # The worker running the last attempt died
+                _finish(unchanged, job, CompletionJob.FAILED, error='The AI service did not answer in time.')
+                continue
+
+            locked_until = now + timedelta(seconds=int(getattr(settings, 'AI_JOB_VISIBILITY_TIMEOUT', 120)))
+            if not unchanged.update(status=CompletionJob.RUNNING, attempts=F('attempts') + 1,
+                                    worker_id=worker_id, locked_until=locked_until):
+                continue
+
+        if job.status == CompletionJob.RUNNING:
+            logger.warning(f"Completion job {job.id} was abandoned by worker {job.worker_id}, reclaiming it")
+            metrics.increment('ai_jobs.reclaimed')
+        job.status = CompletionJob.RUNNING
+        job.attempts += 1
+        job.worker_id = worker_id
+        job.locked_until = locked_until
+        return job
+    return None
+
+
+def _finish(claim: Any, job: CompletionJob, status: str, content: Optional[str] = None,
+            error: str = '') -> bool:
+    """
+    Move a job to a final state and save the AI's reply in its conversation.
+
+    Failed jobs save the error as the reply, like the chat views do.
+
+    Args:
+        claim: Queryset matching the job only while the caller's claim is valid
+        job: The job
+        status: SUCCEEDED or FAILED
+        content: The AI's reply; the error is used when None
+        error: The error reported for the job
+
+    Returns:
+        False if the claim was lost (job cancelled or reclaimed) and nothing was saved
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ai_message = Message.objects.create(
+            conversation_id=job.conversation_id,
+            content=content if content is not None else error,
+            is_user=False
+        )
+        if not claim.update(status=status, ai_message=ai_message, error=error,
+                            finished_at=now, locked_until=None):
+            transaction.set_rollback(True)
+            return False
+        Conversation.objects.filter(pk=job.conversation_id).update(updated_at=now)
+
+    metrics.increment(f'ai_jobs.{status}')
+    return True
+
+
+def _retry_delay(attempts: int) -> float:
+    """
+    Compute the delay before a failed job is claimable again.
+
+    Args:
+        attempts: Number of attempts made so far
+
+    Returns:
+        Delay in seconds
+    """
+    base = float(getattr(settings, 'AI_JOB_RETRY_DELAY', 5))
+    return base * (2 ** max(attempts - 1, 0))
+
+
+def visibility_timeout(service_config: Dict[str, Any]) -> float:
+    """
+    Compute how long a running job's claim must last.
+
+    Args:
+        service_config: Configuration of the job's AI service
+
+    Returns:
+        Seconds: the longest the provider call may take, failovers included,
+        and at least AI_JOB_VISIBILITY_TIMEOUT
+    """
+    longest_call = single_flight.timeout(AIService.provider_calls(service_config))
+    return max(float(getattr(settings, 'AI_JOB_VISIBILITY_TIMEOUT', 120)), longest_call)
+
+
+def run_job(job: CompletionJob, worker_id: str) -> None:
+    """
+    Call the AI provider for a claimed job and record the outcome.
+
+    Args:
+        job: A job returned by claim_job
+        worker_id: Identifier of the worker holding the claim
+    """
+    claim = CompletionJob.objects.filter(
+        pk=job.pk, status=CompletionJob.RUNNING, worker_id=worker_id, attempts=job.attempts
+    )
+    service_config = job.conversation.ai_tool.get_service_config()
+    locked_until = timezone.now() + timedelta(seconds=visibility_timeout(service_config))
+    if not claim.update(locked_until=locked_until):
+        logger.info(f"Completion job {job.id} was cancelled or reclaimed before it ran")
+        return
+
+    started = time.monotonic()
+    try:
+        response = AIService.send_to_ai_service(job.prompt, service_config)
+    except Exception as e:
+        logger.error(f"Completion job {job.id} raised: {str(e)}")
+        response = {"success": False, "error": f"Error processing request: {str(e)}"}
+    logger.info(f"Completion job {job.id} attempt {job.attempts} took {time.monotonic() - started:.2f}s")
+
+    if response.get('success', False):
+        content = response.get('data', 'Sorry, I could not process your request.')
+        if not _finish(claim, job, CompletionJob.SUCCEEDED, content=content):
+            logger.info(f"Completion job {job.id} was cancelled or reclaimed, discarding its reply")
+        return
+
+    error = response.get('error', 'Sorry, an error occurred while processing your request.')
+    if is_provider_failure(response) and job.attempts < job.max_attempts:
+        delay = _retry_delay(job.attempts)
+        if claim.update(status=CompletionJob.PENDING, error=error, locked_until=None,
+                        available_at=timezone.now() + timedelta(seconds=delay)):
+            logger.info(f"Completion job {job.id} failed ({error}), retrying in {delay:.0f}s")
+            metrics.increment('ai_jobs.retried')
+        return
+
+    _finish(claim, job, CompletionJob.FAILED, error=error)
+
+
+def cancel_job(job: CompletionJob) -> bool:
+    """
+    Cancel a job that has not finished yet.
+
+    Args:
+        job: The job to cancel
+
+    Returns:
+        True if the job was cancelled, False if it had already finished
+    """
+    cancelled = CompletionJob.objects.filter(
+        pk=job.pk, status__in=[CompletionJob.PENDING, CompletionJob.RUNNING]
+    ).update(status=CompletionJob.CANCELLED, finished_at=timezone.now(), locked_until=None)
+    if cancelled:
+        metrics.increment('ai_jobs.cancelled')
+    job.refresh_from_db()
+    return bool(cancelled)
+
+
+def job_payload(job: CompletionJob) -> Dict[str, Any]:
+    """
+    Build the JSON payload describing a job.
+
+    Finished jobs carry the AI's reply in the same fields as the chat views'
+    responses, so the browser can display it the same way.
+
+    Args:
+        job: The job, with its conversation, AI tool and reply loaded
+
+    Returns:
+        Dictionary describing the job
+    """
+    data: Dict[str, Any] = {
+        'job_id': str(job.id),
+        'status': job.status,
+        'attempts': job.attempts,
+        'conversation_id': str(job.conversation_id),
+        'ai_tool_name': job.conversation.ai_tool.name,
+        'poll_url': reverse('interaction:completion_job', args=[job.id]),
+        'cancel_url': reverse('interaction:cancel_completion_job', args=[job.id]),
+    }
+    if job.ai_message is not None:
+        data['message'] = job.ai_message.content
+        data['timestamp'] = job.ai_message.timestamp.isoformat()
+    elif job.status == CompletionJob.CANCELLED:
+        data['error'] = 'The request was cancelled.'
+    return data
+
+
+def wait_for_job(job: CompletionJob, timeout: float) -> CompletionJob:
+    """
+    Wait until a job finishes or the timeout expires (long polling).
+
+    Args:
+        job: The job to wait for
+        timeout: Maximum wait in seconds
+
+    Returns:
+        The job with its current state
+    """
+    interval = float(getattr(settings, 'AI_JOB_POLL_INTERVAL', 0.5))
+    deadline = time.monotonic() + timeout
+    while not job.is_finished and time.monotonic() < deadline:
+        time.sleep(min(interval, max(deadline - time.monotonic(), 0)))
+        job.refresh_from_db(fields=['status', 'attempts', 'ai_message', 'error'])
+    return job
+
+
+def run_worker(worker_id: str, stop: Any = None, burst: bool = False) -> int:
+    """
+    Execute jobs until stopped.
+
+    Args:
+        worker_id: Identifier of this worker
+        stop: Optional object with an ``is_set()`` method requesting a stop
+        burst: Return as soon as no job is ready instead of waiting for more
+
+    Returns:
+        Number of jobs executed
+    """
+    idle_interval = float(getattr(settings, 'AI_JOB_WORKER_IDLE_INTERVAL', 1))
+    executed = 0
+    failures = 0
+    while stop is None or not stop.is_set():
+        # Like a request, each job starts by dropping broken or expired connections
+        close_old_connections()
+        try:
+            job = claim_job(worker_id)
+            if job is None:
+                if burst:
+                    break
+                time.sleep(idle_interval)
+                continue
+            run_job(job, worker_id)
+        except Exception as e:
+            # A database restart must not kill the worker; a job it was running is reclaimed after its visibility timeout
+            failures += 1
+            metrics.increment('ai_jobs.worker_errors')
+            logger.exception(f"Completion worker {worker_id} failed: {str(e)}")
+            close_old_connections()
+            if burst:
+                break
+            time.sleep(min(idle_interval * 2 ** (failures - 1), MAX_ERROR_BACKOFF))
+            continue
+        failures = 0
+        executed += 1
+    return executed
+
+
+def get_stats() -> Dict[str, Any]:
+    """
+    Report the queue depth and the job counts of this process.
+
+    Jobs are executed by the worker processes, so the finished counts are
+    only meaningful in the metrics of a worker.
+
+    Returns:
+        Dictionary with the number of queued jobs and per-state counts
+    """
+    stats: Dict[str, Any] = {
+        'pending': CompletionJob.objects.filter(status=CompletionJob.PENDING).count(),
+        'running': CompletionJob.objects.filter(status=CompletionJob.RUNNING).count(),
+    }
+    for name in ('enqueued', CompletionJob.SUCCEEDED, CompletionJob.FAILED,
+                 CompletionJob.CANCELLED, 'retried', 'reclaimed', 'worker_errors'):
+        stats[name] = metrics.get_counter(f'ai_jobs.{name}')
+    return stats
+
+
+metrics.register_collector('ai_jobs', get_stats)
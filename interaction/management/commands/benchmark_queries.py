@@ -0,0 +1,171 @@
+import random
+import statistics
+import time
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from catalog.models import AITool
+from interaction.models import Conversation, Message, SharedChat
+
+# Synthetic rows are recognisable by these prefixes, so --cleanup only removes them
+USER_PREFIX = 'bench-user-'
+TOOL_PREFIX = 'Bench Tool '
+
+CATEGORIES = ['Text Generator', 'Image Generator', 'Video Generator', 'Code Generator',
+              'Transcription', 'Word Processor']
+
+
+class Command(BaseCommand):
+    help = ('Shows the query plans and timings of the hottest chat and catalog queries, '
+            'optionally on a generated dataset')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--populate', action='store_true', help='Generate synthetic data first')
+        parser.add_argument('--users', type=int, default=2000, help='Users to generate')
+        parser.add_argument('--conversations', type=int, default=50, help='Conversations per generated user')
+        parser.add_argument('--messages', type=int, default=20, help='Messages per generated conversation')
+        parser.add_argument('--tools', type=int, default=300, help='AI tools to generate')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per INSERT')
+        parser.add_argument('--repeat', type=int, default=20, help='Executions of each query')
+        parser.add_argument('--no-plans', action='store_true', help='Only report timings')
+        parser.add_argument('--cleanup', action='store_true', help='Delete the generated data and exit')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        if options['cleanup']:
+            users, _ = User.objects.filter(username__startswith=USER_PREFIX).delete()
+            tools, _ = AITool.objects.filter(name__startswith=TOOL_PREFIX).delete()
+            self.stdout.write(self.style.SUCCESS(f'Deleted {users + tools} generated rows'))
+            return
+
+        if options['populate']:
+            self._populate(options)
+
+        user = User.objects.filter(username__startswith=USER_PREFIX).order_by('username').first()
+        if user is None:
+            raise CommandError('No generated data: run with --populate first')
+        conversation = Conversation.objects.filter(user=user).order_by('-updated_at').first()
+        if conversation is None:
+            raise CommandError('The generated users have no conversations')
+
+        self.stdout.write(
+            f"Dataset: {AITool.objects.count()} tools, {User.objects.count()} users, "
+            f"{Conversation.objects.count()} conversations, {Message.objects.count()} messages, "
+            f"{SharedChat.objects.count()} shared chats ({connection.vendor})"
+        )
+
+        queries = [
+            ('Messages of a conversation',
+             lambda: Message.objects.filter(conversation=conversation).order_by('timestamp')),
+            ("User's latest conversations",
+             lambda: Conversation.objects.filter(user=user).order_by('-updated_at')[:50]),
+            ('Most popular tools of a category',
+             lambda: AITool.objects.filter(category='Code Generator').order_by('-popularity')[:10]),
+            ("User's shared chats",
+             lambda: SharedChat.objects.filter(created_by=user).order_by('-created_at')),
+            ('Conversation title uniqueness',
+             lambda: Conversation.objects.filter(user=user, title=conversation.title).exclude(id=conversation.id)[:1]),
+        ]
+        for name, build in queries:
+            self._benchmark(name, build, options['repeat'], not options['no_plans'])
+
+    def _benchmark(self, name, build, repeat, show_plan):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n{name}'))
+        if show_plan:
+            self.stdout.write(build().explain())
+
+        timings = []
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            list(build())
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        p95 = timings[min(int(len(timings) * 0.95), len(timings) - 1)]
+        self.stdout.write(f'median {statistics.median(timings):.2f} ms, p95 {p95:.2f} ms over {len(timings)} runs')
+
+    def _populate(self, options):
+        User = get_user_model()
+        batch_size = options['batch_size']
+        rng = random.Random(0)
+        now = timezone.now()
+        run = uuid.uuid4().hex[:8]
+
+        tools = [
+            AITool(
+                name=f'{TOOL_PREFIX}{run}-{index}',
+                provider='Benchmark',
+                endpoint='https://example.com',
+                category=CATEGORIES[index % len(CATEGORIES)],
+                description='Generated for query benchmarks',
+                popularity=round(rng.uniform(0, 5), 2),
+            )
+            for index in range(options['tools'])
+        ]
+        AITool.objects.bulk_create(tools, batch_size=batch_size)
+        self.stdout.write(f'Created {len(tools)} tools')
+
+        # Enough users per transaction for about one batch of conversations
+        users_per_batch = max(batch_size // max(options['conversations'], 1), 1)
+        users_done = conversations_done = messages_done = 0
+        for start in range(0, options['users'], users_per_batch):
+            stop = min(start + users_per_batch, options['users'])
+            with transaction.atomic():
+                users = User.objects.bulk_create([
+                    User(
+                        username=f'{USER_PREFIX}{run}-{index}',
+                        email=f'{USER_PREFIX}{run}-{index}@example.com',
+                        first_name='Bench',
+                        password='!',
+                    )
+                    for index in range(start, stop)
+                ], batch_size=batch_size)
+
+                conversations = []
+                shares = []
+                for user in users:
+                    for number in range(options['conversations']):
+                        conversations.append(Conversation(
+                            user=user,
+                            ai_tool=rng.choice(tools),
+                            title=f'Conversation {number}',
+                        ))
+                    for _ in range(3):
+                        shares.append(SharedChat(
+                            conversation=conversations[-1 - rng.randrange(options['conversations'])],
+                            created_by=user,
+                            access_token=uuid.uuid4().hex,
+                        ))
+                Conversation.objects.bulk_create(conversations, batch_size=batch_size)
+                # auto_now overrides updated_at on insert; spread it out again
+                for conversation in conversations:
+                    conversation.updated_at = now - timedelta(minutes=rng.randrange(0, 60 * 24 * 365))
+                Conversation.objects.bulk_update(conversations, ['updated_at'], batch_size=batch_size)
+                SharedChat.objects.bulk_create(shares, batch_size=batch_size)
+
+                messages = []
+                for conversation in conversations:
+                    started = conversation.updated_at - timedelta(minutes=options['messages'])
+                    for number in range(options['messages']):
+                        messages.append(Message(
+                            conversation=conversation,
+                            content=f'Generated message {number}',
+                            is_user=number % 2 == 0,
+                            timestamp=started + timedelta(minutes=number),
+                        ))
+                        if len(messages) >= batch_size:
+                            Message.objects.bulk_create(messages, batch_size=batch_size)
+                            messages_done += len(messages)
+                            messages = []
+                Message.objects.bulk_create(messages, batch_size=batch_size)
+                messages_done += len(messages)
+
+            users_done += len(users)
+            conversations_done += len(conversations)
+            self.stdout.write(
+                f'Created {users_done} users, {conversations_done} conversations, {messages_done} messages'
+            )
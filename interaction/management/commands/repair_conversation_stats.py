@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from interaction.models import Conversation
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the message count and last message of conversations from their messages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Conversations updated per query')
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report the conversations whose message count is wrong',
+        )
+
+    def handle(self, *args, **options):
+        wrong_counts = (
+            Conversation.objects.annotate(actual=Count('message'))
+            .filter(~Q(message_count=F('actual')))
+            .count()
+        )
+        self.stdout.write(f'{wrong_counts} conversations have a wrong message count')
+        if options['check']:
+            return
+
+        batch_size = max(options['batch_size'], 1)
+        ids = Conversation.objects.order_by('pk').values_list('pk', flat=True)
+        batch = []
+        updated = 0
+        for pk in ids.iterator(chunk_size=batch_size):
+            batch.append(pk)
+            if len(batch) >= batch_size:
+                updated += self._refresh(batch)
+                batch = []
+        if batch:
+            updated += self._refresh(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'Recomputed the message stats of {updated} conversations'))
+
+    def _refresh(self, ids):
+        with transaction.atomic():
+            return Conversation.refresh_message_stats(Conversation.objects.filter(pk__in=ids))
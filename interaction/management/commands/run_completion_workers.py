@@ -0,0 +1,82 @@
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from interaction import jobs
+
+logger = logging.getLogger(__name__)
+
+
+def _worker_main(index: int, burst: bool) -> None:
+    """
+    Entry point of a worker process.
+
+    SIGTERM and SIGINT stop the worker once its current job is done.
+
+    Args:
+        index: Number of the worker within the pool
+        burst: Exit once no job is ready
+    """
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: stop.set())
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{index}"
+    logger.info(f"Completion worker {worker_id} started")
+    executed = jobs.run_worker(worker_id, stop=stop, burst=burst)
+    logger.info(f"Completion worker {worker_id} stopped after {executed} jobs")
+
+
+class Command(BaseCommand):
+    help = 'Runs worker processes executing background AI completion jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=None,
+            help='Number of worker processes (defaults to AI_JOB_WORKERS)',
+        )
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help='Exit once no job is ready instead of waiting for new jobs',
+        )
+
+    def handle(self, *args, **options):
+        processes = options['processes'] or int(getattr(settings, 'AI_JOB_WORKERS', 2))
+        burst = options['burst']
+
+        if processes <= 1:
+            _worker_main(0, burst)
+            return
+
+        # Children must open their own database connections
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        workers = [
+            context.Process(target=_worker_main, args=(index, burst), daemon=False)
+            for index in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f'Started {processes} completion workers')
+
+        def stop_workers(signum, frame):
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+
+        signal.signal(signal.SIGTERM, stop_workers)
+        signal.signal(signal.SIGINT, stop_workers)
+
+        for worker in workers:
+            worker.join()
+        self.stdout.write(self.style.SUCCESS('Completion workers stopped'))
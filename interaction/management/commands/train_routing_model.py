@@ -0,0 +1,95 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import OuterRef, Subquery
+
+from interaction import classifier
+from interaction.models import Conversation, Message
+
+
+class Command(BaseCommand):
+    help = 'Trains the smart routing model from the first message and AI tool of past conversations'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            default=None,
+            help='Base path of the model files (defaults to AI_ROUTING_MODEL_PATH)',
+        )
+        parser.add_argument(
+            '--max-conversations',
+            type=int,
+            default=200000,
+            help='Most recent conversations used for training',
+        )
+        parser.add_argument(
+            '--min-examples',
+            type=int,
+            default=20,
+            help='Categories with fewer conversations are left to the regex rules',
+        )
+        parser.add_argument(
+            '--features',
+            type=int,
+            default=classifier.DEFAULT_N_FEATURES,
+            help='Size of the hashed feature space (a power of two)',
+        )
+        parser.add_argument('--epochs', type=int, default=8, help='Passes over the training examples')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the shuffling')
+
+    def handle(self, *args, **options):
+        if classifier.np is None:
+            raise CommandError('NumPy is required to train the routing model. Install it with: pip install numpy')
+
+        first_message = Message.objects.filter(
+            conversation=OuterRef('pk'), is_user=True
+        ).order_by('timestamp').values('content')[:1]
+        rows = (
+            Conversation.objects.filter(ai_tool__isnull=False)
+            .annotate(first_message=Subquery(first_message))
+            .exclude(first_message__isnull=True)
+            .order_by('-created_at')
+            .values_list('first_message', 'ai_tool__category')[:options['max_conversations']]
+        )
+        texts, labels = [], []
+        for text, category in rows.iterator(chunk_size=2000):
+            texts.append(text)
+            labels.append(category)
+
+        counts = {}
+        for label in labels:
+            counts[label] = counts.get(label, 0) + 1
+        kept = {label for label, count in counts.items() if count >= options['min_examples']}
+        for label in sorted(set(counts) - kept):
+            self.stdout.write(f'Skipping {label}: only {counts[label]} conversations')
+        examples = [(text, label) for text, label in zip(texts, labels) if label in kept]
+        self.stdout.write(f'Training on {len(examples)} conversations in {len(kept)} categories')
+
+        try:
+            model, report = classifier.train(
+                [text for text, _ in examples],
+                [label for _, label in examples],
+                n_features=options['features'],
+                epochs=options['epochs'],
+                seed=options['seed'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for category, count in report['categories'].items():
+            self.stdout.write(f'  {category}: {count}')
+        if 'accuracy' in report:
+            self.stdout.write(
+                f"Held-out accuracy {report['accuracy']:.1%} on {report['validation']} conversations, "
+                f"mean confidence {report['mean_confidence']:.1%} (temperature {report['temperature']:.2f})"
+            )
+        else:
+            self.stdout.write('Too few conversations to hold some out: confidences are not calibrated')
+
+        output = Path(options['output'] or getattr(settings, 'AI_ROUTING_MODEL_PATH', settings.BASE_DIR / 'routing_model'))
+        model.save(output)
+        self.stdout.write(self.style.SUCCESS(
+            f'Routing model written to {output.with_suffix(".npy")} and {output.with_suffix(".json")}. '
+            'Restart the workers to load it.'
+        ))
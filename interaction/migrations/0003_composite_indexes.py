@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalog", "0005_composite_indexes"),
+        ("interaction", "0002_completionjob"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="conversation",
+            index=models.Index(
+                fields=["user", "-updated_at"], name="interaction_conv_user_upd_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="conversation",
+            index=models.Index(
+                fields=["user", "title"], name="interaction_conv_title_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(
+                fields=["conversation", "timestamp"], name="interaction_msg_conv_ts_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="sharedchat",
+            index=models.Index(
+                fields=["created_by", "-created_at"],
+                name="interaction_share_created_idx",
+            ),
+        ),
+    ]
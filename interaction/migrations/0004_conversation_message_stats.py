@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:38
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Substr
+
+
+def fill_message_stats(apps, schema_editor):
+    Conversation = apps.get_model("interaction", "Conversation")
+    Message = apps.get_model("interaction", "Message")
+    messages = Message.objects.filter(conversation=OuterRef("pk"))
+    latest = messages.order_by("-timestamp", "-pk")
+    Conversation.objects.update(
+        message_count=Coalesce(
+            Subquery(
+                messages.order_by()
+                .values("conversation")
+                .annotate(total=Count("pk"))
+                .values("total")
+            ),
+            0,
+        ),
+        last_message_at=Subquery(latest.values("timestamp")[:1]),
+        last_message_preview=Coalesce(
+            Subquery(
+                latest.annotate(preview=Substr("content", 1, 100)).values("preview")[:1]
+            ),
+            Value(""),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("interaction", "0003_composite_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="conversation",
+            name="last_message_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="conversation",
+            name="last_message_preview",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=100
+            ),
+        ),
+        migrations.AddField(
+            model_name="conversation",
+            name="message_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_message_stats, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,7 @@
 import uuid
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Substr
 from django.conf import settings
 from django.utils import timezone
 import json
@@ -21,7 +23,15 @@ class Conversation(models.Model):
         title (CharField): Title of the conversation
         created_at (DateTimeField): When the conversation was created
         updated_at (DateTimeField): When the conversation was last updated
+        message_count (PositiveIntegerField): Number of messages, maintained by Message.save and a post_delete signal
+        last_message_at (DateTimeField): Timestamp of the latest message
+        last_message_preview (CharField): Start of the latest message
     """
+    # Characters of the latest message kept in last_message_preview
+    PREVIEW_LENGTH = 100
+    # Kept up to date with queryset updates; a full save would write back the values it loaded
+    MESSAGE_STATS_FIELDS = ('message_count', 'last_message_at', 'last_message_preview')
+
     id: models.UUIDField = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(
         'users.CustomUser',  
@@ -38,6 +48,17 @@ class Conversation(models.Model):
     title: models.CharField = models.CharField(max_length=255, default="New Conversation")
     created_at: models.DateTimeField = models.DateTimeField(auto_now_add=True)
     updated_at: models.DateTimeField = models.DateTimeField(auto_now=True)
+    message_count: models.PositiveIntegerField = models.PositiveIntegerField(default=0, editable=False)
+    last_message_at: models.DateTimeField = models.DateTimeField(null=True, blank=True, editable=False)
+    last_message_preview: models.CharField = models.CharField(max_length=PREVIEW_LENGTH, blank=True, default='', editable=False)
+    
+    class Meta:
+        indexes = [
+            # Conversation history, dashboard, profile and API list a user's latest conversations
+            models.Index(fields=['user', '-updated_at'], name='interaction_conv_user_upd_idx'),
+            # rename_conversation checks that the user has no other conversation with the new title
+            models.Index(fields=['user', 'title'], name='interaction_conv_title_idx'),
+        ]
     
     def __str__(self) -> str:
         # Type checking: ensure user has username attribute
@@ -46,6 +67,50 @@ class Conversation(models.Model):
         tool_name = self.ai_tool.name if hasattr(self.ai_tool, 'name') else "Unknown Tool"
         return f"{user_str} - {tool_name} - {self.title}"
     
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        """
+        Save the conversation, leaving the message stats of an existing one untouched.
+        
+        Messages may be added by other requests or job workers between loading
+        and saving a conversation, so a full save skips the stat fields.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.MESSAGE_STATS_FIELDS
+            ]
+        super().save(*args, **kwargs)
+    
+    @classmethod
+    def refresh_message_stats(cls, queryset: Optional['QuerySet[Conversation]'] = None) -> int:
+        """
+        Recompute message_count, last_message_at and last_message_preview from the messages.
+        
+        Message.save and the Message post_delete signal keep the fields up to
+        date; this is for changes that bypass them (bulk_create, queryset update).
+        
+        Args:
+            queryset: Conversations to refresh, all of them when None
+            
+        Returns:
+            int: Number of conversations updated
+        """
+        messages = Message.objects.filter(conversation=OuterRef('pk'))
+        latest = messages.order_by('-timestamp', '-pk')
+        if queryset is None:
+            queryset = cls.objects.all()
+        return queryset.update(
+            message_count=Coalesce(
+                Subquery(messages.order_by().values('conversation').annotate(total=Count('pk')).values('total')),
+                0
+            ),
+            last_message_at=Subquery(latest.values('timestamp')[:1]),
+            last_message_preview=Coalesce(
+                Subquery(latest.annotate(preview=Substr('content', 1, cls.PREVIEW_LENGTH)).values('preview')[:1]),
+                Value('')
+            ),
+        )
+    
     def get_messages(self) -> 'QuerySet[Message]':
         """
         Get all messages in this conversation ordered by timestamp.
@@ -103,9 +168,37 @@ class Message(models.Model):
     is_user: models.BooleanField = models.BooleanField(default=True)  # True if from user, False if from AI
     timestamp: models.DateTimeField = models.DateTimeField(default=timezone.now)
     
+    class Meta:
+        indexes = [
+            # Every chat page loads the messages of a conversation in order
+            models.Index(fields=['conversation', 'timestamp'], name='interaction_msg_conv_ts_idx'),
+        ]
+    
     def __str__(self) -> str:
         sender = "User" if self.is_user else "AI"
         return f"{sender} - {self.timestamp.strftime('%Y-%m-%d %H:%M')}"
+    
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        """
+        Save the message and update the message stats of its conversation in the same transaction.
+        """
+        preview = (self.content or '')[:Conversation.PREVIEW_LENGTH]
+        conversations = Conversation.objects.filter(pk=self.conversation_id)
+        with transaction.atomic():
+            if not self._state.adding:
+                super().save(*args, **kwargs)
+                # An edit of the latest message changes the preview
+                conversations.filter(last_message_at=self.timestamp).update(last_message_preview=preview)
+                return
+            super().save(*args, **kwargs)
+            # Messages may be saved out of order; only a newer one replaces the latest
+            is_latest = Q(last_message_at__isnull=True) | Q(last_message_at__lte=self.timestamp)
+            conversations.update(
+                message_count=F('message_count') + 1,
+                last_message_at=Case(When(is_latest, then=Value(self.timestamp)), default=F('last_message_at')),
+                last_message_preview=Case(When(is_latest, then=Value(preview)), default=F('last_message_preview')),
+            )
+    
 
 
 class FavoritePrompt(models.Model):
@@ -171,6 +264,12 @@ class SharedChat(models.Model):
     created_at: models.DateTimeField = models.DateTimeField(auto_now_add=True)
     expiration_days: models.PositiveIntegerField = models.PositiveIntegerField(default=7, help_text="Number of days until the shared chat expires")
     
+    class Meta:
+        indexes = [
+            # The shared chats page lists a user's latest shares
+            models.Index(fields=['created_by', '-created_at'], name='interaction_share_created_idx'),
+        ]
+    
     def __str__(self) -> str:
         created_by_name = self.created_by.username if hasattr(self.created_by, 'username') else "Unknown User"
         if self.is_public:
@@ -199,5 +298,91 @@ class SharedChat(models.Model):
         return timezone.now() > expiration_date
 
 
+class CompletionJob(models.Model):
+    """
+    Model for an AI completion computed in the background.
+    
+    When background completions are enabled, the chat views store the user's
+    message, enqueue a job and return immediately. Worker processes (see the
+    ``run_completion_workers`` command) claim the jobs, call the AI provider
+    and save the AI's reply in the conversation.
+    
+    A claimed job is invisible to other workers until ``locked_until``; if its
+    worker dies, the job becomes claimable again once that time has passed.
+    
+    Attributes:
+        id (UUIDField): Unique identifier for the job
+        user (ForeignKey): Reference to the user who sent the message
+        conversation (ForeignKey): Reference to the conversation the reply belongs to
+        prompt (TextField): The user's message sent to the AI tool
+        status (CharField): Current state of the job
+        attempts (PositiveIntegerField): Number of times the job was claimed
+        max_attempts (PositiveIntegerField): Number of claims after which the job fails
+        available_at (DateTimeField): Earliest time the job may be claimed
+        locked_until (DateTimeField): End of the current claim's visibility timeout
+        worker_id (CharField): Identifier of the worker holding the claim
+        ai_message (ForeignKey): The AI's reply, once the job is done
+        error (TextField): Last error reported for the job
+        created_at (DateTimeField): When the job was enqueued
+        finished_at (DateTimeField): When the job succeeded, failed or was cancelled
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+        (CANCELLED, 'Cancelled'),
+    ]
+    FINISHED_STATUSES = (SUCCEEDED, FAILED, CANCELLED)
+    
+    id: models.UUIDField = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user: models.ForeignKey = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='completion_jobs'
+    )
+    conversation: models.ForeignKey = models.ForeignKey(
+        Conversation,
+        on_delete=models.CASCADE,
+        related_name='completion_jobs'
+    )
+    prompt: models.TextField = models.TextField()
+    status: models.CharField = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    attempts: models.PositiveIntegerField = models.PositiveIntegerField(default=0)
+    max_attempts: models.PositiveIntegerField = models.PositiveIntegerField(default=3)
+    available_at: models.DateTimeField = models.DateTimeField(default=timezone.now)
+    locked_until: models.DateTimeField = models.DateTimeField(null=True, blank=True)
+    worker_id: models.CharField = models.CharField(max_length=100, blank=True, default='')
+    ai_message: models.ForeignKey = models.ForeignKey(
+        Message,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    error: models.TextField = models.TextField(blank=True, default='')
+    created_at: models.DateTimeField = models.DateTimeField(auto_now_add=True)
+    finished_at: models.DateTimeField = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            # Workers look for the oldest claimable job
+            models.Index(fields=['status', 'available_at'], name='interaction_job_claim_idx'),
+        ]
+    
+    def __str__(self) -> str:
+        return f"Completion job {self.id} ({self.status})"
+    
+    @property
+    def is_finished(self) -> bool:
+        """Whether the job reached a final state."""
+        return self.status in self.FINISHED_STATUSES
+
+
 # UserFavorite model has been removed in favor of using the ManyToManyField in CustomUser model
 # This ensures a single source of truth for user favorites
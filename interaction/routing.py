@@ -0,0 +1,452 @@
+"""
+Smart routing of chat messages to AI tools.
+
+The category rules are compiled once per process. Every rule starts with a
+group of alternative keywords, and a rule can only match if one of them
+occurs in the message. A substring test per keyword (about 80 of them)
+therefore selects the few rules worth running, instead of running every
+regular expression on every message. The scores are identical to running
+all the rules. The keyword tests are not combined into one regular
+expression: Python's ``re`` tries the alternatives one by one at every
+position of the message, which is several times slower than the ``in``
+tests.
+
+A model trained on past conversations (see interaction.classifier) is
+consulted first; the rules decide when it is missing or unsure.
+
+The most popular tools of each category are read from a per-process table
+loaded with a single query, and the one whose backend currently answers
+fastest is chosen (see choose_tool). The table is reloaded when its version, kept in
+the ``default`` cache, is bumped by the ``AITool`` signals (see
+interaction.signals), so routing a message usually runs no query at all.
+With a shared cache such as Redis, all workers reload after a change.
+"""
+import copy
+import logging
+import re
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Sequence, Tuple, cast
+
+from django.conf import settings
+
+from catalog.models import AITool
+from catalog.providers.health import backend_key, provider_health
+from core import metrics
+from core.versioned_cache import VersionedCache
+from interaction.classifier import get_classifier
+
+logger = logging.getLogger(__name__)
+
+# Category used when no rule matches, and fallback when a category has no tool
+DEFAULT_CATEGORY = 'Text Generator'
+
+# Regex rules of each AI tool category.
+# Each category has multiple patterns to increase the chance of a correct match.
+# The patterns are designed to capture common ways users might request specific types of content.
+# A message scores one point per match; the category with the highest score wins.
+CATEGORY_PATTERNS: Dict[str, List[str]] = {
+    'Image Generator': [
+        r'(create|generate|make|draw|design|produce) (a|an|some)? ?(image|picture|photo|illustration|artwork|drawing)',
+        r'(image|picture|photo) of',
+        r'(visualize|visualise|imagine|envision)',
+        r'(render|sketch|paint|illustrate)',
+        r'(image|picture|photo|visual) (generation|creation)'
+    ],
+    'Video Generator': [
+        r'(create|generate|make|produce) (a|an|some)? ?(video|animation|clip|movie)',
+        r'(video|animation) of',
+        r'(animate|animating)',
+        r'(video|animation|clip|movie) (generation|creation)'
+    ],
+    'Code Generator': [
+        r'(write|generate|create|code|program|implement|develop) (a|an|some)? ?(code|function|class|method|algorithm|program|script)',
+        r'(python|javascript|java|c\+\+|html|css|sql|php|ruby|swift|typescript|go|rust|kotlin)',
+        r'(programming|coding|development|software)',
+        r'(function|class|method|api|endpoint|algorithm)',
+        r'(debug|fix|solve) (this|my|the) (code|bug|error|issue|problem)'
+    ],
+    'Transcription': [
+        r'(transcribe|transcription|convert speech to text|speech-to-text)',
+        r'(audio|speech|voice) (to|into) (text|transcript)',
+        r'(extract|get|pull) text from (audio|speech|recording)'
+    ],
+    'Word Processor': [
+        r'(summarize|summarise|summary)',
+        r'(proofread|edit|revise|check|correct) (my|this|the) (text|document|essay|paper|article|content)',
+        r'(grammar|spelling|punctuation) (check|correction)',
+        r'(rewrite|rephrase|paraphrase)',
+        r'(translate|translation)'
+    ]
+}
+
+# Cache key of the tool table version, in the default cache
+TOOL_TABLE_VERSION_KEY = 'routing:tool_table:version'
+
+
+def _leading_keywords(pattern: str) -> Optional[Tuple[str, ...]]:
+    """
+    Extract the alternatives of the group a pattern starts with.
+
+    Args:
+        pattern: A routing regex
+
+    Returns:
+        The literal keywords one of which every match starts with, or None if
+        the pattern does not start with a plain group of literals
+    """
+    if not pattern.startswith('('):
+        return None
+    end = pattern.find(')')
+    if end < 0:
+        return None
+    body = pattern[1:end]
+    if not body or re.search(r'[()\[\]?*+.^${}]', re.sub(r'\\.', '', body)):
+        return None
+    return tuple(re.sub(r'\\(.)', r'\1', keyword) for keyword in body.split('|'))
+
+
+class RoutingRules:
+    """
+    Category rules compiled once for fast scoring.
+
+    Use the module-level ``routing_rules`` instance rather than creating new ones.
+    """
+
+    def __init__(self, category_patterns: Dict[str, List[str]]) -> None:
+        self.categories: Tuple[str, ...] = tuple(category_patterns)
+        # (category index, compiled pattern) for every rule
+        self._rules: List[Tuple[int, Pattern[str]]] = []
+        # Rules that must run on every message: no keyword prefilter
+        self._unfiltered: List[int] = []
+        keyword_rules: Dict[str, List[int]] = {}
+        for category_index, patterns in enumerate(category_patterns.values()):
+            for pattern in patterns:
+                rule_index = len(self._rules)
+                self._rules.append((category_index, re.compile(pattern)))
+                keywords = _leading_keywords(pattern)
+                if keywords is None:
+                    self._unfiltered.append(rule_index)
+                    continue
+                for keyword in keywords:
+                    keyword_rules.setdefault(keyword, []).append(rule_index)
+        self._keywords: Tuple[Tuple[str, Tuple[int, ...]], ...] = tuple(
+            (keyword, tuple(rules)) for keyword, rules in keyword_rules.items()
+        )
+
+    def scores(self, message_content: str) -> List[int]:
+        """
+        Score a message against every category.
+
+        Args:
+            message_content: The user's message
+
+        Returns:
+            Number of rule matches per category, in the order of ``categories``
+        """
+        # Case-insensitive matching, regardless of the user's capitalization style
+        content_lower = message_content.lower()
+        candidates = set(self._unfiltered)
+        for keyword, rules in self._keywords:
+            if keyword in content_lower:
+                candidates.update(rules)
+
+        scores = [0] * len(self.categories)
+        for rule_index in candidates:
+            category_index, pattern = self._rules[rule_index]
+            scores[category_index] += len(pattern.findall(content_lower))
+        return scores
+
+    def best_category(self, message_content: str) -> str:
+        """
+        Find the category best matching a message.
+
+        Args:
+            message_content: The user's message
+
+        Returns:
+            The category with the highest score; DEFAULT_CATEGORY if no rule matches.
+            Ties go to the category listed first.
+        """
+        return self.classify(message_content)[0]
+
+    def classify(self, message_content: str) -> Tuple[str, float]:
+        """
+        Find the category best matching a message, with a confidence.
+
+        Args:
+            message_content: The user's message
+
+        Returns:
+            Tuple of (category, share of the rule matches that went to it);
+            (DEFAULT_CATEGORY, 0.0) if no rule matches
+        """
+        return self._pick(self.scores(message_content))
+
+    def classify_many(self, messages: Sequence[str]) -> List[Tuple[str, float]]:
+        """
+        Classify several messages with one scan of the batch per rule.
+
+        The messages are joined with NUL separators, which no rule matches,
+        so every match falls within one message and the scores are the same
+        as classifying the messages one by one.
+
+        Args:
+            messages: The users' messages
+
+        Returns:
+            List of (category, confidence) as returned by classify(), in the
+            order of ``messages``
+        """
+        if not messages:
+            return []
+        # Offsets come from the lowered text: lower() can change a message's length ('İ')
+        lowered = [message.lower() for message in messages]
+        text = '\0'.join(lowered)
+        starts = []
+        position = 0
+        for message in lowered:
+            starts.append(position)
+            position += len(message) + 1
+
+        candidates = set(self._unfiltered)
+        for keyword, rules in self._keywords:
+            if keyword in text:
+                candidates.update(rules)
+
+        scores = [[0] * len(self.categories) for _ in messages]
+        for rule_index in candidates:
+            category_index, pattern = self._rules[rule_index]
+            for match in pattern.finditer(text):
+                scores[bisect_right(starts, match.start()) - 1][category_index] += 1
+        return [self._pick(message_scores) for message_scores in scores]
+
+    def _pick(self, scores: List[int]) -> Tuple[str, float]:
+        best_category = DEFAULT_CATEGORY
+        highest_score = 0
+        for category, score in zip(self.categories, scores):
+            if score > highest_score:
+                highest_score = score
+                best_category = category
+        return best_category, (highest_score / sum(scores) if highest_score else 0.0)
+
+
+def choose_tool(candidates: List[AITool]) -> AITool:
+    """
+    Pick the tool expected to answer first.
+
+    The expected latency of each tool comes from the recent p50/p95 latency
+    and error rate of its backend (see catalog.providers.health). Tools
+    within AI_ROUTING_LATENCY_TOLERANCE of the fastest count as equally
+    fast, and the most popular of them wins. Tools with fewer than
+    AI_HEALTH_MIN_SAMPLES recent calls count as equally fast too, so they
+    keep getting traffic to be measured.
+
+    Args:
+        candidates: Tools of a category, most popular first
+
+    Returns:
+        The chosen tool
+    """
+    if len(candidates) == 1 or not getattr(settings, 'AI_ROUTING_HEALTH_ENABLED', True):
+        return candidates[0]
+
+    backends = [backend_key(tool.api_type, tool.api_model) for tool in candidates]
+    health = provider_health.get(backends)
+    min_calls = int(getattr(settings, 'AI_HEALTH_MIN_SAMPLES', 5))
+    expected = [
+        health[backend].expected_latency if health[backend].calls >= min_calls else None
+        for backend in backends
+    ]
+    known = [latency for latency in expected if latency is not None]
+    if not known:
+        return candidates[0]
+
+    limit = min(known) * (1 + float(getattr(settings, 'AI_ROUTING_LATENCY_TOLERANCE', 0.2)))
+    for index, (tool, latency) in enumerate(zip(candidates, expected)):
+        if latency is None or latency <= limit:
+            if index:
+                metrics.increment('routing.health_reroutes')
+            return tool
+    return candidates[0]
+
+
+class ToolTable(VersionedCache):
+    """
+    Most popular AI tools of each category, cached per process.
+
+    Cache backend failures are logged; the table is then kept until
+    AI_ROUTING_TABLE_TTL expires (see core.versioned_cache).
+
+    Use the module-level ``tool_table`` instance rather than creating new ones.
+    """
+
+    version_key = TOOL_TABLE_VERSION_KEY
+    name = 'routing table'
+    ttl_setting = 'AI_ROUTING_TABLE_TTL'
+
+    def __init__(self) -> None:
+        super().__init__()
+        # Most popular tools of each category, most popular first
+        self._by_category: Dict[str, List[AITool]] = {}
+        self._most_popular: Optional[AITool] = None
+
+    def _load(self, version: Optional[int]) -> None:
+        """Load the most popular tools of every category with a single query."""
+        candidates = max(int(getattr(settings, 'AI_ROUTING_CANDIDATES', 3)), 1)
+        by_category: Dict[str, List[AITool]] = {}
+        most_popular = None
+        for tool in AITool.objects.order_by('-popularity'):
+            if most_popular is None:
+                most_popular = tool
+            category_tools = by_category.setdefault(tool.category, [])
+            if len(category_tools) < candidates:
+                category_tools.append(tool)
+        self._by_category = by_category
+        self._most_popular = most_popular
+        metrics.increment('routing.table_loads')
+        logger.debug(f"Routing table loaded: {len(by_category)} categories, version {version}")
+
+    def _ensure_fresh(self) -> bool:
+        """Reload the table if its version changed or it is too old."""
+        fresh = super()._ensure_fresh()
+        if fresh:
+            metrics.increment('routing.table_hits')
+        return fresh
+
+    def _resolve(self, category: str) -> Optional[AITool]:
+        candidates = (
+            self._by_category.get(category)
+            or self._by_category.get(DEFAULT_CATEGORY)
+            or ([self._most_popular] if self._most_popular is not None else [])
+        )
+        return copy.copy(choose_tool(candidates)) if candidates else None
+
+    def get_tool(self, category: str) -> Optional[AITool]:
+        """
+        Get the tool handling a category.
+
+        Args:
+            category: The AI tool category
+
+        Returns:
+            The tool expected to answer first among the most popular tools of
+            the category (see choose_tool), else of the Text Generators, else
+            the most popular tool overall; None if there are no tools.
+            The instance is a copy the caller may modify.
+        """
+        self._ensure_fresh()
+        return self._resolve(category)
+
+    def get_tools(self, categories: Iterable[str]) -> Dict[str, Optional[AITool]]:
+        """
+        Get the tools handling several categories, checking the table version once.
+
+        Args:
+            categories: AI tool categories
+
+        Returns:
+            Dictionary mapping each distinct category to its tool, as get_tool() would
+        """
+        self._ensure_fresh()
+        return {category: self._resolve(category) for category in set(categories)}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Report the table state for this process.
+
+        Returns:
+            Dictionary with the loaded version, category count, loads and hits
+        """
+        return {
+            'version': self._version,
+            'categories': len(self._by_category),
+            'loads': metrics.get_counter('routing.table_loads'),
+            'hits': metrics.get_counter('routing.table_hits'),
+        }
+
+
+routing_rules = RoutingRules(CATEGORY_PATTERNS)
+tool_table = ToolTable()
+
+
+def classify_message(message_content: str) -> Tuple[str, float]:
+    """
+    Pick the AI tool category of a message.
+
+    The trained routing model decides when it is at least
+    AI_ROUTING_MODEL_THRESHOLD confident; otherwise, or without a model,
+    the regex rules decide.
+
+    Args:
+        message_content: The user's message
+
+    Returns:
+        Tuple of (category, confidence between 0 and 1)
+    """
+    classifier = get_classifier()
+    if classifier is not None:
+        category, confidence = classifier.predict(message_content)
+        if confidence >= float(getattr(settings, 'AI_ROUTING_MODEL_THRESHOLD', 0.6)):
+            metrics.increment('routing.model_decisions')
+            return category, confidence
+    metrics.increment('routing.rule_decisions')
+    return routing_rules.classify(message_content)
+
+
+def classify_messages(messages: Sequence[str]) -> List[Tuple[str, float]]:
+    """
+    Pick the AI tool category of several messages at once.
+
+    Same decisions as classify_message(), but the model scores the whole
+    batch with one matrix product and the rules scan it once per rule.
+
+    Args:
+        messages: The users' messages
+
+    Returns:
+        List of (category, confidence), in the order of ``messages``
+    """
+    results: List[Optional[Tuple[str, float]]] = [None] * len(messages)
+    classifier = get_classifier()
+    if classifier is not None and messages:
+        threshold = float(getattr(settings, 'AI_ROUTING_MODEL_THRESHOLD', 0.6))
+        for index, (category, confidence) in enumerate(classifier.predict_many(messages)):
+            if confidence >= threshold:
+                results[index] = (category, confidence)
+
+    undecided = [index for index, result in enumerate(results) if result is None]
+    for index, result in zip(undecided, routing_rules.classify_many([messages[index] for index in undecided])):
+        results[index] = result
+    metrics.increment('routing.model_decisions', len(messages) - len(undecided))
+    metrics.increment('routing.rule_decisions', len(undecided))
+    return cast(List[Tuple[str, float]], results)
+
+
+def get_stats() -> Dict[str, Any]:
+    """
+    Report smart routing counts for this process.
+
+    Returns:
+        Dictionary with the routing table state, the number of messages
+        routed by the trained model and by the regex rules, and the number
+        of times a faster tool was preferred to the most popular one
+    """
+    stats = tool_table.get_stats()
+    stats['model_loaded'] = get_classifier() is not None
+    stats['model_decisions'] = metrics.get_counter('routing.model_decisions')
+    stats['health_reroutes'] = metrics.get_counter('routing.health_reroutes')
+    stats['rule_decisions'] = metrics.get_counter('routing.rule_decisions')
+    return stats
+
+
+metrics.register_collector('ai_routing', get_stats)
+
+
+def invalidate_tool_table() -> None:
+    """
+    Reload the category to tool table in every process.
+
+    Called by the AITool signals; call it after ``QuerySet.update()`` on AI
+    tools, which sends no signal.
+    """
+    tool_table.invalidate()
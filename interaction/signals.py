@@ -0,0 +1,95 @@
+"""
+Signal handlers for the interaction app.
+"""
+from typing import Any, Optional, Set
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from catalog.models import AITool, Rating
+from interaction.models import Conversation, Message
+from interaction.routing import invalidate_tool_table
+
+
+@receiver(post_save, sender=AITool, dispatch_uid='interaction_routing_tool_saved')
+@receiver(post_delete, sender=AITool, dispatch_uid='interaction_routing_tool_deleted')
+@receiver(post_save, sender=Rating, dispatch_uid='interaction_routing_rating_saved')
+@receiver(post_delete, sender=Rating, dispatch_uid='interaction_routing_rating_deleted')
+def refresh_routing_table(sender: Any, **kwargs: Any) -> None:
+    """
+    Reload the smart routing table when an AI tool changes (popularity, category, ...).
+
+    Ratings change their tool's popularity with a queryset update, which sends no AITool signal.
+    """
+    invalidate_tool_table()
+
+
+class _MessageStatsRefresh:
+    """
+    Conversations whose messages were deleted in the current transaction.
+
+    Registered once per transaction with ``transaction.on_commit``, so a
+    delete of many messages (a user, a queryset, a cleanup command) refreshes
+    each conversation with one UPDATE in total instead of one per message.
+    """
+
+    def __init__(self) -> None:
+        self.conversation_ids: Set[Any] = set()
+        # Conversations deleted by the same cascade have nothing left to refresh
+        self.deleted_ids: Set[Any] = set()
+
+    def __call__(self) -> None:
+        conversation_ids = self.conversation_ids - self.deleted_ids
+        if conversation_ids:
+            Conversation.refresh_message_stats(Conversation.objects.filter(pk__in=conversation_ids))
+
+
+def _pending_stats_refresh(using: str) -> Optional[_MessageStatsRefresh]:
+    """
+    Get the refresh already registered for the current transaction.
+
+    Args:
+        using: The database alias of the delete
+
+    Returns:
+        The pending refresh, or None if none is registered (or rolled back)
+    """
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        return None
+    for _, callback, *_ in connection.run_on_commit:
+        if isinstance(callback, _MessageStatsRefresh):
+            return callback
+    return None
+
+
+@receiver(post_delete, sender=Message, dispatch_uid='interaction_message_deleted')
+def refresh_conversation_stats(sender: Any, instance: Message, origin: Any = None,
+                               using: str = DEFAULT_DB_ALIAS, **kwargs: Any) -> None:
+    """
+    Recompute the message stats of a deleted message's conversation.
+
+    A signal rather than Message.delete so queryset deletes, the admin's
+    delete action and cascades are counted too. The conversations are
+    refreshed together once the delete's transaction commits. Nothing is
+    left to update when the conversation itself is being deleted.
+    """
+    if isinstance(origin, Conversation) or getattr(origin, 'model', None) is Conversation:
+        return
+    refresh = _pending_stats_refresh(using)
+    if refresh is None:
+        refresh = _MessageStatsRefresh()
+        refresh.conversation_ids.add(instance.conversation_id)
+        transaction.on_commit(refresh, using=using)
+    else:
+        refresh.conversation_ids.add(instance.conversation_id)
+
+
+@receiver(post_delete, sender=Conversation, dispatch_uid='interaction_conversation_deleted')
+def skip_deleted_conversation_stats(sender: Any, instance: Conversation,
+                                    using: str = DEFAULT_DB_ALIAS, **kwargs: Any) -> None:
+    """Leave a conversation deleted along with its messages (e.g. with its user) out of the refresh."""
+    refresh = _pending_stats_refresh(using)
+    if refresh is not None:
+        refresh.deleted_ids.add(instance.pk)
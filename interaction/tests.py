@@ -1,3 +1,377 @@
-from django.test import TestCase
+import re
+import threading
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth import get_user_model
+from django.db import OperationalError, connection
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from catalog.models import AITool
+from core.admission import chat_admission
+from interaction import jobs
+from interaction.models import CompletionJob, Conversation, Message
+from interaction.routing import CATEGORY_PATTERNS, RoutingRules, invalidate_tool_table
+from interaction.utils import route_message_to_ai_tool, route_messages_to_ai_tools
+
+
+class MessageStatsTests(TestCase):
+    """Conversation.message_count and the latest message follow every change to the messages."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='alice', email='alice@example.com', password='secret')
+        self.tool = AITool.objects.create(
+            name='ChatGPT', provider='OpenAI', endpoint='https://api.openai.com',
+            category='Text', description='Chat assistant', api_type='openai',
+        )
+        self.conversation = Conversation.objects.create(user=self.user, ai_tool=self.tool)
+        for content in ('first', 'second', 'third'):
+            Message.objects.create(conversation=self.conversation, content=content)
+
+    def test_saving_messages_counts_them(self):
+        self.conversation.refresh_from_db()
+
+        self.assertEqual(self.conversation.message_count, 3)
+        self.assertEqual(self.conversation.last_message_preview, 'third')
+
+    def test_deleting_one_message_updates_the_latest(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Message.objects.get(content='third').delete()
+
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.message_count, 2)
+        self.assertEqual(self.conversation.last_message_preview, 'second')
+
+    def test_queryset_delete_is_counted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Message.objects.filter(conversation=self.conversation).delete()
+
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.message_count, 0)
+        self.assertIsNone(self.conversation.last_message_at)
+        self.assertEqual(self.conversation.last_message_preview, '')
+
+    def test_saving_a_stale_conversation_keeps_newer_counts(self):
+        stale = Conversation.objects.get(pk=self.conversation.pk)
+        Message.objects.create(conversation=self.conversation, content='fourth')
+
+        stale.title = 'Renamed'
+        stale.save()
+
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.title, 'Renamed')
+        self.assertEqual(self.conversation.message_count, 4)
+        self.assertEqual(self.conversation.last_message_preview, 'fourth')
+
+    def test_deleting_the_conversation_deletes_its_messages(self):
+        self.conversation.delete()
+
+        self.assertFalse(Message.objects.exists())
+
+    def _conversation_updates(self, queries):
+        return [query['sql'] for query in queries if query['sql'].startswith('UPDATE "interaction_conversation"')]
+
+    def test_deleting_many_messages_refreshes_each_conversation_once(self):
+        other = Conversation.objects.create(user=self.user, ai_tool=self.tool)
+        Message.objects.bulk_create(
+            [Message(conversation=conversation, content=f'message {number}')
+             for conversation in (self.conversation, other) for number in range(30)]
+        )
+
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            Message.objects.filter(content__startswith='message').delete()
+
+        self.assertEqual(len(self._conversation_updates(queries.captured_queries)), 1)
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.message_count, 3)
+        self.assertEqual(self.conversation.last_message_preview, 'third')
+
+    def test_deleting_a_user_skips_its_conversations(self):
+        Message.objects.bulk_create(
+            [Message(conversation=self.conversation, content=f'message {number}') for number in range(60)]
+        )
+
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+
+        self.assertEqual(self._conversation_updates(queries.captured_queries), [])
+        self.assertFalse(Message.objects.exists())
+
+
+@override_settings(AI_JOB_MAX_ATTEMPTS=3, AI_JOB_RETRY_DELAY=5, AI_JOB_VISIBILITY_TIMEOUT=120)
+class CompletionJobTests(TestCase):
+    """Jobs are claimed by one worker at a time, retried after provider failures and can be cancelled."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='alice', email='alice@example.com', password='secret')
+        tool = AITool.objects.create(
+            name='ChatGPT', provider='OpenAI', endpoint='https://api.openai.com',
+            category='Text', description='Chat assistant', api_type='openai',
+        )
+        self.conversation = Conversation.objects.create(user=self.user, ai_tool=tool)
+
+    def _enqueue(self):
+        return jobs.enqueue_completion(self.user, self.conversation, 'Hello')
+
+    def _run(self, job, response):
+        with mock.patch('interaction.jobs.AIService.send_to_ai_service', return_value=response):
+            jobs.run_job(job, job.worker_id)
+        job.refresh_from_db()
+        return job
+
+    def _expire_claim(self, job):
+        CompletionJob.objects.filter(pk=job.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+
+    def test_claim_takes_the_oldest_ready_job_once(self):
+        first, second, later = self._enqueue(), self._enqueue(), self._enqueue()
+        CompletionJob.objects.filter(pk=later.pk).update(available_at=timezone.now() + timedelta(minutes=1))
+
+        claimed = jobs.claim_job('worker-1')
+
+        self.assertEqual(claimed.pk, first.pk)
+        claimed.refresh_from_db()
+        self.assertEqual((claimed.status, claimed.attempts, claimed.worker_id),
+                         (CompletionJob.RUNNING, 1, 'worker-1'))
+        self.assertGreater(claimed.locked_until, timezone.now() + timedelta(seconds=110))
+        self.assertEqual(jobs.claim_job('worker-2').pk, second.pk)
+        self.assertIsNone(jobs.claim_job('worker-3'))
+
+    def test_expired_claim_is_reclaimed_and_the_late_reply_discarded(self):
+        self._enqueue()
+        first = jobs.claim_job('worker-1')
+        self._expire_claim(first)
+        second = jobs.claim_job('worker-2')
+
+        self.assertEqual((second.pk, second.attempts), (first.pk, 2))
+        self.assertEqual(self._run(first, {'success': True, 'data': 'Late'}).status, CompletionJob.RUNNING)
+        job = self._run(second, {'success': True, 'data': 'Hi!'})
+        self.assertEqual(job.status, CompletionJob.SUCCEEDED)
+        self.assertEqual(list(Message.objects.filter(is_user=False).values_list('content', flat=True)), ['Hi!'])
+
+    def test_abandoned_last_attempt_fails_the_job(self):
+        job = self._enqueue()
+        CompletionJob.objects.filter(pk=job.pk).update(max_attempts=1)
+        self._expire_claim(jobs.claim_job('worker-1'))
+
+        self.assertIsNone(jobs.claim_job('worker-2'))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, CompletionJob.FAILED)
+        self.assertEqual(job.ai_message.content, 'The AI service did not answer in time.')
+
+    def test_provider_failures_are_retried_with_backoff(self):
+        self._enqueue()
+        failure = {'success': False, 'error': 'Service unavailable', 'status_code': 503}
+
+        for attempt, delay in ((1, 5), (2, 10)):
+            started = timezone.now()
+            job = self._run(jobs.claim_job('worker-1'), failure)
+            self.assertEqual((job.status, job.attempts), (CompletionJob.PENDING, attempt))
+            self.assertIsNone(job.ai_message)
+            self.assertGreaterEqual(job.available_at, started + timedelta(seconds=delay))
+            self.assertIsNone(jobs.claim_job('worker-1'))
+            CompletionJob.objects.filter(pk=job.pk).update(available_at=timezone.now())
+
+        job = self._run(jobs.claim_job('worker-1'), failure)
+        self.assertEqual(job.status, CompletionJob.FAILED)
+        self.assertEqual(job.ai_message.content, 'Service unavailable')
+
+    def test_client_errors_are_not_retried(self):
+        self._enqueue()
+
+        job = self._run(jobs.claim_job('worker-1'), {'success': False, 'error': 'Bad request', 'status_code': 400})
+
+        self.assertEqual((job.status, job.attempts), (CompletionJob.FAILED, 1))
+
+    @override_settings(AI_RETRY_DEADLINE=45, AI_RATE_LIMIT_ENABLED=True, AI_RATE_LIMIT_MODE='queue',
+                       AI_RATE_LIMIT_QUEUE_TIMEOUT=10, AI_COALESCE_GRACE=5, AI_FAILOVER_CHAIN=['huggingface', 'simulation'])
+    def test_claim_lasts_as_long_as_the_provider_call_may_take(self):
+        self._enqueue()
+        job = jobs.claim_job('worker-1')
+        later = timezone.now() + timedelta(seconds=150)
+
+        def slow_call(prompt, service_config):
+            # Past AI_JOB_VISIBILITY_TIMEOUT, within the retry deadlines of the three providers
+            with mock.patch('interaction.jobs.timezone.now', return_value=later):
+                self.assertIsNone(jobs.claim_job('worker-2'))
+            return {'success': True, 'data': 'Hi!'}
+
+        with mock.patch('interaction.jobs.AIService.send_to_ai_service', side_effect=slow_call):
+            jobs.run_job(job, job.worker_id)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (CompletionJob.SUCCEEDED, 1))
+
+    def test_cancelled_job_is_not_claimed(self):
+        job = self._enqueue()
+
+        self.assertTrue(jobs.cancel_job(job))
+
+        self.assertEqual(job.status, CompletionJob.CANCELLED)
+        self.assertIsNone(jobs.claim_job('worker-1'))
+        self.assertFalse(jobs.cancel_job(job))
+
+    def test_cancelling_a_running_job_discards_its_reply(self):
+        self._enqueue()
+        job = jobs.claim_job('worker-1')
+
+        self.assertTrue(jobs.cancel_job(CompletionJob.objects.get(pk=job.pk)))
+        job = self._run(job, {'success': True, 'data': 'Hi!'})
+
+        self.assertEqual(job.status, CompletionJob.CANCELLED)
+        self.assertFalse(Message.objects.filter(is_user=False).exists())
+
+
+@override_settings(AI_JOB_WORKER_IDLE_INTERVAL=0)
+class CompletionWorkerTests(TransactionTestCase):
+    """A completion worker survives database errors."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='alice', email='alice@example.com', password='secret')
+        tool = AITool.objects.create(
+            name='ChatGPT', provider='OpenAI', endpoint='https://api.openai.com',
+            category='Text', description='Chat assistant', api_type='openai',
+        )
+        self.conversation = Conversation.objects.create(user=self.user, ai_tool=tool)
+
+    def test_worker_keeps_running_after_a_database_error(self):
+        job = jobs.enqueue_completion(self.user, self.conversation, 'Hello')
+        claim_job = jobs.claim_job
+        calls = []
+
+        def flaky_claim(worker_id):
+            calls.append(worker_id)
+            if len(calls) == 1:
+                raise OperationalError('server closed the connection unexpectedly')
+            return claim_job(worker_id)
+
+        reply = {'success': True, 'data': 'Hi!'}
+        with mock.patch('interaction.jobs.claim_job', flaky_claim), \
+                mock.patch('interaction.jobs.AIService.send_to_ai_service', return_value=reply), \
+                mock.patch('interaction.jobs.time.sleep') as sleep, \
+                mock.patch('interaction.jobs.close_old_connections') as close_old_connections:
+            stop = mock.Mock(is_set=mock.Mock(side_effect=[False, False, False, True]))
+            executed = jobs.run_worker('worker-1', stop=stop)
+
+        self.assertEqual(executed, 1)
+        self.assertTrue(sleep.called)
+        self.assertGreaterEqual(close_old_connections.call_count, 3)
+        job.refresh_from_db()
+        self.assertEqual(job.status, CompletionJob.SUCCEEDED)
+        self.assertEqual(job.ai_message.content, 'Hi!')
+
+
+class BatchRoutingTests(TestCase):
+    """Routing a batch of messages gives the same answers as routing them one by one."""
+
+    MESSAGES = [
+        'draw an image of a sunset',
+        'write a python function to sort a list',
+        'hello there',
+        'İ' * 40 + ' hi',
+        'transcribe this audio recording',
+        'generate a video of a cat',
+    ]
+
+    def setUp(self):
+        for name, category, popularity in (
+            ('ChatGPT', 'Text Generator', 10),
+            ('Midjourney', 'Image Generator', 8),
+            ('DALL-E', 'Image Generator', 9),
+            ('Copilot', 'Code Generator', 7),
+        ):
+            AITool.objects.create(
+                name=name, provider='Provider', endpoint='https://example.com', category=category,
+                description=name, api_type='simulated', popularity=popularity,
+            )
+        invalidate_tool_table()
+        patcher = mock.patch('interaction.routing.get_classifier', return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_classify_many_matches_classify(self):
+        rules = RoutingRules(CATEGORY_PATTERNS)
+        messages = self.MESSAGES + ['İ' * 40 + ' hi', 'draw an image', 'hello there']
+
+        self.assertEqual(rules.classify_many(messages), [rules.classify(message) for message in messages])
+
+    def test_scores_match_running_every_rule(self):
+        rules = RoutingRules(CATEGORY_PATTERNS)
+        messages = self.MESSAGES + ['Program a script in javascript', 'programming: program a function',
+                                    'Picture of a cat, then animate it', 'draw an image', 'hello there']
+
+        for message in messages:
+            expected = [sum(len(re.findall(pattern, message.lower())) for pattern in patterns)
+                        for patterns in CATEGORY_PATTERNS.values()]
+            self.assertEqual(rules.scores(message), expected, message)
+
+    def test_batch_routing_matches_single_routing(self):
+        routed = route_messages_to_ai_tools(self.MESSAGES)
+
+        for message, (tool, category, confidence) in zip(self.MESSAGES, routed):
+            self.assertEqual((tool, confidence), route_message_to_ai_tool(message))
+        self.assertEqual(routed[0][0].name, 'DALL-E')
+        self.assertEqual(routed[1][0].name, 'Copilot')
+        # No tool in the category: the most popular text tool answers
+        self.assertEqual(routed[4][0].name, 'ChatGPT')
+
+    def test_empty_batch(self):
+        self.assertEqual(route_messages_to_ai_tools([]), [])
+
+
+class StreamingUnderASGITests(TransactionTestCase):
+    """Under ASGI, streamed replies are sent as they are produced, not buffered."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='alice', email='alice@example.com', password='secret')
+        self.tool = AITool.objects.create(
+            name='ChatGPT', provider='OpenAI', endpoint='https://api.openai.com',
+            category='Text', description='Chat assistant', api_type='openai',
+        )
+
+    def test_tokens_are_sent_before_the_reply_ends(self):
+        first_token_received = threading.Event()
+        waited = []
+        active = []
+
+        def stream(prompt, service_config):
+            yield 'Hello'
+            # Only set once the browser got the first token, which buffering prevents
+            waited.append(first_token_received.wait(5))
+            yield ' world'
+
+        async def run():
+            client = AsyncClient()
+            await client.aforce_login(self.user)
+            response = await client.post(
+                '/interaction/direct-chat/stream/',
+                {'message': 'Say hello', 'ai_tool_id': str(self.tool.id)},
+            )
+            self.assertTrue(response.is_async)
+            events = []
+            async for chunk in response.streaming_content:
+                event = chunk.decode()
+                events.append(event)
+                if event.startswith('event: token') and not first_token_received.is_set():
+                    active.append(chat_admission.get_stats()['active'])
+                    first_token_received.set()
+            # As the ASGI handler does once the response is sent
+            await sync_to_async(response.close)()
+            return events
+
+        with mock.patch('catalog.utils.AIService.stream_ai_service', stream):
+            events = async_to_sync(run)()
+
+        self.assertEqual(waited, [True])
+        # The admission slot is held until the stream ends
+        self.assertEqual(active, [1])
+        self.assertEqual(chat_admission.get_stats()['active'], 0)
+        self.assertTrue(events[-1].startswith('event: done'))
+        conversation = Conversation.objects.get(user=self.user)
+        self.assertEqual(
+            list(Message.objects.filter(conversation=conversation).order_by('timestamp').values_list('content', flat=True)),
+            ['Say hello', 'Hello world'],
+        )
@@ -1,20 +1,36 @@
 from typing import List, Union
+from django.conf import settings
 from django.urls import path, URLPattern, URLResolver
-from .views import chat, conversations, favorites, sharing
+from .views import chat, conversations, favorites, jobs, sharing
 
 # Register the app namespace
 app_name = 'interaction'
 
+# Under ASGI the chat endpoints can await the AI provider instead of blocking a worker
+if settings.ASYNC_CHAT_VIEWS:
+    direct_chat_message_view = chat.adirect_chat_message
+    send_message_view = chat.asend_message
+    completion_job_view = jobs.acompletion_job
+else:
+    direct_chat_message_view = chat.direct_chat_message
+    send_message_view = chat.send_message
+    completion_job_view = jobs.completion_job
+
 # Type hint for URL patterns
 urlpatterns: List[Union[URLPattern, URLResolver]] = [    
     # Direct chat URLs
     path('direct-chat/', chat.direct_chat, name='direct_chat'),
-    path('direct-chat/message/', chat.direct_chat_message, name='direct_chat_message'),
+    path('direct-chat/message/', direct_chat_message_view, name='direct_chat_message'),
+    path('direct-chat/stream/', chat.direct_chat_stream, name='direct_chat_stream'),
+    path('compare-chat/stream/', chat.compare_chat_stream, name='compare_chat_stream'),
+    # Background completion jobs
+    path('jobs/<uuid:job_id>/', completion_job_view, name='completion_job'),
+    path('jobs/<uuid:job_id>/cancel/', jobs.cancel_completion_job, name='cancel_completion_job'),
     # Chat URLs
     path('chat/', chat.chat_selection, name='chat_selection'),
     # Important: Order matters! More specific patterns should come first
     path('chat/conversation/<uuid:conversation_id>/', chat.chat_view, name='continue_conversation'),
-    path('chat/conversation/<uuid:conversation_id>/send/', chat.send_message, name='send_message'),
+    path('chat/conversation/<uuid:conversation_id>/send/', send_message_view, name='send_message'),
     path('chat/<uuid:ai_id>/', chat.chat_view, name='chat'),
     path('conversations/', conversations.conversation_history, name='conversation_history'),
     path('conversations/<uuid:conversation_id>/delete/', conversations.delete_conversation, name='delete_conversation'),
@@ -5,11 +5,13 @@ This package contains all views for the interaction app, organized into logical
 """
 # Import views for easy access
 from .chat import (
-    direct_chat, direct_chat_message, conversation_view, message_view,
-    chat_selection, chat_view, send_message
+    direct_chat, direct_chat_message, direct_chat_stream, compare_chat_stream, conversation_view, message_view,
+    chat_selection, chat_view, send_message,
+    amessage_view, adirect_chat_message, asend_message
 )
 from .conversations import (
     conversation_history, delete_conversation, download_conversation
 )
+from .jobs import completion_job, acompletion_job, cancel_completion_job
 from .sharing import share_conversation, view_shared_chat
 from .favorites import favorite_prompts, save_favorite_prompt, delete_favorite_prompt
@@ -3,20 +3,31 @@ Chat views for the interaction app.
 
 This module contains views related to chatting with AI tools, including direct chat and conversation views.
 """
-from typing import Any, Dict, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple, Union
 import json
 import uuid
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib import messages as django_messages
 from django.contrib.auth.decorators import login_required
-from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connections, transaction
+from django.http import HttpRequest, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.decorators.http import require_http_methods
 from django.utils import timezone
 
 from catalog.models import AITool
+from catalog.snapshot import get_catalog_tools
+from core.admission import admission_control
+from catalog.providers.exceptions import ProviderError
 from catalog.utils import AIService
 from interaction.models import Conversation, Message
 from interaction.forms import MessageForm, ConversationForm
+from interaction import jobs
+from interaction.compare import fan_out
 from interaction.utils import route_message_to_ai_tool
 
 
@@ -90,7 +101,7 @@ def direct_chat(request: HttpRequest) -> HttpResponse:
     form = MessageForm()
     
     # Get all AI tools for the tool selector
-    ai_tools = AITool.objects.all().order_by('name')
+    ai_tools = get_catalog_tools()
     
     return render(request, 'interaction/direct_chat.html', {
         'conversation': conversation,
@@ -98,7 +109,9 @@ def direct_chat(request: HttpRequest) -> HttpResponse:
         'messages_list': messages_list,
         'chat_messages': messages_list,  # Add an alternative name to avoid potential conflicts
         'ai_tools': ai_tools,
-        'form': form
+        'form': form,
+        # Replies are computed by the completion workers instead of being streamed
+        'completion_jobs_enabled': jobs.jobs_enabled()
     })
 
 
@@ -166,7 +179,7 @@ def conversation_view(request: HttpRequest, conversation_id: uuid.UUID) -> HttpR
     ).order_by('timestamp')
     
     # Get all AI tools for the tool selector
-    ai_tools = AITool.objects.all().order_by('name')
+    ai_tools = get_catalog_tools()
     
     return render(request, 'interaction/conversation.html', {
         'conversation': conversation,
@@ -176,31 +189,24 @@ def conversation_view(request: HttpRequest, conversation_id: uuid.UUID) -> HttpR
     })
 
 
-@login_required
-@require_http_methods(["POST"])
-def message_view(request: HttpRequest, conversation_id: Optional[uuid.UUID] = None) -> JsonResponse:
+def _parse_message_request(request: HttpRequest) -> Tuple[str, Optional[str], Optional[JsonResponse]]:
     """
-    View for sending and receiving messages via AJAX.
+    Extract and validate the chat message sent by the browser.
     
-    This view handles sending messages to AI tools and receiving responses with validation.
+    The message can be sent either as form data or as a JSON body.
     
     Args:
         request: The HTTP request object
-        conversation_id: The UUID of the conversation, if any
         
     Returns:
-        JSON response with the AI's reply or validation errors
+        Tuple of (message, AI tool ID, error response). The error response is
+        None when the message is valid.
     """
-    user = request.user
-    
-    # Log request details
-    logger.info(f"Message view called with conversation_id: {conversation_id}")
     logger.info(f"Request content type: {request.content_type}")
     logger.info(f"POST data present: {bool(request.POST)}")
     if request.POST:
         logger.info(f"POST keys: {list(request.POST.keys())}")
     
-    # Get the message content from the request
     # Try to get data from POST first (form data)
     if request.POST:
         user_message = request.POST.get('message', '').strip()
@@ -216,7 +222,7 @@ def message_view(request: HttpRequest, conversation_id: Optional[uuid.UUID] = No
             logger.info(f"Got message from JSON: '{user_message[:50]}...' (truncated)")
         except json.JSONDecodeError:
             logger.error("Failed to parse request body as JSON")
-            return JsonResponse({
+            return '', None, JsonResponse({
                 'error': 'Invalid request data'
             }, status=400)
     
@@ -231,11 +237,30 @@ def message_view(request: HttpRequest, conversation_id: Optional[uuid.UUID] = No
     
     # If there are validation errors, return them
     if errors:
-        return JsonResponse({
+        return user_message, ai_tool_id, JsonResponse({
             'errors': errors
         }, status=400)
     
-    # Get or create the conversation
+    return user_message, ai_tool_id, None
+
+
+def _get_or_create_conversation(user: Any, conversation_id: Optional[uuid.UUID],
+                                ai_tool_id: Optional[str], user_message: str) -> Conversation:
+    """
+    Get the user's conversation, or start a new one for the message.
+    
+    New conversations use the requested AI tool, or smart routing when no
+    valid tool is given.
+    
+    Args:
+        user: The user sending the message
+        conversation_id: The UUID of the conversation, if any
+        ai_tool_id: The ID of the AI tool selected by the user, if any
+        user_message: The message content, used for routing and the title
+        
+    Returns:
+        The conversation the message belongs to
+    """
     conversation = None
     if conversation_id:
         try:
@@ -244,29 +269,59 @@ def message_view(request: HttpRequest, conversation_id: Optional[uuid.UUID] = No
             # If the conversation doesn't exist or ID is invalid, create a new one
             conversation = None
     
-    # If no conversation exists, create a new one
-    if not conversation:
-        # If an AI tool ID is provided, use that tool
-        ai_tool = None
-        if ai_tool_id:
-            try:
-                ai_tool = AITool.objects.get(id=ai_tool_id)
-            except AITool.DoesNotExist:
-                # If the AI tool doesn't exist, use smart routing
-                ai_tool = None
-        
-        # If no AI tool is specified, use smart routing
-        if not ai_tool:
-            ai_tool = route_message_to_ai_tool(user_message)
-            # Log the selected AI tool for debugging
-            logger.info(f"Smart routing selected AI tool: {ai_tool.name if ai_tool else 'None'}")
+    if conversation:
+        return conversation
+    
+    # If an AI tool ID is provided, use that tool
+    ai_tool = None
+    if ai_tool_id:
+        try:
+            ai_tool = AITool.objects.get(id=ai_tool_id)
+        except (AITool.DoesNotExist, ValueError, ValidationError):
+            # If the AI tool doesn't exist, use smart routing
+            ai_tool = None
+    
+    # If no AI tool is specified, use smart routing
+    if not ai_tool:
+        ai_tool, confidence = route_message_to_ai_tool(user_message)
+        # Log the selected AI tool for debugging
+        logger.info(f"Smart routing selected AI tool: {ai_tool.name if ai_tool else 'None'} (confidence {confidence:.2f})")
+    
+    # Create a new conversation with the selected AI tool
+    return Conversation.objects.create(
+        user=user,
+        ai_tool=ai_tool,
+        title=user_message[:50] + ('...' if len(user_message) > 50 else '')
+    )
+
+
+@login_required
+@require_http_methods(["POST"])
+def message_view(request: HttpRequest, conversation_id: Optional[uuid.UUID] = None) -> JsonResponse:
+    """
+    View for sending and receiving messages via AJAX.
+    
+    This view handles sending messages to AI tools and receiving responses with validation.
+    
+    Args:
+        request: The HTTP request object
+        conversation_id: The UUID of the conversation, if any
         
-        # Create a new conversation with the selected AI tool
-        conversation = Conversation.objects.create(
-            user=user,
-            ai_tool=ai_tool,
-            title=user_message[:50] + ('...' if len(user_message) > 50 else '')
-        )
+    Returns:
+        JSON response with the AI's reply or validation errors
+    """
+    user = request.user
+    
+    # Log request details
+    logger.info(f"Message view called with conversation_id: {conversation_id}")
+    
+    # Get and validate the message content from the request
+    user_message, ai_tool_id, error_response = _parse_message_request(request)
+    if error_response is not None:
+        return error_response
+    
+    # Get or create the conversation
+    conversation = _get_or_create_conversation(user, conversation_id, ai_tool_id, user_message)
     
     # Create a new message instance
     new_message = Message(
@@ -285,14 +340,18 @@ def message_view(request: HttpRequest, conversation_id: Optional[uuid.UUID] = No
     # Save the user message
     user_message_obj = form.save()
     
+    # Let the completion workers call the provider; the browser polls the job
+    if jobs.jobs_enabled():
+        job = jobs.enqueue_completion(user, conversation, user_message)
+        if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+            return JsonResponse(jobs.job_payload(job), status=202)
+        return redirect(f'/interaction/direct-chat/?conversation_id={conversation.id}')
+    
     # Get the AI tool for this conversation
     ai_tool = conversation.ai_tool
     
     # Get the AI tool configuration
-    service_config = {
-        'api_type': ai_tool.api_type,
-        'api_model': ai_tool.api_model
-    }
+    service_config = ai_tool.get_service_config()
     
     # Get the AI response using the static method
     response = AIService.send_to_ai_service(user_message, service_config)
@@ -333,6 +392,7 @@ logger = logging.getLogger(__name__)
 
 @login_required
 @require_http_methods(["POST"])
+@admission_control
 def direct_chat_message(request: HttpRequest) -> JsonResponse:
     """
     View for handling direct chat messages.
@@ -386,6 +446,442 @@ def direct_chat_message(request: HttpRequest) -> JsonResponse:
     return message_view(request)
 
 
+async def _aget_or_create_conversation(user: Any, conversation_id: Optional[uuid.UUID],
+                                       ai_tool_id: Optional[str], user_message: str) -> Conversation:
+    """
+    Async version of _get_or_create_conversation.
+    
+    The AI tool is loaded together with the conversation so that it can be
+    used afterwards without touching the database from async code.
+    
+    Args:
+        user: The user sending the message
+        conversation_id: The UUID of the conversation, if any
+        ai_tool_id: The ID of the AI tool selected by the user, if any
+        user_message: The message content, used for routing and the title
+        
+    Returns:
+        The conversation the message belongs to, with its AI tool loaded
+    """
+    if conversation_id:
+        try:
+            return await Conversation.objects.select_related('ai_tool').aget(id=conversation_id, user=user)
+        except (Conversation.DoesNotExist, ValueError):
+            # If the conversation doesn't exist or ID is invalid, create a new one
+            pass
+    
+    ai_tool = None
+    if ai_tool_id:
+        try:
+            ai_tool = await AITool.objects.aget(id=ai_tool_id)
+        except (AITool.DoesNotExist, ValueError, ValidationError):
+            ai_tool = None
+    
+    if not ai_tool:
+        ai_tool, confidence = await sync_to_async(route_message_to_ai_tool)(user_message)
+        logger.info(f"Smart routing selected AI tool: {ai_tool.name if ai_tool else 'None'} (confidence {confidence:.2f})")
+    
+    return await Conversation.objects.acreate(
+        user=user,
+        ai_tool=ai_tool,
+        title=user_message[:50] + ('...' if len(user_message) > 50 else '')
+    )
+
+
+@login_required
+@require_http_methods(["POST"])
+async def amessage_view(request: HttpRequest, conversation_id: Optional[uuid.UUID] = None) -> HttpResponse:
+    """
+    Async version of message_view for ASGI deployments.
+    
+    The provider call is awaited on the event loop, so a slow completion no
+    longer holds a worker thread. Enabled by the ASYNC_CHAT_VIEWS setting.
+    
+    Args:
+        request: The HTTP request object
+        conversation_id: The UUID of the conversation, if any
+        
+    Returns:
+        JSON response with the AI's reply or validation errors
+    """
+    user = await request.auser()
+    logger.info(f"Async message view called with conversation_id: {conversation_id}")
+    
+    user_message, ai_tool_id, error_response = _parse_message_request(request)
+    if error_response is not None:
+        return error_response
+    
+    conversation = await _aget_or_create_conversation(user, conversation_id, ai_tool_id, user_message)
+    
+    # Validate the message with our form
+    form = MessageForm(data={'content': user_message})
+    if not form.is_valid():
+        return JsonResponse({
+            'errors': form.errors
+        }, status=400)
+    
+    await Message.objects.acreate(
+        conversation=conversation,
+        content=form.cleaned_data['content'],
+        is_user=True
+    )
+    
+    if jobs.jobs_enabled():
+        job = await sync_to_async(jobs.enqueue_completion)(user, conversation, user_message)
+        if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+            return JsonResponse(jobs.job_payload(job), status=202)
+        return redirect(f'/interaction/direct-chat/?conversation_id={conversation.id}')
+    
+    ai_tool = conversation.ai_tool
+    service_config = ai_tool.get_service_config()
+    
+    response = await AIService.asend_to_ai_service(user_message, service_config)
+    
+    if response.get('success', False):
+        ai_response = response.get('data', 'Sorry, I could not process your request.')
+    else:
+        ai_response = response.get('error', 'Sorry, an error occurred while processing your request.')
+    
+    ai_message = await Message.objects.acreate(
+        conversation=conversation,
+        content=ai_response,
+        is_user=False
+    )
+    
+    conversation.updated_at = timezone.now()
+    await conversation.asave(update_fields=['updated_at'])
+    
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        return JsonResponse({
+            'message': ai_response,
+            'conversation_id': str(conversation.id),
+            'ai_tool_name': ai_tool.name,
+            'timestamp': ai_message.timestamp.isoformat()
+        })
+    else:
+        return redirect(f'/interaction/direct-chat/?conversation_id={conversation.id}')
+
+
+@login_required
+@require_http_methods(["POST"])
+@admission_control
+async def adirect_chat_message(request: HttpRequest) -> HttpResponse:
+    """
+    Async version of direct_chat_message for ASGI deployments.
+    
+    Args:
+        request: The HTTP request object
+        
+    Returns:
+        JSON response with the AI's reply
+    """
+    conversation_id = request.POST.get('conversation_id')
+    conversation_uuid = None
+    
+    if conversation_id:
+        try:
+            conversation_uuid = uuid.UUID(conversation_id)
+        except (ValueError, TypeError):
+            # If the conversation ID is invalid, continue without it
+            logger.warning(f"Invalid conversation ID format: {conversation_id}")
+    
+    return await amessage_view(request, conversation_uuid)
+
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """
+    Format a Server-Sent Event.
+    
+    Args:
+        event: The event name
+        data: JSON-serializable event payload
+        
+    Returns:
+        The encoded event, terminated by a blank line
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _close_event_stream(events: Iterator[str]) -> None:
+    """Close an event stream and the database connection of the thread it ran in."""
+    try:
+        events.close()  # type: ignore[attr-defined]
+    finally:
+        connections.close_all()
+
+
+async def _aiter_event_stream(events: Iterator[str]) -> AsyncIterator[str]:
+    """
+    Relay a sync event stream to an ASGI server as each event is produced.
+    
+    Under ASGI, Django reads a sync iterator to the end before sending any of
+    it, which would buffer the whole reply. The events are pulled one by one
+    from a thread of their own instead: the stream's database queries always
+    run in the same thread, whose connection is closed when the stream ends.
+    
+    Args:
+        events: The sync event stream
+        
+    Yields:
+        The events
+    """
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sse')
+    next_event = sync_to_async(next, thread_sensitive=False, executor=executor)
+    try:
+        while True:
+            event = await next_event(events, None)
+            if event is None:
+                return
+            yield event
+    finally:
+        await sync_to_async(_close_event_stream, thread_sensitive=False, executor=executor)(events)
+        executor.shutdown(wait=False)
+
+
+def _sse_response(request: HttpRequest, events: Iterator[str]) -> StreamingHttpResponse:
+    """
+    Build a Server-Sent Events response sending each event as it is produced.
+    
+    Args:
+        request: The HTTP request object
+        events: Sync iterator of encoded events
+        
+    Returns:
+        Streaming response with content type text/event-stream
+    """
+    content: Union[Iterator[str], AsyncIterator[str]] = events
+    if isinstance(request, ASGIRequest):
+        content = _aiter_event_stream(events)
+    response = StreamingHttpResponse(content, content_type='text/event-stream')
+    # Disable caching and proxy buffering so events reach the browser immediately
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@login_required
+@require_http_methods(["POST"])
+@admission_control
+def direct_chat_stream(request: HttpRequest) -> HttpResponse:
+    """
+    View for streaming the AI's reply as Server-Sent Events.
+    
+    This view accepts the same data as direct_chat_message, but relays the
+    provider's tokens to the browser as soon as they arrive instead of waiting
+    for the full completion. The following events are sent:
+    
+    - ``meta``: conversation ID and AI tool name, sent immediately
+    - ``token``: a piece of the reply
+    - ``error``: the provider failed before producing any text
+    - ``done``: the reply was saved; includes the full message and timestamp
+    
+    Args:
+        request: The HTTP request object
+        
+    Returns:
+        Streaming response with content type text/event-stream
+    """
+    user_message, ai_tool_id, error_response = _parse_message_request(request)
+    if error_response is not None:
+        return error_response
+    
+    # Get the conversation ID from the form data or the JSON body
+    conversation_id = request.POST.get('conversation_id')
+    if not conversation_id and not request.POST:
+        conversation_id = json.loads(request.body).get('conversation_id')
+    try:
+        conversation_uuid = uuid.UUID(str(conversation_id)) if conversation_id else None
+    except ValueError:
+        logger.warning(f"Invalid conversation ID format: {conversation_id}")
+        conversation_uuid = None
+    
+    conversation = _get_or_create_conversation(request.user, conversation_uuid, ai_tool_id, user_message)
+    ai_tool = conversation.ai_tool
+    
+    # Save the user message before streaming starts
+    Message.objects.create(
+        conversation=conversation,
+        content=user_message,
+        is_user=True
+    )
+    
+    service_config = ai_tool.get_service_config()
+    
+    def save_ai_message(content: str) -> Message:
+        ai_message = Message.objects.create(
+            conversation=conversation,
+            content=content,
+            is_user=False
+        )
+        conversation.updated_at = timezone.now()
+        conversation.save(update_fields=['updated_at'])
+        return ai_message
+    
+    def event_stream() -> Iterator[str]:
+        chunks: List[str] = []
+        saved = False
+        try:
+            yield _sse_event('meta', {
+                'conversation_id': str(conversation.id),
+                'ai_tool_name': ai_tool.name
+            })
+            
+            try:
+                for token in AIService.stream_ai_service(user_message, service_config):
+                    chunks.append(token)
+                    yield _sse_event('token', {'token': token})
+            except Exception as e:
+                logger.error(f"Error while streaming from {ai_tool.api_type}: {str(e)}")
+                if not chunks:
+                    # Nothing was generated: store the error like message_view does
+                    error_message = str(e) if isinstance(e, ProviderError) else f"Exception: {str(e)}"
+                    save_ai_message(error_message)
+                    saved = True
+                    yield _sse_event('error', {'error': error_message})
+                    return
+            
+            ai_message = save_ai_message(''.join(chunks))
+            saved = True
+            yield _sse_event('done', {
+                'message': ai_message.content,
+                'conversation_id': str(conversation.id),
+                'timestamp': ai_message.timestamp.isoformat()
+            })
+        except GeneratorExit:
+            # The client went away mid-stream: keep what was generated so far
+            if chunks and not saved:
+                save_ai_message(''.join(chunks))
+            raise
+    
+    return _sse_response(request, event_stream())
+
+
+def _parse_compare_tools(request: HttpRequest) -> Tuple[List[AITool], Optional[JsonResponse]]:
+    """
+    Get the AI tools selected for a compare-chat request.
+    
+    The tools are sent as repeated ``tool_id`` form fields or as a
+    ``tool_ids`` list in the JSON body.
+    
+    Args:
+        request: The HTTP request object
+        
+    Returns:
+        Tuple of (AI tools, error response). The error response is None when
+        the selection is valid.
+    """
+    if request.POST:
+        tool_ids = request.POST.getlist('tool_id')
+    else:
+        tool_ids = json.loads(request.body).get('tool_ids') or []
+    
+    try:
+        # Keep the order chosen by the user and drop duplicates
+        tool_uuids = list(dict.fromkeys(uuid.UUID(str(tool_id)) for tool_id in tool_ids))
+    except ValueError:
+        tool_uuids = []
+    
+    max_tools = int(getattr(settings, 'AI_COMPARE_MAX_TOOLS', 4))
+    if len(tool_uuids) < 2 or len(tool_uuids) > max_tools:
+        return [], JsonResponse({
+            'errors': {'tool_id': [f'Select between 2 and {max_tools} AI tools to compare.']}
+        }, status=400)
+    
+    tools_by_id = AITool.objects.in_bulk(tool_uuids)
+    if len(tools_by_id) != len(tool_uuids):
+        return [], JsonResponse({
+            'errors': {'tool_id': ['One or more AI tools do not exist.']}
+        }, status=400)
+    return [tools_by_id[tool_id] for tool_id in tool_uuids], None
+
+
+@login_required
+@require_http_methods(["POST"])
+@admission_control
+def compare_chat_stream(request: HttpRequest) -> HttpResponse:
+    """
+    View sending one message to several AI tools and streaming their answers.
+    
+    The tools are asked concurrently and each answer is sent as soon as it
+    arrives, so the response takes as long as the slowest tool. Every tool
+    gets its own conversation holding the message and the tool's answer.
+    The following Server-Sent Events are sent:
+    
+    - ``meta``: the conversation created for each tool, sent immediately
+    - ``result``: the answer of one tool, or its error or timeout
+    - ``done``: all tools answered or timed out
+    
+    Args:
+        request: The HTTP request object
+        
+    Returns:
+        Streaming response with content type text/event-stream
+    """
+    user_message, _, error_response = _parse_message_request(request)
+    if error_response is not None:
+        return error_response
+    tools, error_response = _parse_compare_tools(request)
+    if error_response is not None:
+        return error_response
+    
+    title = user_message[:50] + ('...' if len(user_message) > 50 else '')
+    conversations = {
+        tool.id: Conversation.objects.create(user=request.user, ai_tool=tool, title=title)
+        for tool in tools
+    }
+    with transaction.atomic():
+        Message.objects.bulk_create([
+            Message(conversation=conversation, content=user_message, is_user=True)
+            for conversation in conversations.values()
+        ])
+        # bulk_create bypasses Message.save, which maintains the message stats
+        Conversation.refresh_message_stats(
+            Conversation.objects.filter(pk__in=[conversation.pk for conversation in conversations.values()])
+        )
+    
+    def event_stream() -> Iterator[str]:
+        yield _sse_event('meta', {
+            'conversations': [
+                {
+                    'tool_id': str(tool.id),
+                    'ai_tool_name': tool.name,
+                    'conversation_id': str(conversations[tool.id].id)
+                }
+                for tool in tools
+            ]
+        })
+        
+        succeeded = 0
+        for tool, response, elapsed in fan_out(user_message, tools):
+            if response.get('success', False):
+                succeeded += 1
+                ai_response = response.get('data', 'Sorry, I could not process your request.')
+            else:
+                ai_response = response.get('error', 'Sorry, an error occurred while processing your request.')
+            
+            conversation = conversations[tool.id]
+            ai_message = Message.objects.create(conversation=conversation, content=ai_response, is_user=False)
+            Conversation.objects.filter(pk=conversation.pk).update(updated_at=timezone.now())
+            
+            yield _sse_event('result', {
+                'tool_id': str(tool.id),
+                'ai_tool_name': tool.name,
+                'conversation_id': str(conversation.id),
+                'success': response.get('success', False),
+                'timed_out': response.get('timed_out', False),
+                'message': ai_response,
+                'elapsed': round(elapsed, 3),
+                'timestamp': ai_message.timestamp.isoformat()
+            })
+        
+        yield _sse_event('done', {
+            'succeeded': succeeded,
+            'failed': len(tools) - succeeded
+        })
+    
+    return _sse_response(request, event_stream())
+
+
 @login_required
 def chat_selection(request: HttpRequest) -> HttpResponse:
     """
@@ -401,7 +897,7 @@ def chat_selection(request: HttpRequest) -> HttpResponse:
         Rendered chat selection page
     """
     # Get all AI tools
-    ai_tools = AITool.objects.all().order_by('name')
+    ai_tools = get_catalog_tools()
     
     # Get recent conversations
     recent_conversations = Conversation.objects.filter(
@@ -531,7 +1027,7 @@ def chat_view(request: HttpRequest, ai_id: Optional[uuid.UUID] = None,
         return redirect('interaction:chat_selection')
     
     # Get all AI tools for the tool selector
-    ai_tools = AITool.objects.all().order_by('name')
+    ai_tools = get_catalog_tools()
     
     return render(request, 'interaction/chat.html', {
         'ai_tool': ai_tool,
@@ -544,6 +1040,7 @@ def chat_view(request: HttpRequest, ai_id: Optional[uuid.UUID] = None,
 
 @login_required
 @require_http_methods(["POST"])
+@admission_control
 def send_message(request: HttpRequest, conversation_id: uuid.UUID) -> JsonResponse:
     """
     View for sending a message in an existing conversation.
@@ -559,3 +1056,20 @@ def send_message(request: HttpRequest, conversation_id: uuid.UUID) -> JsonRespon
     """
     # Call the message view with the conversation ID
     return message_view(request, conversation_id)
+
+
+@login_required
+@require_http_methods(["POST"])
+@admission_control
+async def asend_message(request: HttpRequest, conversation_id: uuid.UUID) -> HttpResponse:
+    """
+    Async version of send_message for ASGI deployments.
+    
+    Args:
+        request: The HTTP request object
+        conversation_id: The UUID of the conversation
+        
+    Returns:
+        JSON response with the AI's reply
+    """
+    return await amessage_view(request, conversation_id)
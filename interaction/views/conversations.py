@@ -14,7 +14,7 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse
 from django.views.decorators.http import require_http_methods
 
-from catalog.models import AITool
+from catalog.snapshot import get_catalog_tools
 from core.utils import format_conversation_for_download
 from interaction.models import Conversation
 from interaction.forms import ConversationForm
@@ -80,7 +80,7 @@ def conversation_history(request: HttpRequest) -> HttpResponse:
             page_range_start = max(paginator.num_pages - 4, 1)
     
     # Get all AI tools for the form dropdown
-    ai_tools = AITool.objects.all().order_by('name')
+    ai_tools = get_catalog_tools()
     
     return render(request, 'interaction/conversation_history.html', {
         'conversations': conversations,
@@ -15,6 +15,7 @@ from django.views.decorators.http import require_http_methods
 from django.urls import reverse
 
 from catalog.models import AITool
+from catalog.snapshot import get_catalog_tools
 from interaction.models import FavoritePrompt
 from interaction.forms import FavoritePromptForm
 
@@ -87,7 +88,7 @@ def favorite_prompts(request: HttpRequest, ai_id: Optional[uuid.UUID] = None) ->
             page_range_start = max(paginator.num_pages - 4, 1)
     
     # Get all AI tools for the filter dropdown
-    ai_tools = AITool.objects.all().order_by('name')
+    ai_tools = get_catalog_tools()
     
     return render(request, 'interaction/favorite_prompts.html', {
         'prompts': prompts,
@@ -0,0 +1,115 @@
+"""
+Completion job views for the interaction app.
+
+This module contains the endpoints the browser uses to follow and cancel
+background completion jobs (see interaction.jobs).
+"""
+import asyncio
+import time
+import uuid
+from typing import Any
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.http import Http404, HttpRequest, HttpResponse, JsonResponse
+from django.db.models.query import QuerySet
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_http_methods
+
+from interaction import jobs
+from interaction.models import CompletionJob
+
+
+def _wait_seconds(request: HttpRequest) -> float:
+    """
+    Read the long-poll duration requested with the ``wait`` query parameter.
+
+    Args:
+        request: The HTTP request object
+
+    Returns:
+        Seconds to wait for the job, capped at AI_JOB_LONG_POLL_TIMEOUT
+    """
+    try:
+        wait = float(request.GET.get('wait', 0))
+    except ValueError:
+        wait = 0.0
+    return min(max(wait, 0.0), float(getattr(settings, 'AI_JOB_LONG_POLL_TIMEOUT', 25)))
+
+
+def _user_jobs(user: Any) -> 'QuerySet[CompletionJob]':
+    """Jobs of a user, with everything job_payload needs loaded."""
+    return CompletionJob.objects.select_related('conversation__ai_tool', 'ai_message').filter(user=user)
+
+
+@login_required
+@require_http_methods(["GET"])
+def completion_job(request: HttpRequest, job_id: uuid.UUID) -> JsonResponse:
+    """
+    View returning the state of a completion job.
+
+    With ``?wait=<seconds>`` the request is held until the job finishes or
+    the wait expires (long polling).
+
+    Args:
+        request: The HTTP request object
+        job_id: The UUID of the job
+
+    Returns:
+        JSON description of the job, including the AI's reply once finished
+    """
+    job = get_object_or_404(_user_jobs(request.user), id=job_id)
+    wait = _wait_seconds(request)
+    if wait and not job.is_finished:
+        job = jobs.wait_for_job(job, wait)
+        job = _user_jobs(request.user).get(id=job_id)
+    return JsonResponse(jobs.job_payload(job))
+
+
+@login_required
+@require_http_methods(["GET"])
+async def acompletion_job(request: HttpRequest, job_id: uuid.UUID) -> HttpResponse:
+    """
+    Async version of completion_job for ASGI deployments.
+
+    Long polls wait on the event loop instead of holding a worker thread.
+
+    Args:
+        request: The HTTP request object
+        job_id: The UUID of the job
+
+    Returns:
+        JSON description of the job, including the AI's reply once finished
+    """
+    user = await request.auser()
+    queryset = _user_jobs(user)
+    try:
+        job = await queryset.aget(id=job_id)
+    except CompletionJob.DoesNotExist:
+        raise Http404("No completion job matches the given query.")
+
+    interval = float(getattr(settings, 'AI_JOB_POLL_INTERVAL', 0.5))
+    deadline = time.monotonic() + _wait_seconds(request)
+    while not job.is_finished and time.monotonic() < deadline:
+        await asyncio.sleep(min(interval, max(deadline - time.monotonic(), 0)))
+        job = await queryset.aget(id=job_id)
+    return JsonResponse(jobs.job_payload(job))
+
+
+@login_required
+@require_http_methods(["POST"])
+def cancel_completion_job(request: HttpRequest, job_id: uuid.UUID) -> JsonResponse:
+    """
+    View cancelling a completion job that has not finished yet.
+
+    Args:
+        request: The HTTP request object
+        job_id: The UUID of the job
+
+    Returns:
+        JSON description of the job, with status 409 if it had already finished
+    """
+    job = get_object_or_404(_user_jobs(request.user), id=job_id)
+    cancelled = jobs.cancel_job(job)
+    job = _user_jobs(request.user).get(id=job_id)
+    return JsonResponse(jobs.job_payload(job), status=200 if cancelled else 409)
@@ -0,0 +1,50 @@
+"""
+Tests for the warm-up of the per-process caches by the server hooks.
+"""
+import asyncio
+import importlib
+from unittest import mock
+
+from inspireIA import asgi, startup
+
+
+def _lifespan(*messages):
+    """Run the ASGI lifespan protocol and return the messages sent back."""
+    received = list(messages)
+    sent = []
+
+    async def receive():
+        return received.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(asgi.application({'type': 'lifespan'}, receive, send))
+    return [message['type'] for message in sent]
+
+
+def test_importing_the_application_does_not_warm_up():
+    with mock.patch('catalog.autocomplete.autocomplete_index.warm_up') as warm_up:
+        from inspireIA import wsgi
+
+        importlib.reload(wsgi)
+        importlib.reload(asgi)
+
+    warm_up.assert_not_called()
+
+
+def test_lifespan_startup_warms_up():
+    with mock.patch('catalog.autocomplete.autocomplete_index.warm_up') as warm_up:
+        sent = _lifespan({'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'})
+
+    warm_up.assert_called_once_with()
+    assert sent == ['lifespan.startup.complete', 'lifespan.shutdown.complete']
+
+
+def test_failed_warm_up_does_not_stop_the_server():
+    with mock.patch('catalog.autocomplete.autocomplete_index.warm_up', side_effect=RuntimeError('database down')), \
+            mock.patch.object(startup, 'connections') as connections:
+        sent = _lifespan({'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'})
+
+    assert sent == ['lifespan.startup.complete', 'lifespan.shutdown.complete']
+    connections.close_all.assert_called_once_with()
@@ -9,6 +9,7 @@ from django.contrib.auth import update_session_auth_hash
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import PasswordChangeForm
 from django.contrib import messages
+from django.db.models import Sum
 from django.http import HttpRequest, HttpResponse
 from django.shortcuts import render, redirect
 from django.views.decorators.http import require_http_methods
@@ -73,9 +74,9 @@ def dashboard(request: HttpRequest) -> HttpResponse:
     
     # Get conversation statistics
     total_conversations = Conversation.objects.filter(user=user).count()
-    total_messages = sum(
-        c.message_set.count() for c in Conversation.objects.filter(user=user)
-    )
+    total_messages = Conversation.objects.filter(user=user).aggregate(
+        total=Sum('message_count')
+    )['total'] or 0
     
     # Get most used AI tool
     most_used_tool = None